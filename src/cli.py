@@ -12,7 +12,20 @@ def parse_arguments():
     parser.add_argument("--pos_start", default=config.POSITIONS_START_FILE_PATH, help="Path to start of year positions CSV file.")
     parser.add_argument("--pos_end", default=config.POSITIONS_END_FILE_PATH, help="Path to end of year positions CSV file.")
     parser.add_argument("--corp_actions", default=config.CORPORATE_ACTIONS_FILE_PATH, help="Path to corporate actions CSV file.")
+    parser.add_argument("--streaming-ingestion", action=argparse.BooleanOptionalAction, default=config.STREAMING_CSV_INGESTION, help="Stream trades, cash transactions and corporate actions from their CSV files instead of loading them into memory.")
+    parser.add_argument("--fast-row-decoding", action=argparse.BooleanOptionalAction, default=config.FAST_CSV_ROW_DECODING, help="Decode trade and cash transaction rows without pydantic validation (identical records, faster on large exports).")
+    parser.add_argument("--parallel-parsing", action=argparse.BooleanOptionalAction, default=config.PARALLEL_CSV_PARSING, help="Parse the input CSV files concurrently in a process pool. Per-file parse timings are logged.")
+    parser.add_argument("--snapshot", dest="use_snapshot", action=argparse.BooleanOptionalAction, default=config.USE_PIPELINE_SNAPSHOT, help="Reuse the parsed and enriched events from the last run if no input file or setting changed (saved to the pipeline snapshot file).")
+    parser.add_argument("--parallel-fifo", action=argparse.BooleanOptionalAction, default=config.PARALLEL_FIFO_PROCESSING, help="Process the FIFO ledgers of independent assets in a process pool (identical results).")
+    parser.add_argument("--ledger-state-in", dest="soy_ledger_state_file_path", metavar="PATH", default=config.SOY_LEDGER_STATE_FILE_PATH, help="Seed the FIFO ledgers from the previous tax year's exported end-of-year ledger state instead of replaying the history. Checked against the start-of-year positions.")
+    parser.add_argument("--ledger-state-out", dest="eoy_ledger_state_file_path", metavar="PATH", default=config.EOY_LEDGER_STATE_FILE_PATH, help="Export the end-of-year FIFO ledger state (open lots with cost basis) for seeding the next tax year.")
+    parser.add_argument("--profile", action=argparse.BooleanOptionalAction, default=config.PIPELINE_PROFILING, help="Print the time, item count and peak memory of every pipeline stage at the end of the run.")
+    parser.add_argument("--profile-out", metavar="PATH", default=config.PIPELINE_PROFILE_FILE_PATH, help="Write the per-stage pipeline profile as JSON to PATH (implies --profile).")
     
+    # Exchange rates
+    parser.add_argument("--rates-source", choices=["ecb_api", "ecb_bundle"], default=config.EXCHANGE_RATE_SOURCE, help="Exchange rate source: ECB data API or an offline ECB historical rate file.")
+    parser.add_argument("--ecb-bundle", default=config.ECB_HISTORICAL_BUNDLE_FILE_PATH, help="Path to the ECB historical rate file (eurofxref-hist.csv or .zip) used with --rates-source ecb_bundle.")
+
     # Operational modes
     parser.add_argument("--interactive", action="store_true", default=None, help="Enable interactive asset classification. Overrides config if set.")
     parser.add_argument("--no-interactive", dest="interactive", action="store_false", help="Disable interactive asset classification. Overrides config if set.")
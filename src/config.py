@@ -1,6 +1,7 @@
 # src/config.py
 
 from decimal import Decimal # Added for Decimal type hint
+from typing import Optional
 
 # File paths for IBKR Flex Query reports
 """ TRADES_FILE_PATH = "data/trades_2023.csv"
@@ -50,6 +51,54 @@ OUTPUT_PRECISION_AMOUNTS: Decimal = Decimal("0.01") # Renamed from PRECISION_TOT
 OUTPUT_PRECISION_PER_SHARE: Decimal = Decimal("0.000001") # Renamed from PRECISION_PER_SHARE_AMOUNTS
 PRECISION_QUANTITY: Decimal = Decimal("0.00000001") # Example for quantities, used in FifoLot
 
+# Exchange rate source: "ecb_api" (ECB data API with local JSON cache) or
+# "ecb_bundle" (offline, from the ECB historical reference-rate file eurofxref-hist.csv/.zip)
+EXCHANGE_RATE_SOURCE = "ecb_api"
+ECB_HISTORICAL_BUNDLE_FILE_PATH = "data/eurofxref-hist.zip"
+# Binary snapshot of the parsed bundle for fast reloads (None to disable)
+ECB_HISTORICAL_SNAPSHOT_FILE_PATH = "cache/ecb_eurofxref_hist.snapshot"
+
+# Stream trades, cash transactions and corporate actions from their CSV files instead of loading
+# them into memory (two passes per file; lowers peak memory on very large exports)
+STREAMING_CSV_INGESTION = False
+
+# Decode trade and cash transaction rows with the pydantic-free row decoder (same records as the
+# pydantic raw models, which remain the reference implementation)
+FAST_CSV_ROW_DECODING = False
+
+# Parse the input CSV files concurrently in a process pool (asset resolution stays sequential)
+PARALLEL_CSV_PARSING = False
+
+# Snapshot of the parsed and enriched events (and assets) for instant re-runs. The snapshot is
+# keyed by the input file contents, the relevant settings and the source code; any change
+# invalidates it.
+USE_PIPELINE_SNAPSHOT = False
+PIPELINE_SNAPSHOT_FILE_PATH = "cache/pipeline.snapshot"
+
+# FIFO ledger state carried between tax years: the open lots at the end of a tax year are exported
+# to EOY_LEDGER_STATE_FILE_PATH, and a run for the following year seeds its ledgers from
+# SOY_LEDGER_STATE_FILE_PATH instead of replaying the history (None to disable either)
+SOY_LEDGER_STATE_FILE_PATH: Optional[str] = None
+EOY_LEDGER_STATE_FILE_PATH: Optional[str] = None
+
+# Process the current tax year events of independent groups of assets (linked by options,
+# option exercises/assignments and stock mergers) in a process pool. Results are identical.
+PARALLEL_FIFO_PROCESSING = False
+
+# Validation of FIFO lots created by the ledgers: "strict" (value checks and total vs. quantity *
+# unit value consistency on every lot, including partial lots) or "fast" (skipped; the ledger
+# arithmetic produces consistent lots, lots loaded from a carried ledger state are always checked)
+FIFO_LOT_VALIDATION_MODE = "strict"
+
+# Per-stage profile of a run (time, item counts, peak memory): printed as a table with
+# PIPELINE_PROFILING, written as JSON to PIPELINE_PROFILE_FILE_PATH if set (which implies profiling)
+PIPELINE_PROFILING = False
+PIPELINE_PROFILE_FILE_PATH: Optional[str] = None
+
+# Withholding tax linking: "greedy" (each WHT line takes its best candidate) or
+# "optimal" (one-to-one assignment maximizing the total link confidence)
+WHT_LINKING_ASSIGNMENT_MODE = "greedy"
+
 # Fallback days for ECB exchange rates (Example, used by ECBExchangeRateProvider if not overridden)
 MAX_FALLBACK_DAYS_EXCHANGE_RATES = 7
 # Currency code mapping for ECB (Example)
@@ -1,10 +1,12 @@
 # src/domain/events.py
 from dataclasses import dataclass, field, KW_ONLY
+from datetime import date
 from decimal import Decimal
 import uuid
-from typing import Optional
+from typing import Any, Optional, Tuple
 
 from .enums import FinancialEventType
+from src.utils.type_utils import parse_ibkr_date
 # Removed AssetCategory, InvestmentFundType, TaxReportingCategory imports as they are not directly used in event fields
 # Asset information will be linked via asset_internal_id, and classification is on the Asset object itself.
 
@@ -32,6 +34,37 @@ class FinancialEvent:
     ibkr_activity_description: Optional[str] = None # From Cash Transactions "Description" or Trades "Description"
     ibkr_notes_codes: Optional[str] = None # From Trades "Notes/Codes" column
 
+    # Typed companion of event_date (see event_date_obj). Remembers which event_date string it was
+    # parsed from, so reassigning event_date never leaves a stale date behind.
+    _event_date_obj: Optional[date] = field(default=None, init=False, repr=False, compare=False)
+    _event_date_obj_source: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    # Deterministic sort key (see sorting_utils.get_event_sort_key), computed once by ParsingOrchestrator
+    # and reused by the calculation engine. Tied to event_date the same way as _event_date_obj.
+    _sort_key: Optional[Tuple[date, Tuple[Any, ...]]] = field(default=None, init=False, repr=False, compare=False)
+    _sort_key_source: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def event_date_obj(self) -> Optional[date]:
+        """event_date as datetime.date (None if unparseable). Set by DomainEventFactory, otherwise parsed on first use."""
+        if self._event_date_obj_source is not self.event_date:
+            self.set_event_date_obj(parse_ibkr_date(self.event_date))
+        return self._event_date_obj
+
+    def set_event_date_obj(self, event_date_obj: Optional[date]):
+        """Stores the already parsed date for the current event_date string."""
+        self._event_date_obj = event_date_obj
+        self._event_date_obj_source = self.event_date
+
+    @property
+    def cached_sort_key(self) -> Optional[Tuple[date, Tuple[Any, ...]]]:
+        """Sort key stored by set_sort_key, or None if none was stored for the current event_date."""
+        return self._sort_key if self._sort_key_source is self.event_date else None
+
+    def set_sort_key(self, sort_key: Tuple[date, Tuple[Any, ...]]):
+        """Caches the sort key computed for this event."""
+        self._sort_key = sort_key
+        self._sort_key_source = self.event_date
+
     def __post_init__(self):
         if not isinstance(self.event_type, FinancialEventType):
             raise TypeError(f"FinancialEvent.event_type must be a FinancialEventType enum member, got {type(self.event_type)}")
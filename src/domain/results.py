@@ -1,22 +1,106 @@
 # src/domain/results.py
 from dataclasses import dataclass, field, KW_ONLY
-from decimal import Decimal
+from datetime import date
+from decimal import Decimal, Context
 import uuid
-from typing import Optional, Dict 
+from typing import Optional, Dict, List, Tuple
 from collections import defaultdict
 
 import logging 
 
 from .enums import AssetCategory, TaxReportingCategory, InvestmentFundType, RealizationType
 from src.utils.tax_utils import get_teilfreistellung_rate_for_fund_type
+from src.utils.type_utils import parse_ibkr_date
 from src import config as global_config
 
 logger = logging.getLogger(__name__)
 
 
+# Lines of the subtotal table that are not form lines themselves: the components the reports break
+# the form lines down into. Losses and paid amounts are recorded as absolute values, like their form line.
+SUBTOTAL_INTEREST_RECEIVED = "KAP_COMPONENT_INTEREST_RECEIVED"
+SUBTOTAL_STOCK_CASH_DIVIDENDS = "KAP_COMPONENT_STOCK_CASH_DIVIDENDS"
+SUBTOTAL_STOCK_DIVIDENDS_IN_SHARES = "KAP_COMPONENT_STOCK_DIVIDENDS_IN_SHARES"
+SUBTOTAL_BOND_GAINS = "KAP_COMPONENT_BOND_GAINS"
+SUBTOTAL_BOND_LOSSES = "KAP_COMPONENT_BOND_LOSSES"
+SUBTOTAL_STUECKZINSEN_PAID = "KAP_COMPONENT_STUECKZINSEN_PAID"
+SUBTOTAL_WHT_TAXED_INCOME = "WHT_TAXED_INCOME" # Gross income of the linked income events, under the WHT's country
+# Withholding tax amounts by link status (counts give the linking statistics)
+SUBTOTAL_WHT_LINKED_HIGH_CONFIDENCE = "WHT_LINKED_HIGH_CONFIDENCE" # Score >= 80
+SUBTOTAL_WHT_LINKED_MEDIUM_CONFIDENCE = "WHT_LINKED_MEDIUM_CONFIDENCE" # Score 60-79
+SUBTOTAL_WHT_LINKED_LOW_CONFIDENCE = "WHT_LINKED_LOW_CONFIDENCE"
+SUBTOTAL_WHT_UNLINKED = "WHT_UNLINKED"
+
+SubtotalLine = TaxReportingCategory | str
+SubtotalKey = Tuple[SubtotalLine, Optional[uuid.UUID], Optional[int], Optional[str]]
+
+
+class ReportingSubtotals:
+    """
+    Subtotal table of the loss offsetting aggregation, keyed by (form line, asset, month, country).
+    Month (1-12) is that of the event or realization date, country the source country of withholding
+    tax; both are None where they do not apply. Line totals are kept while adding. Roll-ups of a line
+    by asset, month or country are built on first use and cached, so reports read them in time
+    independent of the number of events.
+    """
+    _DIMENSIONS = {"asset": 1, "month": 2, "country": 3}
+
+    def __init__(self, ctx: Optional[Context] = None):
+        self.ctx = ctx or Context(prec=global_config.INTERNAL_CALCULATION_PRECISION, rounding=global_config.DECIMAL_ROUNDING_MODE)
+        self.amounts: Dict[SubtotalKey, Decimal] = {}
+        self.counts: Dict[SubtotalKey, int] = {}
+        self._keys_by_line: Dict[SubtotalLine, List[SubtotalKey]] = {}
+        self._line_totals: Dict[SubtotalLine, Decimal] = {}
+        self._line_counts: Dict[SubtotalLine, int] = {}
+        self._rollups: Dict[Tuple[SubtotalLine, str], Dict] = {}
+
+    def add(self, line: SubtotalLine, amount: Decimal, asset_id: Optional[uuid.UUID] = None,
+            month: Optional[int] = None, country: Optional[str] = None):
+        key = (line, asset_id, month, country)
+        current = self.amounts.get(key)
+        if current is None:
+            self._keys_by_line.setdefault(line, []).append(key)
+            self.amounts[key] = self.ctx.add(Decimal(0), amount)
+            self.counts[key] = 1
+        else:
+            self.amounts[key] = self.ctx.add(current, amount)
+            self.counts[key] += 1
+        self._line_totals[line] = self.ctx.add(self._line_totals.get(line, Decimal(0)), amount)
+        self._line_counts[line] = self._line_counts.get(line, 0) + 1
+        if self._rollups:
+            self._rollups = {cache_key: rollup for cache_key, rollup in self._rollups.items() if cache_key[0] != line}
+
+    def total(self, line: SubtotalLine) -> Decimal:
+        return self._line_totals.get(line, Decimal(0))
+
+    def count(self, line: SubtotalLine) -> int:
+        """Number of amounts (events or realizations) recorded under line."""
+        return self._line_counts.get(line, 0)
+
+    def by_asset(self, line: SubtotalLine) -> Dict[Optional[uuid.UUID], Decimal]:
+        return self._rollup(line, "asset")
+
+    def by_month(self, line: SubtotalLine) -> Dict[Optional[int], Decimal]:
+        return self._rollup(line, "month")
+
+    def by_country(self, line: SubtotalLine) -> Dict[Optional[str], Decimal]:
+        return self._rollup(line, "country")
+
+    def _rollup(self, line: SubtotalLine, dimension: str) -> Dict:
+        rollup = self._rollups.get((line, dimension))
+        if rollup is None:
+            position = self._DIMENSIONS[dimension]
+            rollup = {}
+            for key in self._keys_by_line.get(line, []):
+                rollup[key[position]] = self.ctx.add(rollup.get(key[position], Decimal(0)), self.amounts[key])
+            self._rollups[(line, dimension)] = rollup
+        return rollup
+
+
 @dataclass
 class LossOffsettingResult:
     form_line_values: Dict[TaxReportingCategory | str, Decimal] = field(default_factory=lambda: defaultdict(Decimal))
+    subtotals: ReportingSubtotals = field(default_factory=ReportingSubtotals, repr=False, compare=False)
     conceptual_net_stocks: Decimal = Decimal('0')
     conceptual_net_other_income: Decimal = Decimal('0') 
     conceptual_net_derivatives_uncapped: Decimal = Decimal('0')
@@ -58,7 +142,15 @@ class RealizedGainLoss:
 
     is_stillhalter_income: bool = False 
 
+    # Typed companions of acquisition_date / realization_date (carried over from the lot and event; parsed if not given)
+    acquisition_date_obj: Optional[date] = field(default=None, repr=False, compare=False)
+    realization_date_obj: Optional[date] = field(default=None, repr=False, compare=False)
+
     def __post_init__(self):
+        if self.acquisition_date_obj is None:
+            self.acquisition_date_obj = parse_ibkr_date(self.acquisition_date)
+        if self.realization_date_obj is None:
+            self.realization_date_obj = parse_ibkr_date(self.realization_date)
         if not isinstance(self.asset_category_at_realization, AssetCategory):
             raise TypeError(f"RealizedGainLoss.asset_category_at_realization must be an AssetCategory, got {type(self.asset_category_at_realization)}")
         if not isinstance(self.realization_type, RealizationType):
@@ -1,5 +1,6 @@
 # src/engine/calculation_engine.py
 import logging
+import time
 from typing import List, Tuple, Dict, DefaultDict, Optional, Any
 import uuid
 from decimal import Decimal, getcontext, Context
@@ -17,13 +18,16 @@ from src.domain.assets import Asset, Stock, Bond, AssetCategory, Option, Investm
 from src.identification.asset_resolver import AssetResolver
 from src.domain.results import RealizedGainLoss, VorabpauschaleData
 from src.domain.enums import FinancialEventType, InvestmentFundType 
-from src.utils.sorting_utils import get_event_sort_key
+from src.utils.sorting_utils import get_cached_event_sort_key
 from src.utils.type_utils import parse_ibkr_date
 
-from .fifo_manager import FifoLedger
+from .ledger_registry import FifoLedgerRegistry
+from .ledger_state import CarriedLedgerState, export_eoy_ledger_state
+from .parallel_fifo import process_events_by_asset_component
 from src.utils.currency_converter import CurrencyConverter
 from src.utils.exchange_rate_provider import ECBExchangeRateProvider
 import src.config as config
+from src.pipeline_profiler import active_profiler, profile_stage
 
 # Import the event processors
 from .event_processors.base_processor import EventProcessor
@@ -39,6 +43,23 @@ from .event_processors.option_processor import (
 
 logger = logging.getLogger(__name__)
 
+# Event types that act on the FIFO ledger of their asset (processed by an event processor, or
+# reducing the cost basis). Other income events never cause a ledger to be built.
+LEDGER_EVENT_TYPES = frozenset({
+    FinancialEventType.TRADE_BUY_LONG, FinancialEventType.TRADE_SELL_LONG,
+    FinancialEventType.TRADE_SELL_SHORT_OPEN, FinancialEventType.TRADE_BUY_SHORT_COVER,
+    FinancialEventType.CORP_SPLIT_FORWARD, FinancialEventType.CORP_MERGER_CASH,
+    FinancialEventType.CORP_STOCK_DIVIDEND, FinancialEventType.CORP_MERGER_STOCK,
+    FinancialEventType.CORP_EXPIRE_DIVIDEND_RIGHTS, FinancialEventType.OPTION_EXERCISE,
+    FinancialEventType.OPTION_ASSIGNMENT, FinancialEventType.OPTION_EXPIRATION_WORTHLESS,
+    FinancialEventType.CAPITAL_REPAYMENT,
+})
+
+
+def event_needs_ledger(event: FinancialEvent) -> bool:
+    return event.event_type in LEDGER_EVENT_TYPES or isinstance(event, CorporateActionEvent)
+
+
 def _format_asset_info(asset_obj) -> str:
     """Helper to format asset information for logging."""
     if not asset_obj:
@@ -54,16 +75,24 @@ def run_main_calculations(
     exchange_rate_provider: ECBExchangeRateProvider,
     tax_year: int,
     internal_calculation_precision: int, # Renamed from internal_working_precision
-    decimal_rounding_mode: str
+    decimal_rounding_mode: str,
+    carried_ledger_state: Optional[Dict[str, CarriedLedgerState]] = None,
+    eoy_ledger_state_file_path: Optional[str] = None,
+    parallel_fifo: bool = False
 ) -> Tuple[List[RealizedGainLoss], List[VorabpauschaleData], List[FinancialEvent], int]: 
     """
     Runs the main calculation logic:
     1. Separates historical and current year events.
-    2. Initializes FIFO ledgers based on SOY positions and historical trades.
-    3. Processes current year events chronologically using dedicated processors.
+    2. Initializes FIFO ledgers based on SOY positions and historical trades, or seeds them from the
+       previous year's carried EOY ledger state (carried_ledger_state, by asset classification key).
+       Ledgers whose carried state diverges from the SOY positions are rebuilt from history.
+       Ledgers are only built for assets a current year event or the EOY validation needs.
+    3. Processes current year events chronologically using dedicated processors. With parallel_fifo,
+       independent groups of assets are processed in worker processes (same results).
     4. Performs EOY quantity validation (logs errors but does not halt).
     5. Calculates Vorabpauschale (currently placeholder).
     6. Returns calculated results (Realized G/L, Vorabpauschale), processed events, and EOY mismatch count.
+    If eoy_ledger_state_file_path is given, the EOY ledger state is exported there for the next tax year.
     """
     logger.info(f"Starting main calculation engine for tax year {tax_year} with {len(financial_events)} events.")
     ctx = Context(prec=internal_calculation_precision, rounding=decimal_rounding_mode) # Renamed internal_working_precision
@@ -92,7 +121,7 @@ def run_main_calculations(
     filtered_events_count = 0
     for event in financial_events:
         try:
-            event_sort_key = get_event_sort_key(event, asset_resolver)
+            event_sort_key = get_cached_event_sort_key(event, asset_resolver) # Cached by ParsingOrchestrator
             event_date_obj = event_sort_key[0] 
         except ValueError as e:
             logger.error(f"Event {event.event_id} has invalid date or identifier ({e}). Cannot process.")
@@ -113,52 +142,128 @@ def run_main_calculations(
     logger.info(f"Separated events: {sum(len(v) for v in historical_events_by_asset.values())} relevant historical events for SOY FIFO reconstruction, "
                 f"{len(current_year_events)} current tax year events.")
 
-    fifo_ledgers: Dict[uuid.UUID, FifoLedger] = {}
-
-    logger.info("Initializing FIFO ledgers from Start-of-Year positions and historical data...")
-    for asset_id, asset_obj in asset_resolver.assets_by_internal_id.items():
-        if asset_obj.asset_category != AssetCategory.CASH_BALANCE:
-            asset_multiplier_val: Optional[Decimal] = None
-            asset_fund_type: Optional[InvestmentFundType] = None
-
-            if isinstance(asset_obj, Option):
-                asset_multiplier_val = asset_obj.multiplier
-            elif isinstance(asset_obj, InvestmentFund):
-                asset_fund_type = asset_obj.fund_type
-            
-            ledger = FifoLedger(
-                asset_internal_id=asset_id, asset_category=asset_obj.asset_category,
-                asset_multiplier_from_asset=asset_multiplier_val,
-                currency_converter=currency_converter, exchange_rate_provider=exchange_rate_provider,
-                internal_working_precision=internal_calculation_precision, # Pass renamed variable
-                decimal_rounding_mode=decimal_rounding_mode,
-                fund_type=asset_fund_type 
+    fifo_ledgers = FifoLedgerRegistry(
+        asset_resolver, historical_events_by_asset, currency_converter, exchange_rate_provider, tax_year,
+        internal_calculation_precision, decimal_rounding_mode, carried_ledger_state=carried_ledger_state
+    )
+    carried_state_unknown_assets = 0
+    if carried_ledger_state is not None:
+        known_keys = set()
+        for asset_obj in asset_resolver.assets_by_internal_id.values():
+            try:
+                known_keys.add(asset_obj.get_classification_key())
+            except ValueError:
+                continue
+        for classification_key in sorted(set(carried_ledger_state) - known_keys):
+            logger.warning(f"Carried EOY ledger state has an open position for {classification_key} (Net Qty: "
+                           f"{carried_ledger_state[classification_key].net_quantity}), but the asset is not in the data for tax year {tax_year}.")
+            carried_state_unknown_assets += 1
+
+    logger.info("FIFO ledgers are initialized from Start-of-Year positions and historical data on first use.")
+
+    with profile_stage("Event processing") as stage:
+        realized_gains_losses_by_event = None
+        if parallel_fifo:
+            realized_gains_losses_by_event = process_events_by_asset_component(
+                current_year_events, fifo_ledgers, asset_resolver, currency_converter, pending_option_adjustments
             )
-            
-            asset_historical_events_for_soy_init = []
-            if asset_id in historical_events_by_asset:
-                try:
-                    sort_key_func = lambda e: get_event_sort_key(e, asset_resolver)
-                    asset_historical_events_for_soy_init = sorted(
-                        historical_events_by_asset[asset_id], key=sort_key_func
-                    )
-                except ValueError as e:
-                    logger.critical(f"Fatal error sorting historical events for asset {asset_obj.get_classification_key()} (ID: {asset_id}): {e}. Cannot guarantee deterministic order for FIFO init. Aborting.")
-                    raise e
+        if realized_gains_losses_by_event is None:
+            realized_gains_losses_by_event, _ = process_current_year_events(
+                current_year_events, fifo_ledgers, asset_resolver, currency_converter, pending_option_adjustments
+            )
+        stage.count(len(current_year_events))
+    for _, new_rgls in realized_gains_losses_by_event:
+        realized_gains_losses.extend(new_rgls)
+    logger.info("Finished processing current year events.")
+    logger.info(f"Pending option adjustments stored: {len(pending_option_adjustments)}")
+
 
+    logger.info("Performing End-of-Year (EOY) quantity validation...")
+    eoy_mismatch_errors = 0 
+    with profile_stage("EOY validation") as stage:
+        stage.count(len(asset_resolver.assets_by_internal_id))
+        for asset_id, asset_obj in asset_resolver.assets_by_internal_id.items():
+            if asset_obj.asset_category == AssetCategory.CASH_BALANCE:
+                continue
+
+            ledger = fifo_ledgers.ledger_for_eoy_validation(asset_id)
+            calculated_eoy_qty: Decimal
+
+            if ledger:
+                calculated_eoy_qty = ledger.get_current_position_quantity()
+            else:
+                calculated_eoy_qty = Decimal(0)
+                if asset_obj.soy_quantity is not None and asset_obj.soy_quantity != Decimal(0): # Renamed
+                    logger.warning(f"EOY Validation: Asset {asset_obj.get_classification_key()} had SOY qty {asset_obj.soy_quantity} but no ledger found at EOY. Calculated EOY assumed 0.") # Renamed
+
+            reported_eoy_qty = asset_obj.eoy_quantity
             try:
-                ledger.initialize_lots_from_soy(
-                    asset=asset_obj,
-                    all_historical_events_for_asset=asset_historical_events_for_soy_init, 
-                    tax_year=tax_year
+                tolerance_exponent = -(ctx.prec // 2)
+                comparison_tolerance = Decimal('1e' + str(tolerance_exponent))
+            except Exception:
+                logger.warning(f"Could not calculate dynamic tolerance from precision {ctx.prec}. Using fixed tolerance 1e-8.")
+                comparison_tolerance = Decimal('1e-8')
+
+            if reported_eoy_qty is not None:
+                if abs(calculated_eoy_qty - reported_eoy_qty) > comparison_tolerance:
+                    logger.error(
+                        f"CRITICAL EOY MISMATCH for {asset_obj.description or asset_obj.get_classification_key()} (ID: {asset_id}): "
+                        f"Calculated EOY Qty: {calculated_eoy_qty}, Reported EOY Qty (from file): {reported_eoy_qty}. "
+                        f"Difference: {calculated_eoy_qty - reported_eoy_qty}"
+                    )
+                    eoy_mismatch_errors += 1
+            elif abs(calculated_eoy_qty) > comparison_tolerance: 
+                logger.error( 
+                    f"EOY MISMATCH for {asset_obj.description or asset_obj.get_classification_key()} (ID: {asset_id}): "
+                    f"Calculated EOY Qty: {calculated_eoy_qty}, but asset NOT found in EOY positions report (implying reported EOY Qty is 0)."
                 )
-            except ValueError as e:
-                logger.critical(f"Fatal error initializing FIFO lots from SOY for asset {asset_obj.get_classification_key()} (ID: {asset_id}): {e}. Aborting.")
-                raise e 
+                eoy_mismatch_errors += 1 
+
+    non_cash_asset_count = len(asset_resolver.assets_by_internal_id) - len(asset_resolver.assets_by_category.get(AssetCategory.CASH_BALANCE, {}))
+    logger.info(f"Materialized {len(fifo_ledgers)} FIFO ledgers. Skipped {non_cash_asset_count - len(fifo_ledgers)} assets "
+                f"without SOY position, history or current year activity.")
+    if carried_ledger_state is not None:
+        logger.info(f"Seeded {fifo_ledgers.seeded_ledger_count} FIFO ledgers from the carried EOY ledger state, "
+                    f"{len(fifo_ledgers) - fifo_ledgers.seeded_ledger_count} from historical data.")
+        carried_state_divergences = fifo_ledgers.carried_state_divergences + carried_state_unknown_assets
+        if carried_state_divergences > 0:
+            logger.error(f"Carried EOY ledger state diverges from the SOY positions for {carried_state_divergences} assets. "
+                         f"Those ledgers were rebuilt from historical data and the SOY positions.")
+
+    if eoy_mismatch_errors > 0:
+        logger.error(f"EOY Quantity Validation FAILED with {eoy_mismatch_errors} critical mismatches. Processing will continue, but results may be inaccurate.")
+    else:
+        logger.info("EOY Quantity Validation passed or no critical mismatches found against reported EOY positions.")
+
+    if eoy_ledger_state_file_path:
+        with profile_stage("EOY ledger state export"):
+            export_eoy_ledger_state(fifo_ledgers, asset_resolver.assets_by_internal_id, tax_year, eoy_ledger_state_file_path)
 
-            fifo_ledgers[asset_id] = ledger
+    logger.info("Vorabpauschale calculation skipped (result is €0 for tax year 2023).")
+
+    processed_income_events_for_output: List[FinancialEvent] = list(current_year_events)
+
+    logger.info(f"Calculation engine finished. Produced {len(realized_gains_losses)} RealizedGainLoss records.")
+    logger.info(f"Calculation engine produced {len(vorabpauschale_data_items)} VorabpauschaleData records (expected 0 for 2023).")
+
+    return realized_gains_losses, vorabpauschale_data_items, processed_income_events_for_output, eoy_mismatch_errors
 
-    logger.info(f"Initialized {len(fifo_ledgers)} FIFO ledgers.")
+
+def process_current_year_events(
+    current_year_events: List[FinancialEvent],
+    fifo_ledgers: FifoLedgerRegistry,
+    asset_resolver: AssetResolver,
+    currency_converter: CurrencyConverter,
+    pending_option_adjustments: Dict[uuid.UUID, Tuple[Decimal, uuid.UUID, str]]
+) -> Tuple[List[Tuple[int, List[RealizedGainLoss]]], List[Tuple[int, FinancialEvent]]]:
+    """
+    Dispatches current tax year events (in list order) to their event processors.
+    Returns the RealizedGainLoss records per event as (event index, records) and the events spawned
+    while processing (excess dividends of capital repayments) as (index of the originating event, event).
+    Spawned events are also appended to current_year_events, as before.
+    """
+    realized_gains_losses_by_event: List[Tuple[int, List[RealizedGainLoss]]] = []
+    spawned_events: List[Tuple[int, FinancialEvent]] = []
 
     logger.info("Initializing event processors...")
     trade_processor = TradeProcessor()
@@ -188,14 +293,16 @@ def run_main_calculations(
     }
 
     logger.info(f"Processing {len(current_year_events)} current tax year events using dispatch table...")
+    profiler = active_profiler() # None unless profiling; the per-event timing below is skipped then
     for event_idx, event in enumerate(current_year_events):
         asset_object = asset_resolver.get_asset_by_id(event.asset_internal_id)
         if not asset_object:
             logger.error(f"Event {event.event_id} ({event.event_type.name}) references unknown asset {event.asset_internal_id}. Skipping processing.")
             continue
 
-        ledger = fifo_ledgers.get(asset_object.internal_asset_id)
         processor = event_processor_map.get(event.event_type)
+        needs_ledger = event_needs_ledger(event)
+        ledger = fifo_ledgers.ledger_for(asset_object.internal_asset_id) if needs_ledger else fifo_ledgers.get(asset_object.internal_asset_id)
 
         if not processor and isinstance(event, CorporateActionEvent):
             logger.warning(f"Event {event.event_id} is CorporateActionEvent type {event.event_type.name} for asset {_format_asset_info(asset_object)} but not in specific map. Using GenericCorporateActionProcessor.")
@@ -220,10 +327,15 @@ def run_main_calculations(
                 logger.debug(f"Dispatching event {event.event_id} ({event.event_type.name}) to {type(processor).__name__}")
 
                 current_ledger = ledger if ledger else None
-                new_rgls = processor.process(event, current_ledger, context)
+                if profiler is None:
+                    new_rgls = processor.process(event, current_ledger, context)
+                else:
+                    processor_started = time.perf_counter()
+                    new_rgls = processor.process(event, current_ledger, context)
+                    profiler.record(type(processor).__name__, time.perf_counter() - processor_started, 1)
 
                 if new_rgls:
-                    realized_gains_losses.extend(new_rgls)
+                    realized_gains_losses_by_event.append((event_idx, new_rgls))
                     logger.debug(f"  Processor generated {len(new_rgls)} RGL records.")
 
             except ValueError as e:
@@ -236,7 +348,7 @@ def run_main_calculations(
                 logger.warning(f"Processor {type(processor).__name__} indicated logic for event type {event.event_type.name} (ID: {event.event_id}) is not yet implemented.")
                 continue
 
-        elif not ledger and asset_object.asset_category != AssetCategory.CASH_BALANCE:
+        elif needs_ledger and not ledger and asset_object.asset_category != AssetCategory.CASH_BALANCE:
             logger.warning(f"Event {event.event_id} ({event.event_type.name}) for non-cash asset {asset_object.get_classification_key()} occurred, but no FIFO ledger exists. Skipping processing for this event.")
 
         # Handle capital repayments directly
@@ -249,7 +361,8 @@ def run_main_calculations(
                     logger.info(f"Capital repayment excess {excess} EUR becomes taxable dividend income")
                     
                     # Create new DIVIDEND_CASH event for excess amount
-                    _create_excess_dividend_event(event, excess, asset_object, current_year_events)
+                    excess_event = _create_excess_dividend_event(event, excess, asset_object, current_year_events)
+                    spawned_events.append((event_idx, excess_event))
                     
                     # Reduce original capital repayment event to only the cost basis portion
                     cost_basis_portion = repayment_amount_eur - excess
@@ -270,63 +383,7 @@ def run_main_calculations(
             else:
                 logger.debug(f"Event type {event.event_type.name} (ID: {event.event_id}) does not require FIFO ledger processing. Skipping processor dispatch.")
 
-
-    logger.info("Finished processing current year events.")
-    logger.info(f"Pending option adjustments stored: {len(pending_option_adjustments)}")
-
-
-    logger.info("Performing End-of-Year (EOY) quantity validation...")
-    eoy_mismatch_errors = 0 
-    for asset_id, asset_obj in asset_resolver.assets_by_internal_id.items():
-        if asset_obj.asset_category == AssetCategory.CASH_BALANCE:
-            continue
-
-        ledger = fifo_ledgers.get(asset_id)
-        calculated_eoy_qty: Decimal
-
-        if ledger:
-            calculated_eoy_qty = ledger.get_current_position_quantity()
-        else:
-            calculated_eoy_qty = Decimal(0)
-            if asset_obj.soy_quantity is not None and asset_obj.soy_quantity != Decimal(0): # Renamed
-                logger.warning(f"EOY Validation: Asset {asset_obj.get_classification_key()} had SOY qty {asset_obj.soy_quantity} but no ledger found at EOY. Calculated EOY assumed 0.") # Renamed
-
-        reported_eoy_qty = asset_obj.eoy_quantity
-        try:
-            tolerance_exponent = -(ctx.prec // 2)
-            comparison_tolerance = Decimal('1e' + str(tolerance_exponent))
-        except Exception:
-            logger.warning(f"Could not calculate dynamic tolerance from precision {ctx.prec}. Using fixed tolerance 1e-8.")
-            comparison_tolerance = Decimal('1e-8')
-
-        if reported_eoy_qty is not None:
-            if abs(calculated_eoy_qty - reported_eoy_qty) > comparison_tolerance:
-                logger.error(
-                    f"CRITICAL EOY MISMATCH for {asset_obj.description or asset_obj.get_classification_key()} (ID: {asset_id}): "
-                    f"Calculated EOY Qty: {calculated_eoy_qty}, Reported EOY Qty (from file): {reported_eoy_qty}. "
-                    f"Difference: {calculated_eoy_qty - reported_eoy_qty}"
-                )
-                eoy_mismatch_errors += 1
-        elif abs(calculated_eoy_qty) > comparison_tolerance: 
-            logger.error( 
-                f"EOY MISMATCH for {asset_obj.description or asset_obj.get_classification_key()} (ID: {asset_id}): "
-                f"Calculated EOY Qty: {calculated_eoy_qty}, but asset NOT found in EOY positions report (implying reported EOY Qty is 0)."
-            )
-            eoy_mismatch_errors += 1 
-
-    if eoy_mismatch_errors > 0:
-        logger.error(f"EOY Quantity Validation FAILED with {eoy_mismatch_errors} critical mismatches. Processing will continue, but results may be inaccurate.")
-    else:
-        logger.info("EOY Quantity Validation passed or no critical mismatches found against reported EOY positions.")
-
-    logger.info("Vorabpauschale calculation skipped (result is €0 for tax year 2023).")
-
-    processed_income_events_for_output: List[FinancialEvent] = list(current_year_events)
-
-    logger.info(f"Calculation engine finished. Produced {len(realized_gains_losses)} RealizedGainLoss records.")
-    logger.info(f"Calculation engine produced {len(vorabpauschale_data_items)} VorabpauschaleData records (expected 0 for 2023).")
-
-    return realized_gains_losses, vorabpauschale_data_items, processed_income_events_for_output, eoy_mismatch_errors
+    return realized_gains_losses_by_event, spawned_events
 
 
 def _create_excess_dividend_event(original_event, excess_amount, asset_object, current_year_events):
@@ -141,8 +141,8 @@ class OptionExpirationWorthlessProcessor(EventProcessor):
         
         realized_gains_losses: List[RealizedGainLoss] = []
         
-        available_long_qty = sum(lot.quantity for lot in ledger.lots)
-        available_short_qty = sum(lot.quantity_shorted for lot in ledger.short_lots)
+        available_long_qty = ledger.lots.open_quantity
+        available_short_qty = ledger.short_lots.open_quantity
 
         consumed_lot_details: List[ConsumedLotDetail] = []
         current_realization_type: Optional[RealizationType] = None
@@ -169,8 +169,8 @@ class OptionExpirationWorthlessProcessor(EventProcessor):
             return []
 
         for detail in consumed_lot_details:
-            acq_date_obj = parse_ibkr_date(detail.original_lot_date)
-            real_date_obj = parse_ibkr_date(event.event_date)
+            acq_date_obj = detail.original_lot_date_obj or parse_ibkr_date(detail.original_lot_date)
+            real_date_obj = event.event_date_obj
             holding_period_days: Optional[int] = None
             if acq_date_obj and real_date_obj and real_date_obj >= acq_date_obj:
                 holding_period_days = (real_date_obj - acq_date_obj).days
@@ -210,6 +210,8 @@ class OptionExpirationWorthlessProcessor(EventProcessor):
                 asset_category_at_realization=AssetCategory.OPTION, 
                 acquisition_date=detail.original_lot_date,
                 realization_date=event.event_date,
+                acquisition_date_obj=acq_date_obj,
+                realization_date_obj=real_date_obj,
                 realization_type=current_realization_type,
                 quantity_realized=quantity_realized_for_rgl,
                 unit_cost_basis_eur=cost_basis_eur_per_unit_rgl, # Renamed kwarg
@@ -1,5 +1,5 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import InitVar, dataclass, field
 from decimal import Decimal, Context, getcontext as get_global_context
 from typing import List, Optional, Tuple
 import uuid
@@ -14,18 +14,52 @@ from src.utils.exchange_rate_provider import ECBExchangeRateProvider
 from src.utils.type_utils import parse_ibkr_date, safe_decimal
 from src.utils.tax_utils import get_teilfreistellung_rate_for_fund_type 
 import src.config as global_config
+from .lot_store import FifoLotStore
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+LOT_VALIDATION_STRICT = "strict" # Value checks and total vs. quantity * unit value consistency on every lot
+LOT_VALIDATION_FAST = "fast" # Only lots from outside a ledger (e.g. a carried ledger state) are checked
+LOT_VALIDATION_MODES = (LOT_VALIDATION_STRICT, LOT_VALIDATION_FAST)
+
+
+def lot_total_tolerance() -> Decimal:
+    """Largest accepted difference between a lot's total and quantity * unit value, from the output precisions."""
+    places_total = abs(global_config.OUTPUT_PRECISION_AMOUNTS.as_tuple().exponent)
+    places_unit = abs(global_config.OUTPUT_PRECISION_PER_SHARE.as_tuple().exponent)
+    return Decimal('1e-' + str(min(places_total, places_unit) - 1))
+
+
+def _check_lot_total(lot_kind: str, source_transaction_id: str, total_name: str, total: Decimal,
+                     quantity: Decimal, unit_name: str, unit_value: Decimal, tolerance: Optional[Decimal]):
+    expected_total = get_global_context().multiply(quantity, unit_value)
+    if tolerance is None:
+        tolerance = lot_total_tolerance()
+    if abs(total - expected_total) > tolerance and expected_total != Decimal(0):
+        logger.warning(
+            f"{lot_kind} {source_transaction_id}: {total_name} {total} "
+            f"differs significantly from (quantity {quantity} * {unit_name} {unit_value} = {expected_total}). "
+            f"Difference: {total - expected_total}. Using provided {total_name}."
+        )
+
+
+@dataclass(slots=True)
 class FifoLot:
     acquisition_date: str  # YYYY-MM-DD
     quantity: Decimal # Represents shares/units OR contracts for options
     unit_cost_basis_eur: Decimal # Renamed from cost_basis_eur_per_unit
     total_cost_basis_eur: Decimal # Stored with high precision
     source_transaction_id: str # IBKR Transaction ID (or fallback string like "SOY_FALLBACK")
-
-    def __post_init__(self):
+    acquisition_date_obj: Optional[date_obj] = field(default=None, repr=False, compare=False) # Typed acquisition_date; parsed if not given
+    # Construction-only: the owning ledger's precomputed tolerance and whether its lots are validated
+    validation_tolerance: InitVar[Optional[Decimal]] = None
+    validate: InitVar[bool] = True
+
+    def __post_init__(self, validation_tolerance: Optional[Decimal], validate: bool):
+        if self.acquisition_date_obj is None:
+            self.acquisition_date_obj = parse_ibkr_date(self.acquisition_date)
+        if not validate:
+            return
         if not isinstance(self.quantity, Decimal) or not self.quantity.is_finite() or self.quantity <= Decimal(0):
             raise ValueError(f"FifoLot quantity must be a positive finite Decimal: {self.quantity} (type: {type(self.quantity)})")
         if not isinstance(self.unit_cost_basis_eur, Decimal) or not self.unit_cost_basis_eur.is_finite() or self.unit_cost_basis_eur < Decimal(0): # Renamed
@@ -34,31 +68,25 @@ class FifoLot:
             raise ValueError(f"FifoLot total_cost_basis_eur must be a non-negative finite Decimal: {self.total_cost_basis_eur}")
         if not self.source_transaction_id:
              raise ValueError(f"FifoLot requires a non-empty source_transaction_id.")
+        _check_lot_total("FifoLot", self.source_transaction_id, "total_cost_basis_eur", self.total_cost_basis_eur,
+                         self.quantity, "unit_cost_basis_eur", self.unit_cost_basis_eur, validation_tolerance)
 
-        ctx_check = Context(prec=get_global_context().prec)
-        expected_total = ctx_check.multiply(self.quantity, self.unit_cost_basis_eur) # Renamed
-        
-        places_total = abs(global_config.OUTPUT_PRECISION_AMOUNTS.as_tuple().exponent) # Renamed
-        places_unit = abs(global_config.OUTPUT_PRECISION_PER_SHARE.as_tuple().exponent) # Renamed
-        tolerance_exponent = min(places_total, places_unit) - 1 
-        tolerance = Decimal('1e-' + str(tolerance_exponent))
-
-        if abs(self.total_cost_basis_eur - expected_total) > tolerance and expected_total != Decimal(0): 
-             logger.warning(
-                 f"FifoLot {self.source_transaction_id}: total_cost_basis_eur {self.total_cost_basis_eur} "
-                 f"differs significantly from (quantity {self.quantity} * unit_cost_basis_eur {self.unit_cost_basis_eur} = {expected_total}). " # Renamed
-                 f"Difference: {self.total_cost_basis_eur - expected_total}. Using provided total_cost_basis_eur."
-             )
-
-@dataclass
+@dataclass(slots=True)
 class ShortFifoLot:
     opening_date: str  # YYYY-MM-DD
     quantity_shorted: Decimal # Represents shares/units OR contracts for options (always positive)
     unit_sale_proceeds_eur: Decimal # Renamed from sale_proceeds_eur_per_unit
     total_sale_proceeds_eur: Decimal # Total sale proceeds when shorted
     source_transaction_id: str # IBKR Transaction ID (or fallback string like "SOY_FALLBACK_SHORT")
-
-    def __post_init__(self):
+    opening_date_obj: Optional[date_obj] = field(default=None, repr=False, compare=False) # Typed opening_date; parsed if not given
+    validation_tolerance: InitVar[Optional[Decimal]] = None
+    validate: InitVar[bool] = True
+
+    def __post_init__(self, validation_tolerance: Optional[Decimal], validate: bool):
+        if self.opening_date_obj is None:
+            self.opening_date_obj = parse_ibkr_date(self.opening_date)
+        if not validate:
+            return
         if not isinstance(self.quantity_shorted, Decimal) or not self.quantity_shorted.is_finite() or self.quantity_shorted <= Decimal(0):
             raise ValueError(f"ShortFifoLot quantity_shorted must be a positive finite Decimal: {self.quantity_shorted}")
         if not isinstance(self.unit_sale_proceeds_eur, Decimal) or not self.unit_sale_proceeds_eur.is_finite() or self.unit_sale_proceeds_eur < Decimal(0): # Renamed
@@ -67,28 +95,16 @@ class ShortFifoLot:
             raise ValueError(f"ShortFifoLot total_sale_proceeds_eur must be a non-negative finite Decimal: {self.total_sale_proceeds_eur}")
         if not self.source_transaction_id:
             raise ValueError(f"ShortFifoLot requires a non-empty source_transaction_id.")
+        _check_lot_total("ShortFifoLot", self.source_transaction_id, "total_sale_proceeds_eur", self.total_sale_proceeds_eur,
+                         self.quantity_shorted, "unit_sale_proceeds_eur", self.unit_sale_proceeds_eur, validation_tolerance)
 
-        ctx_check = Context(prec=get_global_context().prec)
-        expected_total = ctx_check.multiply(self.quantity_shorted, self.unit_sale_proceeds_eur) # Renamed
-
-        places_total = abs(global_config.OUTPUT_PRECISION_AMOUNTS.as_tuple().exponent) # Renamed
-        places_unit = abs(global_config.OUTPUT_PRECISION_PER_SHARE.as_tuple().exponent) # Renamed
-        tolerance_exponent = min(places_total, places_unit) - 1
-        tolerance = Decimal('1e-' + str(tolerance_exponent))
-        
-        if abs(self.total_sale_proceeds_eur - expected_total) > tolerance and expected_total != Decimal(0):
-            logger.warning(
-                f"ShortFifoLot {self.source_transaction_id}: total_sale_proceeds_eur {self.total_sale_proceeds_eur} "
-                f"differs significantly from (quantity {self.quantity_shorted} * unit_sale_proceeds_eur {self.unit_sale_proceeds_eur} = {expected_total}). " # Renamed
-                f"Difference: {self.total_sale_proceeds_eur - expected_total}. Using provided total_sale_proceeds_eur."
-            )
-
-@dataclass
+@dataclass(slots=True)
 class ConsumedLotDetail:
     consumed_quantity: Decimal
     value_per_unit_eur: Decimal # Cost basis per unit for long, proceeds per unit for short
     original_lot_date: str # Acquisition date for long, opening date for short
     original_lot_source_tx_id: str
+    original_lot_date_obj: Optional[date_obj] = None
 
 
 class FifoLedger:
@@ -100,7 +116,10 @@ class FifoLedger:
                  exchange_rate_provider: ECBExchangeRateProvider,
                  internal_working_precision: int, # Will be renamed internal_calculation_precision where called
                  decimal_rounding_mode: str,
-                 fund_type: Optional[InvestmentFundType] = None): 
+                 fund_type: Optional[InvestmentFundType] = None,
+                 lot_validation_mode: str = LOT_VALIDATION_STRICT):
+        if lot_validation_mode not in LOT_VALIDATION_MODES:
+            raise ValueError(f"Unknown FIFO lot validation mode '{lot_validation_mode}'. Expected one of {LOT_VALIDATION_MODES}.")
         self.asset_internal_id: uuid.UUID = asset_internal_id
         self.asset_category: AssetCategory = asset_category
         self.fund_type: Optional[InvestmentFundType] = fund_type 
@@ -119,21 +138,26 @@ class FifoLedger:
                  logger.warning(f"FifoLedger for Option asset {asset_internal_id} initialized with invalid asset_multiplier_from_asset ({asset_multiplier_from_asset}). Storing as is, but typically should be > 0.")
                  self.asset_multiplier_info = multiplier_dec if multiplier_dec is not None else Decimal(100)
 
-        self.lots: List[FifoLot] = []
-        self.short_lots: List[ShortFifoLot] = []
+        self.lots: FifoLotStore = FifoLotStore(quantity_attr="quantity", date_attr="acquisition_date_obj")
+        self.short_lots: FifoLotStore = FifoLotStore(quantity_attr="quantity_shorted", date_attr="opening_date_obj")
         self.currency_converter: CurrencyConverter = currency_converter
         self.exchange_rate_provider: ECBExchangeRateProvider = exchange_rate_provider
 
         self.ctx = Context(prec=internal_working_precision, rounding=decimal_rounding_mode)
         self.soy_fallback_lot_source_tx_id = f"SOY_FALLBACK_{asset_internal_id}"
         self.soy_fallback_short_lot_source_tx_id = f"SOY_FALLBACK_SHORT_{asset_internal_id}"
+        self.lot_validation_mode = lot_validation_mode
+        self.validate_lots = lot_validation_mode == LOT_VALIDATION_STRICT
+        self.lot_total_tolerance = lot_total_tolerance()
 
 
-    def initialize_lots_from_soy(self,
-                                 asset: Asset,
-                                 all_historical_events_for_asset: List[FinancialEvent],
-                                 tax_year: int):
-        
+    def _new_lot(self, **lot_fields) -> FifoLot:
+        return FifoLot(**lot_fields, validation_tolerance=self.lot_total_tolerance, validate=self.validate_lots)
+
+    def _new_short_lot(self, **lot_fields) -> ShortFifoLot:
+        return ShortFifoLot(**lot_fields, validation_tolerance=self.lot_total_tolerance, validate=self.validate_lots)
+
+    def _update_fund_type_from_asset(self, asset: Asset):
         if self.asset_category == AssetCategory.INVESTMENT_FUND:
             asset_fund_type = getattr(asset, 'fund_type', None) 
             if isinstance(asset_fund_type, InvestmentFundType) and asset_fund_type != InvestmentFundType.NONE:
@@ -144,6 +168,49 @@ class FifoLedger:
                  logger.warning(f"FifoLedger for Investment Fund {self.asset_internal_id} still has no specific fund_type after asset load for SOY. Using InvestmentFundType.NONE.")
                  self.fund_type = InvestmentFundType.NONE
 
+    def initialize_lots_from_carried_state(self,
+                                           asset: Asset,
+                                           carried_lots: List[FifoLot],
+                                           carried_short_lots: List[ShortFifoLot]) -> bool:
+        """
+        Seeds the ledger with the lots carried over from the previous tax year's EOY ledger state.
+        The carried net quantity must match the reported SOY quantity; on a divergence the ledger is
+        left empty and False is returned, so the caller can fall back to initialize_lots_from_soy.
+        """
+        self._update_fund_type_from_asset(asset)
+        self.lots.clear()
+        self.short_lots.clear()
+
+        reported_soy_qty = asset.soy_quantity if asset.soy_quantity is not None else Decimal(0)
+        reported_soy_qty = reported_soy_qty.quantize(global_config.PRECISION_QUANTITY, context=self.ctx)
+        carried_net_qty = self.ctx.subtract(sum((lot.quantity for lot in carried_lots), Decimal(0)),
+                                            sum((lot.quantity_shorted for lot in carried_short_lots), Decimal(0)))
+        if carried_net_qty.quantize(global_config.PRECISION_QUANTITY, context=self.ctx) != reported_soy_qty:
+            logger.warning(f"Asset {asset.get_classification_key()}: Carried EOY ledger state (Net Qty: {carried_net_qty}) "
+                           f"diverges from the reported SOY Qty ({reported_soy_qty}).")
+            return False
+
+        for lot in carried_lots:
+            self.lots.add(self._new_lot(
+                acquisition_date=lot.acquisition_date, acquisition_date_obj=lot.acquisition_date_obj, quantity=lot.quantity,
+                unit_cost_basis_eur=lot.unit_cost_basis_eur, total_cost_basis_eur=lot.total_cost_basis_eur,
+                source_transaction_id=lot.source_transaction_id
+            ))
+        for lot in carried_short_lots:
+            self.short_lots.add(self._new_short_lot(
+                opening_date=lot.opening_date, opening_date_obj=lot.opening_date_obj, quantity_shorted=lot.quantity_shorted,
+                unit_sale_proceeds_eur=lot.unit_sale_proceeds_eur, total_sale_proceeds_eur=lot.total_sale_proceeds_eur,
+                source_transaction_id=lot.source_transaction_id
+            ))
+        logger.info(f"Asset {asset.get_classification_key()}: Seeded {len(self.lots)} long and {len(self.short_lots)} short lots "
+                    f"from the carried EOY ledger state (SOY Qty: {reported_soy_qty}).")
+        return True
+
+    def initialize_lots_from_soy(self,
+                                 asset: Asset,
+                                 all_historical_events_for_asset: List[FinancialEvent],
+                                 tax_year: int):
+        self._update_fund_type_from_asset(asset)
         self.lots.clear()
         self.short_lots.clear()
         historical_simulation_inconsistent = False 
@@ -152,7 +219,7 @@ class FifoLedger:
                     f"Processing {len(all_historical_events_for_asset)} historical events for simulation.")
 
         for hist_event in all_historical_events_for_asset:
-            event_date_obj = parse_ibkr_date(hist_event.event_date)
+            event_date_obj = hist_event.event_date_obj
             if not event_date_obj or event_date_obj >= date_obj(tax_year, 1, 1):
                 logger.warning(f"Historical event {hist_event.event_id} for asset {asset.internal_asset_id} "
                                f"has date {hist_event.event_date} which is not before tax year {tax_year}. Skipping for SOY init.")
@@ -209,13 +276,13 @@ class FifoLedger:
                     for lot in reconstructed_long_lots_snapshot:
                         if qty_to_assign <= Decimal(0): break
                         qty_from_this_lot = min(lot.quantity, qty_to_assign)
-                        final_lot = FifoLot(
-                            acquisition_date=lot.acquisition_date, quantity=qty_from_this_lot,
+                        final_lot = self._new_lot(
+                            acquisition_date=lot.acquisition_date, acquisition_date_obj=lot.acquisition_date_obj, quantity=qty_from_this_lot,
                             unit_cost_basis_eur=lot.unit_cost_basis_eur, # Renamed
                             total_cost_basis_eur=self.ctx.multiply(qty_from_this_lot, lot.unit_cost_basis_eur), # Renamed
                             source_transaction_id=lot.source_transaction_id
                         )
-                        self.lots.append(final_lot)
+                        self.lots.add(final_lot)
                         qty_to_assign -= qty_from_this_lot
                     if qty_to_assign.copy_abs() > Decimal('1e-8'):
                          logger.error(f"Asset {asset.get_classification_key()}: Mismatch after assigning sufficient long lots. Rem: {qty_to_assign}")
@@ -231,13 +298,13 @@ class FifoLedger:
                     for lot in reconstructed_short_lots_snapshot:
                         if qty_to_assign <= Decimal(0): break
                         qty_from_this_lot = min(lot.quantity_shorted, qty_to_assign)
-                        final_short_lot = ShortFifoLot(
-                            opening_date=lot.opening_date, quantity_shorted=qty_from_this_lot,
+                        final_short_lot = self._new_short_lot(
+                            opening_date=lot.opening_date, opening_date_obj=lot.opening_date_obj, quantity_shorted=qty_from_this_lot,
                             unit_sale_proceeds_eur=lot.unit_sale_proceeds_eur, # Renamed
                             total_sale_proceeds_eur=self.ctx.multiply(qty_from_this_lot, lot.unit_sale_proceeds_eur), # Renamed
                             source_transaction_id=lot.source_transaction_id
                         )
-                        self.short_lots.append(final_short_lot)
+                        self.short_lots.add(final_short_lot)
                         qty_to_assign -= qty_from_this_lot
                     if qty_to_assign.copy_abs() > Decimal('1e-8'):
                          logger.error(f"Asset {asset.get_classification_key()}: Mismatch after assigning sufficient short lots. Rem: {qty_to_assign}")
@@ -258,15 +325,6 @@ class FifoLedger:
                 self._create_fallback_long_lot(asset, reported_soy_qty, tax_year)
             elif reported_soy_qty < Decimal(0):
                 self._create_fallback_short_lot(asset, reported_soy_qty.copy_abs(), tax_year)
-        
-        if self.lots:
-            self.lots.sort(key=lambda lot: (parse_ibkr_date(lot.acquisition_date) or datetime.min.date(), lot.source_transaction_id))
-            if any((parse_ibkr_date(lot.acquisition_date) is None) for lot in self.lots):
-                 raise ValueError(f"Unparseable acquisition date found in final SOY lots for asset {self.asset_internal_id}.")
-        if self.short_lots:
-            self.short_lots.sort(key=lambda lot: (parse_ibkr_date(lot.opening_date) or datetime.min.date(), lot.source_transaction_id))
-            if any((parse_ibkr_date(lot.opening_date) is None) for lot in self.short_lots):
-                 raise ValueError(f"Unparseable opening date found in final SOY short lots for asset {self.asset_internal_id}.")
 
     def _create_fallback_long_lot(self, asset: Asset, quantity: Decimal, tax_year: int):
         if quantity <= Decimal(0): return
@@ -294,12 +352,12 @@ class FifoLedger:
                 total_cost_basis_eur = self.ctx.create_decimal(Decimal(0))
         cost_per_unit = self.ctx.divide(total_cost_basis_eur, quantity) if quantity != Decimal(0) else Decimal(0)
         acquisition_date_str = f"{tax_year-1}-12-31" 
-        fallback_lot = FifoLot(
-            acquisition_date=acquisition_date_str, quantity=quantity,
+        fallback_lot = self._new_lot(
+            acquisition_date=acquisition_date_str, acquisition_date_obj=date_obj(tax_year - 1, 12, 31), quantity=quantity,
             unit_cost_basis_eur=cost_per_unit, total_cost_basis_eur=total_cost_basis_eur, # Renamed
             source_transaction_id=self.soy_fallback_lot_source_tx_id
         )
-        self.lots.append(fallback_lot)
+        self.lots.add(fallback_lot)
         logger.info(
             f"Asset {asset.get_classification_key()}: Created fallback SOY long lot: "
             f"Qty: {fallback_lot.quantity}, Cost/Unit EUR: {fallback_lot.unit_cost_basis_eur}, Acq. Date: {fallback_lot.acquisition_date}" # Renamed
@@ -328,12 +386,12 @@ class FifoLedger:
                     total_proceeds_eur = self.ctx.create_decimal(converted_eur)
         proceeds_per_unit = self.ctx.divide(total_proceeds_eur, quantity_abs) if quantity_abs != Decimal(0) else Decimal(0)
         opening_date_str = f"{tax_year-1}-12-31" 
-        fallback_short_lot = ShortFifoLot(
-            opening_date=opening_date_str, quantity_shorted=quantity_abs,
+        fallback_short_lot = self._new_short_lot(
+            opening_date=opening_date_str, opening_date_obj=date_obj(tax_year - 1, 12, 31), quantity_shorted=quantity_abs,
             unit_sale_proceeds_eur=proceeds_per_unit, total_sale_proceeds_eur=total_proceeds_eur, # Renamed
             source_transaction_id=self.soy_fallback_short_lot_source_tx_id
         )
-        self.short_lots.append(fallback_short_lot)
+        self.short_lots.add(fallback_short_lot)
         logger.info(
             f"Asset {asset.get_classification_key()}: Created fallback SOY short lot: "
             f"Qty Short: {fallback_short_lot.quantity_shorted}, Proceeds/Unit EUR: {fallback_short_lot.unit_sale_proceeds_eur}, Opening Date: {fallback_short_lot.opening_date}" # Renamed
@@ -354,16 +412,13 @@ class FifoLedger:
             return
         cost_basis_eur_per_unit = self.ctx.divide(total_cost_basis_eur, lot_qty_contracts_or_units)
 
-        new_lot = FifoLot(
-            acquisition_date=trade_event.event_date, quantity=lot_qty_contracts_or_units, 
+        new_lot = self._new_lot(
+            acquisition_date=trade_event.event_date, acquisition_date_obj=trade_event.event_date_obj, quantity=lot_qty_contracts_or_units, 
             unit_cost_basis_eur=cost_basis_eur_per_unit, # Renamed
             total_cost_basis_eur=total_cost_basis_eur,
             source_transaction_id=trade_event.ibkr_transaction_id
         )
-        self.lots.append(new_lot)
-        self.lots.sort(key=lambda lot: (parse_ibkr_date(lot.acquisition_date) or datetime.min.date(), lot.source_transaction_id))
-        if any((parse_ibkr_date(lot.acquisition_date) is None) for lot in self.lots):
-             raise ValueError(f"Unparseable acquisition date found in FIFO lots for asset {self.asset_internal_id} after adding lot.")
+        self.lots.add(new_lot)
 
     def add_short_lot(self, trade_event: TradeEvent):
         if trade_event.event_type != FinancialEventType.TRADE_SELL_SHORT_OPEN: return
@@ -380,16 +435,13 @@ class FifoLedger:
             return
         sale_proceeds_eur_per_unit = self.ctx.divide(total_sale_proceeds_eur, lot_qty_shorted_contracts_or_units)
 
-        new_short_lot = ShortFifoLot(
-            opening_date=trade_event.event_date, quantity_shorted=lot_qty_shorted_contracts_or_units, 
+        new_short_lot = self._new_short_lot(
+            opening_date=trade_event.event_date, opening_date_obj=trade_event.event_date_obj, quantity_shorted=lot_qty_shorted_contracts_or_units, 
             unit_sale_proceeds_eur=sale_proceeds_eur_per_unit, # Renamed
             total_sale_proceeds_eur=total_sale_proceeds_eur,
             source_transaction_id=trade_event.ibkr_transaction_id
         )
-        self.short_lots.append(new_short_lot)
-        self.short_lots.sort(key=lambda lot: (parse_ibkr_date(lot.opening_date) or datetime.min.date(), lot.source_transaction_id))
-        if any((parse_ibkr_date(lot.opening_date) is None) for lot in self.short_lots):
-             raise ValueError(f"Unparseable opening date found in Short FIFO lots for asset {self.asset_internal_id} after adding lot.")
+        self.short_lots.add(new_short_lot)
 
 
     def consume_long_lots_for_sale(self, sale_event: TradeEvent, is_historical_simulation: bool = False) -> List[RealizedGainLoss]:
@@ -405,8 +457,7 @@ class FifoLedger:
 
         realized_gains_losses: List[RealizedGainLoss] = []
         quantity_remaining_to_realize = quantity_to_realize
-        lots_to_remove_indices: List[int] = []
-        current_available_qty_in_lots = sum(l.quantity for l in self.lots)
+        current_available_qty_in_lots = self.lots.open_quantity
 
 
         realization_type_for_rgl: RealizationType
@@ -415,16 +466,17 @@ class FifoLedger:
         else:
             realization_type_for_rgl = RealizationType.LONG_POSITION_SALE # Renamed
 
-        for i, current_lot in enumerate(self.lots):
-            if quantity_remaining_to_realize <= Decimal(0): break
+        while self.lots and quantity_remaining_to_realize > Decimal(0):
+            current_lot = self.lots.head()
             quantity_from_this_lot: Decimal
             if current_lot.quantity <= quantity_remaining_to_realize:
                 quantity_from_this_lot = current_lot.quantity
-                lots_to_remove_indices.append(i)
+                self.lots.pop_head()
             else:
                 quantity_from_this_lot = quantity_remaining_to_realize
                 current_lot.quantity = self.ctx.subtract(current_lot.quantity, quantity_from_this_lot)
                 current_lot.total_cost_basis_eur = self.ctx.multiply(current_lot.quantity, current_lot.unit_cost_basis_eur) # Renamed
+                self.lots.deduct_open_quantity(quantity_from_this_lot)
 
             quantity_remaining_to_realize = self.ctx.subtract(quantity_remaining_to_realize, quantity_from_this_lot)
             
@@ -433,8 +485,8 @@ class FifoLedger:
                 realization_value_for_portion = self.ctx.multiply(quantity_from_this_lot, sale_proceeds_eur_per_unit_for_event)
                 gross_gain_loss = self.ctx.subtract(realization_value_for_portion, cost_basis_for_portion)
 
-                acq_date_obj = parse_ibkr_date(current_lot.acquisition_date)
-                real_date_obj = parse_ibkr_date(sale_event.event_date)
+                acq_date_obj = current_lot.acquisition_date_obj
+                real_date_obj = sale_event.event_date_obj
                 holding_period_days: Optional[int] = None
                 if acq_date_obj and real_date_obj and real_date_obj >= acq_date_obj :
                     holding_period_days = (real_date_obj - acq_date_obj).days
@@ -486,6 +538,7 @@ class FifoLedger:
                     originating_event_id=sale_event.event_id, asset_internal_id=self.asset_internal_id,
                     asset_category_at_realization=self.asset_category, acquisition_date=current_lot.acquisition_date,
                     realization_date=sale_event.event_date,
+                    acquisition_date_obj=acq_date_obj, realization_date_obj=real_date_obj,
                     realization_type=realization_type_for_rgl,
                     quantity_realized=quantity_from_this_lot, 
                     unit_cost_basis_eur=current_lot.unit_cost_basis_eur, # Renamed kwarg
@@ -501,8 +554,6 @@ class FifoLedger:
                 )
                 realized_gains_losses.append(rgl)
 
-        for i in sorted(lots_to_remove_indices, reverse=True): del self.lots[i]
-
         small_tolerance_qty = Decimal('1e-10') 
         if quantity_remaining_to_realize.copy_abs() > small_tolerance_qty:
             msg = (f"Insufficient long lots for sale event {sale_event.ibkr_transaction_id or sale_event.event_id} "
@@ -529,8 +580,7 @@ class FifoLedger:
 
         realized_gains_losses: List[RealizedGainLoss] = []
         quantity_remaining_to_realize = quantity_to_realize
-        short_lots_to_remove_indices: List[int] = []
-        current_available_qty_in_short_lots = sum(sl.quantity_shorted for sl in self.short_lots)
+        current_available_qty_in_short_lots = self.short_lots.open_quantity
 
 
         realization_type_for_rgl: RealizationType
@@ -539,16 +589,17 @@ class FifoLedger:
         else:
             realization_type_for_rgl = RealizationType.SHORT_POSITION_COVER # Renamed
 
-        for i, current_short_lot in enumerate(self.short_lots):
-            if quantity_remaining_to_realize <= Decimal(0): break
+        while self.short_lots and quantity_remaining_to_realize > Decimal(0):
+            current_short_lot = self.short_lots.head()
             quantity_covered_from_this_lot: Decimal
             if current_short_lot.quantity_shorted <= quantity_remaining_to_realize:
                 quantity_covered_from_this_lot = current_short_lot.quantity_shorted
-                short_lots_to_remove_indices.append(i)
+                self.short_lots.pop_head()
             else:
                 quantity_covered_from_this_lot = quantity_remaining_to_realize
                 current_short_lot.quantity_shorted = self.ctx.subtract(current_short_lot.quantity_shorted, quantity_covered_from_this_lot)
                 current_short_lot.total_sale_proceeds_eur = self.ctx.multiply(current_short_lot.quantity_shorted, current_short_lot.unit_sale_proceeds_eur) # Renamed
+                self.short_lots.deduct_open_quantity(quantity_covered_from_this_lot)
 
             quantity_remaining_to_realize = self.ctx.subtract(quantity_remaining_to_realize, quantity_covered_from_this_lot)
 
@@ -557,8 +608,8 @@ class FifoLedger:
                 realization_value_for_portion = self.ctx.multiply(quantity_covered_from_this_lot, current_short_lot.unit_sale_proceeds_eur) # Renamed
                 gross_gain_loss = self.ctx.subtract(realization_value_for_portion, cost_basis_for_portion) 
 
-                open_date_obj = parse_ibkr_date(current_short_lot.opening_date)
-                cover_date_obj = parse_ibkr_date(cover_event.event_date)
+                open_date_obj = current_short_lot.opening_date_obj
+                cover_date_obj = cover_event.event_date_obj
                 holding_period_days: Optional[int] = None
                 if open_date_obj and cover_date_obj and cover_date_obj >= open_date_obj:
                     holding_period_days = (cover_date_obj - open_date_obj).days
@@ -613,6 +664,7 @@ class FifoLedger:
                     asset_category_at_realization=self.asset_category, 
                     acquisition_date=current_short_lot.opening_date, 
                     realization_date=cover_event.event_date, 
+                    acquisition_date_obj=open_date_obj, realization_date_obj=cover_date_obj,
                     realization_type=realization_type_for_rgl,
                     quantity_realized=quantity_covered_from_this_lot, 
                     unit_cost_basis_eur=cost_eur_per_unit_for_cover_event, # Renamed kwarg
@@ -628,8 +680,6 @@ class FifoLedger:
                 )
                 realized_gains_losses.append(rgl)
 
-        for i in sorted(short_lots_to_remove_indices, reverse=True): del self.short_lots[i]
-
         small_tolerance_qty = Decimal('1e-10')
         if quantity_remaining_to_realize.copy_abs() > small_tolerance_qty:
             msg = (f"Insufficient short lots for cover event {cover_event.ibkr_transaction_id or cover_event.event_id} "
@@ -684,6 +734,9 @@ class FifoLedger:
             short_lot.unit_sale_proceeds_eur = new_proceeds_per_unit # Renamed
             logger.debug(f"  Adjusted Short Lot (Src: {short_lot.source_transaction_id}): New Qty={short_lot.quantity_shorted}, New Proceeds/Unit={short_lot.unit_sale_proceeds_eur}, Total Proceeds (Unchanged)={short_lot.total_sale_proceeds_eur}") # Renamed
 
+        self.lots.recompute_open_quantity()
+        self.short_lots.recompute_open_quantity()
+
     def consume_all_lots_for_cash_merger(self, event: CorpActionMergerCash) -> List[RealizedGainLoss]:
         if event.cash_per_share_eur is None:
              logger.error(f"Cash merger event {event.event_id} for asset {self.asset_internal_id} missing cash_per_share_eur. Cannot process.")
@@ -704,8 +757,8 @@ class FifoLedger:
             realization_value_for_portion = self.ctx.multiply(quantity_from_this_lot, realization_value_eur_per_unit_for_event)
             gross_gain_loss = self.ctx.subtract(realization_value_for_portion, cost_basis_for_portion)
 
-            acq_date_obj = parse_ibkr_date(current_lot.acquisition_date)
-            real_date_obj = parse_ibkr_date(event.event_date)
+            acq_date_obj = current_lot.acquisition_date_obj
+            real_date_obj = event.event_date_obj
             holding_period_days: Optional[int] = None
             if acq_date_obj and real_date_obj and real_date_obj >= acq_date_obj :
                 holding_period_days = (real_date_obj - acq_date_obj).days
@@ -758,6 +811,7 @@ class FifoLedger:
                 originating_event_id=event.event_id, asset_internal_id=self.asset_internal_id,
                 asset_category_at_realization=self.asset_category, acquisition_date=current_lot.acquisition_date,
                 realization_date=event.event_date,
+                acquisition_date_obj=acq_date_obj, realization_date_obj=real_date_obj,
                 realization_type=RealizationType.CASH_MERGER_PROCEEDS, # Renamed
                 quantity_realized=quantity_from_this_lot,
                 unit_cost_basis_eur=current_lot.unit_cost_basis_eur, # Renamed kwarg
@@ -797,15 +851,12 @@ class FifoLedger:
 
         source_id = event.ca_action_id_ibkr or event.ibkr_transaction_id or f"STOCKDIV_{event.event_id}"
 
-        new_lot = FifoLot(
-            acquisition_date=event.event_date, quantity=new_lot_quantity, 
+        new_lot = self._new_lot(
+            acquisition_date=event.event_date, acquisition_date_obj=event.event_date_obj, quantity=new_lot_quantity, 
             unit_cost_basis_eur=new_lot_cost_per_unit, # Renamed
             total_cost_basis_eur=new_lot_total_cost, source_transaction_id=source_id
         )
-        self.lots.append(new_lot)
-        self.lots.sort(key=lambda lot: (parse_ibkr_date(lot.acquisition_date) or datetime.min.date(), lot.source_transaction_id))
-        if any((parse_ibkr_date(lot.acquisition_date) is None) for lot in self.lots):
-             raise ValueError(f"Unparseable acquisition date found after adding stock dividend lot for asset {self.asset_internal_id}.")
+        self.lots.add(new_lot)
 
         logger.info(f"Added new lot for stock dividend event {event.event_id} for asset {self.asset_internal_id}: Qty={new_lot.quantity}, Cost/Unit={new_lot.unit_cost_basis_eur} (FMV)") # Renamed
 
@@ -821,40 +872,37 @@ class FifoLedger:
 
         consumed_lot_details: List[ConsumedLotDetail] = []
         quantity_remaining_to_consume = qty_to_consume
-        lots_to_remove_indices: List[int] = []
 
         logger.debug(f"Attempting to consume {qty_to_consume} long option contracts for asset {self.asset_internal_id}...")
 
-        for i, current_lot in enumerate(self.lots):
-            if quantity_remaining_to_consume <= Decimal(0): break
+        while self.lots and quantity_remaining_to_consume > Decimal(0):
+            current_lot = self.lots.head()
             qty_available_in_lot = current_lot.quantity
 
             qty_consumed_from_this_lot: Decimal
             if qty_available_in_lot <= quantity_remaining_to_consume:
                 qty_consumed_from_this_lot = qty_available_in_lot
-                lots_to_remove_indices.append(i)
+                self.lots.pop_head()
                 logger.debug(f"  Fully consuming long option lot (Src: {current_lot.source_transaction_id}, Acq: {current_lot.acquisition_date}) Qty Contracts: {qty_consumed_from_this_lot}")
             else:
                 qty_consumed_from_this_lot = quantity_remaining_to_consume
                 current_lot.quantity = self.ctx.subtract(current_lot.quantity, qty_consumed_from_this_lot)
                 current_lot.total_cost_basis_eur = self.ctx.multiply(current_lot.quantity, current_lot.unit_cost_basis_eur) # Renamed
+                self.lots.deduct_open_quantity(qty_consumed_from_this_lot)
                 logger.debug(f"  Partially consuming long option lot (Src: {current_lot.source_transaction_id}, Acq: {current_lot.acquisition_date}) Qty Contracts: {qty_consumed_from_this_lot}. Remaining Qty Contracts: {current_lot.quantity}")
 
             consumed_lot_details.append(ConsumedLotDetail(
                 consumed_quantity=qty_consumed_from_this_lot,
                 value_per_unit_eur=current_lot.unit_cost_basis_eur, # Renamed
                 original_lot_date=current_lot.acquisition_date,
+                original_lot_date_obj=current_lot.acquisition_date_obj,
                 original_lot_source_tx_id=current_lot.source_transaction_id
             ))
             quantity_remaining_to_consume = self.ctx.subtract(quantity_remaining_to_consume, qty_consumed_from_this_lot)
 
-        for i in sorted(lots_to_remove_indices, reverse=True):
-            logger.debug(f"  Removing fully consumed long option lot index {i} (Src: {self.lots[i].source_transaction_id})")
-            del self.lots[i]
-
         small_tolerance_qty = Decimal('1e-10') 
         if quantity_remaining_to_consume.copy_abs() > small_tolerance_qty: 
-            current_total_qty_in_lots = sum(l.quantity for l in self.lots) 
+            current_total_qty_in_lots = self.lots.open_quantity
             available_before_this_op = current_total_qty_in_lots + (qty_to_consume - quantity_remaining_to_consume)
             raise ValueError(f"Insufficient long option contracts for asset {self.asset_internal_id}. "
                              f"Required to consume: {qty_to_consume}, "
@@ -876,40 +924,37 @@ class FifoLedger:
 
         consumed_lot_details: List[ConsumedLotDetail] = []
         quantity_remaining_to_consume = qty_to_consume
-        short_lots_to_remove_indices: List[int] = []
 
         logger.debug(f"Attempting to consume {qty_to_consume} short option contracts for asset {self.asset_internal_id}...")
 
-        for i, current_short_lot in enumerate(self.short_lots):
-            if quantity_remaining_to_consume <= Decimal(0): break
+        while self.short_lots and quantity_remaining_to_consume > Decimal(0):
+            current_short_lot = self.short_lots.head()
             qty_available_in_lot = current_short_lot.quantity_shorted
 
             qty_consumed_from_this_lot: Decimal
             if qty_available_in_lot <= quantity_remaining_to_consume:
                 qty_consumed_from_this_lot = qty_available_in_lot
-                short_lots_to_remove_indices.append(i)
+                self.short_lots.pop_head()
                 logger.debug(f"  Fully consuming short option lot (Src: {current_short_lot.source_transaction_id}, Open: {current_short_lot.opening_date}) Qty Contracts: {qty_consumed_from_this_lot}")
             else:
                 qty_consumed_from_this_lot = quantity_remaining_to_consume
                 current_short_lot.quantity_shorted = self.ctx.subtract(current_short_lot.quantity_shorted, qty_consumed_from_this_lot)
                 current_short_lot.total_sale_proceeds_eur = self.ctx.multiply(current_short_lot.quantity_shorted, current_short_lot.unit_sale_proceeds_eur) # Renamed
+                self.short_lots.deduct_open_quantity(qty_consumed_from_this_lot)
                 logger.debug(f"  Partially consuming short option lot (Src: {current_short_lot.source_transaction_id}, Open: {current_short_lot.opening_date}) Qty Contracts: {qty_consumed_from_this_lot}. Remaining Qty Contracts: {current_short_lot.quantity_shorted}")
 
             consumed_lot_details.append(ConsumedLotDetail(
                 consumed_quantity=qty_consumed_from_this_lot,
                 value_per_unit_eur=current_short_lot.unit_sale_proceeds_eur, # Renamed
                 original_lot_date=current_short_lot.opening_date,
+                original_lot_date_obj=current_short_lot.opening_date_obj,
                 original_lot_source_tx_id=current_short_lot.source_transaction_id
             ))
             quantity_remaining_to_consume = self.ctx.subtract(quantity_remaining_to_consume, qty_consumed_from_this_lot)
 
-        for i in sorted(short_lots_to_remove_indices, reverse=True):
-            logger.debug(f"  Removing fully consumed short option lot index {i} (Src: {self.short_lots[i].source_transaction_id})")
-            del self.short_lots[i]
-
         small_tolerance_qty = Decimal('1e-10')
         if quantity_remaining_to_consume.copy_abs() > small_tolerance_qty: 
-            current_total_qty_in_lots = sum(sl.quantity_shorted for sl in self.short_lots)
+            current_total_qty_in_lots = self.short_lots.open_quantity
             available_before_this_op = current_total_qty_in_lots + (qty_to_consume - quantity_remaining_to_consume)
             raise ValueError(f"Insufficient short option contracts for asset {self.asset_internal_id}. "
                              f"Required to consume: {qty_to_consume}, "
@@ -921,8 +966,8 @@ class FifoLedger:
 
 
     def get_current_position_quantity(self) -> Decimal:
-        current_long_qty = sum(lot.quantity for lot in self.lots) if self.lots else Decimal(0)
-        current_short_qty_abs = sum(short_lot.quantity_shorted for short_lot in self.short_lots) if self.short_lots else Decimal(0)
+        current_long_qty = self.lots.open_quantity
+        current_short_qty_abs = self.short_lots.open_quantity
 
         net_quantity = self.ctx.subtract(current_long_qty, current_short_qty_abs)
         return net_quantity.quantize(global_config.PRECISION_QUANTITY, context=self.ctx)
@@ -0,0 +1,171 @@
+# src/engine/ledger_registry.py
+import logging
+import time
+import uuid
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import src.config as global_config
+from src.pipeline_profiler import active_profiler
+from src.domain.assets import Asset, Option, InvestmentFund
+from src.domain.enums import AssetCategory, InvestmentFundType
+from src.domain.events import FinancialEvent
+from src.identification.asset_resolver import AssetResolver
+from src.utils.currency_converter import CurrencyConverter
+from src.utils.exchange_rate_provider import ECBExchangeRateProvider
+from src.utils.sorting_utils import get_cached_event_sort_key
+from .fifo_manager import FifoLedger
+from .ledger_state import CarriedLedgerState
+
+logger = logging.getLogger(__name__)
+
+
+class FifoLedgerRegistry:
+    """
+    FIFO ledgers by asset id, built and initialised (from the carried EOY ledger state or from SOY
+    positions and history) the first time they are needed:
+    - ledger_for() materialises the ledger of an asset a current year event touches.
+    - ledger_for_eoy_validation() only materialises ledgers that can hold lots, i.e. of assets with
+      a SOY position, pre-tax-year history or a carried ledger state.
+    Assets with none of these and no current year activity never get a ledger.
+    """
+
+    def __init__(self,
+                 asset_resolver: AssetResolver,
+                 historical_events_by_asset: Dict[uuid.UUID, List[FinancialEvent]],
+                 currency_converter: CurrencyConverter,
+                 exchange_rate_provider: ECBExchangeRateProvider,
+                 tax_year: int,
+                 internal_calculation_precision: int,
+                 decimal_rounding_mode: str,
+                 carried_ledger_state: Optional[Dict[str, CarriedLedgerState]] = None):
+        self.asset_resolver = asset_resolver
+        self.historical_events_by_asset = historical_events_by_asset
+        self.currency_converter = currency_converter
+        self.exchange_rate_provider = exchange_rate_provider
+        self.tax_year = tax_year
+        self.internal_calculation_precision = internal_calculation_precision
+        self.decimal_rounding_mode = decimal_rounding_mode
+        self.carried_ledger_state = carried_ledger_state
+        self._ledgers: Dict[uuid.UUID, FifoLedger] = {}
+        self.seeded_ledger_count = 0
+        self.carried_state_divergences = 0
+
+    def __contains__(self, asset_id: uuid.UUID) -> bool:
+        return asset_id in self._ledgers
+
+    def __getitem__(self, asset_id: uuid.UUID) -> FifoLedger:
+        return self._ledgers[asset_id]
+
+    def __setitem__(self, asset_id: uuid.UUID, ledger: FifoLedger):
+        """Replaces a materialised ledger (e.g. by its copy processed in a worker process)."""
+        self._ledgers[asset_id] = ledger
+
+    def __len__(self) -> int:
+        return len(self._ledgers)
+
+    def __iter__(self) -> Iterator[uuid.UUID]:
+        return iter(self._ledgers)
+
+    def items(self) -> Iterator[Tuple[uuid.UUID, FifoLedger]]:
+        return iter(self._ledgers.items())
+
+    def values(self) -> Iterator[FifoLedger]:
+        return iter(self._ledgers.values())
+
+    def get(self, asset_id: uuid.UUID) -> Optional[FifoLedger]:
+        """The ledger of an asset if it was materialised, without creating it."""
+        return self._ledgers.get(asset_id)
+
+    def ledger_for(self, asset_id: uuid.UUID) -> Optional[FifoLedger]:
+        """The ledger of a non-cash asset, materialised on first use. None for cash and unknown assets."""
+        ledger = self._ledgers.get(asset_id)
+        if ledger is None:
+            asset = self.asset_resolver.get_asset_by_id(asset_id)
+            if asset is None or asset.asset_category == AssetCategory.CASH_BALANCE:
+                return None
+            profiler = active_profiler()
+            if profiler is None:
+                ledger = self._materialize(asset)
+            else:
+                # Once per asset: recorded like the processor timings, without memory figures
+                started = time.perf_counter()
+                ledger = self._materialize(asset)
+                profiler.record("SOY ledger initialization", time.perf_counter() - started, 1)
+        return ledger
+
+    def ledger_for_eoy_validation(self, asset_id: uuid.UUID) -> Optional[FifoLedger]:
+        ledger = self._ledgers.get(asset_id)
+        if ledger is None and self._may_hold_lots(asset_id):
+            ledger = self.ledger_for(asset_id)
+        return ledger
+
+    def _may_hold_lots(self, asset_id: uuid.UUID) -> bool:
+        asset = self.asset_resolver.get_asset_by_id(asset_id)
+        if asset is None:
+            return False
+        if asset.soy_quantity is not None and asset.soy_quantity != Decimal(0):
+            return True
+        if self.historical_events_by_asset.get(asset_id):
+            return True
+        if self.carried_ledger_state:
+            try:
+                return asset.get_classification_key() in self.carried_ledger_state
+            except ValueError:
+                return False
+        return False
+
+    def _materialize(self, asset: Asset) -> FifoLedger:
+        asset_id = asset.internal_asset_id
+        asset_multiplier_val: Optional[Decimal] = None
+        asset_fund_type: Optional[InvestmentFundType] = None
+        if isinstance(asset, Option):
+            asset_multiplier_val = asset.multiplier
+        elif isinstance(asset, InvestmentFund):
+            asset_fund_type = asset.fund_type
+
+        ledger = FifoLedger(
+            asset_internal_id=asset_id, asset_category=asset.asset_category,
+            asset_multiplier_from_asset=asset_multiplier_val,
+            currency_converter=self.currency_converter, exchange_rate_provider=self.exchange_rate_provider,
+            internal_working_precision=self.internal_calculation_precision,
+            decimal_rounding_mode=self.decimal_rounding_mode,
+            fund_type=asset_fund_type,
+            lot_validation_mode=global_config.FIFO_LOT_VALIDATION_MODE
+        )
+
+        if self.carried_ledger_state is not None:
+            carried_state = None
+            try:
+                classification_key = asset.get_classification_key()
+                carried_state = self.carried_ledger_state.get(classification_key, CarriedLedgerState(classification_key))
+            except ValueError as e:
+                logger.warning(f"Asset {asset_id} has no stable key to look up its carried EOY ledger state ({e}). Replaying history.")
+            if carried_state is not None:
+                if ledger.initialize_lots_from_carried_state(asset, carried_state.lots, carried_state.short_lots):
+                    self.seeded_ledger_count += 1
+                    self._ledgers[asset_id] = ledger
+                    return ledger
+                self.carried_state_divergences += 1
+
+        asset_historical_events_for_soy_init = []
+        if asset_id in self.historical_events_by_asset:
+            try:
+                asset_historical_events_for_soy_init = sorted(
+                    self.historical_events_by_asset[asset_id], key=lambda e: get_cached_event_sort_key(e, self.asset_resolver)
+                )
+            except ValueError as e:
+                logger.critical(f"Fatal error sorting historical events for asset {asset.get_classification_key()} (ID: {asset_id}): {e}. Cannot guarantee deterministic order for FIFO init. Aborting.")
+                raise e
+
+        try:
+            ledger.initialize_lots_from_soy(
+                asset=asset,
+                all_historical_events_for_asset=asset_historical_events_for_soy_init,
+                tax_year=self.tax_year
+            )
+        except ValueError as e:
+            logger.critical(f"Fatal error initializing FIFO lots from SOY for asset {asset.get_classification_key()} (ID: {asset_id}): {e}. Aborting.")
+            raise e
+        self._ledgers[asset_id] = ledger
+        return ledger
@@ -0,0 +1,135 @@
+# src/engine/ledger_state.py
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Optional
+
+from src.domain.assets import Asset
+from src.utils.file_utils import write_file_atomically
+from .fifo_manager import FifoLedger, FifoLot, ShortFifoLot
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the layout of the ledger state file changes; older files are ignored.
+LEDGER_STATE_FORMAT_VERSION = 1
+
+
+@dataclass
+class CarriedLedgerState:
+    """Open long and short lots of one asset at the end of a tax year, keyed by asset classification key."""
+    classification_key: str
+    lots: List[FifoLot] = field(default_factory=list)
+    short_lots: List[ShortFifoLot] = field(default_factory=list)
+
+    @property
+    def net_quantity(self) -> Decimal:
+        return sum((lot.quantity for lot in self.lots), Decimal(0)) - \
+               sum((lot.quantity_shorted for lot in self.short_lots), Decimal(0))
+
+
+def _lot_to_dict(lot: FifoLot) -> Dict[str, str]:
+    return {
+        "acquisition_date": lot.acquisition_date,
+        "quantity": str(lot.quantity),
+        "unit_cost_basis_eur": str(lot.unit_cost_basis_eur),
+        "total_cost_basis_eur": str(lot.total_cost_basis_eur),
+        "source_transaction_id": lot.source_transaction_id,
+    }
+
+
+def _short_lot_to_dict(lot: ShortFifoLot) -> Dict[str, str]:
+    return {
+        "opening_date": lot.opening_date,
+        "quantity_shorted": str(lot.quantity_shorted),
+        "unit_sale_proceeds_eur": str(lot.unit_sale_proceeds_eur),
+        "total_sale_proceeds_eur": str(lot.total_sale_proceeds_eur),
+        "source_transaction_id": lot.source_transaction_id,
+    }
+
+
+def _lot_from_dict(data: Mapping[str, Any]) -> FifoLot:
+    return FifoLot(
+        acquisition_date=data["acquisition_date"], quantity=Decimal(data["quantity"]),
+        unit_cost_basis_eur=Decimal(data["unit_cost_basis_eur"]), total_cost_basis_eur=Decimal(data["total_cost_basis_eur"]),
+        source_transaction_id=data["source_transaction_id"]
+    )
+
+
+def _short_lot_from_dict(data: Mapping[str, Any]) -> ShortFifoLot:
+    return ShortFifoLot(
+        opening_date=data["opening_date"], quantity_shorted=Decimal(data["quantity_shorted"]),
+        unit_sale_proceeds_eur=Decimal(data["unit_sale_proceeds_eur"]), total_sale_proceeds_eur=Decimal(data["total_sale_proceeds_eur"]),
+        source_transaction_id=data["source_transaction_id"]
+    )
+
+
+def export_eoy_ledger_state(fifo_ledgers: Mapping[uuid.UUID, FifoLedger], assets_by_internal_id: Mapping[uuid.UUID, Asset],
+                            tax_year: int, file_path: str) -> int:
+    """
+    Writes the open lots of every ledger at the end of tax_year as JSON (amounts as exact decimal
+    strings), so that the next tax year can be seeded from it. The file is written atomically.
+    Returns the number of exported ledgers (ledgers without open lots are not written).
+    """
+    ledgers: Dict[str, Any] = {}
+    for asset_id, ledger in fifo_ledgers.items():
+        if not ledger.lots and not ledger.short_lots:
+            continue
+        asset = assets_by_internal_id.get(asset_id)
+        if asset is None:
+            logger.warning(f"Ledger state export: ledger {asset_id} has no asset. Skipping.")
+            continue
+        try:
+            classification_key = asset.get_classification_key()
+        except ValueError as e:
+            logger.warning(f"Ledger state export: no stable key for asset {asset_id} ({e}). Its lots are not exported.")
+            continue
+        if classification_key in ledgers:
+            logger.warning(f"Ledger state export: duplicate asset key {classification_key}. Keeping the first ledger.")
+            continue
+        ledgers[classification_key] = {
+            "description": asset.description,
+            "lots": [_lot_to_dict(lot) for lot in ledger.lots],
+            "short_lots": [_short_lot_to_dict(lot) for lot in ledger.short_lots],
+        }
+
+    state = {"format_version": LEDGER_STATE_FORMAT_VERSION, "tax_year": tax_year, "ledgers": ledgers}
+    write_file_atomically(file_path, lambda f: json.dump(state, f, indent=2))
+    logger.info(f"Exported end-of-year {tax_year} FIFO ledger state ({len(ledgers)} ledgers) to {file_path}.")
+    return len(ledgers)
+
+
+def load_carried_ledger_state(file_path: str, tax_year: int) -> Optional[Dict[str, CarriedLedgerState]]:
+    """
+    Loads the end-of-year state of tax_year - 1 for seeding tax_year. Returns None (and the ledgers
+    are built by replaying history) if the file is missing, unreadable or for another year.
+    """
+    if not os.path.exists(file_path):
+        logger.warning(f"No FIFO ledger state at {file_path}. Replaying history for the start-of-year lots.")
+        return None
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("format_version") != LEDGER_STATE_FORMAT_VERSION:
+            logger.warning(f"FIFO ledger state {file_path} has unsupported format version {state.get('format_version')}. "
+                           f"Replaying history for the start-of-year lots.")
+            return None
+        if state.get("tax_year") != tax_year - 1:
+            logger.warning(f"FIFO ledger state {file_path} is for the end of {state.get('tax_year')}, but tax year {tax_year} "
+                           f"needs the end of {tax_year - 1}. Replaying history for the start-of-year lots.")
+            return None
+        carried_states = {
+            key: CarriedLedgerState(
+                classification_key=key,
+                lots=[_lot_from_dict(lot) for lot in ledger.get("lots", [])],
+                short_lots=[_short_lot_from_dict(lot) for lot in ledger.get("short_lots", [])]
+            )
+            for key, ledger in state["ledgers"].items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, ArithmeticError) as e:
+        logger.warning(f"Could not load FIFO ledger state {file_path}: {e}. Replaying history for the start-of-year lots.")
+        return None
+    logger.info(f"Loaded end-of-year {tax_year - 1} FIFO ledger state ({len(carried_states)} ledgers) from {file_path}.")
+    return carried_states
@@ -1,19 +1,27 @@
 # src/engine/loss_offsetting.py
 import logging
+import uuid
 from decimal import Decimal, Context
-from collections import defaultdict
 from typing import List, Dict, Optional
 
-from src.domain.results import RealizedGainLoss, VorabpauschaleData, LossOffsettingResult
+from src.domain.results import (
+    RealizedGainLoss, VorabpauschaleData, LossOffsettingResult, ReportingSubtotals,
+    SUBTOTAL_INTEREST_RECEIVED, SUBTOTAL_STOCK_CASH_DIVIDENDS, SUBTOTAL_STOCK_DIVIDENDS_IN_SHARES,
+    SUBTOTAL_BOND_GAINS, SUBTOTAL_BOND_LOSSES, SUBTOTAL_STUECKZINSEN_PAID, SUBTOTAL_WHT_TAXED_INCOME,
+    SUBTOTAL_WHT_LINKED_HIGH_CONFIDENCE, SUBTOTAL_WHT_LINKED_MEDIUM_CONFIDENCE, SUBTOTAL_WHT_LINKED_LOW_CONFIDENCE,
+    SUBTOTAL_WHT_UNLINKED,
+)
 from src.domain.events import FinancialEvent, CashFlowEvent, WithholdingTaxEvent
 from src.domain.enums import AssetCategory, FinancialEventType, InvestmentFundType, TaxReportingCategory
 from src.domain.assets import Asset, InvestmentFund
 from src.identification.asset_resolver import AssetResolver
+from src.reporting.reporting_utils import get_kap_inv_category_for_reporting
 from src.utils.tax_utils import get_teilfreistellung_rate_for_fund_type
 import src.config as global_config
 
 logger = logging.getLogger(__name__)
 
+
 class LossOffsettingEngine:
     def __init__(self,
                  realized_gains_losses: List[RealizedGainLoss],
@@ -55,38 +63,40 @@ class LossOffsettingEngine:
 
 
     def calculate_reporting_figures(self) -> LossOffsettingResult:
-        result = LossOffsettingResult()
-
-        stock_gains_gross = self.ctx.create_decimal(Decimal('0'))
-        stock_losses_abs = self.ctx.create_decimal(Decimal('0'))
-        derivative_gains_gross = self.ctx.create_decimal(Decimal('0'))
-        derivative_losses_abs = self.ctx.create_decimal(Decimal('0'))
-        kap_other_income_positive = self.ctx.create_decimal(Decimal('0'))
-        kap_other_losses_abs = self.ctx.create_decimal(Decimal('0'))
-
-        fund_income_net_taxable = self.ctx.create_decimal(Decimal('0'))
+        """
+        Aggregates the realized gains/losses and the income and withholding tax events in one pass
+        each into result.subtotals, then derives the form lines and conceptual pots from its totals.
+        """
+        result = LossOffsettingResult(subtotals=ReportingSubtotals(self.ctx))
+        subtotals = result.subtotals
+        zero = self.ctx.create_decimal(Decimal('0'))
 
-        p23_net_total = self.ctx.create_decimal(Decimal('0'))
+        fund_income_net_taxable = zero
+        kap_inv_gross_lines: Dict[TaxReportingCategory, None] = {} # Insertion-ordered set
 
         for rgl in self.realized_gains_losses:
-            gross_gl_eur = rgl.gross_gain_loss_eur if rgl.gross_gain_loss_eur is not None else self.ctx.create_decimal(Decimal('0'))
+            gross_gl_eur = rgl.gross_gain_loss_eur if rgl.gross_gain_loss_eur is not None else zero
+            asset_id = rgl.asset_internal_id
+            month = rgl.realization_date_obj.month if rgl.realization_date_obj else None
 
             cat = rgl.asset_category_at_realization
             if cat == AssetCategory.STOCK:
                 if gross_gl_eur > Decimal('0'):
-                    stock_gains_gross = self.ctx.add(stock_gains_gross, gross_gl_eur)
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_AKTIEN_GEWINN, gross_gl_eur, asset_id, month)
                 else:
-                    stock_losses_abs = self.ctx.add(stock_losses_abs, gross_gl_eur.copy_abs())
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_AKTIEN_VERLUST, gross_gl_eur.copy_abs(), asset_id, month)
             elif cat in [AssetCategory.OPTION, AssetCategory.CFD]:
                 if gross_gl_eur > Decimal('0'):
-                    derivative_gains_gross = self.ctx.add(derivative_gains_gross, gross_gl_eur)
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_TERMIN_GEWINN, gross_gl_eur, asset_id, month)
                 else:
-                    derivative_losses_abs = self.ctx.add(derivative_losses_abs, gross_gl_eur.copy_abs())
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_TERMIN_VERLUST, gross_gl_eur.copy_abs(), asset_id, month)
             elif cat == AssetCategory.BOND:
                 if gross_gl_eur > Decimal('0'):
-                    kap_other_income_positive = self.ctx.add(kap_other_income_positive, gross_gl_eur)
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_SONSTIGE_KAPITALERTRAEGE, gross_gl_eur, asset_id, month)
+                    subtotals.add(SUBTOTAL_BOND_GAINS, gross_gl_eur, asset_id, month)
                 else:
-                    kap_other_losses_abs = self.ctx.add(kap_other_losses_abs, gross_gl_eur.copy_abs())
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_SONSTIGE_VERLUSTE, gross_gl_eur.copy_abs(), asset_id, month)
+                    subtotals.add(SUBTOTAL_BOND_LOSSES, gross_gl_eur.copy_abs(), asset_id, month)
             elif cat == AssetCategory.INVESTMENT_FUND:
                 net_gl_eur_after_tf = rgl.net_gain_loss_after_teilfreistellung_eur
                 if net_gl_eur_after_tf is None:
@@ -95,63 +105,125 @@ class LossOffsettingEngine:
 
                 fund_income_net_taxable = self.ctx.add(fund_income_net_taxable, net_gl_eur_after_tf)
 
+                # Anlage KAP-INV gross gains/losses
+                if rgl.gross_gain_loss_eur is not None:
+                    reporting_cat = get_kap_inv_category_for_reporting(rgl.fund_type_at_sale, is_distribution=False, is_gain=True)
+                    if reporting_cat:
+                        if not rgl.tax_reporting_category:
+                            logger.warning(f"RGL for fund {rgl.asset_internal_id} missing tax_reporting_category. Using derived category {reporting_cat}.")
+                        kap_inv_line = rgl.tax_reporting_category or reporting_cat
+                        subtotals.add(kap_inv_line, rgl.gross_gain_loss_eur, asset_id, month)
+                        kap_inv_gross_lines[kap_inv_line] = None
+
             elif cat == AssetCategory.PRIVATE_SALE_ASSET:
                 if rgl.is_taxable_under_section_23:
-                    p23_net_total = self.ctx.add(p23_net_total, gross_gl_eur)
+                    subtotals.add("ANLAGE_SO_Z54_NET_GV", gross_gl_eur, asset_id, month)
 
-        stueckzinsen_paid_sum = self.ctx.create_decimal(Decimal('0')) # Only used for logging/future explicit handling
+        # Each asset is resolved once; events of one asset share it
+        resolved_assets: Dict[uuid.UUID, Optional[Asset]] = {}
+        income_events_by_id: Dict[uuid.UUID, CashFlowEvent] = {}
+        linked_wht_events: List[WithholdingTaxEvent] = []
 
         for event in self.current_year_financial_events:
-            asset_resolved = self.asset_resolver.get_asset_by_id(event.asset_internal_id)
+            asset_id = event.asset_internal_id
+            month = event.event_date_obj.month if event.event_date_obj else None
+            event_gross_eur = event.gross_amount_eur if event.gross_amount_eur is not None else zero
+
+            # Foreign tax paid (Zeile 41), whether or not the asset resolves
+            if isinstance(event, WithholdingTaxEvent):
+                country = event.source_country_code
+                subtotals.add(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID, event_gross_eur, asset_id, month, country)
+                if event.taxed_income_event_id is None:
+                    subtotals.add(SUBTOTAL_WHT_UNLINKED, event_gross_eur, asset_id, month, country)
+                else:
+                    confidence = event.link_confidence_score or 0
+                    if confidence >= 80:
+                        link_line = SUBTOTAL_WHT_LINKED_HIGH_CONFIDENCE
+                    elif confidence >= 60:
+                        link_line = SUBTOTAL_WHT_LINKED_MEDIUM_CONFIDENCE
+                    else:
+                        link_line = SUBTOTAL_WHT_LINKED_LOW_CONFIDENCE
+                    subtotals.add(link_line, event_gross_eur, asset_id, month, country)
+                    if event.gross_amount_eur is not None:
+                        linked_wht_events.append(event)
+                continue
+            if isinstance(event, CashFlowEvent):
+                income_events_by_id[event.event_id] = event
+
+            if asset_id in resolved_assets:
+                asset_resolved = resolved_assets[asset_id]
+            else:
+                asset_resolved = resolved_assets[asset_id] = self.asset_resolver.get_asset_by_id(asset_id)
             if not asset_resolved:
                 logger.warning(f"Could not resolve asset ID {event.asset_internal_id} for financial event {event.event_id}. Skipping for LossOffsettingEngine income aggregation.")
                 continue
 
-            event_gross_eur = event.gross_amount_eur if event.gross_amount_eur is not None else self.ctx.create_decimal(Decimal('0'))
-
             if event.event_type == FinancialEventType.DIVIDEND_CASH and isinstance(asset_resolved, Asset) and asset_resolved.asset_category == AssetCategory.STOCK:
                 if event_gross_eur > Decimal('0'):
-                    kap_other_income_positive = self.ctx.add(kap_other_income_positive, event_gross_eur)
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_SONSTIGE_KAPITALERTRAEGE, event_gross_eur, asset_id, month)
+                    subtotals.add(SUBTOTAL_STOCK_CASH_DIVIDENDS, event_gross_eur, asset_id, month)
             elif event.event_type == FinancialEventType.INTEREST_RECEIVED:
                  if event_gross_eur > Decimal('0'):
-                    kap_other_income_positive = self.ctx.add(kap_other_income_positive, event_gross_eur)
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_SONSTIGE_KAPITALERTRAEGE, event_gross_eur, asset_id, month)
+                    subtotals.add(SUBTOTAL_INTEREST_RECEIVED, event_gross_eur, asset_id, month)
             elif event.event_type == FinancialEventType.INTEREST_PAID_STUECKZINSEN:
-                 stueckzinsen_paid_sum = self.ctx.add(stueckzinsen_paid_sum, event_gross_eur.copy_abs())
                  # According to PRD Section 2.6, paid Stückzinsen reduce "Other Capital Income".
                  # If they are reliably parsed as negative amounts, this would be:
                  # kap_other_income_positive = self.ctx.add(kap_other_income_positive, event_gross_eur)
                  # Or if always positive cost:
                  if event_gross_eur.copy_abs() > Decimal('0'): # ensure non-zero before adding to losses
-                    kap_other_losses_abs = self.ctx.add(kap_other_losses_abs, event_gross_eur.copy_abs())
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_SONSTIGE_VERLUSTE, event_gross_eur.copy_abs(), asset_id, month)
+                    subtotals.add(SUBTOTAL_STUECKZINSEN_PAID, event_gross_eur.copy_abs(), asset_id, month)
 
             elif event.event_type == FinancialEventType.DISTRIBUTION_FUND and isinstance(asset_resolved, InvestmentFund):
                 net_dist_eur = self._calculate_net_fund_distribution(event, asset_resolved)
                 fund_income_net_taxable = self.ctx.add(fund_income_net_taxable, net_dist_eur)
+                # Anlage KAP-INV gross distributions
+                if isinstance(event, CashFlowEvent) and event.gross_amount_eur is not None:
+                    reporting_cat = get_kap_inv_category_for_reporting(asset_resolved.fund_type, is_distribution=True, is_gain=False)
+                    if reporting_cat:
+                        subtotals.add(reporting_cat, event.gross_amount_eur, asset_id, month)
+                        kap_inv_gross_lines[reporting_cat] = None
             elif event.event_type == FinancialEventType.CORP_STOCK_DIVIDEND:
                  if isinstance(asset_resolved, Asset) and asset_resolved.asset_category == AssetCategory.STOCK and event_gross_eur > Decimal('0'):
-                    kap_other_income_positive = self.ctx.add(kap_other_income_positive, event_gross_eur)
+                    subtotals.add(TaxReportingCategory.ANLAGE_KAP_SONSTIGE_KAPITALERTRAEGE, event_gross_eur, asset_id, month)
+                    subtotals.add(SUBTOTAL_STOCK_DIVIDENDS_IN_SHARES, event_gross_eur, asset_id, month)
             elif event.event_type == FinancialEventType.CAPITAL_REPAYMENT:
                  # Capital repayments themselves don't create taxable income
                  # Excess amounts are now handled as separate DIVIDEND_CASH events
                  pass
 
+        # Income subject to withholding tax, by the WHT's country (the income event may come after its WHT)
+        for wht_event in linked_wht_events:
+            income_event = income_events_by_id.get(wht_event.taxed_income_event_id)
+            if income_event is not None and income_event.gross_amount_eur is not None:
+                subtotals.add(SUBTOTAL_WHT_TAXED_INCOME, income_event.gross_amount_eur, income_event.asset_internal_id,
+                              wht_event.event_date_obj.month if wht_event.event_date_obj else None, wht_event.source_country_code)
+
         for vp_item in self.vorabpauschale_items:
             if vp_item.tax_year == self.tax_year:
                 net_vp_eur = vp_item.net_taxable_vorabpauschale_eur
                 if net_vp_eur is None:
                     logger.warning(f"Vorabpauschale item for asset {vp_item.asset_internal_id} has no net_taxable_vorabpauschale_eur. Assuming 0.")
-                    net_vp_eur = self.ctx.create_decimal(Decimal('0'))
+                    net_vp_eur = zero
 
                 fund_income_net_taxable = self.ctx.add(fund_income_net_taxable, net_vp_eur)
 
+                # Anlage KAP-INV gross Vorabpauschale (0 for 2023)
+                if vp_item.gross_vorabpauschale_eur != Decimal(0) and vp_item.tax_reporting_category_gross:
+                    subtotals.add(vp_item.tax_reporting_category_gross, vp_item.gross_vorabpauschale_eur, vp_item.asset_internal_id)
+                    kap_inv_gross_lines[vp_item.tax_reporting_category_gross] = None
+
         result.conceptual_fund_income_net_taxable = fund_income_net_taxable.quantize(self.TWO_PLACES, context=self.ctx)
 
-        # Calculate foreign tax paid (Zeile 41)
-        foreign_tax_total = self.ctx.create_decimal(Decimal('0'))
-        for event in self.current_year_financial_events:
-            if isinstance(event, WithholdingTaxEvent):
-                tax_amount = event.gross_amount_eur if event.gross_amount_eur is not None else self.ctx.create_decimal(Decimal('0'))
-                foreign_tax_total = self.ctx.add(foreign_tax_total, tax_amount)
+        stock_gains_gross = subtotals.total(TaxReportingCategory.ANLAGE_KAP_AKTIEN_GEWINN)
+        stock_losses_abs = subtotals.total(TaxReportingCategory.ANLAGE_KAP_AKTIEN_VERLUST)
+        derivative_gains_gross = subtotals.total(TaxReportingCategory.ANLAGE_KAP_TERMIN_GEWINN)
+        derivative_losses_abs = subtotals.total(TaxReportingCategory.ANLAGE_KAP_TERMIN_VERLUST)
+        kap_other_income_positive = subtotals.total(TaxReportingCategory.ANLAGE_KAP_SONSTIGE_KAPITALERTRAEGE)
+        kap_other_losses_abs = subtotals.total(TaxReportingCategory.ANLAGE_KAP_SONSTIGE_VERLUSTE)
+        foreign_tax_total = subtotals.total(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID)
+        p23_net_total = subtotals.total("ANLAGE_SO_Z54_NET_GV")
 
         # Anlage KAP Line Calculations (as per PRD Sec 2.7)
         result.form_line_values[TaxReportingCategory.ANLAGE_KAP_AKTIEN_GEWINN] = stock_gains_gross.quantize(self.TWO_PLACES, context=self.ctx)
@@ -175,44 +247,8 @@ class LossOffsettingEngine:
         result.form_line_values["ANLAGE_SO_Z54_NET_GV"] = p23_net_total.quantize(self.TWO_PLACES, context=self.ctx)
 
         # Anlage KAP-INV (Gross Figures)
-        kap_inv_gross_dist_collector = defaultdict(lambda: self.ctx.create_decimal(Decimal('0')))
-        kap_inv_gross_gl_collector = defaultdict(lambda: self.ctx.create_decimal(Decimal('0')))
-        kap_inv_gross_vop_collector = defaultdict(lambda: self.ctx.create_decimal(Decimal('0'))) # Should be 0 for 2023
-
-        for event in self.current_year_financial_events:
-            if isinstance(event, CashFlowEvent) and event.event_type == FinancialEventType.DISTRIBUTION_FUND:
-                asset = self.asset_resolver.get_asset_by_id(event.asset_internal_id)
-                if isinstance(asset, InvestmentFund) and event.gross_amount_eur is not None:
-                    from src.reporting.reporting_utils import get_kap_inv_category_for_reporting
-                    reporting_cat = get_kap_inv_category_for_reporting(asset.fund_type, is_distribution=True, is_gain=False) # For distributions
-                    if reporting_cat:
-                        kap_inv_gross_dist_collector[reporting_cat] = self.ctx.add(kap_inv_gross_dist_collector[reporting_cat], event.gross_amount_eur)
-
-        for key, val in kap_inv_gross_dist_collector.items():
-            result.form_line_values[key] = val.quantize(self.TWO_PLACES, context=self.ctx)
-
-        for rgl in self.realized_gains_losses:
-            if rgl.asset_category_at_realization == AssetCategory.INVESTMENT_FUND and rgl.gross_gain_loss_eur is not None:
-                from src.reporting.reporting_utils import get_kap_inv_category_for_reporting
-                reporting_cat = get_kap_inv_category_for_reporting(rgl.fund_type_at_sale, is_distribution=False, is_gain=True)
-                if reporting_cat:
-                     if rgl.tax_reporting_category:
-                         kap_inv_gross_gl_collector[rgl.tax_reporting_category] = self.ctx.add(kap_inv_gross_gl_collector[rgl.tax_reporting_category], rgl.gross_gain_loss_eur)
-                     else:
-                         logger.warning(f"RGL for fund {rgl.asset_internal_id} missing tax_reporting_category. Using derived category {reporting_cat}.")
-                         kap_inv_gross_gl_collector[reporting_cat] = self.ctx.add(kap_inv_gross_gl_collector[reporting_cat], rgl.gross_gain_loss_eur)
-
-
-        for key, val in kap_inv_gross_gl_collector.items():
-            result.form_line_values[key] = val.quantize(self.TWO_PLACES, context=self.ctx)
-
-        for vp_item in self.vorabpauschale_items: # Will be 0 for 2023
-             if vp_item.tax_year == self.tax_year and vp_item.gross_vorabpauschale_eur != Decimal(0):
-                if vp_item.tax_reporting_category_gross:
-                     kap_inv_gross_vop_collector[vp_item.tax_reporting_category_gross] = self.ctx.add(kap_inv_gross_vop_collector[vp_item.tax_reporting_category_gross], vp_item.gross_vorabpauschale_eur)
-
-        for key, val in kap_inv_gross_vop_collector.items():
-            result.form_line_values[key] = val.quantize(self.TWO_PLACES, context=self.ctx)
+        for kap_inv_line in kap_inv_gross_lines:
+            result.form_line_values[kap_inv_line] = subtotals.total(kap_inv_line).quantize(self.TWO_PLACES, context=self.ctx)
 
         # Conceptual Net Balances (as per PRD Sec 2.8)
         result.conceptual_net_stocks = (self.ctx.subtract(stock_gains_gross, stock_losses_abs)).quantize(self.TWO_PLACES, context=self.ctx)
@@ -0,0 +1,109 @@
+# src/engine/lot_store.py
+import logging
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Once this many consumed lots have accumulated at the head of the store (and they make up
+# at least half of the backing list) the consumed prefix is dropped in one slice deletion.
+_COMPACTION_MIN_CONSUMED_LOTS = 64
+
+
+class FifoLotStore:
+    """
+    Ordered container for FIFO lots (FifoLot or ShortFifoLot) of a single ledger.
+
+    Lots are kept in acquisition order using the same key the ledger previously sorted by:
+    (lot date, source_transaction_id), with ties kept in insertion order.
+    - The sort key is built once on insertion from the lot's typed date attribute (date_attr).
+    - In-order inserts (the common case) are appends; out-of-order lots are placed by binary search.
+    - Lots are consumed from the head in amortised O(1) (a head index plus periodic compaction).
+    - The open quantity of all lots is tracked as a running total.
+
+    The ledger mutates the head lot in place on partial consumption and reports the consumed
+    quantity via deduct_open_quantity(). Bulk quantity changes (e.g. splits) must be followed by
+    recompute_open_quantity().
+    """
+
+    def __init__(self, quantity_attr: str, date_attr: str):
+        self._quantity_attr = quantity_attr
+        self._date_attr = date_attr
+        self._lots: List[Any] = []
+        self._keys: List[Tuple[date, str]] = []
+        self._head: int = 0
+        self._open_quantity: Decimal = Decimal(0)
+
+    def __len__(self) -> int:
+        return len(self._lots) - self._head
+
+    def __bool__(self) -> bool:
+        return len(self._lots) > self._head
+
+    def __iter__(self) -> Iterator[Any]:
+        return islice(self._lots, self._head, None)
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("FifoLotStore index out of range")
+        return self._lots[self._head + index]
+
+    @property
+    def open_quantity(self) -> Decimal:
+        """Sum of the quantities of all open lots, maintained incrementally."""
+        return self._open_quantity
+
+    def add(self, lot: Any) -> None:
+        """Inserts a lot at its FIFO position. Raises ValueError if the lot has no (parseable) date."""
+        lot_date = getattr(lot, self._date_attr)
+        if lot_date is None:
+            raise ValueError(f"Missing or unparseable {self._date_attr} for lot {lot.source_transaction_id}. Cannot place lot in FIFO order.")
+        key = (lot_date, lot.source_transaction_id)
+
+        if not self or key >= self._keys[-1]:
+            self._lots.append(lot)
+            self._keys.append(key)
+        else:
+            position = bisect_right(self._keys, key, lo=self._head)
+            self._lots.insert(position, lot)
+            self._keys.insert(position, key)
+        self._open_quantity += getattr(lot, self._quantity_attr)
+
+    def head(self) -> Any:
+        """Returns the oldest open lot without removing it."""
+        if not self:
+            raise IndexError("head() called on an empty FifoLotStore")
+        return self._lots[self._head]
+
+    def pop_head(self) -> Any:
+        """Removes and returns the oldest open lot, deducting its quantity from the open total."""
+        lot = self.head()
+        self._lots[self._head] = None
+        self._head += 1
+        self._open_quantity -= getattr(lot, self._quantity_attr)
+        if not self:
+            self.clear()
+        elif self._head >= _COMPACTION_MIN_CONSUMED_LOTS and self._head * 2 >= len(self._lots):
+            del self._lots[:self._head]
+            del self._keys[:self._head]
+            self._head = 0
+        return lot
+
+    def deduct_open_quantity(self, quantity: Decimal) -> None:
+        """Records that `quantity` was consumed in place from a lot that stays open."""
+        self._open_quantity -= quantity
+
+    def recompute_open_quantity(self) -> None:
+        """Rebuilds the running open-quantity total after lot quantities were changed in bulk."""
+        self._open_quantity = sum((getattr(lot, self._quantity_attr) for lot in self), Decimal(0))
+
+    def clear(self) -> None:
+        self._lots.clear()
+        self._keys.clear()
+        self._head = 0
+        self._open_quantity = Decimal(0)
@@ -0,0 +1,185 @@
+# src/engine/parallel_fifo.py
+import decimal
+import logging
+import os
+import pickle
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.domain.events import FinancialEvent, TradeEvent, OptionLifecycleEvent, CorpActionMergerStock
+from src.domain.results import RealizedGainLoss
+from src.identification.asset_resolver import AssetResolver
+from src.utils.currency_converter import CurrencyConverter
+from .ledger_registry import FifoLedgerRegistry
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker process by _init_worker. With the default fork start method these are
+# inherited from the parent process instead of being pickled for every task.
+_worker_asset_resolver: Optional[AssetResolver] = None
+_worker_currency_converter: Optional[CurrencyConverter] = None
+_worker_events: List[FinancialEvent] = []
+_worker_fifo_ledgers: Optional[FifoLedgerRegistry] = None
+
+
+class AssetComponent:
+    """Events (by index into the current year events) of a set of assets that interact with each other."""
+    __slots__ = ("event_indices", "asset_ids")
+
+    def __init__(self):
+        self.event_indices: List[int] = []
+        self.asset_ids: Set[uuid.UUID] = set()
+
+
+def partition_events_by_asset_component(events: List[FinancialEvent], asset_resolver: AssetResolver) -> List[AssetComponent]:
+    """
+    Groups events into connected components of interacting assets. Assets are linked by option
+    lifecycle events (option and underlying), stock trades resulting from them (related_option_event_id)
+    and stock mergers (old and new asset). Components are ordered by their first event.
+    """
+    parent: Dict[uuid.UUID, uuid.UUID] = {}
+
+    def find(asset_id: uuid.UUID) -> uuid.UUID:
+        root = parent.setdefault(asset_id, asset_id)
+        while root != parent[root]:
+            root = parent[root]
+        while asset_id != root:
+            parent[asset_id], asset_id = root, parent[asset_id]
+        return root
+
+    def union(first: uuid.UUID, second: uuid.UUID):
+        first_root, second_root = find(first), find(second)
+        if first_root != second_root:
+            parent[second_root] = first_root
+
+    asset_id_by_event_id = {event.event_id: event.asset_internal_id for event in events}
+    for event in events:
+        find(event.asset_internal_id)
+        if isinstance(event, OptionLifecycleEvent):
+            option_asset = asset_resolver.get_asset_by_id(event.asset_internal_id)
+            underlying_id = getattr(option_asset, "underlying_asset_internal_id", None)
+            if underlying_id is not None:
+                union(event.asset_internal_id, underlying_id)
+        elif isinstance(event, TradeEvent) and event.related_option_event_id is not None:
+            related_asset_id = asset_id_by_event_id.get(event.related_option_event_id)
+            if related_asset_id is not None:
+                union(event.asset_internal_id, related_asset_id)
+        elif isinstance(event, CorpActionMergerStock):
+            union(event.asset_internal_id, event.new_asset_internal_id)
+
+    components: Dict[uuid.UUID, AssetComponent] = {}
+    for event_idx, event in enumerate(events):
+        component = components.setdefault(find(event.asset_internal_id), AssetComponent())
+        component.event_indices.append(event_idx)
+        component.asset_ids.add(event.asset_internal_id)
+    return list(components.values())
+
+
+def _balance_batches(components: List[AssetComponent], batch_count: int) -> List[AssetComponent]:
+    """Packs components into batch_count batches of similar event counts (largest component first)."""
+    batches = [AssetComponent() for _ in range(min(batch_count, len(components)))]
+    for component in sorted(components, key=lambda c: len(c.event_indices), reverse=True):
+        batch = min(batches, key=lambda b: len(b.event_indices))
+        batch.event_indices.extend(component.event_indices)
+        batch.asset_ids.update(component.asset_ids)
+    for batch in batches:
+        batch.event_indices.sort()
+    return batches
+
+
+def _init_worker(asset_resolver: AssetResolver, currency_converter: CurrencyConverter, decimal_context: decimal.Context,
+                 current_year_events: List[FinancialEvent], fifo_ledgers: FifoLedgerRegistry):
+    global _worker_asset_resolver, _worker_currency_converter, _worker_events, _worker_fifo_ledgers
+    _worker_asset_resolver = asset_resolver
+    _worker_currency_converter = currency_converter
+    _worker_events = current_year_events
+    _worker_fifo_ledgers = fifo_ledgers
+    decimal.setcontext(decimal_context)
+
+
+def _process_batch(event_indices: List[int], asset_ids: Set[uuid.UUID]):
+    """
+    Processes the events of one batch with the worker's copy of their ledgers. Only what changed is
+    sent back: the event attributes the processors replaced, the batch's ledgers and the results.
+    """
+    from .calculation_engine import process_current_year_events
+
+    batch_events = [_worker_events[i] for i in event_indices]
+    attributes_before = [dict(event.__dict__) for event in batch_events]
+    pending_option_adjustments: Dict = {}
+    realized_gains_losses_by_event, spawned_events = process_current_year_events(
+        batch_events, _worker_fifo_ledgers, _worker_asset_resolver, _worker_currency_converter, pending_option_adjustments
+    )
+    batch_ledgers = {asset_id: _worker_fifo_ledgers[asset_id] for asset_id in asset_ids if asset_id in _worker_fifo_ledgers}
+
+    event_updates = []
+    for local_idx, before in enumerate(attributes_before):
+        changed = {name: value for name, value in batch_events[local_idx].__dict__.items()
+                   if name not in before or before[name] is not value}
+        if changed:
+            event_updates.append((local_idx, changed))
+    # The ledgers only need the converter for SOY fallback lots, which were created in the parent
+    for ledger in batch_ledgers.values():
+        ledger.currency_converter = ledger.exchange_rate_provider = None
+    return event_updates, batch_ledgers, realized_gains_losses_by_event, spawned_events, pending_option_adjustments
+
+
+def process_events_by_asset_component(
+    current_year_events: List[FinancialEvent],
+    fifo_ledgers: FifoLedgerRegistry,
+    asset_resolver: AssetResolver,
+    currency_converter: CurrencyConverter,
+    pending_option_adjustments: Dict,
+    max_workers: Optional[int] = None
+) -> Optional[List[Tuple[int, List[RealizedGainLoss]]]]:
+    """
+    Parallel counterpart of calculation_engine.process_current_year_events: each batch of asset
+    components is processed in a worker process with its own copy of the events and ledgers. The
+    resulting ledgers, event updates (e.g. option premium adjustments), spawned events and
+    RealizedGainLoss records are merged back in the global event order, so the outcome equals the
+    sequential run.
+    Returns None (nothing was changed) if there is nothing to parallelize or the process pool is not usable.
+    """
+    components = partition_events_by_asset_component(current_year_events, asset_resolver)
+    if len(components) < 2:
+        logger.info(f"Current tax year events form {len(components)} asset components. Processing them sequentially.")
+        return None
+    # Ledgers are initialized here, so the SOY/history bookkeeping of the registry stays in this process
+    from .calculation_engine import event_needs_ledger
+    for event in current_year_events:
+        if event_needs_ledger(event):
+            fifo_ledgers.ledger_for(event.asset_internal_id)
+    max_workers = max_workers or os.cpu_count() or 1
+    batches = _balance_batches(components, max_workers)
+    logger.info(f"Processing {len(current_year_events)} current tax year events in {len(components)} asset components "
+                f"({len(batches)} batches) with up to {max_workers} worker processes...")
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(batches)), initializer=_init_worker,
+                                 initargs=(asset_resolver, currency_converter, decimal.getcontext(),
+                                           current_year_events, fifo_ledgers)) as pool:
+            futures = [pool.submit(_process_batch, batch.event_indices, batch.asset_ids) for batch in batches]
+            results = [future.result() for future in futures]
+    except (OSError, BrokenProcessPool, pickle.PicklingError) as e:
+        logger.warning(f"Parallel FIFO processing failed ({e}). Processing the events sequentially.")
+        return None
+
+    realized_gains_losses_by_event: List[Tuple[int, List[RealizedGainLoss]]] = []
+    spawned_events: List[Tuple[int, FinancialEvent]] = []
+    for batch, (event_updates, processed_ledgers, batch_rgls, batch_spawned, batch_pending) in zip(batches, results):
+        for local_idx, changed in event_updates:
+            current_year_events[batch.event_indices[local_idx]].__dict__.update(changed)
+        for asset_id, ledger in processed_ledgers.items():
+            ledger.currency_converter = fifo_ledgers[asset_id].currency_converter
+            ledger.exchange_rate_provider = fifo_ledgers[asset_id].exchange_rate_provider
+            fifo_ledgers[asset_id] = ledger
+        realized_gains_losses_by_event.extend((batch.event_indices[local_idx], rgls) for local_idx, rgls in batch_rgls)
+        spawned_events.extend((batch.event_indices[local_idx], event) for local_idx, event in batch_spawned)
+        pending_option_adjustments.update(batch_pending)
+
+    realized_gains_losses_by_event.sort(key=lambda item: item[0])
+    spawned_events.sort(key=lambda item: item[0])
+    current_year_events.extend(event for _, event in spawned_events)
+    return realized_gains_losses_by_event
@@ -1,7 +1,7 @@
 # src/identification/asset_resolver.py
 import uuid
 from decimal import Decimal
-from typing import Dict, Set, Optional, Tuple, Any
+from typing import Dict, List, Set, Optional, Tuple, Any
 
 from src.domain.assets import (
     Asset, Stock, Bond, InvestmentFund, Option, Cfd, PrivateSaleAsset, CashBalance, Derivative # Changed Section23EstgAsset to PrivateSaleAsset
@@ -15,6 +15,11 @@ class AssetResolver:
         self.asset_classifier: AssetClassifier = asset_classifier
         self.alias_map: Dict[str, Asset] = {}
         self.assets_by_internal_id: Dict[uuid.UUID, Asset] = {}
+        # Secondary indexes, maintained by _index_asset/_unindex_asset (see reindex_asset)
+        self.assets_by_isin: Dict[str, Dict[uuid.UUID, Asset]] = {}
+        self.assets_by_symbol: Dict[str, Dict[uuid.UUID, Asset]] = {}
+        self.assets_by_category: Dict[AssetCategory, Dict[uuid.UUID, Asset]] = {}
+        self._indexed_keys: Dict[uuid.UUID, Tuple[Optional[str], Optional[str], AssetCategory]] = {}
 
     def get_asset_by_id(self, internal_asset_id: uuid.UUID) -> Optional[Asset]:
         """Retrieves an asset by its internal UUID."""
@@ -24,6 +29,66 @@ class AssetResolver:
         """Retrieves an asset by one of its alias strings."""
         return self.alias_map.get(alias_key)
 
+    def get_asset_by_isin(self, isin: str) -> Optional[Asset]:
+        """Retrieves the first registered asset still carrying the given ISIN as its ibkr_isin."""
+        assets = self.assets_by_isin.get(isin)
+        return next(iter(assets.values())) if assets else None
+
+    def get_assets_by_symbol(self, symbol: str) -> List[Asset]:
+        """All assets whose ibkr_symbol is the given symbol, in registration order."""
+        return list(self.assets_by_symbol.get(symbol.strip().upper(), {}).values())
+
+    def get_assets_by_category(self, category: AssetCategory) -> List[Asset]:
+        """All assets of the given category, in registration order."""
+        return list(self.assets_by_category.get(category, {}).values())
+
+    def reindex_asset(self, asset: Asset):
+        """Updates the secondary indexes after an asset's ISIN, symbol or category was changed in place."""
+        indexed_keys = self._indexed_keys.get(asset.internal_asset_id)
+        if indexed_keys is None:
+            self._index_asset(asset)
+            return
+        if indexed_keys == (asset.ibkr_isin, asset.ibkr_symbol, asset.asset_category) and \
+                self.assets_by_category[asset.asset_category].get(asset.internal_asset_id) is asset:
+            return
+        # Only the changed keys are moved, so the asset keeps its position under the others
+        # (an asset object replacing one with the same id takes its place)
+        isin, symbol, category = indexed_keys
+        if isin != asset.ibkr_isin:
+            self._remove_from_multimap(self.assets_by_isin, isin, asset.internal_asset_id)
+        if symbol != asset.ibkr_symbol:
+            self._remove_from_multimap(self.assets_by_symbol, symbol, asset.internal_asset_id)
+        if category != asset.asset_category:
+            self._remove_from_multimap(self.assets_by_category, category, asset.internal_asset_id)
+        self._index_asset(asset)
+
+    def _index_asset(self, asset: Asset):
+        asset_id = asset.internal_asset_id
+        if asset.ibkr_isin:
+            self.assets_by_isin.setdefault(asset.ibkr_isin, {})[asset_id] = asset
+        if asset.ibkr_symbol:
+            self.assets_by_symbol.setdefault(asset.ibkr_symbol, {})[asset_id] = asset
+        self.assets_by_category.setdefault(asset.asset_category, {})[asset_id] = asset
+        self._indexed_keys[asset_id] = (asset.ibkr_isin, asset.ibkr_symbol, asset.asset_category)
+
+    def _unindex_asset(self, asset: Asset):
+        """Removes an asset from the secondary indexes, under the keys it was indexed with."""
+        indexed_keys = self._indexed_keys.pop(asset.internal_asset_id, None)
+        if indexed_keys is None:
+            return
+        isin, symbol, category = indexed_keys
+        self._remove_from_multimap(self.assets_by_isin, isin, asset.internal_asset_id)
+        self._remove_from_multimap(self.assets_by_symbol, symbol, asset.internal_asset_id)
+        self._remove_from_multimap(self.assets_by_category, category, asset.internal_asset_id)
+
+    @staticmethod
+    def _remove_from_multimap(index: Dict[Any, Dict[uuid.UUID, Asset]], key: Any, asset_id: uuid.UUID):
+        assets = index.get(key)
+        if assets is not None:
+            assets.pop(asset_id, None)
+            if not assets:
+                del index[key]
+
     def _generate_aliases(self,
                           isin: Optional[str],
                           conid: Optional[str],
@@ -129,6 +194,7 @@ class AssetResolver:
         new_asset.aliases = old_asset.aliases # Crucial: re-use aliases set object or ensure it's a full copy
 
         self.assets_by_internal_id[new_asset.internal_asset_id] = new_asset
+        self.reindex_asset(new_asset)
         for alias_str in new_asset.aliases: # Ensure all aliases point to the new object
             self.alias_map[alias_str] = new_asset
         
@@ -258,6 +324,7 @@ class AssetResolver:
                 
                 if loser_asset.internal_asset_id in self.assets_by_internal_id:
                     del self.assets_by_internal_id[loser_asset.internal_asset_id]
+                    self._unindex_asset(loser_asset)
         
         # Update asset_instance.description based on source priority
         if description_from_row:
@@ -338,6 +405,7 @@ class AssetResolver:
                  asset_instance.add_alias(cash_bal_alias)
             self.alias_map[cash_bal_alias] = asset_instance 
 
+        self.reindex_asset(asset_instance)
         return asset_instance
 
     def link_derivatives(self):
@@ -350,16 +418,10 @@ class AssetResolver:
                         underlying_asset = self.alias_map[alias_key]
                 
                 if underlying_asset is None and asset.underlying_ibkr_symbol:
-                    alias_key = f"SYMBOL:{asset.underlying_ibkr_symbol.upper()}"
-                    potential_matches = [
-                        a for symbol_alias, a in self.alias_map.items()
-                        if symbol_alias == alias_key and not isinstance(a, CashBalance)
-                    ]
-                    if len(potential_matches) == 1 :
-                        underlying_asset = potential_matches[0]
-                    elif not potential_matches: 
-                        if alias_key in self.alias_map: 
-                            pass 
+                    # The SYMBOL alias names at most one asset (the last one registered with it)
+                    symbol_alias_asset = self.alias_map.get(f"SYMBOL:{asset.underlying_ibkr_symbol.upper()}")
+                    if symbol_alias_asset is not None and not isinstance(symbol_alias_asset, CashBalance):
+                        underlying_asset = symbol_alias_asset
 
                 if underlying_asset:
                     asset.underlying_asset_internal_id = underlying_asset.internal_asset_id
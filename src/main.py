@@ -25,6 +25,7 @@ from src.reporting.diagnostic_reports import (
     print_vorabpauschale_diagnostic
 )
 from src.reporting.pdf_generator import PdfReportGenerator # Added PDF Generator
+from src.pipeline_profiler import PipelineProfiler, activate_profiler, profile_stage
 
 # Configure logging (can be moved to a dedicated setup function if complex)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -55,6 +56,12 @@ def main_application():
 
     logger.info("Starting IBKR German Tax Declaration Engine...")
 
+    profiler = None
+    if args.profile or args.profile_out:
+        profiler = PipelineProfiler()
+        activate_profiler(profiler)
+        profiler.start()
+
     try:
         processing_results: ProcessingOutput = run_core_processing_pipeline(
             trades_file_path=args.trades,
@@ -63,7 +70,16 @@ def main_application():
             positions_end_file_path=args.pos_end,
             corporate_actions_file_path=args.corp_actions,
             interactive_classification_mode=args.interactive,
-            tax_year_to_process=config.TAX_YEAR 
+            tax_year_to_process=config.TAX_YEAR,
+            exchange_rate_source=args.rates_source,
+            ecb_bundle_file_path=args.ecb_bundle,
+            streaming_ingestion=args.streaming_ingestion,
+            fast_row_decoding=args.fast_row_decoding,
+            parallel_parsing=args.parallel_parsing,
+            use_snapshot=args.use_snapshot,
+            soy_ledger_state_file_path=args.soy_ledger_state_file_path,
+            eoy_ledger_state_file_path=args.eoy_ledger_state_file_path,
+            parallel_fifo=args.parallel_fifo
         )
     except Exception as e:
         logger.critical(f"Core processing pipeline failed: {e}. Exiting.", exc_info=True)
@@ -82,7 +98,8 @@ def main_application():
                 tax_year=config.TAX_YEAR,
                 apply_conceptual_derivative_loss_capping=config.APPLY_CONCEPTUAL_DERIVATIVE_LOSS_CAPPING
             )
-            loss_offsetting_summary = loss_engine.calculate_reporting_figures()
+            with profile_stage("Loss offsetting"):
+                loss_offsetting_summary = loss_engine.calculate_reporting_figures()
             logger.info("Loss offsetting calculation completed.")
         except Exception as e:
             logger.error(f"Loss offsetting calculation failed: {e}. Tax reports might be incomplete or inaccurate.", exc_info=True)
@@ -108,16 +125,14 @@ def main_application():
 
     if args.report_tax_declaration:
         if loss_offsetting_summary:
-            generate_console_tax_report(
-                realized_gains_losses=processing_results.realized_gains_losses,
-                vorabpauschale_items=processing_results.vorabpauschale_items,
-                # The console reporter uses this list and filters it itself for its detailed views
-                all_financial_events=processing_results.all_financial_events_enriched, 
-                asset_resolver=asset_resolver,
-                tax_year=tax_year,
-                eoy_mismatch_count=processing_results.eoy_mismatch_error_count,
-                loss_offsetting_summary=loss_offsetting_summary
-            )
+            with profile_stage("Console tax report"):
+                generate_console_tax_report(
+                    vorabpauschale_items=processing_results.vorabpauschale_items,
+                    asset_resolver=asset_resolver,
+                    tax_year=tax_year,
+                    eoy_mismatch_count=processing_results.eoy_mismatch_error_count,
+                    loss_offsetting_summary=loss_offsetting_summary
+                )
         else:
             logger.error("Console tax declaration report cannot be generated because loss offsetting calculation failed or was skipped.")
 
@@ -139,7 +154,8 @@ def main_application():
                 eoy_mismatch_details=eoy_mismatch_details_for_pdf,
                 report_version="v3.2.3" # Updated to match PRD version reflecting this fix
             )
-            pdf_generator.generate_report(args.pdf_output_file)
+            with profile_stage("PDF report"):
+                pdf_generator.generate_report(args.pdf_output_file)
         else:
             logger.error(f"PDF report '{args.pdf_output_file}' cannot be generated because loss offsetting calculation failed or was skipped.")
 
@@ -158,5 +174,12 @@ def main_application():
     if processing_results.eoy_mismatch_error_count > 0:
         logger.warning(f"There were {processing_results.eoy_mismatch_error_count} EOY quantity mismatch errors. Review logs and output carefully.")
 
+    if profiler is not None:
+        profiler.stop()
+        activate_profiler(None)
+        print(profiler.format_table())
+        if args.profile_out:
+            profiler.write_json(args.profile_out)
+
 if __name__ == "__main__":
     main_application()
@@ -1,24 +1,14 @@
 # src/parsers/cash_transactions_parser.py
-import csv
-from typing import List
-from pydantic import ValidationError
+from typing import Iterator, List
 
+from .csv_records import iter_csv_records
+from .fast_row_decoder import FastRawCashTransactionRecord
 from .raw_models import RawCashTransactionRecord
 
-def parse_cash_transactions_csv(file_path: str, encoding='utf-8-sig') -> List[RawCashTransactionRecord]:
-    raw_cash_transactions: List[RawCashTransactionRecord] = []
-    try:
-        with open(file_path, mode='r', encoding=encoding) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for i, row_dict in enumerate(reader):
-                try:
-                    raw_cash_transactions.append(RawCashTransactionRecord(**row_dict))
-                except ValidationError as e:
-                    print(f"Validation Error parsing cash transaction row {i+2}: {row_dict}. Error: {e.errors()}")
-                except Exception as e:
-                    print(f"Unexpected error parsing cash transaction row {i+2}: {row_dict}. Error: {e}")
-    except FileNotFoundError:
-        print(f"Cash transactions file not found: {file_path}")
-    except Exception as e:
-        print(f"Error reading cash transactions file {file_path}: {e}")
-    return raw_cash_transactions
+def iter_cash_transactions_csv(file_path: str, encoding='utf-8-sig', fast_decoding: bool = False) -> Iterator[RawCashTransactionRecord]:
+    """Yields RawCashTransactionRecord objects one row at a time without keeping the file's records in memory."""
+    return iter_csv_records(file_path, RawCashTransactionRecord, "cash transaction", "Cash transactions", encoding=encoding,
+                            fast_record_cls=FastRawCashTransactionRecord if fast_decoding else None)
+
+def parse_cash_transactions_csv(file_path: str, encoding='utf-8-sig', fast_decoding: bool = False) -> List[RawCashTransactionRecord]:
+    return list(iter_cash_transactions_csv(file_path, encoding=encoding, fast_decoding=fast_decoding))
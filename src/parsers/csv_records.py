@@ -0,0 +1,39 @@
+# src/parsers/csv_records.py
+import csv
+from typing import Iterator, Optional, Type, TypeVar
+from pydantic import ValidationError
+
+from .fast_row_decoder import FastRawRecord, iter_fast_decoded_rows
+from .raw_models import RawBaseRecord
+
+RecordT = TypeVar("RecordT", bound=RawBaseRecord)
+
+
+def iter_csv_records(file_path: str, record_cls: Type[RecordT], record_label: str, file_label: str,
+                     encoding: str = 'utf-8-sig', fast_record_cls: Optional[Type[FastRawRecord]] = None) -> Iterator[RecordT]:
+    """
+    Lazily decodes a Flex Query CSV file into raw records, one row at a time.
+    Rows that fail validation are reported and skipped, like the list-based parsers.
+    With fast_record_cls, rows are decoded into that record class without pydantic.
+    """
+    try:
+        with open(file_path, mode='r', encoding=encoding) as csvfile:
+            if fast_record_cls is not None:
+                yield from iter_fast_decoded_rows(csvfile, fast_record_cls, record_label)
+                return
+            reader = csv.DictReader(csvfile)
+            for i, row_dict in enumerate(reader):
+                try:
+                    # Pydantic will use Field aliases for mapping
+                    record = record_cls(**row_dict)
+                except ValidationError as e:
+                    print(f"Validation Error parsing {record_label} row {i+2}: {row_dict}. Error: {e.errors()}")
+                    continue
+                except Exception as e:
+                    print(f"Unexpected error parsing {record_label} row {i+2}: {row_dict}. Error: {e}")
+                    continue
+                yield record
+    except FileNotFoundError:
+        print(f"{file_label} file not found: {file_path}")
+    except Exception as e:
+        print(f"Error reading {file_label.lower()} file {file_path}: {e}")
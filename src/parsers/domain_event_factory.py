@@ -2,7 +2,7 @@
 import logging
 import re
 from decimal import Decimal
-from typing import List, Optional, Set, Union, Tuple # Ensure Tuple is here
+from typing import Iterable, List, Optional, Set, Union, Tuple # Ensure Tuple is here
 from datetime import date, datetime
 
 from src.domain.assets import Asset, Option, CashBalance, InvestmentFund, Derivative, Stock, Bond
@@ -22,6 +22,10 @@ from src.utils.type_utils import parse_ibkr_date, parse_ibkr_datetime, safe_deci
 
 logger = logging.getLogger(__name__)
 
+def _record_count_label(raw_records: Iterable) -> str:
+    """Record count for log messages; streamed inputs (generators) have no length up front."""
+    return str(len(raw_records)) if hasattr(raw_records, "__len__") else "streamed"
+
 class DomainEventFactory:
     def __init__(self, asset_resolver: AssetResolver):
         self.asset_resolver = asset_resolver
@@ -60,6 +64,12 @@ class DomainEventFactory:
             if parsed_date_obj: return parsed_date_obj.isoformat()
         return None
 
+    @staticmethod
+    def _attach_event_dates(events: List[FinancialEvent]):
+        """Parses each event_date once and stores it as event_date_obj for the downstream stages."""
+        for event in events:
+            event.set_event_date_obj(parse_ibkr_date(event.event_date))
+
 
     def _determine_trade_event_type(self, raw_trade: RawTradeRecord) -> FinancialEventType:
         buy_sell = (raw_trade.buy_sell or "").upper()
@@ -161,15 +171,18 @@ class DomainEventFactory:
                 return option_event
         return None
 
-    def create_events_from_trades(self, raw_trades: List[RawTradeRecord]) -> Tuple[List[FinancialEvent], List[OptionLifecycleEvent], List[TradeEvent]]:
-        logger.info(f"Processing {len(raw_trades)} raw trade records into domain events (linking deferred)...")
+    def create_events_from_trades(self, raw_trades: Iterable[RawTradeRecord]) -> Tuple[List[FinancialEvent], List[OptionLifecycleEvent], List[TradeEvent]]:
+        """Creates events from raw trades. raw_trades may be a list or a generator streaming rows from the CSV file."""
+        logger.info(f"Processing {_record_count_label(raw_trades)} raw trade records into domain events (linking deferred)...")
         all_created_events: List[FinancialEvent] = []
         candidate_option_lifecycle_events: List[OptionLifecycleEvent] = []
         candidate_stock_trades_for_linking: List[TradeEvent] = []
 
         self.processed_ibkr_trade_ids_for_options.clear()
 
+        records_processed = 0
         for rt in raw_trades:
+            records_processed += 1
             tx_id_primary = rt.transaction_id or rt.trade_id
             if not tx_id_primary:
                  logger.error(f"Trade record for Symbol: {rt.symbol}, Date: {rt.trade_date}, Qty: {rt.quantity} lacks both transaction_id and trade_id. Skipping.")
@@ -364,12 +377,13 @@ class DomainEventFactory:
                 all_created_events.append(trade_event)
                 logger.debug(f"Created TradeEvent: {trade_event.event_type.name} for {asset.get_classification_key()}, Qty: {trade_event.quantity}, Price: {trade_event.price_foreign_currency}, Gross: {trade_event.gross_amount_foreign_currency} {trade_event.local_currency}")
 
-        logger.info(f"Finished initial processing of {len(raw_trades)} raw trade records. Generated {len(all_created_events)} domain events. Linking deferred.")
+        logger.info(f"Finished initial processing of {records_processed} raw trade records. Generated {len(all_created_events)} domain events. Linking deferred.")
         logger.info(f"Collected {len(candidate_option_lifecycle_events)} candidate option lifecycle events and {len(candidate_stock_trades_for_linking)} candidate stock trades for linking.")
+        self._attach_event_dates(all_created_events)
         return all_created_events, candidate_option_lifecycle_events, candidate_stock_trades_for_linking
 
-    def create_events_from_cash_transactions(self, raw_cash_transactions: List[RawCashTransactionRecord]) -> List[FinancialEvent]:
-        logger.info(f"Processing {len(raw_cash_transactions)} raw cash transaction records into domain events...")
+    def create_events_from_cash_transactions(self, raw_cash_transactions: Iterable[RawCashTransactionRecord]) -> List[FinancialEvent]:
+        logger.info(f"Processing {_record_count_label(raw_cash_transactions)} raw cash transaction records into domain events...")
         domain_events: List[FinancialEvent] = []
         for rct in raw_cash_transactions:
             tx_id_for_event = rct.transaction_id
@@ -526,15 +540,17 @@ class DomainEventFactory:
                 domain_events.append(domain_event_instance)
             else:
                 logger.debug(f"Cash transaction type '{rct.type}' (Desc: '{rct.description}') for asset {asset_for_event.get_classification_key()} did not map to a specific domain event. Skipping.")
+        self._attach_event_dates(domain_events)
         return domain_events
 
 
-    def create_events_from_corporate_actions(self, raw_corporate_actions: List[RawCorporateActionRecord]) -> List[CorporateActionEvent]:
-        logger.info(f"Processing {len(raw_corporate_actions)} raw corporate action records into domain events...")
+    def create_events_from_corporate_actions(self, raw_corporate_actions: Iterable[RawCorporateActionRecord]) -> List[CorporateActionEvent]:
+        record_count_label = _record_count_label(raw_corporate_actions)
+        logger.info(f"Processing {record_count_label} raw corporate action records into domain events...")
         domain_ca_events: List[CorporateActionEvent] = []
 
         for idx, rca in enumerate(raw_corporate_actions):
-            logger.debug(f"CA Record {idx+1}/{len(raw_corporate_actions)}: Data: Symbol='{rca.symbol}', Desc='{rca.description}', Type='{rca.type_ca}', ActionID='{rca.action_id_ibkr}'")
+            logger.debug(f"CA Record {idx+1}/{record_count_label}: Data: Symbol='{rca.symbol}', Desc='{rca.description}', Type='{rca.type_ca}', ActionID='{rca.action_id_ibkr}'")
 
             if not rca.symbol or not rca.description or not rca.type_ca:
                 logger.warning(f"CA Record {idx+1}: Skipping due to missing Symbol, Description, or Type. Data: {rca}")
@@ -789,4 +805,5 @@ class DomainEventFactory:
                  )
                  domain_ca_events.append(generic_event)
                  logger.info(f"CA Record {idx+1}: Created generic CorporateActionEvent for fallback. Type assigned: {fallback_event_type.name}, Gross: {gross_amount_ca}")
+        self._attach_event_dates(domain_ca_events)
         return domain_ca_events
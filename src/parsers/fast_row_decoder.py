@@ -0,0 +1,173 @@
+# src/parsers/fast_row_decoder.py
+import csv
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Type
+
+from pydantic import BaseModel
+
+from src.utils.type_utils import safe_decimal
+from .raw_models import RawTradeRecord, RawCashTransactionRecord
+
+# The raw models are the reference implementation: the decoder derives its plan from their fields and
+# only knows how to replay these validators. A model gaining another validator must be taught here first.
+KNOWN_RAW_MODEL_VALIDATORS = frozenset({"parse_all_decimals", "parse_decimal_fields", "validate_date_strings"})
+
+_DECIMAL_DEFAULT = Decimal("0.0")
+
+
+def _decode_decimal(value: Optional[str]) -> Decimal:
+    # parse_decimal_fields maps blanks to None, then parse_all_decimals maps None and garbage to 0.0
+    return safe_decimal(value, default=_DECIMAL_DEFAULT)
+
+
+def _decode_date_string(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return value.strip() or None
+
+
+class _FieldSpec(NamedTuple):
+    name: str
+    alias: str
+    converter: Optional[Callable[[Optional[str]], Any]] # None: the CSV string is kept as is
+    required: bool
+    allow_none: bool
+    default: Any
+
+
+def _compile_field_specs(model: Type[BaseModel]) -> List[_FieldSpec]:
+    specs = []
+    for field in model.__fields__.values():
+        unknown_validators = set(field.class_validators) - KNOWN_RAW_MODEL_VALIDATORS
+        if unknown_validators:
+            raise ValueError(f"Fast row decoder cannot replay validators {sorted(unknown_validators)} of {model.__name__}.{field.name}.")
+        if field.type_ is Decimal:
+            converter = _decode_decimal
+        elif field.type_ is str:
+            converter = _decode_date_string if "validate_date_strings" in field.class_validators else None
+        else:
+            raise ValueError(f"Fast row decoder does not support field type {field.type_} of {model.__name__}.{field.name}.")
+        specs.append(_FieldSpec(field.name, field.alias, converter, bool(field.required), field.allow_none, field.default))
+    return specs
+
+
+class FastRawRecord:
+    """
+    Lightweight raw record with the attributes of its pydantic reference model.
+    Subclasses are created with fast_record_class().
+    """
+    __slots__ = ()
+    reference_model: Type[BaseModel]
+    field_specs: List[_FieldSpec]
+
+    def dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.dict() == other.dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = " ".join(f"{name}={value!r}" for name, value in self.dict().items())
+        return f"{type(self).__name__}({fields})"
+
+
+def fast_record_class(model: Type[BaseModel]) -> Type[FastRawRecord]:
+    """Creates the __slots__ record class decoding the same CSV columns as the given raw model."""
+    specs = _compile_field_specs(model)
+    return type(f"Fast{model.__name__}", (FastRawRecord,), {
+        "__slots__": tuple(spec.name for spec in specs),
+        "reference_model": model,
+        "field_specs": specs,
+    })
+
+
+FastRawTradeRecord = fast_record_class(RawTradeRecord)
+FastRawCashTransactionRecord = fast_record_class(RawCashTransactionRecord)
+
+
+class RowDecodeError(ValueError):
+    """A row the reference model would reject; errors() mirrors pydantic's error list."""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(errors)
+        self._errors = errors
+
+    def errors(self) -> List[Dict[str, Any]]:
+        return self._errors
+
+
+class RowDecoder:
+    """
+    Decodes csv.reader rows of one file. The header is compiled once into a plan of
+    (column index, attribute, converter) entries; columns no field maps to are never touched.
+    """
+
+    def __init__(self, record_cls: Type[FastRawRecord], header: Sequence[str]):
+        self.record_cls = record_cls
+        self.header = list(header)
+        column_by_alias = {alias: index for index, alias in enumerate(self.header)} # Last duplicate wins, like csv.DictReader
+        self.plan = []
+        self.defaults = []
+        self.missing_required_errors = []
+        for spec in record_cls.field_specs:
+            column = column_by_alias.get(spec.alias)
+            if column is not None:
+                self.plan.append((column, spec.name, spec.converter, spec.allow_none, spec.alias))
+            elif spec.required:
+                self.missing_required_errors.append({"loc": (spec.alias,), "msg": "field required", "type": "value_error.missing"})
+            else:
+                self.defaults.append((spec.name, spec.default))
+
+    def decode(self, row: Sequence[str]) -> FastRawRecord:
+        record = self.record_cls.__new__(self.record_cls)
+        errors = list(self.missing_required_errors)
+        row_length = len(row)
+        for column, name, converter, allow_none, alias in self.plan:
+            value = row[column] if column < row_length else None # Short rows are padded with None, like csv.DictReader
+            if converter is not None:
+                value = converter(value)
+            if value is None and not allow_none:
+                errors.append({"loc": (alias,), "msg": "none is not an allowed value", "type": "type_error.none.not_allowed"})
+                continue
+            setattr(record, name, value)
+        if errors:
+            raise RowDecodeError(errors)
+        for name, default in self.defaults:
+            setattr(record, name, default)
+        return record
+
+    def row_dict(self, row: Sequence[str]) -> Dict[Optional[str], Any]:
+        """The csv.DictReader view of a row, for error messages."""
+        row_dict: Dict[Optional[str], Any] = dict(zip(self.header, row))
+        for key in self.header[len(row):]:
+            row_dict[key] = None
+        if len(row) > len(self.header):
+            row_dict[None] = list(row[len(self.header):])
+        return row_dict
+
+
+def iter_fast_decoded_rows(csvfile: TextIO, record_cls: Type[FastRawRecord], record_label: str) -> Iterator[FastRawRecord]:
+    """
+    Decodes an open Flex Query CSV file with a RowDecoder. Rows are skipped and reported
+    exactly where the pydantic decoding in iter_csv_records would skip them.
+    """
+    reader = csv.reader(csvfile)
+    header = next(reader, None)
+    if header is None:
+        return
+    decoder = RowDecoder(record_cls, header)
+    header_length = len(header)
+    for i, row in enumerate(row for row in reader if row): # csv.DictReader skips blank lines
+        if len(row) > header_length:
+            print(f"Unexpected error parsing {record_label} row {i+2}: {decoder.row_dict(row)}. Error: row has more fields than the header")
+            continue
+        try:
+            record = decoder.decode(row)
+        except RowDecodeError as e:
+            print(f"Validation Error parsing {record_label} row {i+2}: {decoder.row_dict(row)}. Error: {e.errors()}")
+            continue
+        yield record
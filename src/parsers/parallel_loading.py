@@ -0,0 +1,84 @@
+# src/parsers/parallel_loading.py
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from .cash_transactions_parser import parse_cash_transactions_csv
+from .corporate_actions_parser import parse_corporate_actions_csv
+from .fast_row_decoder import FastRawRecord
+from .positions_parser import parse_positions_csv
+from .trades_parser import parse_trades_csv
+
+logger = logging.getLogger(__name__)
+
+RAW_FILE_KINDS = ("trades", "cash_transactions", "positions", "corporate_actions")
+
+
+def parse_raw_file(kind: str, file_path: str, fast_decoding: bool = False) -> List[Any]:
+    """Parses one Flex Query file into raw records. fast_decoding applies to trades and cash transactions."""
+    if kind == "trades":
+        return parse_trades_csv(file_path, fast_decoding=fast_decoding)
+    if kind == "cash_transactions":
+        return parse_cash_transactions_csv(file_path, fast_decoding=fast_decoding)
+    if kind == "positions":
+        return parse_positions_csv(file_path)
+    if kind == "corporate_actions":
+        return parse_corporate_actions_csv(file_path)
+    raise ValueError(f"Unknown raw file kind '{kind}'. Expected one of {RAW_FILE_KINDS}.")
+
+
+def _pack_records(records: List[Any]) -> Tuple[Optional[type], Tuple[str, ...], List[tuple]]:
+    """
+    Compact form for the trip back to the parent: one record class, its field names and a plain
+    tuple per row, instead of pickling every model's __dict__ and __fields_set__.
+    """
+    if not records:
+        return None, (), []
+    record_cls = type(records[0])
+    if issubclass(record_cls, BaseModel):
+        field_names = tuple(record_cls.__fields__)
+        return record_cls, field_names, [tuple(record.__dict__[name] for name in field_names) for record in records]
+    field_names = record_cls.__slots__
+    return record_cls, field_names, [tuple(getattr(record, name) for name in field_names) for record in records]
+
+
+def _unpack_records(record_cls: Optional[type], field_names: Tuple[str, ...], rows: List[tuple]) -> List[Any]:
+    if record_cls is None:
+        return []
+    if issubclass(record_cls, BaseModel):
+        # Values were validated in the worker
+        return [record_cls.construct(**dict(zip(field_names, row))) for row in rows]
+    records = []
+    for row in rows:
+        record: FastRawRecord = record_cls.__new__(record_cls)
+        for name, value in zip(field_names, row):
+            setattr(record, name, value)
+        records.append(record)
+    return records
+
+
+def _parse_packed(kind: str, file_path: str, fast_decoding: bool):
+    started = time.perf_counter()
+    records = parse_raw_file(kind, file_path, fast_decoding=fast_decoding)
+    return _pack_records(records), time.perf_counter() - started
+
+
+def load_raw_files_concurrently(jobs: Sequence[Tuple[str, str]], fast_decoding: bool = False,
+                                max_workers: Optional[int] = None) -> List[Tuple[List[Any], float]]:
+    """
+    Parses (kind, file_path) jobs in a process pool. Returns (records, parse seconds) per job,
+    in job order, so everything downstream sees the same records as with sequential loading.
+    """
+    max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    logger.debug(f"Parsing {len(jobs)} input files in a process pool with {max_workers} workers.")
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_parse_packed, kind, file_path, fast_decoding) for kind, file_path in jobs]
+        results = []
+        for future in futures:
+            packed, seconds = future.result()
+            results.append((_unpack_records(*packed), seconds))
+    return results
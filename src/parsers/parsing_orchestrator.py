@@ -1,10 +1,12 @@
 # src/parsers/parsing_orchestrator.py
 import uuid
 from decimal import Decimal, getcontext
-from typing import List, Dict, Optional, Any, Set, Tuple
+from typing import List, Dict, Optional, Any, Set, Tuple, Iterable
 from datetime import datetime, date
 import logging
 import sys 
+import time
+from concurrent.futures.process import BrokenProcessPool
 
 from src.domain.assets import (
     Asset, InvestmentFund, Option, CashBalance, Derivative, Stock, Bond, PrivateSaleAsset, Cfd # Changed Section23EstgAsset to PrivateSaleAsset
@@ -14,18 +16,19 @@ from src.domain.events import FinancialEvent, OptionLifecycleEvent, TradeEvent
 from src.domain.enums import FinancialEventType, AssetCategory, InvestmentFundType
 from src.identification.asset_resolver import AssetResolver
 from src.classification.asset_classifier import AssetClassifier
-from src.utils.sorting_utils import get_event_sort_key
+from src.utils.sorting_utils import compute_event_sort_keys
 from src.utils.type_utils import parse_ibkr_date, parse_ibkr_datetime, safe_decimal
 import src.config as global_config 
+from src.pipeline_profiler import active_profiler, profile_stage
 
 from .raw_models import (
     RawTradeRecord, RawCashTransactionRecord, RawPositionRecord, RawCorporateActionRecord
 )
-from .trades_parser import parse_trades_csv
-from .cash_transactions_parser import parse_cash_transactions_csv
-from .positions_parser import parse_positions_csv
-from .corporate_actions_parser import parse_corporate_actions_csv
+from .trades_parser import iter_trades_csv
+from .cash_transactions_parser import iter_cash_transactions_csv
+from .corporate_actions_parser import iter_corporate_actions_csv
 from .domain_event_factory import DomainEventFactory
+from .parallel_loading import load_raw_files_concurrently, parse_raw_file
 # NEW IMPORTS
 from src.processing.option_trade_linker import perform_option_trade_linking
 from src.processing.withholding_tax_linker import WithholdingTaxLinker
@@ -33,19 +36,97 @@ from src.processing.withholding_tax_linker import WithholdingTaxLinker
 
 logger = logging.getLogger(__name__)
 
+
+def _parse_stage_name(raw_attribute: str) -> str:
+    """Profiler stage name of one input file, e.g. 'raw_positions_start' -> 'Parse positions_start'."""
+    return f"Parse {raw_attribute[len('raw_'):]}"
+
+
+class DomainEventIndex:
+    """
+    Per-run index of the domain events for the post-processing steps. Each key kind is built by
+    one pass over the events on first use; lookups return events in their original order.
+    - by description marker (case-insensitive substring of ibkr_activity_description)
+    - by event class and identifier ("conid", "isin" or "symbol") of the event's asset,
+      optionally within the events carrying a description marker
+    Events are indexed under their asset at build time: a step that re-points events to another
+    asset must re-check the asset of the events it gets back.
+    """
+    IDENTIFIER_ATTRIBUTES = {"conid": "ibkr_conid", "isin": "ibkr_isin", "symbol": "ibkr_symbol"}
+
+    def __init__(self, events: List[FinancialEvent], asset_resolver: AssetResolver):
+        self._events = events
+        self._asset_resolver = asset_resolver
+        self._by_class: Dict[type, List[FinancialEvent]] = {}
+        self._by_identifier: Dict[Tuple[type, str, Optional[str]], Dict[Optional[str], List[FinancialEvent]]] = {}
+        self._by_marker: Dict[str, List[FinancialEvent]] = {}
+
+    def events_of_class(self, event_class: type) -> List[FinancialEvent]:
+        events = self._by_class.get(event_class)
+        if events is None:
+            events = [event for event in self._events if isinstance(event, event_class)]
+            self._by_class[event_class] = events
+        return events
+
+    def events_by_identifier(self, event_class: type, identifier: str, value: Optional[str],
+                             marker: Optional[str] = None) -> List[FinancialEvent]:
+        """
+        Events of event_class (with the description marker, if given) whose asset's identifier
+        equals value. None matches assets without that identifier.
+        """
+        key = (event_class, identifier, marker.upper() if marker else None)
+        index = self._by_identifier.get(key)
+        if index is None:
+            attribute = self.IDENTIFIER_ATTRIBUTES[identifier]
+            candidates = self.events_of_class(event_class) if marker is None else \
+                [event for event in self.events_with_marker(marker) if isinstance(event, event_class)]
+            index = {}
+            for event in candidates:
+                asset = self._asset_resolver.get_asset_by_id(event.asset_internal_id)
+                if asset is not None:
+                    index.setdefault(getattr(asset, attribute), []).append(event)
+            self._by_identifier[key] = index
+        return index.get(value, [])
+
+    def events_with_marker(self, marker: str) -> List[FinancialEvent]:
+        marker = marker.upper()
+        events = self._by_marker.get(marker)
+        if events is None:
+            events = [event for event in self._events
+                      if event.ibkr_activity_description and marker in event.ibkr_activity_description.upper()]
+            self._by_marker[marker] = events
+        return events
+
+
 class ParsingOrchestrator:
-    def __init__(self, asset_resolver: AssetResolver, asset_classifier: AssetClassifier, interactive_classification: bool = True):
+    def __init__(self, asset_resolver: AssetResolver, asset_classifier: AssetClassifier, interactive_classification: bool = True,
+                 streaming_ingestion: bool = False, fast_row_decoding: bool = False, parallel_parsing: bool = False):
+        """
+        streaming_ingestion: instead of loading trades, cash transactions and corporate actions into
+        lists, stream them from their CSV files twice (asset discovery, then event creation), so raw
+        records only live until their events exist. Position files are small and always loaded.
+        fast_row_decoding: decode trade and cash transaction rows with the pydantic-free row decoder.
+        parallel_parsing: parse the input files concurrently in a process pool.
+        """
         self.asset_resolver = asset_resolver
         self.asset_classifier = asset_classifier
         self.interactive_classification = interactive_classification
+        self.streaming_ingestion = streaming_ingestion
+        self.fast_row_decoding = fast_row_decoding
+        self.parallel_parsing = parallel_parsing
 
         self.raw_trades: List[RawTradeRecord] = []
         self.raw_cash_transactions: List[RawCashTransactionRecord] = []
         self.raw_positions_start: List[RawPositionRecord] = []
         self.raw_positions_end: List[RawPositionRecord] = []
         self.raw_corporate_actions: List[RawCorporateActionRecord] = []
+        # Source files of the streamed record types (streaming_ingestion only)
+        self.trades_file: Optional[str] = None
+        self.cash_transactions_file: Optional[str] = None
+        self.corporate_actions_file: Optional[str] = None
 
         self.domain_financial_events: List[FinancialEvent] = []
+        self.event_index: Optional[DomainEventIndex] = None
         # NEW: Store collections for linking
         self.candidate_option_lifecycle_events: List[OptionLifecycleEvent] = []
         self.candidate_stock_trades_for_linking: List[TradeEvent] = []
@@ -60,21 +141,67 @@ class ParsingOrchestrator:
                            positions_end_file: Optional[str] = None,
                            corporate_actions_file: Optional[str] = None):
         # ... (implementation is the same)
-        if trades_file:
-            self.raw_trades = parse_trades_csv(trades_file)
-            logger.info(f"Loaded {len(self.raw_trades)} raw trade records.")
-        if cash_transactions_file:
-            self.raw_cash_transactions = parse_cash_transactions_csv(cash_transactions_file)
-            logger.info(f"Loaded {len(self.raw_cash_transactions)} raw cash transaction records.")
-        if positions_start_file:
-            self.raw_positions_start = parse_positions_csv(positions_start_file)
-            logger.info(f"Loaded {len(self.raw_positions_start)} raw start-of-year position records.")
-        if positions_end_file:
-            self.raw_positions_end = parse_positions_csv(positions_end_file)
-            logger.info(f"Loaded {len(self.raw_positions_end)} raw end-of-year position records.")
-        if corporate_actions_file:
-            self.raw_corporate_actions = parse_corporate_actions_csv(corporate_actions_file)
-            logger.info(f"Loaded {len(self.raw_corporate_actions)} raw corporate action records.")
+        if self.streaming_ingestion:
+            self.trades_file = trades_file
+            self.cash_transactions_file = cash_transactions_file
+            self.corporate_actions_file = corporate_actions_file
+            logger.info(f"Streaming ingestion: trades, cash transactions and corporate actions are read row by row from "
+                        f"{[f for f in (trades_file, cash_transactions_file, corporate_actions_file) if f]}.")
+            trades_file = cash_transactions_file = corporate_actions_file = None
+        jobs = [job for job in (
+            ("raw_trades", "trades", trades_file, "raw trade records"),
+            ("raw_cash_transactions", "cash_transactions", cash_transactions_file, "raw cash transaction records"),
+            ("raw_positions_start", "positions", positions_start_file, "raw start-of-year position records"),
+            ("raw_positions_end", "positions", positions_end_file, "raw end-of-year position records"),
+            ("raw_corporate_actions", "corporate_actions", corporate_actions_file, "raw corporate action records"),
+        ) if job[2]]
+        if not jobs:
+            return
+
+        started = time.perf_counter()
+        results = None
+        parallel = self.parallel_parsing and len(jobs) > 1
+        if parallel:
+            try:
+                results = load_raw_files_concurrently([(kind, file_path) for _, kind, file_path, _ in jobs],
+                                                      fast_decoding=self.fast_row_decoding)
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning(f"Parallel parsing failed ({e}). Parsing input files sequentially.")
+                parallel = False
+        if results is None:
+            results = []
+            for attribute, kind, file_path, _ in jobs:
+                file_started = time.perf_counter()
+                with profile_stage(_parse_stage_name(attribute)) as stage:
+                    records = parse_raw_file(kind, file_path, fast_decoding=self.fast_row_decoding)
+                    stage.count(len(records))
+                results.append((records, time.perf_counter() - file_started))
+        elif active_profiler() is not None:
+            # Parsed in worker processes: only their wall times are known here
+            for (attribute, _, _, _), (records, seconds) in zip(jobs, results):
+                active_profiler().record(_parse_stage_name(attribute), seconds, len(records))
+
+        # Records are assigned in a fixed order; asset resolution runs single-threaded afterwards.
+        for (attribute, _, file_path, label), (records, seconds) in zip(jobs, results):
+            setattr(self, attribute, records)
+            logger.info(f"Loaded {len(records)} {label} from {file_path} in {seconds:.2f}s.")
+        logger.info(f"Parsed {len(jobs)} input files {'in parallel ' if parallel else ''}in {time.perf_counter() - started:.2f}s.")
+
+    def iter_raw_trades(self) -> Iterable[RawTradeRecord]:
+        """Raw trade records: the loaded list, or a fresh pass over the trades file when streaming."""
+        if self.streaming_ingestion:
+            return iter_trades_csv(self.trades_file, fast_decoding=self.fast_row_decoding) if self.trades_file else iter(())
+        return self.raw_trades
+
+    def iter_raw_cash_transactions(self) -> Iterable[RawCashTransactionRecord]:
+        if self.streaming_ingestion:
+            return iter_cash_transactions_csv(self.cash_transactions_file, fast_decoding=self.fast_row_decoding) if self.cash_transactions_file else iter(())
+        return self.raw_cash_transactions
+
+    def iter_raw_corporate_actions(self) -> Iterable[RawCorporateActionRecord]:
+        if self.streaming_ingestion:
+            return iter_corporate_actions_csv(self.corporate_actions_file) if self.corporate_actions_file else iter(())
+        return self.raw_corporate_actions
 
     def process_positions(self):
         # ... (implementation is the same)
@@ -116,7 +243,7 @@ class ParsingOrchestrator:
     def discover_assets_from_transactions(self):
         # ... (implementation is the same)
         logger.info("Discovering assets from trades, cash transactions, and corporate actions...")
-        for rt in self.raw_trades:
+        for rt in self.iter_raw_trades():
             self.asset_resolver.get_or_create_asset(
                 raw_isin=rt.isin or rt.security_id if rt.security_id_type == "ISIN" else rt.isin,
                 raw_conid=rt.conid, raw_symbol=rt.symbol, raw_currency=rt.currency_primary,
@@ -127,7 +254,7 @@ class ParsingOrchestrator:
                 raw_underlying_conid=rt.underlying_conid, raw_underlying_symbol=rt.underlying_symbol
             )
 
-        for rct in self.raw_cash_transactions:
+        for rct in self.iter_raw_cash_transactions():
             is_instrument_specific = bool(
                 rct.isin or \
                 rct.conid or \
@@ -151,7 +278,7 @@ class ParsingOrchestrator:
                     raw_ibkr_sub_category=rct.sub_category
                 )
 
-        for rca in self.raw_corporate_actions:
+        for rca in self.iter_raw_corporate_actions():
             self.asset_resolver.get_or_create_asset(
                 raw_isin=rca.isin or rca.security_id if rca.security_id_type == "ISIN" else rca.isin,
                 raw_conid=rca.conid, raw_symbol=rca.symbol, raw_currency=rca.currency_primary,
@@ -195,6 +322,7 @@ class ParsingOrchestrator:
                 elif not isinstance(asset_to_classify, InvestmentFund) and final_cat == AssetCategory.INVESTMENT_FUND:
                     logger.error(f"CRITICAL ERROR: Mismatch - Asset {asset_to_classify.get_classification_key()} is {type(asset_to_classify)} but classified as InvestmentFund without replacement flag being True.")
                 asset_to_classify.user_notes = final_notes
+                self.asset_resolver.reindex_asset(asset_to_classify)
                 asset_after_action = asset_to_classify
 
             asset_key_for_cache = asset_after_action.get_classification_key()
@@ -222,30 +350,27 @@ class ParsingOrchestrator:
         For each ED (Expire Dividend Rights) event:
         1. Find matching DI (Dividend Issue) event and set its shares to 0
         2. Find matching cash dividend event and update its asset ISIN to underlying asset
+        Candidates are looked up by CONID in the per-run event index, so this is O(ED) after one
+        pass over the events.
         """
         from src.domain.events import CorpActionExpireDividendRights, CorpActionStockDividend, CashFlowEvent, CorporateActionEvent
         from src.domain.enums import FinancialEventType
-        import re
         
         logger.info("Processing dividend rights matching (DI/ED events)...")
+        event_index = self.event_index or DomainEventIndex(self.domain_financial_events, self.asset_resolver)
         
-        # Debug: Log all corporate action events
-        ca_events = [event for event in self.domain_financial_events if isinstance(event, CorporateActionEvent)]
-        logger.debug(f"Found {len(ca_events)} corporate action events total:")
-        for ca_event in ca_events:
-            logger.debug(f"  CA Event: {type(ca_event).__name__}, Type: {ca_event.event_type.name}, Desc: {ca_event.ibkr_activity_description}")
-        
-        # Debug: Log all cash flow events
-        cash_events = [event for event in self.domain_financial_events if isinstance(event, CashFlowEvent)]
-        logger.debug(f"Found {len(cash_events)} cash flow events total:")
-        for cash_event in cash_events:
-            logger.debug(f"  Cash Event: Type: {cash_event.event_type.name}, Desc: {cash_event.ibkr_activity_description}")
+        if logger.isEnabledFor(logging.DEBUG):
+            ca_events = event_index.events_of_class(CorporateActionEvent)
+            logger.debug(f"Found {len(ca_events)} corporate action events total:")
+            for ca_event in ca_events:
+                logger.debug(f"  CA Event: {type(ca_event).__name__}, Type: {ca_event.event_type.name}, Desc: {ca_event.ibkr_activity_description}")
+            cash_events = event_index.events_of_class(CashFlowEvent)
+            logger.debug(f"Found {len(cash_events)} cash flow events total:")
+            for cash_event in cash_events:
+                logger.debug(f"  Cash Event: Type: {cash_event.event_type.name}, Desc: {cash_event.ibkr_activity_description}")
         
         # Find all ED events for processing
-        ed_events = [
-            event for event in self.domain_financial_events 
-            if isinstance(event, CorpActionExpireDividendRights)
-        ]
+        ed_events = event_index.events_of_class(CorpActionExpireDividendRights)
         
         if not ed_events:
             logger.info("No ED (Expire Dividend Rights) events found. Skipping dividend rights processing.")
@@ -263,19 +388,16 @@ class ParsingOrchestrator:
             
             # 1. Find matching DI event
             matching_di_event = None
-            for event in self.domain_financial_events:
-                if (isinstance(event, CorpActionStockDividend) and 
-                    event.ibkr_activity_description and
-                    "DIVIDEND RIGHTS ISSUE" in event.ibkr_activity_description.upper()):
-                    
-                    di_asset = self.asset_resolver.get_asset_by_id(event.asset_internal_id)
-                    if (di_asset and 
-                        di_asset.ibkr_conid == ed_asset.ibkr_conid and 
-                        di_asset.ibkr_isin == ed_asset.ibkr_isin and
-                        di_asset.ibkr_symbol == ed_asset.ibkr_symbol):
-                        matching_di_event = event
-                        logger.debug(f"Found matching DI event {event.event_id} for ED event {ed_event.event_id}")
-                        break
+            for event in event_index.events_by_identifier(CorpActionStockDividend, "conid", ed_asset.ibkr_conid,
+                                                          marker="DIVIDEND RIGHTS ISSUE"):
+                di_asset = self.asset_resolver.get_asset_by_id(event.asset_internal_id)
+                if (di_asset and 
+                    di_asset.ibkr_conid == ed_asset.ibkr_conid and 
+                    di_asset.ibkr_isin == ed_asset.ibkr_isin and
+                    di_asset.ibkr_symbol == ed_asset.ibkr_symbol):
+                    matching_di_event = event
+                    logger.debug(f"Found matching DI event {event.event_id} for ED event {ed_event.event_id}")
+                    break
             
             if matching_di_event:
                 # Set DI event shares to 0 (rights expired without receiving shares)
@@ -295,41 +417,28 @@ class ParsingOrchestrator:
                 continue
                 
             logger.debug(f"ED Event {ed_event.event_id}: Extracted underlying ISIN from DI event: {underlying_isin}")
-            
-            # Debug: Log what we're looking for in cash events
             logger.debug(f"ED Event {ed_event.event_id}: Looking for cash event with CONID={ed_asset.ibkr_conid}, ISIN={ed_asset.ibkr_isin}")
             
             matching_cash_event = None
             cash_events_checked = 0
-            for event in self.domain_financial_events:
-                if isinstance(event, CashFlowEvent):
-                    cash_events_checked += 1
+            for event in event_index.events_by_identifier(CashFlowEvent, "conid", ed_asset.ibkr_conid,
+                                                          marker="EXPIRE DIVIDEND RIGHT"):
+                cash_events_checked += 1
+                if event.event_type == FinancialEventType.DIVIDEND_CASH or event.event_type == FinancialEventType.CAPITAL_REPAYMENT:
+                    # Re-checked: a cash event matched by an earlier ED event points to the LEG stock by now
                     cash_asset = self.asset_resolver.get_asset_by_id(event.asset_internal_id)
-                    logger.debug(f"  Checking cash event {event.event_id}: Type={event.event_type.name}, Desc='{event.ibkr_activity_description}', Asset CONID={cash_asset.ibkr_conid if cash_asset else 'None'}, ISIN={cash_asset.ibkr_isin if cash_asset else 'None'}")
-                    
-                    if ((event.event_type == FinancialEventType.DIVIDEND_CASH or event.event_type == FinancialEventType.CAPITAL_REPAYMENT) and
-                        event.ibkr_activity_description and
-                        "EXPIRE DIVIDEND RIGHT" in event.ibkr_activity_description.upper()):
-                        
-                        logger.debug(f"    Cash event matches description pattern")
-                        if (cash_asset and 
-                            cash_asset.ibkr_conid == ed_asset.ibkr_conid and 
-                            cash_asset.ibkr_isin == ed_asset.ibkr_isin):
-                            matching_cash_event = event
-                            logger.debug(f"Found matching cash dividend event {event.event_id} for ED event {ed_event.event_id}")
-                            break
-                        else:
-                            logger.debug(f"    Asset identifiers don't match: Expected CONID={ed_asset.ibkr_conid}/ISIN={ed_asset.ibkr_isin}, Got CONID={cash_asset.ibkr_conid if cash_asset else 'None'}/ISIN={cash_asset.ibkr_isin if cash_asset else 'None'}")
+                    if (cash_asset and 
+                        cash_asset.ibkr_conid == ed_asset.ibkr_conid and 
+                        cash_asset.ibkr_isin == ed_asset.ibkr_isin):
+                        matching_cash_event = event
+                        logger.debug(f"Found matching cash dividend event {event.event_id} for ED event {ed_event.event_id}")
+                        break
             
-            logger.debug(f"ED Event {ed_event.event_id}: Checked {cash_events_checked} cash events, found match: {matching_cash_event is not None}")
+            logger.debug(f"ED Event {ed_event.event_id}: Checked {cash_events_checked} candidate cash events, found match: {matching_cash_event is not None}")
             
             if matching_cash_event:
                 # Find the LEG stock asset to link the cash event to
-                leg_stock_asset = None
-                for asset_id, asset in self.asset_resolver.assets_by_internal_id.items():
-                    if asset.ibkr_isin == underlying_isin:
-                        leg_stock_asset = asset
-                        break
+                leg_stock_asset = self.asset_resolver.get_asset_by_isin(underlying_isin)
                 
                 if leg_stock_asset:
                     logger.info(f"ED Event {ed_event.event_id}: Updating cash dividend event to point to LEG stock asset {leg_stock_asset.get_classification_key()}")
@@ -392,20 +501,21 @@ class ParsingOrchestrator:
         logger.info("Creating domain events using DomainEventFactory and preparing for linking...")
         
         # DomainEventFactory.create_events_from_trades now returns a tuple
-        trade_events_tuple = event_factory.create_events_from_trades(self.raw_trades)
+        trade_events_tuple = event_factory.create_events_from_trades(self.iter_raw_trades())
         all_trade_events: List[FinancialEvent] = trade_events_tuple[0]
         # Store these on self for the linking step
         self.candidate_option_lifecycle_events = trade_events_tuple[1]
         self.candidate_stock_trades_for_linking = trade_events_tuple[2]
 
-        cash_events = event_factory.create_events_from_cash_transactions(self.raw_cash_transactions)
-        ca_events = event_factory.create_events_from_corporate_actions(self.raw_corporate_actions)
+        cash_events = event_factory.create_events_from_cash_transactions(self.iter_raw_cash_transactions())
+        ca_events = event_factory.create_events_from_corporate_actions(self.iter_raw_corporate_actions())
 
         # Populate the main list of events
         self.domain_financial_events.clear() # Clear if run multiple times (though not typical)
         self.domain_financial_events.extend(all_trade_events)
         self.domain_financial_events.extend(cash_events)
         self.domain_financial_events.extend(ca_events)
+        self.event_index = DomainEventIndex(self.domain_financial_events, self.asset_resolver)
 
         logger.info(f"DomainEventFactory created {len(self.domain_financial_events)} total financial events initially.")
         logger.info(f"Collected {len(self.candidate_option_lifecycle_events)} candidate option lifecycle events for linking.")
@@ -413,54 +523,48 @@ class ParsingOrchestrator:
 
 
     def get_all_financial_events(self) -> List[FinancialEvent]:
-        # ... (sorting logic is the same, uses self.domain_financial_events)
+        """
+        Sorts self.domain_financial_events deterministically and validates that every sort key is
+        unique. Each event's key is computed once and cached on the event for the calculation engine.
+        """
         logger.info("Sorting financial events deterministically...")
-        sort_key_func = lambda ev: get_event_sort_key(ev, self.asset_resolver)
         try:
-            self.domain_financial_events.sort(key=sort_key_func)
+            unsorted_keys = compute_event_sort_keys(self.domain_financial_events, self.asset_resolver)
         except ValueError as e:
             logger.critical(f"Fatal error during event sorting: {e}. Cannot guarantee deterministic order. Aborting.")
             raise e 
 
+        sorted_indices = sorted(range(len(unsorted_keys)), key=unsorted_keys.__getitem__)
+        self.domain_financial_events[:] = [self.domain_financial_events[i] for i in sorted_indices]
+        all_generated_keys: List[Tuple[date, Tuple[Any, ...]]] = [unsorted_keys[i] for i in sorted_indices]
+
         logger.info("Validating sort key uniqueness and completeness post-sort...")
         errors_found = 0
         
-        all_generated_keys: List[Tuple[date, Tuple[Any, ...]]] = []
-        for event in self.domain_financial_events:
-            try:
-                key = get_event_sort_key(event, self.asset_resolver)
-                all_generated_keys.append(key)
-                if key[0] == date.min and not parse_ibkr_date(event.event_date):
-                    logger.error(f"Sort Validation Error: Event {event.event_id} ({type(event).__name__}, Date: '{event.event_date}') resulted in a minimal date sort key component, indicating a potential parsing issue not caught earlier.")
-                    errors_found += 1
-            except ValueError as e: 
-                logger.error(f"Sort Key Generation Error: Event {event.event_id} ({type(event).__name__}) - {e}")
+        indices_by_key: Dict[Tuple[date, Tuple[Any, ...]], List[int]] = {}
+        for i, (event, key) in enumerate(zip(self.domain_financial_events, all_generated_keys)):
+            if key[0] == date.min and not event.event_date_obj:
+                logger.error(f"Sort Validation Error: Event {event.event_id} ({type(event).__name__}, Date: '{event.event_date}') resulted in a minimal date sort key component, indicating a potential parsing issue not caught earlier.")
                 errors_found += 1
-        
-        seen_keys = set()
-        for i, key_to_check in enumerate(all_generated_keys):
-            if key_to_check in seen_keys:
-                duplicate_event_details = []
-                for j, ev_event in enumerate(self.domain_financial_events):
-                    try:
-                        current_ev_key = get_event_sort_key(ev_event, self.asset_resolver)
-                        if current_ev_key == key_to_check:
-                            duplicate_event_details.append(
-                                f"(Index {j}, ID: {ev_event.event_id}, Type: {type(ev_event).__name__}, "
-                                f"Desc: '{ev_event.ibkr_activity_description}', Amt: {ev_event.gross_amount_foreign_currency} {ev_event.local_currency}, "
-                                f"TxID: {ev_event.ibkr_transaction_id})"
-                            )
-                    except ValueError: 
-                        pass
-
-                logger.error(
-                    f"Sort Validation Error: Duplicate sort key detected! \n"
-                    f"  Duplicate Key: {key_to_check}\n"
-                    f"  Events with this key:\n    " + "\n    ".join(duplicate_event_details)
+            indices_by_key.setdefault(key, []).append(i)
+
+        for key_to_check, indices in indices_by_key.items():
+            if len(indices) < 2:
+                continue
+            duplicate_event_details = []
+            for j in indices:
+                ev_event = self.domain_financial_events[j]
+                duplicate_event_details.append(
+                    f"(Index {j}, ID: {ev_event.event_id}, Type: {type(ev_event).__name__}, "
+                    f"Desc: '{ev_event.ibkr_activity_description}', Amt: {ev_event.gross_amount_foreign_currency} {ev_event.local_currency}, "
+                    f"TxID: {ev_event.ibkr_transaction_id})"
                 )
-                errors_found += 1
-            else:
-                seen_keys.add(key_to_check)
+            logger.error(
+                f"Sort Validation Error: Duplicate sort key detected! \n"
+                f"  Duplicate Key: {key_to_check}\n"
+                f"  Events with this key:\n    " + "\n    ".join(duplicate_event_details)
+            )
+            errors_found += len(indices) - 1 # One per event beyond the first, as before
 
         if errors_found > 0:
             msg = f"{errors_found} critical sorting key issues found. Non-deterministic event order or key generation failure detected. Processing cannot continue reliably."
@@ -482,36 +586,48 @@ class ParsingOrchestrator:
                              ) -> List[FinancialEvent]:
         logger.info("Starting parsing pipeline...")
         try:
-            self.load_all_raw_data(
-                trades_file=trades_file,
-                cash_transactions_file=cash_transactions_file,
-                positions_start_file=positions_start_file,
-                positions_end_file=positions_end_file,
-                corporate_actions_file=corporate_actions_file
-            )
-            self.process_positions()
-            self.discover_assets_from_transactions()
-            self.asset_resolver.link_derivatives()
-            self.finalize_asset_classifications()
-            self._ensure_soy_quantities_are_set()
+            with profile_stage("Load input files"):
+                self.load_all_raw_data(
+                    trades_file=trades_file,
+                    cash_transactions_file=cash_transactions_file,
+                    positions_start_file=positions_start_file,
+                    positions_end_file=positions_end_file,
+                    corporate_actions_file=corporate_actions_file
+                )
+            with profile_stage("Asset discovery") as stage:
+                self.process_positions()
+                self.discover_assets_from_transactions()
+                stage.count(len(self.asset_resolver.assets_by_internal_id))
+            with profile_stage("Derivative linking"):
+                self.asset_resolver.link_derivatives()
+            with profile_stage("Asset classification") as stage:
+                self.finalize_asset_classifications()
+                self._ensure_soy_quantities_are_set()
+                stage.count(len(self.asset_resolver.assets_by_internal_id))
 
             event_factory = DomainEventFactory(asset_resolver=self.asset_resolver)
             # MODIFIED: Call the new method that prepares for linking
-            self.create_domain_events_and_prepare_for_linking(event_factory)
+            with profile_stage("Event factory") as stage:
+                self.create_domain_events_and_prepare_for_linking(event_factory)
+                stage.count(len(self.domain_financial_events))
             
             # NEW STEP: Perform the linking using the collected candidate events
             logger.info("Performing option trade linking post-event creation...")
-            perform_option_trade_linking(
-                asset_resolver=self.asset_resolver,
-                candidate_option_lifecycle_events=self.candidate_option_lifecycle_events,
-                candidate_stock_trades_for_linking=self.candidate_stock_trades_for_linking
-            )
+            with profile_stage("Option trade linking") as stage:
+                perform_option_trade_linking(
+                    asset_resolver=self.asset_resolver,
+                    candidate_option_lifecycle_events=self.candidate_option_lifecycle_events,
+                    candidate_stock_trades_for_linking=self.candidate_stock_trades_for_linking
+                )
+                stage.count(len(self.candidate_option_lifecycle_events))
             # self.domain_financial_events now contains events with potentially updated related_option_event_id
             
             # NEW STEP: Perform withholding tax linking
             logger.info("Performing withholding tax linking...")
-            wht_linker = WithholdingTaxLinker()
-            successful_links, unlinked_wht_events = wht_linker.link_withholding_tax_events(self.domain_financial_events)
+            wht_linker = WithholdingTaxLinker(assignment_mode=global_config.WHT_LINKING_ASSIGNMENT_MODE)
+            with profile_stage("Withholding tax linking") as stage:
+                successful_links, unlinked_wht_events = wht_linker.link_withholding_tax_events(self.domain_financial_events)
+                stage.count(len(successful_links) + len(unlinked_wht_events))
             
             # Log linking statistics
             logger.info(f"Withholding tax linking completed: {len(successful_links)} successful links, {len(unlinked_wht_events)} unlinked WHT events")
@@ -521,10 +637,13 @@ class ParsingOrchestrator:
                     logger.warning(f"  - WHT Event {wht_event.event_id}: Date={wht_event.event_date}, Amount={wht_event.gross_amount_foreign_currency} {wht_event.local_currency}, Desc='{wht_event.ibkr_activity_description}'")
             
             # Post-process DI/ED dividend rights matching
-            self._process_dividend_rights_matching()
+            with profile_stage("Dividend rights matching"):
+                self._process_dividend_rights_matching()
             
             logger.info("Parsing pipeline (including linking) completed.")
-            return self.get_all_financial_events() # This will sort all events
+            with profile_stage("Event sort and validation") as stage:
+                stage.count(len(self.domain_financial_events))
+                return self.get_all_financial_events() # This will sort all events
         except ValueError as e:
             logger.critical(f"Terminating parsing pipeline due to critical error: {e}")
             raise e 
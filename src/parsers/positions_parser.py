@@ -1,27 +1,12 @@
 # src/parsers/positions_parser.py
-import csv
-from typing import List
-from pydantic import ValidationError
+from typing import Iterator, List
 
+from .csv_records import iter_csv_records
 from .raw_models import RawPositionRecord
 
+def iter_positions_csv(file_path: str, encoding='utf-8-sig') -> Iterator[RawPositionRecord]:
+    """Yields RawPositionRecord objects one row at a time without keeping the file's records in memory."""
+    return iter_csv_records(file_path, RawPositionRecord, "position", "Positions", encoding=encoding)
+
 def parse_positions_csv(file_path: str, encoding='utf-8-sig') -> List[RawPositionRecord]:
-    raw_positions: List[RawPositionRecord] = []
-    try:
-        with open(file_path, mode='r', encoding=encoding) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for i, row_dict in enumerate(reader):
-                try:
-                    # Assuming 'Quantity' in CSV maps to 'Position' in RawPositionRecord via alias or direct name
-                    # If 'Position' is the CSV header, then RawPositionRecord.position will map directly.
-                    # Current RawPositionRecord uses 'Position' for the field name and alias.
-                    raw_positions.append(RawPositionRecord(**row_dict))
-                except ValidationError as e:
-                    print(f"Validation Error parsing position row {i+2}: {row_dict}. Error: {e.errors()}")
-                except Exception as e:
-                    print(f"Unexpected error parsing position row {i+2}: {row_dict}. Error: {e}")
-    except FileNotFoundError:
-        print(f"Positions file not found: {file_path}")
-    except Exception as e:
-        print(f"Error reading positions file {file_path}: {e}")
-    return raw_positions
+    return list(iter_positions_csv(file_path, encoding=encoding))
@@ -1,26 +1,15 @@
 # src/parsers/trades_parser.py
-import csv
-from typing import List
-from pydantic import ValidationError
+from typing import Iterator, List
 
+from .csv_records import iter_csv_records
+from .fast_row_decoder import FastRawTradeRecord
 from .raw_models import RawTradeRecord
 from src.utils.type_utils import parse_ibkr_datetime # For trade_time if needed to combine with date
 
-def parse_trades_csv(file_path: str, encoding='utf-8-sig') -> List[RawTradeRecord]:
-    raw_trades: List[RawTradeRecord] = []
-    try:
-        with open(file_path, mode='r', encoding=encoding) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for i, row_dict in enumerate(reader):
-                try:
-                    # Pydantic will use Field aliases for mapping
-                    raw_trades.append(RawTradeRecord(**row_dict))
-                except ValidationError as e:
-                    print(f"Validation Error parsing trade row {i+2}: {row_dict}. Error: {e.errors()}")
-                except Exception as e:
-                    print(f"Unexpected error parsing trade row {i+2}: {row_dict}. Error: {e}")
-    except FileNotFoundError:
-        print(f"Trades file not found: {file_path}")
-    except Exception as e:
-        print(f"Error reading trades file {file_path}: {e}")
-    return raw_trades
+def iter_trades_csv(file_path: str, encoding='utf-8-sig', fast_decoding: bool = False) -> Iterator[RawTradeRecord]:
+    """Yields RawTradeRecord objects one row at a time without keeping the file's records in memory."""
+    return iter_csv_records(file_path, RawTradeRecord, "trade", "Trades", encoding=encoding,
+                            fast_record_cls=FastRawTradeRecord if fast_decoding else None)
+
+def parse_trades_csv(file_path: str, encoding='utf-8-sig', fast_decoding: bool = False) -> List[RawTradeRecord]:
+    return list(iter_trades_csv(file_path, encoding=encoding, fast_decoding=fast_decoding))
@@ -0,0 +1,212 @@
+# src/pipeline_profiler.py
+import json
+import logging
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from src.utils.file_utils import write_file_atomically
+
+try:
+    import resource
+except ImportError: # Not available on Windows; the RSS column stays empty there
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FORMAT_VERSION = 1
+STAGE_PATH_SEPARATOR = " > "
+_BYTES_PER_MB = 1024 * 1024
+_PROC_STATUS_FILE = "/proc/self/status"
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Peak resident set size of this process so far. Read from VmHWM where available: on Linux
+    ru_maxrss survives exec, so a freshly started interpreter would report its parent's peak.
+    """
+    try:
+        with open(_PROC_STATUS_FILE, encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux (bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageStats:
+    """Accumulated timings of one pipeline stage (by its path in the stage tree)."""
+    __slots__ = ("path", "name", "depth", "calls", "seconds", "items", "peak_traced_bytes", "max_rss_bytes")
+
+    def __init__(self, path: str, name: str, depth: int):
+        self.path = path
+        self.name = name
+        self.depth = depth
+        self.calls = 0
+        self.seconds = 0.0
+        self.items: Optional[int] = None
+        self.peak_traced_bytes: Optional[int] = None
+        self.max_rss_bytes: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _StageTimer:
+    """Context manager timing one run of a stage. Peak memory of nested stages is folded into their parents."""
+    __slots__ = ("_profiler", "_stats", "_parent", "_started", "_running_peak")
+
+    def __init__(self, profiler: "PipelineProfiler", stats: StageStats, parent: Optional["_StageTimer"]):
+        self._profiler = profiler
+        self._stats = stats
+        self._parent = parent
+        self._started = 0.0
+        self._running_peak = 0
+
+    def __enter__(self) -> "_StageTimer":
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if self._parent is not None:
+                self._parent._running_peak = max(self._parent._running_peak, peak)
+            tracemalloc.reset_peak()
+            self._running_peak = current
+        self._profiler._stack.append(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        elapsed = time.perf_counter() - self._started
+        self._profiler._stack.pop()
+        stats = self._stats
+        stats.calls += 1
+        stats.seconds += elapsed
+        if tracemalloc.is_tracing():
+            stage_peak = max(self._running_peak, tracemalloc.get_traced_memory()[1])
+            stats.peak_traced_bytes = max(stats.peak_traced_bytes or 0, stage_peak)
+            if self._parent is not None:
+                self._parent._running_peak = max(self._parent._running_peak, stage_peak)
+            tracemalloc.reset_peak()
+        stats.max_rss_bytes = peak_rss_bytes()
+        return False
+
+    def count(self, items: int):
+        """Adds to the number of items (rows, events, assets, ...) the stage handled."""
+        self._stats.items = (self._stats.items or 0) + items
+
+
+class _DisabledStage:
+    """What profile_stage() returns while no profiler is active: does nothing."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_DisabledStage":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        return False
+
+    def count(self, items: int):
+        pass
+
+
+_DISABLED_STAGE = _DisabledStage()
+
+
+class PipelineProfiler:
+    """
+    Times and counts the stages of a run, with the peak traced (Python) memory of each stage and
+    the process' peak RSS after it. Stages nest: a stage entered inside another is recorded under
+    its parent's path. Repeated stages accumulate.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageStats] = {} # By path, in first-entry order
+        self.total_seconds = 0.0
+        self._stack: List[_StageTimer] = []
+        self._started: Optional[float] = None
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self._started is not None:
+            self.total_seconds = time.perf_counter() - self._started
+            self._started = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _stats_for(self, name: str) -> StageStats:
+        parent_path = self._stack[-1]._stats.path if self._stack else None
+        path = f"{parent_path}{STAGE_PATH_SEPARATOR}{name}" if parent_path else name
+        stats = self.stages.get(path)
+        if stats is None:
+            stats = self.stages[path] = StageStats(path, name, len(self._stack))
+        return stats
+
+    def stage(self, name: str) -> _StageTimer:
+        return _StageTimer(self, self._stats_for(name), self._stack[-1] if self._stack else None)
+
+    def record(self, name: str, seconds: float, items: Optional[int] = None):
+        """Adds a timing measured elsewhere (hot loops, worker processes) under the current stage. No memory figures."""
+        stats = self._stats_for(name)
+        stats.calls += 1
+        stats.seconds += seconds
+        if items is not None:
+            stats.items = (stats.items or 0) + items
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format_version": PROFILE_FORMAT_VERSION,
+            "total_seconds": self.total_seconds,
+            "stages": [stats.to_dict() for stats in self.stages.values()],
+        }
+
+    def format_table(self) -> str:
+        total = self.total_seconds or sum(s.seconds for s in self.stages.values() if s.depth == 0) or 1.0
+        name_width = max([len("Stage")] + [2 * s.depth + len(s.name) for s in self.stages.values()])
+        header = (f"{'Stage':<{name_width}}  {'Calls':>7}  {'Items':>10}  {'Seconds':>9}  {'%':>6}  "
+                  f"{'Peak MB':>9}  {'RSS MB':>9}")
+        lines = ["--- Pipeline Profile ---", header, "-" * len(header)]
+        for stats in self.stages.values():
+            items = f"{stats.items:,}" if stats.items is not None else ""
+            peak = f"{stats.peak_traced_bytes / _BYTES_PER_MB:.1f}" if stats.peak_traced_bytes is not None else ""
+            rss = f"{stats.max_rss_bytes / _BYTES_PER_MB:.1f}" if stats.max_rss_bytes is not None else ""
+            lines.append(f"{'  ' * stats.depth + stats.name:<{name_width}}  {stats.calls:>7}  {items:>10}  "
+                         f"{stats.seconds:>9.3f}  {100 * stats.seconds / total:>5.1f}%  {peak:>9}  {rss:>9}")
+        lines.append(f"Total: {self.total_seconds:.3f}s")
+        return "\n".join(lines)
+
+    def write_json(self, file_path: str):
+        """Writes the profile as JSON (atomically)."""
+        write_file_atomically(file_path, lambda f: json.dump(self.to_dict(), f, indent=2))
+        logger.info(f"Wrote pipeline profile ({len(self.stages)} stages) to {file_path}.")
+
+
+_active_profiler: Optional[PipelineProfiler] = None
+
+
+def activate_profiler(profiler: Optional[PipelineProfiler]):
+    """Makes profiler the target of profile_stage() (None disables profiling)."""
+    global _active_profiler
+    _active_profiler = profiler
+
+
+def active_profiler() -> Optional[PipelineProfiler]:
+    return _active_profiler
+
+
+def profile_stage(name: str):
+    """Context manager timing a stage in the active profiler; a shared no-op object if profiling is off."""
+    profiler = _active_profiler
+    if profiler is None:
+        return _DISABLED_STAGE
+    return profiler.stage(name)
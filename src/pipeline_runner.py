@@ -1,14 +1,15 @@
 # src/pipeline_runner.py
 import logging
+from datetime import date
 from decimal import Decimal, getcontext
-from typing import Any, Optional, Tuple, List, Dict # Python 3.8 compatibility for List, Dict
+from typing import Any, Optional, List, Dict, Set, Tuple # Python 3.8 compatibility for List, Dict
 
 # Configuration
 import src.config as config
 
 # Domain objects and Enums (assuming they are accessible)
 from src.domain.assets import Asset # For type hinting if needed
-from src.domain.events import FinancialEvent
+from src.domain.events import FinancialEvent, TradeEvent
 from src.domain.results import RealizedGainLoss, VorabpauschaleData
 
 # Core components
@@ -17,8 +18,12 @@ from src.classification.asset_classifier import AssetClassifier
 from src.processing.enrichment import enrich_financial_events
 from src.utils.currency_converter import CurrencyConverter
 from src.utils.exchange_rate_provider import ECBExchangeRateProvider, ExchangeRateProvider # Added base for custom provider
+from src.utils.ecb_bundle_provider import ECBHistoricalBundleProvider
 from src.engine.calculation_engine import run_main_calculations
+from src.engine.ledger_state import load_carried_ledger_state
 from src.identification.asset_resolver import AssetResolver
+from src.pipeline_snapshot import PipelineSnapshotStore, compute_snapshot_key, file_content_hash, source_code_hash
+from src.pipeline_profiler import profile_stage
 
 logger = logging.getLogger(__name__)
 
@@ -43,40 +48,91 @@ class ProcessingOutput:
         self.final_assets_by_id: Dict[Any, Asset] = asset_resolver.assets_by_internal_id
 
 
-def run_core_processing_pipeline(
-    trades_file_path: str,
-    cash_transactions_file_path: str,
-    positions_start_file_path: str,
-    positions_end_file_path: str,
-    corporate_actions_file_path: str,
-    interactive_classification_mode: bool,
-    tax_year_to_process: int = config.TAX_YEAR, # Allow override for testing
-    custom_rate_provider: Optional[ExchangeRateProvider] = None # For testing ECB mock
-) -> ProcessingOutput:
+def _collect_rate_prefetch_dates(
+    financial_events: List[FinancialEvent],
+    tax_year: int
+) -> Dict[str, Set[date]]:
     """
-    Runs the core data processing pipeline: parsing, enrichment, and calculations.
-    Returns a ProcessingOutput object containing all relevant results.
+    Collects the (currency, date) pairs that enrichment (and the SOY fallback conversion on
+    January 1st of the tax year) will request exchange rates for, as {currency: dates}.
+    Returns an empty dict if no foreign currency conversion is needed.
     """
-    logger.info("Initializing system components for pipeline...")
-    asset_classifier = AssetClassifier(
-        cache_file_path=config.CLASSIFICATION_CACHE_FILE_PATH, # Renamed from CLASSIFICATION_CACHE_FILE
+    dates_by_currency: Dict[str, Set[date]] = {}
+    for event in financial_events:
+        event_currencies = [event.local_currency]
+        if isinstance(event, TradeEvent):
+            event_currencies.append(event.commission_currency)
+        foreign_currencies = {c.upper() for c in event_currencies if c and c.upper() != "EUR"}
+        if not foreign_currencies:
+            continue
+        event_date_obj = event.event_date_obj
+        if not event_date_obj:
+            continue
+        for currency in foreign_currencies:
+            dates_by_currency.setdefault(currency, set()).add(event_date_obj)
+
+    tax_year_start = date(tax_year, 1, 1)
+    for dates in dates_by_currency.values():
+        dates.add(tax_year_start)
+    return dates_by_currency
+
+
+def _create_rate_provider(exchange_rate_source: str, ecb_bundle_file_path: str) -> ExchangeRateProvider:
+    """Creates the exchange rate provider selected by config/CLI ("ecb_api" or "ecb_bundle")."""
+    if exchange_rate_source == "ecb_bundle":
+        rate_provider = ECBHistoricalBundleProvider(
+            bundle_file_path=ecb_bundle_file_path,
+            snapshot_file_path=config.ECB_HISTORICAL_SNAPSHOT_FILE_PATH,
+            max_fallback_days_override=config.MAX_FALLBACK_DAYS_EXCHANGE_RATES,
+            currency_code_mapping_override=config.CURRENCY_CODE_MAPPING_ECB
+        )
+        logger.info(f"ECB historical rate file provider initialized from {ecb_bundle_file_path}.")
+        return rate_provider
+    if exchange_rate_source != "ecb_api":
+        raise ValueError(f"Unknown exchange rate source '{exchange_rate_source}'. Expected 'ecb_api' or 'ecb_bundle'.")
+
+    rate_provider = ECBExchangeRateProvider(
+        cache_file_path=config.ECB_RATES_CACHE_FILE_PATH, # Renamed from ECB_RATES_CACHE_FILE
+        max_fallback_days_override=config.MAX_FALLBACK_DAYS_EXCHANGE_RATES,
+        currency_code_mapping_override=config.CURRENCY_CODE_MAPPING_ECB
     )
+    logger.info("ECB exchange rates provider initialized.")
+    return rate_provider
+
+
+def _parse_and_enrich_events(
+    input_files: Dict[str, Optional[str]],
+    interactive_classification_mode: bool,
+    asset_classifier: AssetClassifier,
+    rate_provider: ExchangeRateProvider,
+    currency_converter: CurrencyConverter,
+    tax_year: int,
+    streaming_ingestion: bool,
+    fast_row_decoding: bool,
+    parallel_parsing: bool
+) -> Tuple[AssetResolver, List[FinancialEvent]]:
+    """Parses the input files, resolves assets, links events and enriches them with EUR amounts."""
     asset_resolver = AssetResolver(asset_classifier=asset_classifier)
     orchestrator = ParsingOrchestrator(
         asset_resolver=asset_resolver,
         asset_classifier=asset_classifier,
-        interactive_classification=interactive_classification_mode
+        interactive_classification=interactive_classification_mode,
+        streaming_ingestion=streaming_ingestion,
+        fast_row_decoding=fast_row_decoding,
+        parallel_parsing=parallel_parsing
     )
 
     logger.info("Starting parsing pipeline...")
     try:
-        all_financial_events_raw = orchestrator.run_parsing_pipeline(
-            trades_file=trades_file_path,
-            cash_transactions_file=cash_transactions_file_path,
-            positions_start_file=positions_start_file_path,
-            positions_end_file=positions_end_file_path,
-            corporate_actions_file=corporate_actions_file_path
-        )
+        with profile_stage("Parsing pipeline") as stage:
+            all_financial_events_raw = orchestrator.run_parsing_pipeline(
+                trades_file=input_files["trades"],
+                cash_transactions_file=input_files["cash_transactions"],
+                positions_start_file=input_files["positions_start"],
+                positions_end_file=input_files["positions_end"],
+                corporate_actions_file=input_files["corporate_actions"]
+            )
+            stage.count(len(all_financial_events_raw))
     except ValueError as e:
         logger.critical(f"Parsing pipeline failed: {e}. Check input data and configuration.")
         # Re-raise or handle as per application's error strategy for pipeline failures
@@ -88,46 +144,155 @@ def run_core_processing_pipeline(
     logger.info(f"Parsing pipeline completed. Discovered {len(asset_resolver.assets_by_internal_id)} unique assets.")
     logger.info(f"Generated {len(all_financial_events_raw)} raw financial event objects.")
 
+    prefetch_dates_by_currency = _collect_rate_prefetch_dates(all_financial_events_raw, tax_year)
+    if prefetch_dates_by_currency:
+        prefetch_pair_count = sum(len(dates) for dates in prefetch_dates_by_currency.values())
+        logger.info(f"Prefetching exchange rates for {prefetch_pair_count} (currency, date) pairs in {sorted(prefetch_dates_by_currency)}...")
+        try:
+            with profile_stage("Exchange rate prefetch") as stage:
+                rate_provider.prefetch_rates_for_dates(prefetch_dates_by_currency)
+                currency_converter.preload_rates(prefetch_dates_by_currency)
+                stage.count(prefetch_pair_count)
+        except Exception as e:
+            logger.error(f"Exchange rate prefetch failed: {e}. Rates will be fetched on demand.", exc_info=True)
+
+    logger.info("Enriching financial events (e.g., EUR conversion)...")
+    with profile_stage("Enrichment") as stage:
+        financial_events_enriched = enrich_financial_events(
+            financial_events=all_financial_events_raw,
+            currency_converter=currency_converter,
+            internal_calculation_precision=config.INTERNAL_CALCULATION_PRECISION, # Renamed parameter
+            decimal_rounding_mode=config.DECIMAL_ROUNDING_MODE
+        )
+        stage.count(len(financial_events_enriched))
+    logger.info(f"Enrichment completed. {len(financial_events_enriched)} events processed.")
+    rate_provider.flush_cache()
+
+    return asset_resolver, financial_events_enriched
+
+
+def _snapshot_settings(tax_year: int, asset_classifier: AssetClassifier, rate_provider: ExchangeRateProvider,
+                       exchange_rate_source: str, ecb_bundle_file_path: str) -> Dict[str, Any]:
+    """Settings that influence parsing and enrichment, for the pipeline snapshot key."""
+    return {
+        "tax_year": tax_year,
+        "internal_calculation_precision": config.INTERNAL_CALCULATION_PRECISION,
+        "decimal_rounding_mode": config.DECIMAL_ROUNDING_MODE,
+        "precision_quantity": config.PRECISION_QUANTITY,
+        "wht_linking_assignment_mode": config.WHT_LINKING_ASSIGNMENT_MODE,
+        "max_fallback_days_exchange_rates": config.MAX_FALLBACK_DAYS_EXCHANGE_RATES,
+        "currency_code_mapping_ecb": sorted(config.CURRENCY_CODE_MAPPING_ECB.items()),
+        "rate_provider": f"{type(rate_provider).__module__}.{type(rate_provider).__qualname__}",
+        "exchange_rate_source": exchange_rate_source,
+        "ecb_bundle": file_content_hash(ecb_bundle_file_path) if exchange_rate_source == "ecb_bundle" else None,
+        "classification_cache": file_content_hash(asset_classifier.cache_file_path),
+        "source_code": source_code_hash(),
+    }
+
+
+def _count_unconverted_events(financial_events: List[FinancialEvent]) -> int:
+    return sum(1 for event in financial_events
+               if event.gross_amount_foreign_currency is not None and event.gross_amount_eur is None)
+
+
+def run_core_processing_pipeline(
+    trades_file_path: str,
+    cash_transactions_file_path: str,
+    positions_start_file_path: str,
+    positions_end_file_path: str,
+    corporate_actions_file_path: str,
+    interactive_classification_mode: bool,
+    tax_year_to_process: int = config.TAX_YEAR, # Allow override for testing
+    custom_rate_provider: Optional[ExchangeRateProvider] = None, # For testing ECB mock
+    exchange_rate_source: Optional[str] = None, # Defaults to config.EXCHANGE_RATE_SOURCE
+    ecb_bundle_file_path: Optional[str] = None, # Defaults to config.ECB_HISTORICAL_BUNDLE_FILE_PATH
+    streaming_ingestion: Optional[bool] = None, # Defaults to config.STREAMING_CSV_INGESTION
+    fast_row_decoding: Optional[bool] = None, # Defaults to config.FAST_CSV_ROW_DECODING
+    parallel_parsing: Optional[bool] = None, # Defaults to config.PARALLEL_CSV_PARSING
+    use_snapshot: Optional[bool] = None, # Defaults to config.USE_PIPELINE_SNAPSHOT
+    snapshot_file_path: Optional[str] = None, # Defaults to config.PIPELINE_SNAPSHOT_FILE_PATH
+    soy_ledger_state_file_path: Optional[str] = None, # Defaults to config.SOY_LEDGER_STATE_FILE_PATH
+    eoy_ledger_state_file_path: Optional[str] = None, # Defaults to config.EOY_LEDGER_STATE_FILE_PATH
+    parallel_fifo: Optional[bool] = None # Defaults to config.PARALLEL_FIFO_PROCESSING
+) -> ProcessingOutput:
+    """
+    Runs the core data processing pipeline: parsing, enrichment, and calculations.
+    Returns a ProcessingOutput object containing all relevant results.
+    """
+    logger.info("Initializing system components for pipeline...")
+    asset_classifier = AssetClassifier(
+        cache_file_path=config.CLASSIFICATION_CACHE_FILE_PATH, # Renamed from CLASSIFICATION_CACHE_FILE
+    )
+    exchange_rate_source = exchange_rate_source or config.EXCHANGE_RATE_SOURCE
+    ecb_bundle_file_path = ecb_bundle_file_path or config.ECB_HISTORICAL_BUNDLE_FILE_PATH
     if custom_rate_provider:
         rate_provider = custom_rate_provider
         logger.info("Using custom exchange rate provider.")
     else:
-        rate_provider = ECBExchangeRateProvider(
-            cache_file_path=config.ECB_RATES_CACHE_FILE_PATH, # Renamed from ECB_RATES_CACHE_FILE
-            max_fallback_days_override=config.MAX_FALLBACK_DAYS_EXCHANGE_RATES,
-            currency_code_mapping_override=config.CURRENCY_CODE_MAPPING_ECB
-        )
-        try:
-            logger.info("ECB exchange rates provider initialized.")
-        except Exception as e:
-            logger.error(f"Failed to load ECB exchange rates: {e}. Currency conversions might fail.")
-            # Decide on error strategy: raise, or continue with potential failures later?
-            # For now, logging error and continuing.
+        rate_provider = _create_rate_provider(exchange_rate_source, ecb_bundle_file_path)
 
     currency_converter = CurrencyConverter(rate_provider=rate_provider)
 
-    logger.info("Enriching financial events (e.g., EUR conversion)...")
-    financial_events_enriched = enrich_financial_events(
-        financial_events=all_financial_events_raw,
-        currency_converter=currency_converter,
-        internal_calculation_precision=config.INTERNAL_CALCULATION_PRECISION, # Renamed parameter
-        decimal_rounding_mode=config.DECIMAL_ROUNDING_MODE
-    )
-    logger.info(f"Enrichment completed. {len(financial_events_enriched)} events processed.")
+    input_files = {
+        "trades": trades_file_path,
+        "cash_transactions": cash_transactions_file_path,
+        "positions_start": positions_start_file_path,
+        "positions_end": positions_end_file_path,
+        "corporate_actions": corporate_actions_file_path,
+    }
+    snapshot_store = None
+    snapshot = None
+    if config.USE_PIPELINE_SNAPSHOT if use_snapshot is None else use_snapshot:
+        snapshot_store = PipelineSnapshotStore(snapshot_file_path or config.PIPELINE_SNAPSHOT_FILE_PATH)
+        with profile_stage("Pipeline snapshot load"):
+            snapshot = snapshot_store.load(compute_snapshot_key(input_files, _snapshot_settings(
+                tax_year_to_process, asset_classifier, rate_provider, exchange_rate_source, ecb_bundle_file_path)))
+
+    if snapshot is not None:
+        asset_resolver, financial_events_enriched = snapshot
+        asset_resolver.asset_classifier = asset_classifier
+    else:
+        asset_resolver, financial_events_enriched = _parse_and_enrich_events(
+            input_files, interactive_classification_mode, asset_classifier, rate_provider, currency_converter, tax_year_to_process,
+            streaming_ingestion=config.STREAMING_CSV_INGESTION if streaming_ingestion is None else streaming_ingestion,
+            fast_row_decoding=config.FAST_CSV_ROW_DECODING if fast_row_decoding is None else fast_row_decoding,
+            parallel_parsing=config.PARALLEL_CSV_PARSING if parallel_parsing is None else parallel_parsing
+        )
+        if snapshot_store is not None:
+            unconverted_count = _count_unconverted_events(financial_events_enriched)
+            if unconverted_count:
+                logger.warning(f"Not saving a pipeline snapshot: {unconverted_count} events could not be converted to EUR.")
+            else:
+                # The key is computed again: interactive classification may have updated the classification cache.
+                with profile_stage("Pipeline snapshot save"):
+                    snapshot_store.save(compute_snapshot_key(input_files, _snapshot_settings(
+                        tax_year_to_process, asset_classifier, rate_provider, exchange_rate_source, ecb_bundle_file_path)),
+                        asset_resolver, financial_events_enriched)
+
+    soy_ledger_state_file_path = soy_ledger_state_file_path or config.SOY_LEDGER_STATE_FILE_PATH
+    carried_ledger_state = None
+    if soy_ledger_state_file_path:
+        with profile_stage("SOY ledger state load"):
+            carried_ledger_state = load_carried_ledger_state(soy_ledger_state_file_path, tax_year_to_process)
 
     logger.info(f"Running calculation engine for tax year {tax_year_to_process}...")
     eoy_mismatch_error_count_calc = 0
     try:
         # Ensure run_main_calculations uses the passed tax_year_to_process
-        realized_gains_losses, vorabpauschale_items, processed_income_events, eoy_mismatch_error_count_calc = run_main_calculations(
-            financial_events=financial_events_enriched,
-            asset_resolver=orchestrator.asset_resolver, # Use the resolver from the orchestrator
-            currency_converter=currency_converter,
-            exchange_rate_provider=rate_provider,
-            tax_year=tax_year_to_process,
-            internal_calculation_precision=config.INTERNAL_CALCULATION_PRECISION, # Renamed parameter
-            decimal_rounding_mode=config.DECIMAL_ROUNDING_MODE
-        )
+        with profile_stage("Calculations") as stage:
+            realized_gains_losses, vorabpauschale_items, processed_income_events, eoy_mismatch_error_count_calc = run_main_calculations(
+                financial_events=financial_events_enriched,
+                asset_resolver=asset_resolver, # Parsed in this run or restored from the snapshot
+                currency_converter=currency_converter,
+                exchange_rate_provider=rate_provider,
+                tax_year=tax_year_to_process,
+                internal_calculation_precision=config.INTERNAL_CALCULATION_PRECISION, # Renamed parameter
+                decimal_rounding_mode=config.DECIMAL_ROUNDING_MODE,
+                carried_ledger_state=carried_ledger_state,
+                eoy_ledger_state_file_path=eoy_ledger_state_file_path or config.EOY_LEDGER_STATE_FILE_PATH,
+                parallel_fifo=config.PARALLEL_FIFO_PROCESSING if parallel_fifo is None else parallel_fifo
+            )
+            stage.count(len(financial_events_enriched))
     except Exception as e:
         logger.critical(f"Calculation engine failed with unexpected error: {e}", exc_info=True)
         raise # Re-raise for higher level handling or test assertion
@@ -142,6 +307,6 @@ def run_core_processing_pipeline(
         vorabpauschale_items=vorabpauschale_items,
         processed_income_events=processed_income_events,
         all_financial_events_enriched=financial_events_enriched,
-        asset_resolver=orchestrator.asset_resolver,
+        asset_resolver=asset_resolver,
         eoy_mismatch_error_count=eoy_mismatch_error_count_calc
     )
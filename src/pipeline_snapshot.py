@@ -0,0 +1,100 @@
+# src/pipeline_snapshot.py
+import hashlib
+import logging
+import os
+import pickle
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.domain.events import FinancialEvent
+from src.identification.asset_resolver import AssetResolver
+from src.utils.file_utils import write_file_atomically
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the layout of the pickled snapshot changes; older snapshots are ignored.
+SNAPSHOT_FORMAT_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+SOURCE_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def file_content_hash(file_path: Optional[str]) -> Optional[str]:
+    """SHA-256 of a file's content, or None if there is no such file."""
+    if not file_path or not os.path.isfile(file_path):
+        return None
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_code_hash(source_root: str = SOURCE_ROOT) -> str:
+    """SHA-256 over the application's Python sources, so a code change invalidates snapshots too."""
+    digest = hashlib.sha256()
+    for dir_path, dir_names, file_names in os.walk(source_root):
+        dir_names[:] = sorted(d for d in dir_names if d != "__pycache__")
+        for file_name in sorted(f for f in file_names if f.endswith(".py")):
+            path = os.path.join(dir_path, file_name)
+            digest.update(os.path.relpath(path, source_root).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compute_snapshot_key(input_files: Mapping[str, Optional[str]], settings: Mapping[str, Any]) -> str:
+    """
+    Key of a pipeline snapshot: the content hashes of the input files (by role, so swapping two
+    files changes the key) plus the repr of every setting that influences parsing or enrichment.
+    """
+    digest = hashlib.sha256(f"format:{SNAPSHOT_FORMAT_VERSION}".encode("utf-8"))
+    for role in sorted(input_files):
+        digest.update(f"\x00input:{role}={file_content_hash(input_files[role])}".encode("utf-8"))
+    for name in sorted(settings):
+        digest.update(f"\x00setting:{name}={settings[name]!r}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PipelineSnapshotStore:
+    """
+    Binary snapshot of the pipeline state after enrichment: the AssetResolver with all assets
+    and the enriched, sorted FinancialEvent list. A snapshot is only used if its key matches,
+    i.e. no input file, relevant setting or source file changed since it was written.
+    """
+    def __init__(self, snapshot_file_path: str):
+        self.snapshot_file_path = snapshot_file_path
+
+    def load(self, key: str) -> Optional[Tuple[AssetResolver, List[FinancialEvent]]]:
+        if not os.path.exists(self.snapshot_file_path):
+            logger.info(f"No pipeline snapshot at {self.snapshot_file_path}. Running the full parsing and enrichment.")
+            return None
+        started = time.perf_counter()
+        try:
+            with open(self.snapshot_file_path, "rb") as f:
+                snapshot = pickle.load(f)
+            if snapshot.get("format_version") != SNAPSHOT_FORMAT_VERSION or snapshot.get("key") != key:
+                logger.info(f"Pipeline snapshot {self.snapshot_file_path} is outdated (inputs, settings or code changed). "
+                            f"Running the full parsing and enrichment.")
+                return None
+            asset_resolver, events = snapshot["asset_resolver"], snapshot["events"]
+        except Exception as e:
+            logger.warning(f"Could not load pipeline snapshot {self.snapshot_file_path}: {e}. Running the full parsing and enrichment.")
+            return None
+        logger.info(f"Loaded pipeline snapshot {self.snapshot_file_path} ({len(events)} events, "
+                    f"{len(asset_resolver.assets_by_internal_id)} assets) in {(time.perf_counter() - started) * 1000:.0f} ms.")
+        return asset_resolver, events
+
+    def save(self, key: str, asset_resolver: AssetResolver, events: List[FinancialEvent]):
+        """Writes the snapshot atomically (see write_file_atomically)."""
+        snapshot: Dict[str, Any] = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "key": key,
+            "asset_resolver": asset_resolver,
+            "events": events,
+        }
+        try:
+            write_file_atomically(self.snapshot_file_path,
+                                  lambda f: pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL), binary=True)
+            logger.info(f"Saved pipeline snapshot ({len(events)} events) to {self.snapshot_file_path}.")
+        except Exception as e:
+            logger.error(f"Error saving pipeline snapshot to {self.snapshot_file_path}: {e}")
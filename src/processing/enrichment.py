@@ -8,7 +8,6 @@ from src.domain.events import (
     FinancialEventType
 )
 from src.utils.currency_converter import CurrencyConverter
-from src.utils.type_utils import parse_ibkr_date
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +36,7 @@ def enrich_financial_events(
     eur_corp_action_detail_conversions_failed = 0
 
     for event_idx, event in enumerate(financial_events):
-        event_date_obj = parse_ibkr_date(event.event_date)
+        event_date_obj = event.event_date_obj
         if not event_date_obj:
             logger.warning(f"Event {event_idx+1}/{len(financial_events)} (ID: {event.event_id}): Could not parse event_date '{event.event_date}'. Skipping EUR conversion for this event.")
             events_skipped_date_parsing += 1
@@ -189,5 +188,7 @@ def enrich_financial_events(
     logger.info(f"Gross amount to EUR: {eur_gross_conversions_success} succeeded, {eur_gross_conversions_failed} failed/skipped.")
     logger.info(f"Commission to EUR: {eur_commission_conversions_success} succeeded, {eur_commission_conversions_failed} failed/skipped.")
     logger.info(f"CA Detail Conversion to EUR: {eur_corp_action_detail_conversions_success} succeeded, {eur_corp_action_detail_conversions_failed} failed/skipped.")
+    rate_memo = currency_converter.rate_memo
+    logger.info(f"Resolved exchange rate memo: {rate_memo.hits} hits, {rate_memo.misses} misses, {len(rate_memo)} entries.")
     logger.info("Data enrichment phase completed.")
     return financial_events
@@ -1,8 +1,11 @@
 # src/processing/withholding_tax_linker.py
+import heapq
 import logging
 import re
+import time
 import uuid
 from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import List, Optional, Dict, Set, Tuple, Union
 
@@ -13,6 +16,17 @@ from src.domain.events import (
 
 logger = logging.getLogger(__name__)
 
+PROXIMITY_MATCH_MAX_DAYS = 3
+MIN_LINK_CONFIDENCE_SCORE = 50
+
+# "greedy": every WHT event takes its own best candidate (several WHT events may share one income event).
+# "optimal": one-to-one assignment maximizing the total confidence (maximum-weight bipartite matching).
+WHT_ASSIGNMENT_MODE_GREEDY = "greedy"
+WHT_ASSIGNMENT_MODE_OPTIMAL = "optimal"
+WHT_ASSIGNMENT_MODES = (WHT_ASSIGNMENT_MODE_GREEDY, WHT_ASSIGNMENT_MODE_OPTIMAL)
+# Components of the candidate graph with more edges than this are assigned greedily (still one-to-one).
+DEFAULT_MAX_OPTIMAL_COMPONENT_EDGES = 2_000
+
 @dataclass
 class WithholdingTaxLink:
     """Represents a link between a withholding tax event and its underlying income event."""
@@ -32,13 +46,151 @@ class LinkingCriteriaMatch:
     effective_tax_rate: Optional[Decimal] = None
     notes: Optional[str] = None
 
+class _IncomeCandidateIndex:
+    """
+    Indexes potential income events so a WHT event only evaluates the income events that can
+    satisfy at least one matching strategy:
+    - exact/strong: same asset, currency and event_date string
+    - interest pattern: interest income with the same currency and event_date string
+    - proximity: same asset and currency, event dates at most PROXIMITY_MATCH_MAX_DAYS apart
+    Candidates are returned in their original order, so the best-match selection is unchanged.
+    """
+
+    def __init__(self, income_events: List[FinancialEvent]):
+        self.income_events = income_events
+        self._by_asset_currency_date: Dict[Tuple[uuid.UUID, Optional[str], str], List[int]] = {}
+        self._interest_by_currency_date: Dict[Tuple[Optional[str], str], List[int]] = {}
+        self._by_asset_currency_day: Dict[Tuple[uuid.UUID, Optional[str]], Dict[date, List[int]]] = {}
+
+        for index, income_event in enumerate(income_events):
+            asset_currency_key = (income_event.asset_internal_id, income_event.local_currency)
+            self._by_asset_currency_date.setdefault(asset_currency_key + (income_event.event_date,), []).append(index)
+            if income_event.event_type == FinancialEventType.INTEREST_RECEIVED:
+                self._interest_by_currency_date.setdefault((income_event.local_currency, income_event.event_date), []).append(index)
+            day = self._parse_day(income_event.event_date)
+            if day is not None:
+                self._by_asset_currency_day.setdefault(asset_currency_key, {}).setdefault(day, []).append(index)
+
+    @staticmethod
+    def _parse_day(date_str: str) -> Optional[date]:
+        """Calendar day as seen by WithholdingTaxLinker._are_dates_close (None if it cannot compare the string)."""
+        try:
+            return datetime.fromisoformat(date_str).date()
+        except ValueError:
+            return None
+
+    def candidates_for(self, wht_event: WithholdingTaxEvent, is_interest_wht: bool) -> List[FinancialEvent]:
+        asset_currency_key = (wht_event.asset_internal_id, wht_event.local_currency)
+        candidate_indices: Set[int] = set(self._by_asset_currency_date.get(asset_currency_key + (wht_event.event_date,), ()))
+        if is_interest_wht:
+            candidate_indices.update(self._interest_by_currency_date.get((wht_event.local_currency, wht_event.event_date), ()))
+
+        wht_day = self._parse_day(wht_event.event_date)
+        events_by_day = self._by_asset_currency_day.get(asset_currency_key)
+        if wht_day is not None and events_by_day:
+            # One extra day each side: _are_dates_close compares datetimes, which may carry a time of day.
+            window_days = PROXIMITY_MATCH_MAX_DAYS + 1
+            for offset in range(-window_days, window_days + 1):
+                candidate_indices.update(events_by_day.get(wht_day + timedelta(days=offset), ()))
+
+        return [self.income_events[index] for index in sorted(candidate_indices)]
+
+
+def _max_weight_bipartite_matching(num_left: int, num_right: int, edges: List[Tuple[int, int, int]]) -> Dict[int, int]:
+    """
+    Maximum-weight (not necessarily perfect) bipartite matching via successive shortest paths
+    with Dijkstra and node potentials. edges are (left, right, positive integer weight).
+    Returns {left: right}.
+    """
+    source, sink = num_left + num_right, num_left + num_right + 1
+    node_count = sink + 1
+    # Residual graph: per node a list of edge ids; edge arrays hold target, capacity and cost.
+    adjacency: List[List[int]] = [[] for _ in range(node_count)]
+    edge_to: List[int] = []
+    edge_cap: List[int] = []
+    edge_cost: List[int] = []
+
+    def add_edge(u: int, v: int, cost: int):
+        adjacency[u].append(len(edge_to)); edge_to.append(v); edge_cap.append(1); edge_cost.append(cost)
+        adjacency[v].append(len(edge_to)); edge_to.append(u); edge_cap.append(0); edge_cost.append(-cost)
+
+    for left in range(num_left):
+        add_edge(source, left, 0)
+    for left, right, weight in edges:
+        add_edge(left, num_left + right, -weight)
+    for right in range(num_right):
+        add_edge(num_left + right, sink, 0)
+
+    # Initial potentials are exact shortest distances: the graph is a DAG source -> left -> right -> sink.
+    potential = [0] * node_count
+    for left, right, weight in edges:
+        potential[num_left + right] = min(potential[num_left + right], -weight)
+    potential[sink] = min((potential[num_left + right] for right in range(num_right)), default=0)
+
+    infinity = float("inf")
+    while True:
+        dist = [infinity] * node_count
+        prev_edge = [-1] * node_count
+        dist[source] = 0
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for edge_id in adjacency[u]:
+                if edge_cap[edge_id] <= 0:
+                    continue
+                v = edge_to[edge_id]
+                nd = d + edge_cost[edge_id] + potential[u] - potential[v]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    prev_edge[v] = edge_id
+                    heapq.heappush(heap, (nd, v))
+        if dist[sink] == infinity or dist[sink] + potential[sink] - potential[source] >= 0:
+            break # No augmenting path left that increases the total weight
+        for node in range(node_count):
+            if dist[node] < infinity:
+                potential[node] += dist[node]
+        node = sink
+        while node != source:
+            edge_id = prev_edge[node]
+            edge_cap[edge_id] -= 1
+            edge_cap[edge_id ^ 1] += 1
+            node = edge_to[edge_id ^ 1]
+
+    matching: Dict[int, int] = {}
+    for left in range(num_left):
+        for edge_id in adjacency[left]:
+            target = edge_to[edge_id]
+            if edge_id % 2 == 0 and num_left <= target < source and edge_cap[edge_id] == 0:
+                matching[left] = target - num_left
+    return matching
+
+
+def _greedy_bipartite_matching(edges: List[Tuple[int, int, int]]) -> Dict[int, int]:
+    """One-to-one greedy assignment: heaviest edges first, ties in edge order. Returns {left: right}."""
+    matching: Dict[int, int] = {}
+    used_right: Set[int] = set()
+    for left, right, _ in sorted(edges, key=lambda edge: -edge[2]):
+        if left not in matching and right not in used_right:
+            matching[left] = right
+            used_right.add(right)
+    return matching
+
+
 class WithholdingTaxLinker:
     """
     Links withholding tax events to their underlying income-generating transactions.
     Implements comprehensive matching logic based on observed transaction patterns.
     """
     
-    def __init__(self):
+    def __init__(self,
+                 assignment_mode: str = WHT_ASSIGNMENT_MODE_GREEDY,
+                 max_optimal_component_edges_override: Optional[int] = None):
+        if assignment_mode not in WHT_ASSIGNMENT_MODES:
+            raise ValueError(f"Unknown withholding tax assignment mode '{assignment_mode}'. Expected one of {WHT_ASSIGNMENT_MODES}.")
+        self.assignment_mode = assignment_mode
+        self.max_optimal_component_edges = max_optimal_component_edges_override if max_optimal_component_edges_override is not None else DEFAULT_MAX_OPTIMAL_COMPONENT_EDGES
         self.wht_on_interest_pattern = re.compile(
             r"WITHHOLDING\s*(?:@\s*(\d{1,3}(?:\.\d+)?)%)?\s*ON\s*(?:CREDIT\s*)?INT(?:EREST)?.*",
             re.IGNORECASE
@@ -68,11 +220,16 @@ class WithholdingTaxLinker:
         
         successful_links: List[WithholdingTaxLink] = []
         unlinked_wht_events: List[WithholdingTaxEvent] = []
+        income_index = _IncomeCandidateIndex(income_events)
+        candidates_by_wht = [income_index.candidates_for(wht_event, self._is_interest_wht(wht_event)) for wht_event in wht_events]
+
+        if self.assignment_mode == WHT_ASSIGNMENT_MODE_OPTIMAL:
+            best_matches = self._assign_optimally(wht_events, candidates_by_wht, income_events)
+        else:
+            best_matches = [self._find_best_match(wht_event, candidates) for wht_event, candidates in zip(wht_events, candidates_by_wht)]
         
-        for wht_event in wht_events:
-            best_match = self._find_best_match(wht_event, income_events)
-            
-            if best_match and best_match.confidence_score >= 50:  # Minimum confidence threshold
+        for wht_event, best_match in zip(wht_events, best_matches):
+            if best_match and best_match.confidence_score >= MIN_LINK_CONFIDENCE_SCORE:
                 link = WithholdingTaxLink(
                     withholding_tax_event_id=wht_event.event_id,
                     linked_income_event_id=best_match.candidate_event_id,
@@ -116,20 +273,12 @@ class WithholdingTaxLinker:
         wht_event: WithholdingTaxEvent, 
         income_events: List[FinancialEvent]
     ) -> Optional[LinkingCriteriaMatch]:
-        """Find the best matching income event for a withholding tax event."""
+        """Find the best matching income event for a withholding tax event among the given candidates."""
         
         candidate_matches: List[LinkingCriteriaMatch] = []
         
         for income_event in income_events:
-            # Try different matching strategies in order of confidence
-            match = self._try_exact_match(wht_event, income_event)
-            if not match:
-                match = self._try_strong_match(wht_event, income_event)
-            if not match:
-                match = self._try_interest_pattern_match(wht_event, income_event)
-            if not match:
-                match = self._try_proximity_match(wht_event, income_event)
-            
+            match = self._evaluate_candidate(wht_event, income_event)
             if match:
                 candidate_matches.append(match)
         
@@ -139,6 +288,86 @@ class WithholdingTaxLinker:
         
         return None
     
+    def _evaluate_candidate(
+        self,
+        wht_event: WithholdingTaxEvent,
+        income_event: FinancialEvent
+    ) -> Optional[LinkingCriteriaMatch]:
+        """Try the matching strategies in order of confidence; the first one that matches wins."""
+        match = self._try_exact_match(wht_event, income_event)
+        if not match:
+            match = self._try_strong_match(wht_event, income_event)
+        if not match:
+            match = self._try_interest_pattern_match(wht_event, income_event)
+        if not match:
+            match = self._try_proximity_match(wht_event, income_event)
+        return match
+
+    def _is_interest_wht(self, wht_event: WithholdingTaxEvent) -> bool:
+        return bool(self.wht_on_interest_pattern.match((wht_event.ibkr_activity_description or "").upper()))
+
+    def _assign_optimally(
+        self,
+        wht_events: List[WithholdingTaxEvent],
+        candidates_by_wht: List[List[FinancialEvent]],
+        income_events: List[FinancialEvent]
+    ) -> List[Optional[LinkingCriteriaMatch]]:
+        """
+        One-to-one assignment of WHT events to income events maximizing the total confidence score.
+        The sparse candidate graph (edges = matches above the confidence threshold) is split into
+        connected components, each solved as a maximum-weight bipartite matching, or greedily if it
+        has more than max_optimal_component_edges edges.
+        """
+        income_position = {id(income_event): position for position, income_event in enumerate(income_events)}
+        matches_by_edge: Dict[Tuple[int, int], LinkingCriteriaMatch] = {}
+        # Union-find over WHT nodes (0..W-1) and income nodes (W..W+I-1)
+        parent = list(range(len(wht_events) + len(income_events)))
+
+        def find(node: int) -> int:
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for wht_position, (wht_event, candidates) in enumerate(zip(wht_events, candidates_by_wht)):
+            for income_event in candidates:
+                match = self._evaluate_candidate(wht_event, income_event)
+                if match and match.confidence_score >= MIN_LINK_CONFIDENCE_SCORE:
+                    income_pos = income_position[id(income_event)]
+                    matches_by_edge[(wht_position, income_pos)] = match
+                    parent[find(wht_position)] = find(len(wht_events) + income_pos)
+
+        edges_by_component: Dict[int, List[Tuple[int, int]]] = {}
+        for wht_position, income_pos in matches_by_edge:
+            edges_by_component.setdefault(find(wht_position), []).append((wht_position, income_pos))
+
+        assigned: List[Optional[LinkingCriteriaMatch]] = [None] * len(wht_events)
+        greedy_components = 0
+        started_total = time.perf_counter()
+        for component_edges in edges_by_component.values():
+            started = time.perf_counter()
+            wht_nodes = sorted({wht_position for wht_position, _ in component_edges})
+            income_nodes = sorted({income_pos for _, income_pos in component_edges})
+            wht_local = {wht_position: local for local, wht_position in enumerate(wht_nodes)}
+            income_local = {income_pos: local for local, income_pos in enumerate(income_nodes)}
+            weighted_edges = [(wht_local[w], income_local[i], matches_by_edge[(w, i)].confidence_score) for w, i in component_edges]
+
+            use_greedy = len(component_edges) > self.max_optimal_component_edges
+            if use_greedy:
+                greedy_components += 1
+                matching = _greedy_bipartite_matching(weighted_edges)
+            else:
+                matching = _max_weight_bipartite_matching(len(wht_nodes), len(income_nodes), weighted_edges)
+            for local_wht, local_income in matching.items():
+                wht_position = wht_nodes[local_wht]
+                assigned[wht_position] = matches_by_edge[(wht_position, income_nodes[local_income])]
+            logger.debug(f"WHT assignment component with {len(wht_nodes)} WHT / {len(income_nodes)} income events and {len(component_edges)} edges "
+                         f"solved {'greedily' if use_greedy else 'optimally'} in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+        logger.info(f"Optimal WHT assignment: {len(matches_by_edge)} candidate edges in {len(edges_by_component)} components "
+                    f"({greedy_components} assigned greedily), solved in {time.perf_counter() - started_total:.2f}s")
+        return assigned
+
     def _try_exact_match(
         self, 
         wht_event: WithholdingTaxEvent, 
@@ -330,8 +559,8 @@ class WithholdingTaxLinker:
         else:
             return None
             
-        # Close dates (within 3 days)
-        if self._are_dates_close(wht_event.event_date, income_event.event_date, max_days=3):
+        # Close dates (within PROXIMITY_MATCH_MAX_DAYS days)
+        if self._are_dates_close(wht_event.event_date, income_event.event_date, max_days=PROXIMITY_MATCH_MAX_DAYS):
             criteria_met.append("close_dates")
         else:
             return None
@@ -435,7 +664,6 @@ class WithholdingTaxLinker:
     def _are_dates_close(self, date1: str, date2: str, max_days: int = 3) -> bool:
         """Check if two ISO date strings are within max_days of each other."""
         try:
-            from datetime import datetime
             d1 = datetime.fromisoformat(date1)
             d2 = datetime.fromisoformat(date2)
             return abs((d2 - d1).days) <= max_days
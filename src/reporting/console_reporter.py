@@ -5,7 +5,12 @@ from collections import defaultdict
 from typing import List, Dict, Tuple, Optional 
 import uuid 
 
-from src.domain.results import RealizedGainLoss, VorabpauschaleData
+from src.domain.results import (
+    RealizedGainLoss, VorabpauschaleData,
+    SUBTOTAL_INTEREST_RECEIVED, SUBTOTAL_STOCK_CASH_DIVIDENDS, SUBTOTAL_STOCK_DIVIDENDS_IN_SHARES, SUBTOTAL_BOND_GAINS,
+    SUBTOTAL_WHT_LINKED_HIGH_CONFIDENCE, SUBTOTAL_WHT_LINKED_MEDIUM_CONFIDENCE, SUBTOTAL_WHT_LINKED_LOW_CONFIDENCE,
+    SUBTOTAL_WHT_UNLINKED,
+)
 from src.domain.events import FinancialEvent, WithholdingTaxEvent, CashFlowEvent, TradeEvent
 from src.domain.enums import AssetCategory, InvestmentFundType, FinancialEventType, TaxReportingCategory, RealizationType
 from src.domain.assets import Asset, InvestmentFund
@@ -20,38 +25,21 @@ logger = logging.getLogger(__name__)
 
 
 def generate_console_tax_report(
-    realized_gains_losses: List[RealizedGainLoss], 
     vorabpauschale_items: List[VorabpauschaleData], 
-    all_financial_events: List[FinancialEvent], 
     asset_resolver: AssetResolver,
     tax_year: int,
     eoy_mismatch_count: int,
     loss_offsetting_summary: LossOffsettingResult 
 ):
+    """
+    Prints the tax declaration summary. All sums are read from the subtotal table of
+    loss_offsetting_summary; the events and realizations are not scanned again.
+    """
     logger.info(f"Generating console tax declaration summary for tax year {tax_year}...")
     print(f"\n--- Tax Declaration Summary for Year {tax_year} (All amounts in EUR) ---")
     print("--- Figures for direct entry into German tax forms (as per PRD v3.2.2) ---")
-    
-    tax_year_start_date = parse_ibkr_date(f"{tax_year}-01-01")
-    tax_year_end_date = parse_ibkr_date(f"{tax_year}-12-31")
 
-    current_year_events: List[FinancialEvent] = []
-    if tax_year_start_date and tax_year_end_date:
-        for ev in all_financial_events: 
-            ev_date = parse_ibkr_date(ev.event_date)
-            if ev_date and tax_year_start_date <= ev_date <= tax_year_end_date:
-                current_year_events.append(ev)
-    else:
-        current_year_events = list(all_financial_events) # Fallback, less likely
-
-    current_year_rgls: List[RealizedGainLoss] = []
-    if tax_year_start_date and tax_year_end_date:
-        for rgl_item in realized_gains_losses:
-            rgl_realization_date = parse_ibkr_date(rgl_item.realization_date)
-            if rgl_realization_date and tax_year_start_date <= rgl_realization_date <= tax_year_end_date:
-                current_year_rgls.append(rgl_item)
-    else:
-        current_year_rgls = list(realized_gains_losses) # Fallback
+    subtotals = loss_offsetting_summary.subtotals
 
     # --- Anlage KAP (from LossOffsettingResult) ---
     print("\nAnlage KAP (Einkünfte aus Kapitalvermögen)")
@@ -67,36 +55,33 @@ def generate_console_tax_report(
     print(f"  Zeile 41 (Anrechenbare ausländische Steuern): {_q(wht_total_eur)}")
     
     # Add linking statistics for withholding tax events
-    wht_events = [ev for ev in current_year_events if isinstance(ev, WithholdingTaxEvent)]
-    if wht_events:
-        linked_wht_events = [ev for ev in wht_events if getattr(ev, 'taxed_income_event_id', None) is not None]
-        unlinked_wht_events = [ev for ev in wht_events if getattr(ev, 'taxed_income_event_id', None) is None]
-        
-        print(f"    └─ Quellensteuer-Ereignisse: {len(wht_events)} gesamt, {len(linked_wht_events)} verknüpft, {len(unlinked_wht_events)} nicht verknüpft")
+    high_confidence = subtotals.count(SUBTOTAL_WHT_LINKED_HIGH_CONFIDENCE)
+    medium_confidence = subtotals.count(SUBTOTAL_WHT_LINKED_MEDIUM_CONFIDENCE)
+    low_confidence = subtotals.count(SUBTOTAL_WHT_LINKED_LOW_CONFIDENCE)
+    linked_wht_count = high_confidence + medium_confidence + low_confidence
+    unlinked_wht_count = subtotals.count(SUBTOTAL_WHT_UNLINKED)
+    if linked_wht_count or unlinked_wht_count:
+        print(f"    └─ Quellensteuer-Ereignisse: {linked_wht_count + unlinked_wht_count} gesamt, {linked_wht_count} verknüpft, {unlinked_wht_count} nicht verknüpft")
         
-        if linked_wht_events:
+        if linked_wht_count:
             # Show confidence distribution
-            high_confidence = len([ev for ev in linked_wht_events if getattr(ev, 'link_confidence_score', 0) >= 80])
-            medium_confidence = len([ev for ev in linked_wht_events if 60 <= getattr(ev, 'link_confidence_score', 0) < 80])
-            low_confidence = len([ev for ev in linked_wht_events if getattr(ev, 'link_confidence_score', 0) < 60])
             print(f"    └─ Verknüpfungs-Konfidenz: {high_confidence} hoch (≥80%), {medium_confidence} mittel (60-79%), {low_confidence} niedrig (<60%)")
         
-        if unlinked_wht_events:
-            print(f"    └─ WARNUNG: {len(unlinked_wht_events)} Quellensteuer-Ereignisse konnten nicht mit Erträgen verknüpft werden")
+        if unlinked_wht_count:
+            print(f"    └─ WARNUNG: {unlinked_wht_count} Quellensteuer-Ereignisse konnten nicht mit Erträgen verknüpft werden")
 
 
     # --- Detailed Stock G/L (Gross, for transparency) ---
-    stock_g_l_per_asset: Dict[uuid.UUID, Dict[str, Any]] = defaultdict( 
-        lambda: {'description': 'Unknown Asset', 'total_gross_gain_loss': Decimal(0), 'realizations': []}
-    )
-    for rgl in current_year_rgls: # Use filtered list
-        if rgl.asset_category_at_realization == AssetCategory.STOCK:
-            asset = asset_resolver.get_asset_by_id(rgl.asset_internal_id)
-            asset_desc = asset.description if asset and asset.description else f"Asset ID: {rgl.asset_internal_id}"
-            stock_g_l_per_asset[rgl.asset_internal_id]['description'] = asset_desc
-            current_total = stock_g_l_per_asset[rgl.asset_internal_id]['total_gross_gain_loss']
-            if isinstance(current_total, Decimal):
-                 stock_g_l_per_asset[rgl.asset_internal_id]['total_gross_gain_loss'] = current_total + (rgl.gross_gain_loss_eur or Decimal(0))
+    stock_g_l_per_asset: Dict[uuid.UUID, Dict[str, Any]] = {}
+    stock_gains_by_asset = subtotals.by_asset(TaxReportingCategory.ANLAGE_KAP_AKTIEN_GEWINN)
+    stock_losses_by_asset = subtotals.by_asset(TaxReportingCategory.ANLAGE_KAP_AKTIEN_VERLUST)
+    for asset_id in stock_gains_by_asset.keys() | stock_losses_by_asset.keys():
+        asset = asset_resolver.get_asset_by_id(asset_id)
+        asset_desc = asset.description if asset and asset.description else f"Asset ID: {asset_id}"
+        stock_g_l_per_asset[asset_id] = {
+            'description': asset_desc,
+            'total_gross_gain_loss': stock_gains_by_asset.get(asset_id, Decimal(0)) - stock_losses_by_asset.get(asset_id, Decimal(0)),
+        }
 
     print("\n  Detaillierte Aufschlüsselung: Gewinne/Verluste aus Aktienveräußerungen pro Aktie (Brutto, vor Verrechnung)")
     print("  " + "-"*80)
@@ -112,28 +97,13 @@ def generate_console_tax_report(
 
 
     # --- Anlage KAP-INV (Gross figures) ---
-    kap_inv_report_lines: Dict[TaxReportingCategory, Decimal] = defaultdict(Decimal)
-    for rgl in current_year_rgls: # Use filtered list
-        if rgl.asset_category_at_realization == AssetCategory.INVESTMENT_FUND:
-            kap_inv_cat = get_kap_inv_category_for_reporting(rgl.fund_type_at_sale, is_distribution=False, is_gain=True)
-            if kap_inv_cat:
-                kap_inv_report_lines[kap_inv_cat] += rgl.gross_gain_loss_eur or Decimal(0)
-
-    for event in current_year_events: # Already filtered for tax year
-        asset = asset_resolver.get_asset_by_id(event.asset_internal_id)
-        if not asset: continue
-        if event.event_type == FinancialEventType.DISTRIBUTION_FUND and isinstance(asset, InvestmentFund):
-            kap_inv_cat = get_kap_inv_category_for_reporting(asset.fund_type, is_distribution=True, is_gain=False)
-            if kap_inv_cat:
-                kap_inv_report_lines[kap_inv_cat] += event.gross_amount_eur or Decimal(0)
-    
     print("\nAnlage KAP-INV (Investmenterträge - KEINE Alt-Anteile)")
     print("  Ausschüttungen (Brutto, vor Teilfreistellung):")
-    print(f"    Zeile 4 (Aktienfonds): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_AKTIENFONDS_AUSSCHUETTUNG_GROSS, Decimal(0)))}")
-    print(f"    Zeile 5 (Mischfonds): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_MISCHFONDS_AUSSCHUETTUNG_GROSS, Decimal(0)))}")
-    print(f"    Zeile 6 (Immobilienfonds): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_IMMOBILIENFONDS_AUSSCHUETTUNG_GROSS, Decimal(0)))}")
-    print(f"    Zeile 7 (Auslands-Immobilienfonds): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_AUSLANDS_IMMOBILIENFONDS_AUSSCHUETTUNG_GROSS, Decimal(0)))}")
-    print(f"    Zeile 8 (Sonstige Investmentfonds): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_SONSTIGE_FONDS_AUSSCHUETTUNG_GROSS, Decimal(0)))}")
+    print(f"    Zeile 4 (Aktienfonds): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_AKTIENFONDS_AUSSCHUETTUNG_GROSS))}")
+    print(f"    Zeile 5 (Mischfonds): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_MISCHFONDS_AUSSCHUETTUNG_GROSS))}")
+    print(f"    Zeile 6 (Immobilienfonds): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_IMMOBILIENFONDS_AUSSCHUETTUNG_GROSS))}")
+    print(f"    Zeile 7 (Auslands-Immobilienfonds): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_AUSLANDS_IMMOBILIENFONDS_AUSSCHUETTUNG_GROSS))}")
+    print(f"    Zeile 8 (Sonstige Investmentfonds): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_SONSTIGE_FONDS_AUSSCHUETTUNG_GROSS))}")
 
     print("  Vorabpauschale (Brutto, vor Teilfreistellung) - für 2023: 0 EUR")
     vp_gross_by_fund_type: Dict[InvestmentFundType, Decimal] = defaultdict(Decimal)
@@ -149,11 +119,11 @@ def generate_console_tax_report(
 
 
     print("  Gewinne/Verluste aus Veräußerung von Investmentfondsanteilen (Brutto, vor Teilfreistellung):")
-    print(f"    Zeile 14 (Aktienfonds G/V): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_AKTIENFONDS_GEWINN_GROSS, Decimal(0)))}")
-    print(f"    Zeile 17 (Mischfonds G/V): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_MISCHFONDS_GEWINN_GROSS, Decimal(0)))}")
-    print(f"    Zeile 20 (Immobilienfonds G/V): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_IMMOBILIENFONDS_GEWINN_GROSS, Decimal(0)))}")
-    print(f"    Zeile 23 (Auslands-Immobilienfonds G/V): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_AUSLANDS_IMMOBILIENFONDS_GEWINN_GROSS, Decimal(0)))}")
-    print(f"    Zeile 26 (Sonstige Investmentfonds G/V): {_q(kap_inv_report_lines.get(TaxReportingCategory.ANLAGE_KAP_INV_SONSTIGE_FONDS_GEWINN_GROSS, Decimal(0)))}")
+    print(f"    Zeile 14 (Aktienfonds G/V): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_AKTIENFONDS_GEWINN_GROSS))}")
+    print(f"    Zeile 17 (Mischfonds G/V): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_MISCHFONDS_GEWINN_GROSS))}")
+    print(f"    Zeile 20 (Immobilienfonds G/V): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_IMMOBILIENFONDS_GEWINN_GROSS))}")
+    print(f"    Zeile 23 (Auslands-Immobilienfonds G/V): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_AUSLANDS_IMMOBILIENFONDS_GEWINN_GROSS))}")
+    print(f"    Zeile 26 (Sonstige Investmentfonds G/V): {_q(subtotals.total(TaxReportingCategory.ANLAGE_KAP_INV_SONSTIGE_FONDS_GEWINN_GROSS))}")
 
     # --- Anlage SO (from LossOffsettingResult) ---
     print("\nAnlage SO (Sonstige Einkünfte - §23 EStG Private Sales)")
@@ -176,33 +146,10 @@ def generate_console_tax_report(
     # --- NEW DETAILED BREAKDOWN FOR Sonstige Kapitalerträge (nicht Fonds) - POSITIVE PART ---
     print(f"    Detaillierte positive Komponenten für 'Sonstige Kapitalerträge (nicht Fonds)' (Beitrag zu Anlage KAP Zeile 19):")
     
-    sum_interest_income_gross = Decimal('0')
-    sum_non_fund_dividends_gross = Decimal('0')
-    sum_bond_gains_gross = Decimal('0')
-
-    # Process events for interest and non-fund dividends
-    for event in current_year_events: # Already filtered for tax year
-        asset = asset_resolver.get_asset_by_id(event.asset_internal_id)
-        if not asset:
-            continue
-
-        event_gross_eur = event.gross_amount_eur if event.gross_amount_eur is not None else Decimal('0')
-
-        if event.event_type == FinancialEventType.INTEREST_RECEIVED and event_gross_eur > Decimal('0'):
-            sum_interest_income_gross += event_gross_eur
-        
-        elif event.event_type == FinancialEventType.DIVIDEND_CASH and asset.asset_category == AssetCategory.STOCK and event_gross_eur > Decimal('0'):
-            sum_non_fund_dividends_gross += event_gross_eur
-            
-        elif event.event_type == FinancialEventType.CORP_STOCK_DIVIDEND and asset.asset_category == AssetCategory.STOCK and event_gross_eur > Decimal('0'):
-            # Assuming event_gross_eur for CORP_STOCK_DIVIDEND is the taxable FMV
-            sum_non_fund_dividends_gross += event_gross_eur
-
-    # Process RGLs for bond gains
-    for rgl in current_year_rgls: # Already filtered for tax year
-        if rgl.asset_category_at_realization == AssetCategory.BOND and \
-           rgl.gross_gain_loss_eur is not None and rgl.gross_gain_loss_eur > Decimal('0'):
-            sum_bond_gains_gross += rgl.gross_gain_loss_eur
+    sum_interest_income_gross = subtotals.total(SUBTOTAL_INTEREST_RECEIVED)
+    # Assuming the gross EUR amount of a CORP_STOCK_DIVIDEND is the taxable FMV
+    sum_non_fund_dividends_gross = subtotals.total(SUBTOTAL_STOCK_CASH_DIVIDENDS) + subtotals.total(SUBTOTAL_STOCK_DIVIDENDS_IN_SHARES)
+    sum_bond_gains_gross = subtotals.total(SUBTOTAL_BOND_GAINS)
             
     print(f"      Zinserträge (brutto positiv): {_q(sum_interest_income_gross)}")
     print(f"      Dividenden (Aktien, brutto positiv, inkl. steuerpfl. Stock-Dividenden): {_q(sum_non_fund_dividends_gross)}")
@@ -241,10 +188,8 @@ def generate_stock_trade_report_for_symbol(
     target_asset = asset_resolver.get_asset_by_alias(alias_key_symbol)
 
     if not target_asset:
-        for asset_obj in asset_resolver.assets_by_internal_id.values():
-            if asset_obj.ibkr_symbol == stock_symbol_arg.upper() and asset_obj.asset_category == AssetCategory.STOCK:
-                target_asset = asset_obj
-                break
+        target_asset = next((asset_obj for asset_obj in asset_resolver.get_assets_by_symbol(stock_symbol_arg)
+                             if asset_obj.asset_category == AssetCategory.STOCK), None)
 
     if not target_asset:
         print(f"\nError: Stock with symbol '{stock_symbol_arg}' not found or not classified as STOCK.")
@@ -263,7 +208,7 @@ def generate_stock_trade_report_for_symbol(
     current_year_events_for_symbol_report: List[FinancialEvent] = []
     if tax_year_start_date and tax_year_end_date:
         for ev in all_financial_events: # Use all_financial_events passed to function
-            ev_date = parse_ibkr_date(ev.event_date)
+            ev_date = ev.event_date_obj
             if ev_date and tax_year_start_date <= ev_date <= tax_year_end_date:
                 if ev.asset_internal_id == target_asset.internal_asset_id:
                     current_year_events_for_symbol_report.append(ev)
@@ -275,7 +220,7 @@ def generate_stock_trade_report_for_symbol(
     current_year_rgls_for_symbol_report: List[RealizedGainLoss] = []
     if tax_year_start_date and tax_year_end_date:
         for rgl_item in rgl_items: # Use rgl_items passed to function
-            rgl_realization_date = parse_ibkr_date(rgl_item.realization_date)
+            rgl_realization_date = rgl_item.realization_date_obj
             if rgl_realization_date and tax_year_start_date <= rgl_realization_date <= tax_year_end_date:
                 if rgl_item.asset_internal_id == target_asset.internal_asset_id:
                     current_year_rgls_for_symbol_report.append(rgl_item)
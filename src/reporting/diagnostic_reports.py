@@ -111,9 +111,9 @@ def print_asset_positions_diagnostic(asset_resolver: AssetResolver):
 def print_assets_by_category_diagnostic(asset_resolver: AssetResolver):
     """Prints assets grouped by their final classification."""
     print("\n--- Assets by Final Category ---")
-    categorized_assets: Dict[Optional[AssetCategory], List[Asset]] = defaultdict(list) 
-    for asset in asset_resolver.assets_by_internal_id.values():
-        categorized_assets[asset.asset_category].append(asset)
+    categorized_assets: Dict[Optional[AssetCategory], List[Asset]] = {
+        category: list(assets.values()) for category, assets in asset_resolver.assets_by_category.items()
+    }
 
     sorted_categories = sorted(
         [cat for cat in categorized_assets.keys() if cat is not None],
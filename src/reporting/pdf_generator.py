@@ -11,7 +11,11 @@ from reportlab.lib import colors
 from reportlab.lib.units import cm
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
 
-from src.domain.results import LossOffsettingResult, RealizedGainLoss, VorabpauschaleData
+from src.domain.results import (
+    LossOffsettingResult, RealizedGainLoss, VorabpauschaleData,
+    SUBTOTAL_INTEREST_RECEIVED, SUBTOTAL_STOCK_CASH_DIVIDENDS, SUBTOTAL_STOCK_DIVIDENDS_IN_SHARES,
+    SUBTOTAL_BOND_GAINS, SUBTOTAL_BOND_LOSSES, SUBTOTAL_STUECKZINSEN_PAID, SUBTOTAL_WHT_TAXED_INCOME,
+)
 from src.domain.events import FinancialEvent, CashFlowEvent, WithholdingTaxEvent, CorporateActionEvent, \
     CorpActionSplitForward, CorpActionMergerCash, CorpActionStockDividend, CorpActionMergerStock
 from src.domain.assets import Asset, InvestmentFund, Stock, Bond, Derivative
@@ -709,9 +713,6 @@ class PdfReportGenerator:
 
         self.story.append(Paragraph("7.3 Sonstige Kapitalerträge (Zinsen, Dividenden, etc.)", self.styles['H3']))
         
-        all_other_income_positive_components = []
-        all_other_income_negative_components_abs = [] 
-
         self.story.append(Paragraph("7.3.1 Zinserträge", self.styles['SmallText']))
         interest_events = [ev for ev in self.all_financial_events if isinstance(ev, CashFlowEvent) and ev.event_type == FinancialEventType.INTEREST_RECEIVED]
         if interest_events:
@@ -732,11 +733,9 @@ class PdfReportGenerator:
                 if gross_eur > 0:
                     positive_events.append((name, event.event_date, gross_eur))
                     total_positive_interest += gross_eur
-                    all_other_income_positive_components.append(gross_eur)
                 elif gross_eur < 0:
                     negative_events.append((name, event.event_date, gross_eur))
                     total_negative_interest += gross_eur
-                    all_other_income_negative_components_abs.append(gross_eur.copy_abs())
             
             # Add positive interest events
             if positive_events:
@@ -777,7 +776,6 @@ class PdfReportGenerator:
                 gross_eur = event.gross_amount_eur or Decimal(0)
                 data.append([name, isin_symbol, format_date_german(event.event_date), self._format_decimal(gross_eur).replace('.',',')]) # Removed WHT data
                 total_dividends += gross_eur
-                if gross_eur > 0: all_other_income_positive_components.append(gross_eur)
             data.append([Paragraph("Summe Dividenden:", self.styles['TableHeader']), "", "", Paragraph(self._format_decimal(total_dividends).replace('.',','), self.styles['TableCellRight'])]) # Adjusted for removed column
             table = self._create_styled_table(data, col_widths=[5*cm, 3*cm, 2.5*cm, 4.5*cm]) # Adjusted col_widths
             self.story.append(KeepTogether(table))
@@ -810,7 +808,6 @@ class PdfReportGenerator:
                         self._format_decimal(taxable_income).replace('.',',')
                     ])
                     total_taxable_sd_income += taxable_income
-                    all_other_income_positive_components.append(taxable_income)
             if total_taxable_sd_income > 0:
                 data.append([Paragraph("Summe:", self.styles['TableHeader']),"", "", "", "", Paragraph(self._format_decimal(total_taxable_sd_income).replace('.',','), self.styles['TableCellRight'])])
                 # Adjusted quantity col width
@@ -838,8 +835,6 @@ class PdfReportGenerator:
                     self._format_decimal(gross_gl).replace('.',',')
                 ])
                 total_bond_gl += gross_gl
-                if gross_gl > 0: all_other_income_positive_components.append(gross_gl)
-                elif gross_gl < 0: all_other_income_negative_components_abs.append(gross_gl.copy_abs())
             data.append([Paragraph("Summe G/V Anleihen:", self.styles['TableHeader']), "", "", "", "", "", "", Paragraph(self._format_decimal(total_bond_gl).replace('.',','), self.styles['TableCellRight'])])
             # Adjusted quantity col width
             table = self._create_styled_table(data, col_widths=[3*cm, 2.5*cm, 1.8*cm, 1.8*cm, 2*cm, 1.8*cm, 2*cm, 2.2*cm])
@@ -863,9 +858,6 @@ class PdfReportGenerator:
             stueckzinsen_data_exists = True
         
         if stueckzinsen_data_exists:
-            if total_stueckzinsen_paid_abs > 0:
-                 all_other_income_negative_components_abs.append(total_stueckzinsen_paid_abs)
-            
             stueckzinsen_table_data.append([Paragraph("Summe gezahlter Stückzinsen (als neg. Ertrag):", self.styles['TableHeader']), "", "", Paragraph(self._format_decimal(total_stueckzinsen_paid_abs).replace('.',','), self.styles['TableCellRight'])])
             table = self._create_styled_table(stueckzinsen_table_data, col_widths=[7*cm, 3*cm, 2*cm, 3*cm])
             self.story.append(KeepTogether(table))
@@ -937,31 +929,12 @@ class PdfReportGenerator:
             Paragraph("POSITIVE KOMPONENTEN:", self.styles['TableHeader']), "", ""
         ])
         
-        # Calculate totals for each component type
-        total_interest = sum(gross_eur for gross_eur in all_other_income_positive_components 
-                           if any(isinstance(ev, CashFlowEvent) and ev.event_type == FinancialEventType.INTEREST_RECEIVED 
-                                  and (ev.gross_amount_eur or Decimal(0)) == gross_eur 
-                                  for ev in self.all_financial_events))
-        
-        total_dividends = sum(gross_eur for gross_eur in all_other_income_positive_components 
-                            if any(isinstance(ev, CashFlowEvent) and ev.event_type == FinancialEventType.DIVIDEND_CASH 
-                                   and (ev.gross_amount_eur or Decimal(0)) == gross_eur 
-                                   and (asset := self.assets_by_id.get(ev.asset_internal_id)) is not None
-                                   and asset.asset_category == AssetCategory.STOCK
-                                   for ev in self.all_financial_events))
-        
-        total_stock_dividends = sum(taxable_income for taxable_income in all_other_income_positive_components 
-                                  if any(isinstance(ev, CorpActionStockDividend) and 
-                                         ((ev.gross_amount_eur or Decimal(0)) == taxable_income or 
-                                          (ev.fmv_per_new_share_eur and ev.quantity_new_shares_received and 
-                                           ev.quantity_new_shares_received * ev.fmv_per_new_share_eur == taxable_income))
-                                         for ev in self.all_financial_events))
-        
-        total_bond_gains = sum(gross_gl for gross_gl in all_other_income_positive_components 
-                             if any(rgl for rgl in self.realized_gains_losses 
-                                    if rgl.asset_category_at_realization == AssetCategory.BOND 
-                                    and (rgl.gross_gain_loss_eur or Decimal(0)) == gross_gl 
-                                    and gross_gl > 0))
+        # Component totals from the subtotal table of the loss offsetting aggregation
+        subtotals = self.loss_offsetting_result.subtotals
+        total_interest = subtotals.total(SUBTOTAL_INTEREST_RECEIVED)
+        total_dividends = subtotals.total(SUBTOTAL_STOCK_CASH_DIVIDENDS)
+        total_stock_dividends = subtotals.total(SUBTOTAL_STOCK_DIVIDENDS_IN_SHARES)
+        total_bond_gains = subtotals.total(SUBTOTAL_BOND_GAINS)
         
         # Show all positive components (even if 0 EUR)
         detailed_summary_data.append([
@@ -995,17 +968,8 @@ class PdfReportGenerator:
             Paragraph("NEGATIVE KOMPONENTEN (absolut):", self.styles['TableHeader']), "", ""
         ])
         
-        total_bond_losses = sum(gross_gl_abs for gross_gl_abs in all_other_income_negative_components_abs 
-                              if any(rgl for rgl in self.realized_gains_losses 
-                                     if rgl.asset_category_at_realization == AssetCategory.BOND 
-                                     and (rgl.gross_gain_loss_eur or Decimal(0)) < 0
-                                     and (rgl.gross_gain_loss_eur or Decimal(0)).copy_abs() == gross_gl_abs))
-        
-        total_stueckzinsen = sum(stueck_abs for stueck_abs in all_other_income_negative_components_abs 
-                               if stueck_abs == sum(event.gross_amount_eur or Decimal(0) 
-                                                   for event in self.all_financial_events 
-                                                   if isinstance(event, CashFlowEvent) 
-                                                   and event.event_type == FinancialEventType.INTEREST_PAID_STUECKZINSEN))
+        total_bond_losses = subtotals.total(SUBTOTAL_BOND_LOSSES)
+        total_stueckzinsen = subtotals.total(SUBTOTAL_STUECKZINSEN_PAID)
         
         # Show all negative components (even if 0 EUR)
         detailed_summary_data.append([
@@ -1085,9 +1049,10 @@ class PdfReportGenerator:
                 self.story.append(Paragraph("Keine nicht steuerpflichtigen Veräußerungen nach §23 EStG zu berichten.", self.styles['BodyText']))
 
     def _prepare_wht_data(self):
-        wht_by_country_data: Dict[str, Dict[str, Decimal]] = {}
         wht_individual_transactions = []
         withholding_tax_events = [evt for evt in self.all_financial_events if isinstance(evt, WithholdingTaxEvent)]
+        linked_income_ids = {evt.taxed_income_event_id for evt in withholding_tax_events if evt.taxed_income_event_id}
+        income_events_by_id = {evt.event_id: evt for evt in self.all_financial_events if evt.event_id in linked_income_ids}
 
         for wht_event in withholding_tax_events:
             if not wht_event.source_country_code or wht_event.gross_amount_eur is None:
@@ -1097,10 +1062,9 @@ class PdfReportGenerator:
             tax_amount = wht_event.gross_amount_eur
             
             income_subject_to_wht = Decimal(0)
-            if wht_event.taxed_income_event_id:
-                income_event = next((evt for evt in self.all_financial_events if evt.event_id == wht_event.taxed_income_event_id), None)
-                if income_event and isinstance(income_event, CashFlowEvent) and income_event.gross_amount_eur is not None:
-                    income_subject_to_wht = income_event.gross_amount_eur
+            income_event = income_events_by_id.get(wht_event.taxed_income_event_id) if wht_event.taxed_income_event_id else None
+            if income_event and isinstance(income_event, CashFlowEvent) and income_event.gross_amount_eur is not None:
+                income_subject_to_wht = income_event.gross_amount_eur
             
             # Store individual transaction details including linking information
             linking_confidence = wht_event.link_confidence_score if hasattr(wht_event, 'link_confidence_score') else None
@@ -1109,7 +1073,6 @@ class PdfReportGenerator:
             # Generate description of the taxed transaction
             taxed_transaction_desc = ""
             if wht_event.taxed_income_event_id:
-                income_event = next((evt for evt in self.all_financial_events if evt.event_id == wht_event.taxed_income_event_id), None)
                 if income_event:
                     taxed_transaction_desc = self._format_taxed_transaction_description(income_event, wht_event.event_date)
                 else:
@@ -1126,14 +1089,15 @@ class PdfReportGenerator:
                 'confidence': linking_confidence,
                 'tax_rate': effective_tax_rate
             })
-            
-            if country not in wht_by_country_data:
-                wht_by_country_data[country] = {"income": Decimal(0), "tax": Decimal(0)}
-            
-            wht_by_country_data[country]["income"] += income_subject_to_wht
-            wht_by_country_data[country]["tax"] += tax_amount
         
-        self.prepared_wht_details_for_table = wht_by_country_data
+        # Country totals come from the subtotal table of the loss offsetting aggregation
+        subtotals = self.loss_offsetting_result.subtotals
+        tax_by_country = subtotals.by_country(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID)
+        income_by_country = subtotals.by_country(SUBTOTAL_WHT_TAXED_INCOME)
+        self.prepared_wht_details_for_table = {
+            country: {"income": income_by_country.get(country, Decimal(0)), "tax": tax}
+            for country, tax in tax_by_country.items() if country
+        }
         self.prepared_wht_individual_transactions = sorted(wht_individual_transactions, key=lambda x: x['date'])
         
         # Use centralized calculation instead of recalculating
@@ -1,16 +1,103 @@
 # src/utils/currency_converter.py
 import logging
+from collections import OrderedDict
 from datetime import date # Changed from datetime to date for consistency with event_date_obj
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional
+from typing import Dict, Iterable, Optional, Tuple
 
 from .exchange_rate_provider import ECBExchangeRateProvider # Relative import
 
 logger = logging.getLogger(__name__)
 
+RateMemoKey = Tuple[date, str] # (conversion date, effective currency code)
+
+
+class ResolvedRateMemo:
+    """
+    Remembers the final (post-fallback) rate returned by the rate provider per
+    (conversion date, effective currency code), including None for failed lookups,
+    so repeated conversions on the same day skip the provider entirely.
+    Unbounded: a tax run only touches a few hundred dates per currency.
+    """
+    def __init__(self):
+        self._rates: Dict[RateMemoKey, Optional[Decimal]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: RateMemoKey) -> Tuple[bool, Optional[Decimal]]:
+        """Returns (found, rate). Counts a hit or a miss."""
+        if key in self._rates:
+            self.hits += 1
+            return True, self._rates[key]
+        self.misses += 1
+        return False, None
+
+    def store(self, key: RateMemoKey, rate: Optional[Decimal]):
+        self._rates[key] = rate
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+
+class LruResolvedRateMemo(ResolvedRateMemo):
+    """Bounded variant of ResolvedRateMemo that evicts the least recently used entry."""
+    def __init__(self, max_entries: int):
+        super().__init__()
+        if max_entries <= 0:
+            raise ValueError(f"LruResolvedRateMemo max_entries must be positive, got {max_entries}")
+        self.max_entries = max_entries
+        self._rates: "OrderedDict[RateMemoKey, Optional[Decimal]]" = OrderedDict()
+        self.evictions = 0
+
+    def lookup(self, key: RateMemoKey) -> Tuple[bool, Optional[Decimal]]:
+        found, rate = super().lookup(key)
+        if found:
+            self._rates.move_to_end(key)
+        return found, rate
+
+    def store(self, key: RateMemoKey, rate: Optional[Decimal]):
+        self._rates[key] = rate
+        self._rates.move_to_end(key)
+        if len(self._rates) > self.max_entries:
+            self._rates.popitem(last=False)
+            self.evictions += 1
+
+
 class CurrencyConverter:
-    def __init__(self, rate_provider: ECBExchangeRateProvider):
+    def __init__(self, rate_provider: ECBExchangeRateProvider, rate_memo: Optional[ResolvedRateMemo] = None):
         self.rate_provider = rate_provider
+        self.rate_memo: ResolvedRateMemo = rate_memo if rate_memo is not None else ResolvedRateMemo()
+        try:
+            self._currency_code_mapping: Dict[str, str] = {k.upper(): v.upper() for k, v in rate_provider.get_currency_code_mapping().items()}
+        except NotImplementedError:
+            self._currency_code_mapping = {}
+
+    def get_rate(self, date_of_conversion: date, currency_code: str) -> Optional[Decimal]:
+        """
+        Returns the provider rate (foreign currency units per 1 EUR) for the date and currency,
+        served from the resolved-rate memo when the same (date, effective currency) was seen before.
+        """
+        currency_upper = currency_code.upper()
+        memo_key = (date_of_conversion, self._currency_code_mapping.get(currency_upper, currency_upper))
+        found, rate = self.rate_memo.lookup(memo_key)
+        if not found:
+            rate = self.rate_provider.get_rate(date_of_conversion, currency_upper)
+            self.rate_memo.store(memo_key, rate)
+        return rate
+
+    def preload_rates(self, dates_by_currency: Dict[str, Iterable[date]]):
+        """
+        Resolves whole columns of dates per currency with one provider get_rates_for_dates call
+        and stores them in the memo, so the per-event lookups of enrichment become memo hits.
+        """
+        for currency_code, dates in dates_by_currency.items():
+            currency_upper = currency_code.upper()
+            if currency_upper == "EUR":
+                continue
+            effective_currency_code = self._currency_code_mapping.get(currency_upper, currency_upper)
+            sorted_dates = sorted(dates)
+            for date_of_conversion, rate in zip(sorted_dates, self.rate_provider.get_rates_for_dates(sorted_dates, currency_upper)):
+                self.rate_memo.store((date_of_conversion, effective_currency_code), rate)
 
     def convert_to_eur(self, original_amount: Decimal, original_currency: str, date_of_conversion: date) -> Optional[Decimal]:
         """
@@ -31,13 +118,13 @@ class CurrencyConverter:
         if original_currency_upper == "EUR":
             return original_amount # Already in EUR
 
-        rate = self.rate_provider.get_rate(date_of_conversion, original_currency_upper)
+        rate = self.get_rate(date_of_conversion, original_currency_upper)
 
         if rate is None:
             # rate_provider already logs warnings/errors
             logger.error(f"Failed to convert {original_amount} {original_currency_upper} to EUR: No exchange rate provided by provider for {date_of_conversion}.")
             return None
-        
+
         if rate <= Decimal("0"): # Rate must be positive
              logger.error(f"Failed to convert {original_amount} {original_currency_upper} to EUR: Exchange rate from provider is zero or negative ({rate}) for {date_of_conversion}.")
              return None # Avoid division by zero or incorrect results
@@ -0,0 +1,232 @@
+# src/utils/ecb_bundle_provider.py
+import csv
+import datetime
+import io
+import logging
+import os
+import pickle
+import zipfile
+from array import array
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from .exchange_rate_provider import (
+    DEFAULT_CURRENCY_CODE_MAPPING,
+    DEFAULT_MAX_FALLBACK_DAYS,
+    DenseRateTable,
+    ExchangeRateProvider,
+)
+from .file_utils import write_file_atomically
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the layout of the pickled snapshot changes; older snapshots are ignored.
+SNAPSHOT_FORMAT_VERSION = 1
+BUNDLE_CSV_MEMBER_SUFFIX = ".csv" # The official ZIP contains a single eurofxref-hist.csv
+BUNDLE_MISSING_RATE_MARKERS = {"", "N/A"}
+
+
+class EcbRateColumns:
+    """
+    Columnar form of the ECB historical reference-rate file: one ascending array of
+    publication day ordinals and, per currency, the rate strings aligned with it
+    (None where the ECB published no rate for that currency on that day).
+    """
+    __slots__ = ("day_ordinals", "rates_by_currency")
+
+    def __init__(self, day_ordinals: array, rates_by_currency: Dict[str, List[Optional[str]]]):
+        self.day_ordinals = day_ordinals
+        self.rates_by_currency = rates_by_currency
+
+    @property
+    def first_date(self) -> Optional[datetime.date]:
+        return datetime.date.fromordinal(self.day_ordinals[0]) if self.day_ordinals else None
+
+    @property
+    def last_date(self) -> Optional[datetime.date]:
+        return datetime.date.fromordinal(self.day_ordinals[-1]) if self.day_ordinals else None
+
+    @classmethod
+    def from_csv_text(cls, csv_text: str) -> "EcbRateColumns":
+        """
+        Parses eurofxref-hist.csv: a 'Date' column followed by one column per currency
+        (newest day first, 'N/A' for days without a rate, usually a trailing empty column).
+        """
+        reader = csv.reader(io.StringIO(csv_text))
+        try:
+            header = next(reader)
+        except StopIteration:
+            raise ValueError("ECB historical rate file is empty.")
+        if not header or header[0].strip().lower() != "date":
+            raise ValueError(f"ECB historical rate file has an unexpected header: {header[:3]}")
+        currency_columns = [(index, name.strip().upper()) for index, name in enumerate(header) if index > 0 and name.strip()]
+
+        rows: List[Tuple[int, List[str]]] = []
+        for line_number, row in enumerate(reader, start=2):
+            if not row or not row[0].strip():
+                continue
+            try:
+                day_ordinal = datetime.date.fromisoformat(row[0].strip()).toordinal()
+            except ValueError:
+                raise ValueError(f"ECB historical rate file line {line_number}: invalid date '{row[0]}'.")
+            rows.append((day_ordinal, row))
+        rows.sort(key=lambda item: item[0])
+
+        day_ordinals = array("l", (day_ordinal for day_ordinal, _ in rows))
+        rates_by_currency: Dict[str, List[Optional[str]]] = {}
+        for index, currency_code in currency_columns:
+            column: List[Optional[str]] = []
+            for day_ordinal, row in rows:
+                rate_str = row[index].strip() if index < len(row) else ""
+                if rate_str in BUNDLE_MISSING_RATE_MARKERS:
+                    column.append(None)
+                    continue
+                try:
+                    rate = Decimal(rate_str)
+                except InvalidOperation:
+                    logger.warning(f"Ignoring invalid {currency_code} rate '{rate_str}' on {datetime.date.fromordinal(day_ordinal)} in ECB historical rate file.")
+                    column.append(None)
+                    continue
+                column.append(rate_str if rate > Decimal(0) else None)
+            rates_by_currency[currency_code] = column
+        return cls(day_ordinals, rates_by_currency)
+
+
+class ECBHistoricalBundleProvider(ExchangeRateProvider):
+    """
+    Offline exchange rate provider backed by the ECB's complete historical reference-rate file
+    (eurofxref-hist.csv or eurofxref-hist.zip). The file is parsed once into EcbRateColumns and,
+    if snapshot_file_path is set, saved as a binary snapshot that later runs load instead of
+    re-parsing the CSV (as long as the bundle file is unchanged).
+
+    The bundle contains every ECB publication day, so days without a rate are authoritative:
+    like ECBExchangeRateProvider, a missing day falls back to the most recent published rate
+    within max_fallback_days. Dates after the last day in the bundle have no rate.
+    """
+    def __init__(self,
+                 bundle_file_path: str,
+                 snapshot_file_path: Optional[str] = None,
+                 max_fallback_days_override: Optional[int] = None,
+                 currency_code_mapping_override: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self.bundle_file_path = bundle_file_path
+        self.snapshot_file_path = snapshot_file_path
+        self.max_fallback_days = max_fallback_days_override if max_fallback_days_override is not None else DEFAULT_MAX_FALLBACK_DAYS
+        self.currency_code_mapping = currency_code_mapping_override if currency_code_mapping_override is not None else DEFAULT_CURRENCY_CODE_MAPPING.copy()
+        self.loaded_from_snapshot = False
+        self._rate_tables: Dict[str, Optional[DenseRateTable]] = {}
+        self.columns = self._load_columns()
+        logger.info(f"Loaded ECB historical rates for {len(self.columns.rates_by_currency)} currencies "
+                    f"({len(self.columns.day_ordinals)} days, {self.columns.first_date} to {self.columns.last_date}) "
+                    f"from {self.snapshot_file_path if self.loaded_from_snapshot else self.bundle_file_path}.")
+
+    def _bundle_fingerprint(self) -> Tuple[int, int]:
+        bundle_stat = os.stat(self.bundle_file_path)
+        return bundle_stat.st_size, bundle_stat.st_mtime_ns
+
+    def _load_columns(self) -> EcbRateColumns:
+        if not os.path.exists(self.bundle_file_path):
+            raise FileNotFoundError(f"ECB historical rate file not found: {self.bundle_file_path}")
+        fingerprint = self._bundle_fingerprint()
+
+        if self.snapshot_file_path:
+            columns = self._load_snapshot(fingerprint)
+            if columns is not None:
+                self.loaded_from_snapshot = True
+                return columns
+
+        columns = EcbRateColumns.from_csv_text(self._read_bundle_csv_text())
+        if self.snapshot_file_path:
+            self._save_snapshot(columns, fingerprint)
+        return columns
+
+    def _read_bundle_csv_text(self) -> str:
+        if zipfile.is_zipfile(self.bundle_file_path):
+            with zipfile.ZipFile(self.bundle_file_path) as bundle_zip:
+                csv_members = [name for name in bundle_zip.namelist() if name.lower().endswith(BUNDLE_CSV_MEMBER_SUFFIX)]
+                if len(csv_members) != 1:
+                    raise ValueError(f"Expected exactly one CSV file in {self.bundle_file_path}, found {csv_members}.")
+                return bundle_zip.read(csv_members[0]).decode("utf-8-sig")
+        with open(self.bundle_file_path, "r", encoding="utf-8-sig") as f:
+            return f.read()
+
+    def _load_snapshot(self, fingerprint: Tuple[int, int]) -> Optional[EcbRateColumns]:
+        if not os.path.exists(self.snapshot_file_path):
+            return None
+        try:
+            with open(self.snapshot_file_path, "rb") as f:
+                snapshot = pickle.load(f)
+            if snapshot.get("format_version") != SNAPSHOT_FORMAT_VERSION or tuple(snapshot.get("bundle_fingerprint", ())) != fingerprint:
+                logger.info(f"ECB historical rate snapshot {self.snapshot_file_path} is outdated. Re-parsing {self.bundle_file_path}.")
+                return None
+            return EcbRateColumns(snapshot["day_ordinals"], snapshot["rates_by_currency"])
+        except Exception as e:
+            logger.warning(f"Could not load ECB historical rate snapshot {self.snapshot_file_path}: {e}. Re-parsing {self.bundle_file_path}.")
+            return None
+
+    def _save_snapshot(self, columns: EcbRateColumns, fingerprint: Tuple[int, int]):
+        """Writes the snapshot atomically (see write_file_atomically)."""
+        snapshot = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "bundle_fingerprint": fingerprint,
+            "day_ordinals": columns.day_ordinals,
+            "rates_by_currency": columns.rates_by_currency,
+        }
+        try:
+            write_file_atomically(self.snapshot_file_path,
+                                  lambda f: pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL), binary=True)
+            logger.debug(f"Saved ECB historical rate snapshot to {self.snapshot_file_path}")
+        except Exception as e:
+            logger.error(f"Error saving ECB historical rate snapshot to {self.snapshot_file_path}: {e}")
+
+    def _get_effective_currency_code(self, currency_code: str) -> str:
+        return self.currency_code_mapping.get(currency_code.upper(), currency_code.upper())
+
+    def _get_rate_table(self, effective_currency_code: str) -> Optional[DenseRateTable]:
+        if effective_currency_code not in self._rate_tables:
+            column = self.columns.rates_by_currency.get(effective_currency_code)
+            self._rate_tables[effective_currency_code] = self._build_rate_table(column) if column is not None else None
+        return self._rate_tables[effective_currency_code]
+
+    def _build_rate_table(self, column: List[Optional[str]]) -> Optional[DenseRateTable]:
+        """
+        Resolves every calendar day of the bundle range to the most recent published rate within
+        max_fallback_days. The bundle lists every publication day, so a gap is always final.
+        """
+        day_ordinals = self.columns.day_ordinals
+        if not day_ordinals:
+            return None
+        published_rates = {day_ordinal: Decimal(rate_str) for day_ordinal, rate_str in zip(day_ordinals, column) if rate_str is not None}
+        slots: List[Optional[Decimal]] = []
+        last_rate: Optional[Decimal] = None
+        last_rate_ordinal = 0
+        for day_ordinal in range(day_ordinals[0], day_ordinals[-1] + 1):
+            if day_ordinal in published_rates:
+                last_rate = published_rates[day_ordinal]
+                last_rate_ordinal = day_ordinal
+            within_fallback = last_rate is not None and day_ordinal - last_rate_ordinal <= self.max_fallback_days
+            slots.append(last_rate if within_fallback else None)
+        return DenseRateTable(datetime.date.fromordinal(day_ordinals[0]), slots)
+
+    def get_rate(self, date_of_conversion: datetime.date, currency_code: str) -> Optional[Decimal]:
+        original_currency_code_upper = currency_code.upper()
+        if original_currency_code_upper == "EUR":
+            return Decimal("1.0")
+
+        effective_currency_code = self._get_effective_currency_code(original_currency_code_upper)
+        rate_table = self._get_rate_table(effective_currency_code)
+        if rate_table is None:
+            logger.warning(f"Currency {effective_currency_code} (original: {original_currency_code_upper}) is not contained in ECB historical rate file {self.bundle_file_path}.")
+            return None
+
+        rate = rate_table.lookup(date_of_conversion)
+        if rate is None:
+            logger.warning(f"No exchange rate found for {effective_currency_code} (original: {original_currency_code_upper}) on {date_of_conversion} "
+                           f"or within {self.max_fallback_days} fallback days in ECB historical rate file (covers {self.columns.first_date} to {self.columns.last_date}).")
+        return rate
+
+    def get_currency_code_mapping(self) -> Dict[str, str]:
+        return self.currency_code_mapping.copy()
+
+    def get_max_fallback_days(self) -> int:
+        return self.max_fallback_days
@@ -1,12 +1,21 @@
 # src/utils/exchange_rate_provider.py
+import atexit
 import datetime
 import json
 import logging
 import os
-from decimal import Decimal
-from typing import Dict, Optional, Tuple, Set # Added Set for prefetch_rates type hint
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Set # Added Set for prefetch_rates type hint
+from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from .file_utils import write_file_atomically
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +23,129 @@ logger = logging.getLogger(__name__)
 DEFAULT_ECB_API_URL_TEMPLATE = "https://data-api.ecb.europa.eu/service/data/EXR/D.{currency_code}.EUR.SP00.A?startPeriod={start_date_str}&endPeriod={end_date_str}&format=jsondata"
 DEFAULT_MAX_FALLBACK_DAYS = 7
 DEFAULT_REQUEST_TIMEOUT_SECONDS = 15
+DEFAULT_CACHE_FLUSH_INTERVAL_ENTRIES = 500 # Write the rate cache to disk after this many new/changed entries
+DEFAULT_FETCH_MAX_WORKERS = 8 # Thread pool size for concurrent range fetches
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 4 # Concurrent requests to one API host (also the HTTP connection pool size)
+DEFAULT_FETCH_MAX_RETRIES = 3 # Retries after a connection error, timeout or retryable HTTP status
+DEFAULT_FETCH_RETRY_BACKOFF_SECONDS = 0.5 # Backoff before retry n is this value * 2**(n-1)
+DEFAULT_FETCH_COALESCE_GAP_DAYS = 14 # Missing days at most this far apart are fetched in one range query
+RETRYABLE_HTTP_STATUS_CODES = {429, 500, 502, 503, 504}
 DEFAULT_CURRENCY_CODE_MAPPING: Dict[str, str] = {
     "CNH": "CNY",
 }
+# Cache value for a day a successful range reply had no observation for (weekend, TARGET holiday).
+# Unlike None (a failed per-day fetch, retried for the queried day), it is final.
+NO_OBSERVATION_MARKER = "no_observation"
+
+
+class DenseRateTable:
+    """
+    Resolved rates for one currency, stored in a list indexed by day offset from base_date.
+    Every slot already holds the result of the fallback walk (the rate of the most recent
+    available day within max_fallback_days), so a lookup is a single index operation.
+    A slot is None when the answer cannot be decided from cached data alone (a day in the
+    fallback window was never fetched, or only failure markers were found); callers then
+    use the regular fallback lookup.
+    """
+    __slots__ = ("base_date", "_base_ordinal", "slots")
+
+    def __init__(self, base_date: datetime.date, slots: List[Optional[Decimal]]):
+        self.base_date = base_date
+        self._base_ordinal = base_date.toordinal()
+        self.slots = slots
+
+    def lookup(self, query_date: datetime.date) -> Optional[Decimal]:
+        offset = query_date.toordinal() - self._base_ordinal
+        if 0 <= offset < len(self.slots):
+            return self.slots[offset]
+        return None
+
+    @classmethod
+    def from_rates_cache(cls,
+                         rates_cache: Dict[str, Dict[str, Optional[str]]],
+                         effective_currency_code: str,
+                         max_fallback_days: int) -> Optional["DenseRateTable"]:
+        """
+        Builds the table from the string-keyed rates cache, reproducing the fallback semantics of
+        ECBExchangeRateProvider.get_rate: a cached rate on the queried day or on any of the
+        previous max_fallback_days is used if every newer day in between is cached as unavailable.
+        A None failure marker on the queried day itself is not final (get_rate retries the fetch),
+        NO_OBSERVATION_MARKER is. Returns None if the cache has no entries for the currency.
+        """
+        day_states: Dict[int, object] = {}
+        for date_str, day_rates in rates_cache.items():
+            if effective_currency_code not in day_rates:
+                continue
+            try:
+                day_ordinal = datetime.date.fromisoformat(date_str).toordinal()
+            except (TypeError, ValueError):
+                continue
+            state = _cached_day_state(day_rates[effective_currency_code])
+            if state is not None:
+                day_states[day_ordinal] = state
+
+        if not day_states:
+            return None
+
+        first_ordinal = min(day_states)
+        slots = [_resolve_fallback(day_states.get, day_ordinal, max_fallback_days)
+                 for day_ordinal in range(first_ordinal, max(day_states) + 1)]
+        return cls(datetime.date.fromordinal(first_ordinal), slots)
+
+    def refresh_day(self,
+                    rates_cache: Dict[str, Dict[str, Optional[str]]],
+                    effective_currency_code: str,
+                    changed_date: datetime.date,
+                    max_fallback_days: int):
+        """
+        Updates the table in place after the cache entry of one day changed: only the slots whose
+        fallback window contains that day are resolved again, and the table grows to include the
+        day if needed. The result equals a rebuild with from_rates_cache.
+        """
+        def day_state_at(day_ordinal: int) -> Optional[object]:
+            day_rates = rates_cache.get(datetime.date.fromordinal(day_ordinal).strftime("%Y-%m-%d"), {})
+            return _cached_day_state(day_rates[effective_currency_code]) if effective_currency_code in day_rates else None
+
+        changed_ordinal = changed_date.toordinal()
+        if changed_ordinal < self._base_ordinal:
+            self.slots[:0] = [None] * (self._base_ordinal - changed_ordinal)
+            self._base_ordinal = changed_ordinal
+            self.base_date = changed_date
+        last_ordinal = self._base_ordinal + len(self.slots) - 1
+        if changed_ordinal > last_ordinal:
+            self.slots.extend([None] * (changed_ordinal - last_ordinal))
+            last_ordinal = changed_ordinal
+        for day_ordinal in range(changed_ordinal, min(changed_ordinal + max_fallback_days, last_ordinal) + 1):
+            self.slots[day_ordinal - self._base_ordinal] = _resolve_fallback(day_state_at, day_ordinal, max_fallback_days)
+
+
+_UNAVAILABLE = object() # Cached NO_OBSERVATION_MARKER
+_FAILED = object() # Cached None: a failed per-day fetch
+
+
+def _cached_day_state(rate_str: Optional[str]) -> Optional[object]:
+    """A cache value as a Decimal rate, _UNAVAILABLE or _FAILED; None if it is invalid (left to get_rate to repair)."""
+    if rate_str is None:
+        return _FAILED
+    if rate_str == NO_OBSERVATION_MARKER:
+        return _UNAVAILABLE
+    try:
+        return Decimal(rate_str)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+
+
+def _resolve_fallback(day_state_at: Callable[[int], Optional[object]], day_ordinal: int, max_fallback_days: int) -> Optional[Decimal]:
+    """The fallback walk of get_rate over cached day states; None if it cannot be decided from the cache."""
+    for days_back in range(max_fallback_days + 1):
+        state = day_state_at(day_ordinal - days_back)
+        if isinstance(state, Decimal):
+            return state
+        if state is not _UNAVAILABLE and state is not _FAILED:
+            return None # Never fetched: needs the regular lookup
+        if days_back == 0 and state is _FAILED:
+            return None # get_rate retries the queried day
+    return None
 
 
 class ExchangeRateProvider:
@@ -33,6 +162,13 @@ class ExchangeRateProvider:
         """
         raise NotImplementedError("Subclasses must implement get_rate")
 
+    def get_rates_for_dates(self, dates: Sequence[datetime.date], currency_code: str) -> List[Optional[Decimal]]:
+        """
+        Gets the rates for a whole column of dates in one currency, in the same order as `dates`.
+        Subclasses with an indexed rate store can override this; the default calls get_rate per date.
+        """
+        return [self.get_rate(date_of_conversion, currency_code) for date_of_conversion in dates]
+
     def prefetch_rates(self, start_date: datetime.date, end_date: datetime.date, currencies: Set[str]):
         """
         Optional method to prefetch a range of rates to optimize repeated calls.
@@ -41,6 +177,22 @@ class ExchangeRateProvider:
         logger.debug(f"{self.__class__.__name__} does not implement prefetch_rates or it's a no-op for this provider.")
         pass # Default implementation is a no-op
 
+    def prefetch_rates_for_dates(self, dates_by_currency: Dict[str, Set[datetime.date]]):
+        """
+        Optional method to prefetch the rates for specific (currency, date) pairs.
+        The default prefetches the overall date range via prefetch_rates.
+        """
+        all_dates = [d for dates in dates_by_currency.values() for d in dates]
+        if all_dates:
+            self.prefetch_rates(min(all_dates), max(all_dates), set(dates_by_currency))
+
+    def flush_cache(self):
+        """
+        Optional method to persist any pending cached rates.
+        Providers without a persistent cache can rely on this no-op.
+        """
+        pass
+
     def get_currency_code_mapping(self) -> Dict[str, str]:
         """Returns the currency code mapping used by the provider."""
         raise NotImplementedError("Subclasses must implement get_currency_code_mapping")
@@ -56,25 +208,59 @@ class ECBExchangeRateProvider(ExchangeRateProvider):
                  api_url_template_override: Optional[str] = None,
                  max_fallback_days_override: Optional[int] = None,
                  currency_code_mapping_override: Optional[Dict[str, str]] = None,
-                 request_timeout_seconds_override: Optional[int] = None):
+                 request_timeout_seconds_override: Optional[int] = None,
+                 cache_flush_interval_override: Optional[int] = None,
+                 fetch_max_workers_override: Optional[int] = None,
+                 max_connections_per_host_override: Optional[int] = None,
+                 fetch_max_retries_override: Optional[int] = None,
+                 fetch_retry_backoff_seconds_override: Optional[float] = None,
+                 fetch_coalesce_gap_days_override: Optional[int] = None):
         super().__init__() # Call to parent constructor if ExchangeRateProvider had one
         self.cache_file_path = cache_file_path
         self.api_url_template = api_url_template_override or DEFAULT_ECB_API_URL_TEMPLATE
         self.max_fallback_days = max_fallback_days_override if max_fallback_days_override is not None else DEFAULT_MAX_FALLBACK_DAYS
         self.currency_code_mapping = currency_code_mapping_override if currency_code_mapping_override is not None else DEFAULT_CURRENCY_CODE_MAPPING.copy()
         self.request_timeout_seconds = request_timeout_seconds_override or DEFAULT_REQUEST_TIMEOUT_SECONDS
+        self.cache_flush_interval = cache_flush_interval_override if cache_flush_interval_override is not None else DEFAULT_CACHE_FLUSH_INTERVAL_ENTRIES
+        self.fetch_max_workers = fetch_max_workers_override or DEFAULT_FETCH_MAX_WORKERS
+        self.max_connections_per_host = max_connections_per_host_override or DEFAULT_MAX_CONNECTIONS_PER_HOST
+        self.fetch_max_retries = fetch_max_retries_override if fetch_max_retries_override is not None else DEFAULT_FETCH_MAX_RETRIES
+        self.fetch_retry_backoff_seconds = fetch_retry_backoff_seconds_override if fetch_retry_backoff_seconds_override is not None else DEFAULT_FETCH_RETRY_BACKOFF_SECONDS
+        self.fetch_coalesce_gap_days = fetch_coalesce_gap_days_override if fetch_coalesce_gap_days_override is not None else DEFAULT_FETCH_COALESCE_GAP_DAYS
+
+        # One pooled session for all requests (keep-alive instead of a new TCP/TLS handshake per call).
+        # Concurrent range fetches merge into rates_cache under _cache_lock.
+        self._session = requests.Session()
+        http_adapter = HTTPAdapter(pool_connections=self.max_connections_per_host, pool_maxsize=self.max_connections_per_host)
+        self._session.mount("https://", http_adapter)
+        self._session.mount("http://", http_adapter)
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_semaphores_lock = threading.Lock()
+        self._cache_lock = threading.RLock()
+        
+        # Write batching: the cache is only written at explicit checkpoints (flush_cache, interpreter exit)
+        # or once cache_flush_interval entries have changed since the last write.
+        self._pending_cache_entries = 0
+        self.cache_flush_count = 0
+        self.cache_bytes_written = 0
         
-        self.rates_cache: Dict[str, Dict[str, Optional[str]]] = {} # Date string -> {Currency Code -> Rate String or None for failure}
+        # Date string -> {Currency Code -> Rate String, NO_OBSERVATION_MARKER, or None for a failed fetch}
+        self.rates_cache: Dict[str, Dict[str, Optional[str]]] = {}
+        # Effective currency code -> dense table of pre-resolved rates (None if the cache has no entries).
+        # Built lazily from rates_cache; per-day misses patch it in place, bulk updates drop it for a rebuild.
+        self._rate_tables: Dict[str, Optional[DenseRateTable]] = {}
         self._load_cache()
+        _LIVE_PROVIDERS.add(self) # Pending rates are written by _flush_provider_caches_at_exit
 
     def _load_cache(self):
         if os.path.exists(self.cache_file_path):
             try:
                 with open(self.cache_file_path, 'r', encoding='utf-8') as f:
                     self.rates_cache = json.load(f)
-                loaded_rate_count = sum(1 for date_rates in self.rates_cache.values() for rate_val in date_rates.values() if rate_val is not None)
+                loaded_rate_count = sum(1 for date_rates in self.rates_cache.values() for rate_val in date_rates.values() if rate_val not in (None, NO_OBSERVATION_MARKER))
                 loaded_failure_markers = sum(1 for date_rates in self.rates_cache.values() for rate_val in date_rates.values() if rate_val is None)
-                logger.info(f"Loaded {loaded_rate_count} exchange rates and {loaded_failure_markers} failure markers from {self.cache_file_path}")
+                loaded_no_observation_days = sum(1 for date_rates in self.rates_cache.values() for rate_val in date_rates.values() if rate_val == NO_OBSERVATION_MARKER)
+                logger.info(f"Loaded {loaded_rate_count} exchange rates, {loaded_no_observation_days} days without observation and {loaded_failure_markers} failure markers from {self.cache_file_path}")
             except json.JSONDecodeError:
                 logger.error(f"Error decoding JSON from {self.cache_file_path}. Starting with an empty cache.")
                 self.rates_cache = {}
@@ -91,16 +277,72 @@ class ECBExchangeRateProvider(ExchangeRateProvider):
 
 
     def _save_cache(self):
+        """Writes the cache atomically (see write_file_atomically); a failed write is logged and retried at the next flush."""
         try:
-            with open(self.cache_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.rates_cache, f, indent=2, ensure_ascii=False)
-            logger.debug(f"Saved exchange rate cache to {self.cache_file_path}")
+            with self._cache_lock:
+                serialized = json.dumps(self.rates_cache, indent=2, ensure_ascii=False).encode('utf-8')
+            write_file_atomically(self.cache_file_path, lambda f: f.write(serialized), binary=True)
+            self._pending_cache_entries = 0
+            self.cache_flush_count += 1
+            self.cache_bytes_written += len(serialized)
+            logger.debug(f"Saved exchange rate cache to {self.cache_file_path} ({len(serialized)} bytes)")
         except Exception as e:
             logger.error(f"Error saving exchange rate cache to {self.cache_file_path}: {e}")
 
+    def _record_cache_update(self, effective_currency_code: str, entry_count: int = 1, changed_date: Optional[datetime.date] = None):
+        """
+        Marks cache entries as changed and flushes once the batch interval is reached. A single
+        changed day is patched into the currency's rate table; bulk changes drop it for a rebuild.
+        """
+        rate_table = self._rate_tables.get(effective_currency_code)
+        if changed_date is not None and rate_table is not None:
+            rate_table.refresh_day(self.rates_cache, effective_currency_code, changed_date, self.max_fallback_days)
+        else:
+            self._rate_tables.pop(effective_currency_code, None)
+        self._pending_cache_entries += entry_count
+        if self.cache_flush_interval > 0 and self._pending_cache_entries >= self.cache_flush_interval:
+            self._save_cache()
+
+    def flush_cache(self):
+        """Writes pending cache changes to disk (if any) and logs the cache write summary for this run."""
+        if self._pending_cache_entries > 0:
+            self._save_cache()
+        logger.info(f"Exchange rate cache write summary: {self.cache_flush_count} flushes, "
+                    f"{self.cache_bytes_written} bytes written to {self.cache_file_path}.")
+
     def _get_effective_currency_code(self, currency_code: str) -> str:
         return self.currency_code_mapping.get(currency_code.upper(), currency_code.upper())
 
+    def _get_host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._host_semaphores_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_connections_per_host)
+            return self._host_semaphores[host]
+
+    def _http_get(self, url: str) -> requests.Response:
+        """
+        GET over the pooled session, holding one of the per-host connection slots during the request.
+        Connection errors, timeouts and retryable HTTP statuses (429, 5xx) are retried with exponential
+        backoff; after the last retry the exception is raised or the final response is returned.
+        """
+        host_semaphore = self._get_host_semaphore(urlparse(url).netloc)
+        attempt = 0
+        while True:
+            try:
+                with host_semaphore:
+                    response = self._session.get(url, timeout=self.request_timeout_seconds, headers={'Accept': 'application/json'})
+                if response.status_code not in RETRYABLE_HTTP_STATUS_CODES or attempt >= self.fetch_max_retries:
+                    return response
+                retry_reason = f"HTTP {response.status_code}"
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as req_err:
+                if attempt >= self.fetch_max_retries:
+                    raise
+                retry_reason = str(req_err)
+            backoff_seconds = self.fetch_retry_backoff_seconds * (2 ** attempt)
+            attempt += 1
+            logger.warning(f"ECB request failed ({retry_reason}). Retry {attempt}/{self.fetch_max_retries} in {backoff_seconds:.2f}s. URL: {url}")
+            time.sleep(backoff_seconds)
+
     def _fetch_rate_from_ecb(self, query_date: datetime.date, original_currency_code: str) -> Optional[Tuple[Decimal, datetime.date]]:
         effective_currency_code = self._get_effective_currency_code(original_currency_code)
         date_str = query_date.strftime("%Y-%m-%d")
@@ -110,7 +352,7 @@ class ECBExchangeRateProvider(ExchangeRateProvider):
         logger.debug(f"Attempting ECB fetch for {effective_currency_code} (original: {original_currency_code}) on {date_str} from URL: {url}")
         response = None
         try:
-            response = requests.get(url, timeout=self.request_timeout_seconds, headers={'Accept': 'application/json'})
+            response = self._http_get(url)
             response.raise_for_status()
 
             if not response.content:
@@ -194,23 +436,32 @@ class ECBExchangeRateProvider(ExchangeRateProvider):
             return Decimal("1.0")
 
         effective_currency_code_for_ecb = self._get_effective_currency_code(original_currency_code_upper)
+        rate_table = self._get_rate_table(effective_currency_code_for_ecb)
+        if rate_table is not None:
+            resolved_rate = rate_table.lookup(date_of_conversion)
+            if resolved_rate is not None:
+                return resolved_rate
+
         original_date_str = date_of_conversion.strftime("%Y-%m-%d")
 
         for i in range(self.max_fallback_days + 1): # Loop from 0 (today) up to max_fallback_days
             current_search_date = date_of_conversion - datetime.timedelta(days=i)
             current_search_date_str = current_search_date.strftime("%Y-%m-%d")
-            cache_updated_this_iteration = False # Flag to save cache only if modified
+            cache_updated_this_iteration = False # Flag to record a cache change only if modified
 
             # Check cache first for the current_search_date
             if current_search_date_str in self.rates_cache:
                 if effective_currency_code_for_ecb in self.rates_cache[current_search_date_str]:
                     cached_rate_str = self.rates_cache[current_search_date_str][effective_currency_code_for_ecb]
+                    if cached_rate_str == NO_OBSERVATION_MARKER: # A range reply had no observation for this day: final
+                        continue
                     if cached_rate_str is None: # Explicit None means previously fetched and failed
                         logger.debug(f"Rate for {effective_currency_code_for_ecb} on {current_search_date_str} (fallback {i} days for {original_date_str}) previously determined as unavailable. Skipping API call.")
                         # If it's the first day (i=0) and it's None, we might still want to retry if policies change,
                         # but for now, if it's None, it's None. For subsequent fallback days, continue to next older day.
-                        if i == 0: pass # Allow to proceed to API call for day 0 if it was None (e.g. to refresh if cache logic changes)
-                                        # Or, to be strict: if None, then treat as unavailable for THIS search date.
+                        if i == 0:
+                            pass # Allow to proceed to API call for day 0 if it was None (e.g. to refresh if cache logic changes)
+                                 # Or, to be strict: if None, then treat as unavailable for THIS search date.
                         else: # For fallback days, if it's cached as None, move to the next older day.
                             continue 
                     else: # Cached rate string exists
@@ -253,7 +504,7 @@ class ECBExchangeRateProvider(ExchangeRateProvider):
                 # and within the fallback window logic (which is handled by the loop `i`), return it.
                 # The crucial part is that `_fetch_rate_from_ecb` was called for `current_search_date`.
                 if actual_rate_date <= date_of_conversion: # Redundant check, loop ensures this for current_search_date
-                     if cache_updated_this_iteration: self._save_cache()
+                     if cache_updated_this_iteration: self._record_cache_update(effective_currency_code_for_ecb, changed_date=current_search_date)
                      logger.info(f"Using rate {rate_decimal} for {effective_currency_code_for_ecb} from {actual_rate_date} (target: {original_date_str}, fallback {i} days).")
                      return rate_decimal
             else: # Fetch failed or no data for current_search_date
@@ -268,22 +519,203 @@ class ECBExchangeRateProvider(ExchangeRateProvider):
                     cache_updated_this_iteration = True
                     logger.debug(f"Fetch failed for {effective_currency_code_for_ecb} on {current_search_date_str}. Cached as None.")
 
-            # Save cache if it was modified in this iteration
+            # Record the cache change; the write itself is batched
             if cache_updated_this_iteration:
-                self._save_cache()
+                self._record_cache_update(effective_currency_code_for_ecb, changed_date=current_search_date)
         
         # If loop completes without returning a rate
         logger.warning(f"Failed to get exchange rate for {effective_currency_code_for_ecb} (original: {original_currency_code_upper}) for target date {original_date_str} after checking back {self.max_fallback_days} days.")
         return None
 
+    def get_rates_for_dates(self, dates: Sequence[datetime.date], currency_code: str) -> List[Optional[Decimal]]:
+        if currency_code.upper() == "EUR":
+            return [Decimal("1.0")] * len(dates)
+        effective_currency_code = self._get_effective_currency_code(currency_code)
+        rate_table = self._get_rate_table(effective_currency_code)
+        rates: List[Optional[Decimal]] = []
+        for date_of_conversion in dates:
+            resolved_rate = rate_table.lookup(date_of_conversion) if rate_table is not None else None
+            if resolved_rate is None:
+                # Undecided from the cache: regular lookup (may fetch and invalidate the table)
+                resolved_rate = self.get_rate(date_of_conversion, currency_code)
+                rate_table = self._get_rate_table(effective_currency_code)
+            rates.append(resolved_rate)
+        return rates
+
+    def _get_rate_table(self, effective_currency_code: str) -> Optional[DenseRateTable]:
+        if effective_currency_code not in self._rate_tables:
+            self._rate_tables[effective_currency_code] = DenseRateTable.from_rates_cache(
+                self.rates_cache, effective_currency_code, self.max_fallback_days
+            )
+        return self._rate_tables[effective_currency_code]
+
     def get_currency_code_mapping(self) -> Dict[str, str]:
         return self.currency_code_mapping.copy() # Return a copy
 
     def get_max_fallback_days(self) -> int:
         return self.max_fallback_days
 
-    # prefetch_rates is not naturally suited for this specific ECB API structure (one currency per call).
-    # A possible implementation would loop through currencies and date ranges,
-    # but it might be inefficient and hit API rate limits.
-    # For now, it will use the base class's no-op.
-    # If implemented, it should populate self.rates_cache.
+    def prefetch_rates(self, start_date: datetime.date, end_date: datetime.date, currencies: Set[str]):
+        """
+        Fetches the daily series for each currency between start_date and end_date and stores it in
+        rates_cache. The range is extended backwards by max_fallback_days so that fallback lookups for
+        the first days of the range are served from the cache as well. Only the parts of the range that
+        are not cached yet are requested (see _fetch_missing_days).
+        """
+        if start_date > end_date:
+            logger.warning(f"prefetch_rates called with start date {start_date} after end date {end_date}. Nothing to prefetch.")
+            return
+
+        fetch_start_date = start_date - datetime.timedelta(days=self.max_fallback_days)
+        range_days = {fetch_start_date + datetime.timedelta(days=offset) for offset in range((end_date - fetch_start_date).days + 1)}
+        self._fetch_missing_days({currency: range_days for currency in currencies})
+
+    def prefetch_rates_for_dates(self, dates_by_currency: Dict[str, Set[datetime.date]]):
+        """
+        Fetches what get_rate will need for the given (currency, conversion date) pairs: each date
+        plus its max_fallback_days fallback window. Missing days are coalesced into range queries.
+        """
+        fallback_offsets = [datetime.timedelta(days=offset) for offset in range(self.max_fallback_days + 1)]
+        self._fetch_missing_days({
+            currency: {conversion_date - offset for conversion_date in dates for offset in fallback_offsets}
+            for currency, dates in dates_by_currency.items()
+        })
+
+    def _fetch_missing_days(self, days_by_currency: Dict[str, Iterable[datetime.date]]):
+        """
+        Fetch scheduler: collects the (currency, day) pairs that are not cached yet, coalesces them into
+        one range query per run of days that are at most fetch_coalesce_gap_days apart, and runs the
+        range queries on a bounded thread pool. Each completed range is merged into rates_cache under
+        the cache lock. Days without an observation (weekends, TARGET holidays) are cached as
+        NO_OBSERVATION_MARKER, so later runs do not request them again.
+        If a range query fails, get_rate falls back to its per-day fetching for those days.
+        """
+        days_by_effective_code: Dict[str, Set[datetime.date]] = {}
+        for currency, days in days_by_currency.items():
+            if not currency or currency.upper() == "EUR":
+                continue
+            days_by_effective_code.setdefault(self._get_effective_currency_code(currency), set()).update(days)
+
+        fetch_jobs: List[Tuple[str, datetime.date, datetime.date]] = []
+        for effective_currency_code in sorted(days_by_effective_code):
+            # Failed per-day fetches (None) are requested again
+            missing_days = sorted(
+                day for day in days_by_effective_code[effective_currency_code]
+                if self.rates_cache.get(day.strftime("%Y-%m-%d"), {}).get(effective_currency_code) is None
+            )
+            if not missing_days:
+                logger.info(f"ECB rates for {effective_currency_code} already cached. Skipping prefetch.")
+                continue
+            fetch_jobs.extend((effective_currency_code, range_start, range_end)
+                              for range_start, range_end in self._coalesce_days(missing_days))
+
+        if not fetch_jobs:
+            return
+
+        started_at = time.perf_counter()
+        worker_count = min(self.fetch_max_workers, len(fetch_jobs))
+        with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="ecb-fetch") as executor:
+            list(executor.map(lambda job: self._fetch_and_merge_range(*job), fetch_jobs))
+        logger.info(f"Fetched {len(fetch_jobs)} ECB rate ranges for {len(days_by_effective_code)} currencies in "
+                    f"{time.perf_counter() - started_at:.2f}s ({worker_count} workers, max {self.max_connections_per_host} connections per host).")
+
+    def _coalesce_days(self, sorted_days: List[datetime.date]) -> List[Tuple[datetime.date, datetime.date]]:
+        """Groups ascending days into (start, end) ranges, bridging gaps of up to fetch_coalesce_gap_days."""
+        ranges: List[Tuple[datetime.date, datetime.date]] = []
+        range_start = range_end = sorted_days[0]
+        for day in sorted_days[1:]:
+            if (day - range_end).days > self.fetch_coalesce_gap_days:
+                ranges.append((range_start, range_end))
+                range_start = day
+            range_end = day
+        ranges.append((range_start, range_end))
+        return ranges
+
+    def _fetch_and_merge_range(self, effective_currency_code: str, start_date: datetime.date, end_date: datetime.date):
+        observations = self._fetch_series_from_ecb(effective_currency_code, start_date, end_date)
+        if observations is None:
+            logger.warning(f"Fetching ECB rates for {effective_currency_code} from {start_date} to {end_date} failed. Rates will be fetched per day on demand.")
+            return
+
+        with self._cache_lock:
+            updated_entry_count = 0
+            current_date = start_date
+            while current_date <= end_date:
+                current_date_str = current_date.strftime("%Y-%m-%d")
+                day_rates = self.rates_cache.setdefault(current_date_str, {})
+                rate_decimal = observations.get(current_date_str)
+                if rate_decimal is not None:
+                    if day_rates.get(effective_currency_code) != str(rate_decimal):
+                        day_rates[effective_currency_code] = str(rate_decimal)
+                        updated_entry_count += 1
+                elif day_rates.get(effective_currency_code) is None:
+                    # Never overwrite a known rate; a failed per-day fetch is superseded by the range reply
+                    day_rates[effective_currency_code] = NO_OBSERVATION_MARKER
+                    updated_entry_count += 1
+                current_date += datetime.timedelta(days=1)
+
+            logger.info(f"Prefetched {len(observations)} ECB rates for {effective_currency_code} from {start_date} to {end_date} in one request.")
+            if updated_entry_count:
+                self._record_cache_update(effective_currency_code, updated_entry_count)
+
+    def _fetch_series_from_ecb(self, effective_currency_code: str, start_date: datetime.date, end_date: datetime.date) -> Optional[Dict[str, Decimal]]:
+        """
+        Fetches all observations for one currency between start_date and end_date (inclusive).
+        Returns a mapping of date string (YYYY-MM-DD) to rate, which is empty if the ECB has no
+        observations in the range, or None if the request or response parsing failed.
+        """
+        start_date_str = start_date.strftime("%Y-%m-%d")
+        end_date_str = end_date.strftime("%Y-%m-%d")
+        url = self.api_url_template.format(currency_code=effective_currency_code, start_date_str=start_date_str, end_date_str=end_date_str)
+
+        logger.debug(f"Attempting ECB series fetch for {effective_currency_code} from {start_date_str} to {end_date_str} from URL: {url}")
+        try:
+            response = self._http_get(url)
+            if response.status_code == 404:
+                # The ECB API answers 404 when a valid query matches no observations
+                logger.info(f"ECB API returned 404 (no data) for {effective_currency_code} from {start_date_str} to {end_date_str}.")
+                return {}
+            response.raise_for_status()
+            if not response.content:
+                return {}
+            return self._parse_ecb_observations(response.json())
+        except requests.exceptions.RequestException as req_err:
+            logger.error(f"Request error occurred while fetching ECB series for {effective_currency_code} from {start_date_str} to {end_date_str}: {req_err}. URL: {url}")
+        except (json.JSONDecodeError, KeyError, IndexError, TypeError, ValueError) as parse_err:
+            logger.error(f"Error parsing ECB series response for {effective_currency_code} from {start_date_str} to {end_date_str}: {parse_err}. URL: {url}")
+        return None
+
+    @staticmethod
+    def _parse_ecb_observations(data: dict) -> Dict[str, Decimal]:
+        """Maps the observations of the first series in an SDMX-JSON response to {date string: rate}."""
+        data_sets = data.get("dataSets") or []
+        if not data_sets or not data_sets[0].get("series"):
+            return {}
+        series = data_sets[0]["series"]
+        observations = series[next(iter(series))].get("observations") or {}
+
+        time_period_ids: List[str] = []
+        for obs_struct_item in data.get("structure", {}).get("dimensions", {}).get("observation", []):
+            if obs_struct_item.get("id") == "TIME_PERIOD":
+                time_period_ids = [value_obj.get("id") for value_obj in obs_struct_item.get("values", [])]
+                break
+
+        rates_by_date: Dict[str, Decimal] = {}
+        for observation_key, rate_value_list in observations.items():
+            index = int(observation_key)
+            if index >= len(time_period_ids) or not rate_value_list or rate_value_list[0] is None:
+                continue
+            rates_by_date[time_period_ids[index]] = Decimal(str(rate_value_list[0]))
+        return rates_by_date
+
+
+# Providers whose pending rates are written at interpreter exit; dropped when garbage collected
+_LIVE_PROVIDERS: "weakref.WeakSet[ECBExchangeRateProvider]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_provider_caches_at_exit():
+    """atexit hook: persists pending rates of every provider that is still alive at interpreter exit."""
+    for provider in list(_LIVE_PROVIDERS):
+        if provider._pending_cache_entries > 0:
+            provider._save_cache()
@@ -0,0 +1,25 @@
+# src/utils/file_utils.py
+import os
+import tempfile
+from typing import IO, Callable
+
+
+def write_file_atomically(file_path: str, writer: Callable[[IO], None], binary: bool = False):
+    """
+    Writes file_path by calling writer(f) on a temporary file in the same directory and renaming it
+    over file_path, so an interrupted run never leaves a truncated file. Creates the directory if needed.
+    On failure the temporary file is removed, the previous file is left untouched and the error is re-raised.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory)
+    try:
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")) as f:
+            writer(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
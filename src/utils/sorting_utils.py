@@ -3,7 +3,7 @@ import logging
 import uuid
 from datetime import date
 from decimal import Decimal
-from typing import Tuple, Any 
+from typing import Tuple, Any, List
 
 from src.domain.events import (
     FinancialEvent, TradeEvent, CashFlowEvent, WithholdingTaxEvent, CorporateActionEvent,
@@ -12,7 +12,6 @@ from src.domain.events import (
 from src.identification.asset_resolver import AssetResolver
 from src.domain.assets import Asset
 from src.domain.enums import AssetCategory 
-from src.utils.type_utils import parse_ibkr_date
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +32,7 @@ def get_event_sort_key(event: FinancialEvent, asset_resolver: AssetResolver) ->
     Secondary key: Tuple starting with an intra-day sort order, then PRD-specified fields,
                    ending with event.event_id for ultimate tie-breaking.
     """
-    parsed_date = parse_ibkr_date(event.event_date)
+    parsed_date = event.event_date_obj
     if not parsed_date:
         raise ValueError(f"Event {event.event_id} ({type(event).__name__}) has unparseable date '{event.event_date}'. Cannot generate sort key.")
 
@@ -102,3 +101,28 @@ def get_event_sort_key(event: FinancialEvent, asset_resolver: AssetResolver) ->
     secondary_key_tuple = (intra_day_order,) + specific_secondary_elements
     
     return (parsed_date, secondary_key_tuple)
+
+
+def get_cached_event_sort_key(event: FinancialEvent, asset_resolver: AssetResolver) -> Tuple[date, Tuple[Any, ...]]:
+    """
+    Returns the sort key cached on the event by compute_event_sort_keys, computing
+    (and caching) it via get_event_sort_key if there is none.
+    """
+    sort_key = event.cached_sort_key
+    if sort_key is None:
+        sort_key = get_event_sort_key(event, asset_resolver)
+        event.set_sort_key(sort_key)
+    return sort_key
+
+
+def compute_event_sort_keys(events: List[FinancialEvent], asset_resolver: AssetResolver) -> List[Tuple[date, Tuple[Any, ...]]]:
+    """
+    Computes the sort key of every event exactly once, caches it on the event and returns
+    the keys aligned with `events`. Raises ValueError for the first event without a valid key.
+    """
+    sort_keys = []
+    for event in events:
+        sort_key = get_event_sort_key(event, asset_resolver)
+        event.set_sort_key(sort_key)
+        sort_keys.append(sort_key)
+    return sort_keys
@@ -2,6 +2,7 @@
 from decimal import Decimal, InvalidOperation
 from typing import Any, Optional, Union
 from datetime import datetime, date
+from functools import lru_cache
 
 def safe_decimal(value: Any, default: Optional[Decimal] = None, raise_error: bool = False) -> Optional[Decimal]:
     """
@@ -36,16 +37,41 @@ def safe_decimal(value: Any, default: Optional[Decimal] = None, raise_error: boo
         # print(f"Warning: Could not parse decimal from '{value}', using default {default}. Error: {e}")
         return default
 
-def parse_ibkr_date(date_str: Optional[str], default: Optional[date] = None) -> Optional[date]:
+# Parsed dates are cached per input string: IBKR reports repeat the same few hundred dates over and
+# over, and every caller then shares one (immutable) date object per distinct string.
+DATE_PARSE_CACHE_SIZE = 65536
+
+try:
+    from dateutil import parser as dateutil_parser
+except ImportError: # Optional: only used for formats the explicit formats below do not cover
+    dateutil_parser = None
+
+
+def _fast_parse_date_part(s_date_part: str) -> Optional[date]:
     """
-    Parses various date formats IBKR might use (YYYY-MM-DD, YYYYMMDD, MM/DD/YYYY, etc.)
-    Returns a datetime.date object or None.
+    Fast path for YYYY-MM-DD and YYYYMMDD (the formats IBKR Flex Queries use).
+    Returns None if the string has another shape or is not a valid date, so the caller
+    can fall back to the strptime/dateutil path.
     """
-    if not date_str or not str(date_str).strip():
-        return default
+    length = len(s_date_part)
+    if length == 10:
+        if s_date_part[4] != '-' or s_date_part[7] != '-':
+            return None
+        year_str, month_str, day_str = s_date_part[0:4], s_date_part[5:7], s_date_part[8:10]
+    elif length == 8:
+        year_str, month_str, day_str = s_date_part[0:4], s_date_part[4:6], s_date_part[6:8]
+    else:
+        return None
+    if not (year_str + month_str + day_str).isascii() or not (year_str + month_str + day_str).isdigit():
+        return None
+    try:
+        return date(int(year_str), int(month_str), int(day_str))
+    except ValueError:
+        return None
 
-    s_date_str = str(date_str).strip()
-    
+
+def _parse_ibkr_date_uncached(s_date_str: str) -> Optional[date]:
+    """Full strptime/dateutil date parsing of a stripped, non-empty string. Returns None on failure."""
     formats_to_try = [
         "%Y-%m-%d",         # 2023-12-31
         "%Y%m%d",           # 20231231
@@ -55,15 +81,7 @@ def parse_ibkr_date(date_str: Optional[str], default: Optional[date] = None) ->
         "%Y%m%d %H:%M:%S",
     ]
 
-    # Attempt with dateutil.parser for flexibility first
-    try:
-        # dateutil.parser.parse can be too lenient, but good for common variations
-        dt_obj = datetime.strptime(s_date_str.split(' ')[0], formats_to_try[0]) # Try most common first
-        return dt_obj.date()
-    except ValueError:
-        pass # Try other formats
-
-    for fmt in formats_to_try[1:]:
+    for fmt in formats_to_try:
         try:
             dt_obj = datetime.strptime(s_date_str.split(' ')[0], fmt) # Take only date part if time exists
             return dt_obj.date()
@@ -71,24 +89,65 @@ def parse_ibkr_date(date_str: Optional[str], default: Optional[date] = None) ->
             continue
     
     # Fallback to dateutil.parser if specific formats fail (can be slower)
+    if dateutil_parser is None:
+        return None
     try:
-        from dateutil import parser as dateutil_parser
         dt_obj = dateutil_parser.parse(s_date_str)
         return dt_obj.date()
-    except (ValueError, TypeError, ImportError):
+    except (ValueError, TypeError):
         # print(f"Warning: Could not parse date from '{s_date_str}' using multiple formats.")
-        return default
+        return None
 
-def parse_ibkr_datetime(datetime_str: Optional[str], default: Optional[datetime] = None) -> Optional[datetime]:
+
+@lru_cache(maxsize=DATE_PARSE_CACHE_SIZE)
+def _parse_ibkr_date_cached(date_str: str) -> Optional[date]:
+    s_date_str = date_str.strip()
+    if not s_date_str:
+        return None
+    parsed_date = _fast_parse_date_part(s_date_str.split(' ')[0])
+    if parsed_date is not None:
+        return parsed_date
+    return _parse_ibkr_date_uncached(s_date_str)
+
+
+def parse_ibkr_date(date_str: Optional[str], default: Optional[date] = None) -> Optional[date]:
     """
-    Parses various datetime formats IBKR might use.
-    Returns a naive datetime.datetime object or None.
+    Parses various date formats IBKR might use (YYYY-MM-DD, YYYYMMDD, MM/DD/YYYY, etc.)
+    Returns a datetime.date object or None.
     """
-    if not datetime_str or not str(datetime_str).strip():
+    if not date_str:
         return default
+    parsed_date = _parse_ibkr_date_cached(date_str if isinstance(date_str, str) else str(date_str))
+    return default if parsed_date is None else parsed_date
 
-    s_datetime_str = str(datetime_str).strip()
 
+def _fast_parse_datetime(s_datetime_str: str) -> Optional[datetime]:
+    """
+    Fast path for YYYY-MM-DD / YYYYMMDD, optionally followed by ' HH:MM:SS' or ', HH:MM:SS'.
+    Returns None for any other shape or invalid values (the caller falls back to the full parser).
+    """
+    date_part, separator, time_part = s_datetime_str.partition(' ')
+    if separator and date_part.endswith(','):
+        date_part = date_part[:-1]
+    parsed_date = _fast_parse_date_part(date_part)
+    if parsed_date is None:
+        return None
+    if not separator:
+        return datetime(parsed_date.year, parsed_date.month, parsed_date.day)
+    if len(time_part) != 8 or time_part[2] != ':' or time_part[5] != ':':
+        return None
+    digits = time_part[0:2] + time_part[3:5] + time_part[6:8]
+    if not digits.isascii() or not digits.isdigit():
+        return None
+    try:
+        return datetime(parsed_date.year, parsed_date.month, parsed_date.day,
+                        int(time_part[0:2]), int(time_part[3:5]), int(time_part[6:8]))
+    except ValueError:
+        return None
+
+
+def _parse_ibkr_datetime_uncached(s_datetime_str: str) -> Optional[datetime]:
+    """Full strptime/dateutil datetime parsing of a stripped, non-empty string. Returns None on failure."""
     formats_to_try = [
         "%Y-%m-%d %H:%M:%S",
         "%Y%m%d %H:%M:%S",
@@ -106,7 +165,8 @@ def parse_ibkr_datetime(datetime_str: Optional[str], default: Optional[datetime]
 
     # Fallback to dateutil.parser (might be slower but more flexible)
     try:
-        from dateutil import parser as dateutil_parser
+        if dateutil_parser is None:
+            raise ImportError("python-dateutil is not installed")
         # Make naive by default, IBKR reports usually don't have consistent TZ info
         return dateutil_parser.parse(s_datetime_str).replace(tzinfo=None)
     except (ValueError, TypeError, ImportError):
@@ -115,4 +175,26 @@ def parse_ibkr_datetime(datetime_str: Optional[str], default: Optional[datetime]
         parsed_date = parse_ibkr_date(s_datetime_str)
         if parsed_date:
             return datetime.combine(parsed_date, datetime.min.time())
+        return None
+
+
+@lru_cache(maxsize=DATE_PARSE_CACHE_SIZE)
+def _parse_ibkr_datetime_cached(datetime_str: str) -> Optional[datetime]:
+    s_datetime_str = datetime_str.strip()
+    if not s_datetime_str:
+        return None
+    parsed_datetime = _fast_parse_datetime(s_datetime_str)
+    if parsed_datetime is not None:
+        return parsed_datetime
+    return _parse_ibkr_datetime_uncached(s_datetime_str)
+
+
+def parse_ibkr_datetime(datetime_str: Optional[str], default: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Parses various datetime formats IBKR might use.
+    Returns a naive datetime.datetime object or None.
+    """
+    if not datetime_str:
         return default
+    parsed_datetime = _parse_ibkr_datetime_cached(datetime_str if isinstance(datetime_str, str) else str(datetime_str))
+    return default if parsed_datetime is None else parsed_datetime
@@ -0,0 +1,44 @@
+# tests/benchmarks/test_asset_resolver_benchmark.py
+import os
+import time
+
+from src.classification.asset_classifier import AssetClassifier
+from src.domain.enums import AssetCategory
+from src.identification.asset_resolver import AssetResolver
+
+NUM_UNDERLYINGS = 5_000
+NUM_OPTIONS = 100_000
+
+
+def test_resolver_with_100k_options_on_5k_underlyings(temp_data_dir):
+    resolver = AssetResolver(AssetClassifier(cache_file_path=os.path.join(temp_data_dir, "classifications.json")))
+
+    started = time.perf_counter()
+    for i in range(NUM_UNDERLYINGS):
+        resolver.get_or_create_asset(f"US{i:010d}", f"{100000 + i}", f"U{i}", "USD", "STK", f"UNDERLYING {i} INC",
+                                     description_source_type="position")
+    for i in range(NUM_OPTIONS):
+        underlying = i % NUM_UNDERLYINGS
+        strike = 10 + (i // NUM_UNDERLYINGS)
+        # Half of the options only know their underlying by symbol
+        resolver.get_or_create_asset(None, f"{5000000 + i}", f"U{underlying} 240621C{strike:05d}000", "USD", "OPT",
+                                     f"U{underlying} 21JUN24 {strike} C", description_source_type="trade",
+                                     raw_multiplier="100", raw_strike=str(strike), raw_expiry="2024-06-21", raw_put_call="C",
+                                     raw_underlying_conid=f"{100000 + underlying}" if i % 2 else None,
+                                     raw_underlying_symbol=f"U{underlying}")
+    registered = time.perf_counter()
+    resolver.link_derivatives()
+    linked = time.perf_counter()
+
+    options = resolver.get_assets_by_category(AssetCategory.OPTION)
+    assert len(options) == NUM_OPTIONS
+    assert len(resolver.get_assets_by_category(AssetCategory.STOCK)) == NUM_UNDERLYINGS
+    assert all(resolver.get_asset_by_id(o.underlying_asset_internal_id).ibkr_symbol == o.underlying_ibkr_symbol for o in options)
+    assert resolver.get_asset_by_isin(f"US{42:010d}").ibkr_symbol == "U42"
+
+    started_lookups = time.perf_counter()
+    for i in range(NUM_UNDERLYINGS):
+        assert resolver.get_assets_by_symbol(f"U{i}")[0].asset_category == AssetCategory.STOCK
+    lookups = time.perf_counter() - started_lookups
+    print(f"\nAssetResolver: {NUM_OPTIONS:,} options on {NUM_UNDERLYINGS:,} underlyings registered in {registered - started:.2f}s, "
+          f"linked in {linked - registered:.3f}s, {NUM_UNDERLYINGS:,} symbol lookups in {lookups:.3f}s")
@@ -0,0 +1,82 @@
+# tests/benchmarks/test_date_parsing_benchmark.py
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.utils.type_utils import (
+    _parse_ibkr_date_uncached,
+    _parse_ibkr_datetime_uncached,
+    parse_ibkr_date,
+    parse_ibkr_datetime,
+)
+from tests.benchmarks import ASSERT_TIMINGS
+
+NUM_INPUTS = 1_000_000
+# The legacy parser needs ~30s for 1M inputs; it is timed on a slice and scaled up.
+LEGACY_SAMPLE_SIZE = 100_000
+
+
+def _legacy_parse_ibkr_date(date_str):
+    """The parser as it was before memoization and the fast path (strptime per format, then dateutil)."""
+    if not date_str or not str(date_str).strip():
+        return None
+    return _parse_ibkr_date_uncached(str(date_str).strip())
+
+
+def _mixed_format_inputs(count: int):
+    rng = random.Random(42)
+    start = date(2018, 1, 1)
+    formatters = [
+        lambda d: d.isoformat(),                      # 2023-12-31
+        lambda d: d.strftime("%Y%m%d"),               # 20231231
+        lambda d: d.strftime("%Y%m%d") + " 15:30:00",
+        lambda d: d.isoformat() + ", 09:05:00",
+        lambda d: d.strftime("%m/%d/%Y"),             # Slow path
+        lambda d: d.strftime("%d.%m.%Y"),             # Slow path
+    ]
+    weights = [40, 30, 10, 10, 5, 5]
+    distinct = [rng.choices(formatters, weights)[0](start + timedelta(days=rng.randrange(6 * 365))) for _ in range(5000)]
+    return [rng.choice(distinct) for _ in range(count)], distinct
+
+
+@pytest.mark.parametrize("value", [
+    "2023-12-31", "20231231", " 2023-01-05 ", "2023-1-5", "2023-02-30", "20231301", "2023-12-31 10:00:00",
+    "20231231 10:00:00", "12/31/2023", "31.12.2023", "Dec 31 2023", "2023-12-31T10:00", "2023-12-31,", "",
+    "   ", "not a date", "0000-01-01", "２０２３-12-31",
+])
+def test_fast_path_matches_legacy_parsers(value):
+    assert parse_ibkr_date(value) == _legacy_parse_ibkr_date(value)
+    expected_datetime = _parse_ibkr_datetime_uncached(value.strip()) if value.strip() else None
+    assert parse_ibkr_datetime(value) == expected_datetime
+    for suffix in (" 23:59:59", ", 07:08:09", " 24:00:00"):
+        if value.strip():
+            assert parse_ibkr_datetime(value + suffix) == _parse_ibkr_datetime_uncached((value + suffix).strip())
+
+
+def test_defaults_are_returned_for_unparseable_input():
+    assert parse_ibkr_date("garbage", default=date(2000, 1, 1)) == date(2000, 1, 1)
+    assert parse_ibkr_date(None, default=date(2000, 1, 1)) == date(2000, 1, 1)
+    assert parse_ibkr_datetime("garbage", default=datetime(2000, 1, 1)) == datetime(2000, 1, 1)
+
+
+def test_parse_ibkr_date_1m_mixed_inputs():
+    inputs, distinct = _mixed_format_inputs(NUM_INPUTS)
+    for value in distinct:
+        assert parse_ibkr_date(value) == _legacy_parse_ibkr_date(value)
+
+    started_at = time.perf_counter()
+    for value in inputs[:LEGACY_SAMPLE_SIZE]:
+        _legacy_parse_ibkr_date(value)
+    legacy_seconds = (time.perf_counter() - started_at) * NUM_INPUTS / LEGACY_SAMPLE_SIZE
+
+    started_at = time.perf_counter()
+    for value in inputs:
+        parse_ibkr_date(value)
+    fast_seconds = time.perf_counter() - started_at
+
+    print(f"\nparse_ibkr_date on {NUM_INPUTS:,} mixed inputs: legacy {legacy_seconds:.2f}s (extrapolated), "
+          f"memoized fast path {fast_seconds:.2f}s ({legacy_seconds / fast_seconds:.1f}x)")
+    if ASSERT_TIMINGS:
+        assert fast_seconds * 3 < legacy_seconds
@@ -0,0 +1,56 @@
+# tests/benchmarks/test_dividend_rights_matching_benchmark.py
+import os
+import time
+from decimal import Decimal
+
+from src.classification.asset_classifier import AssetClassifier
+from src.domain.enums import FinancialEventType
+from src.domain.events import CashFlowEvent, CorpActionExpireDividendRights, CorpActionStockDividend
+from src.identification.asset_resolver import AssetResolver
+from src.parsers.parsing_orchestrator import ParsingOrchestrator
+
+NUM_RIGHTS_ISSUES = 2_000
+NUM_OTHER_DIVIDENDS = 50_000
+
+
+def _stock(resolver: AssetResolver, i: int):
+    return resolver.get_or_create_asset(f"DE{i:010d}", f"{100000 + i}", f"S{i}", "EUR", "STK", f"STOCK {i}",
+                                        description_source_type="position")
+
+
+def test_dividend_rights_matching_is_linear_in_ed_events(temp_data_dir):
+    classifier = AssetClassifier(cache_file_path=os.path.join(temp_data_dir, "classifications.json"))
+    resolver = AssetResolver(classifier)
+    orchestrator = ParsingOrchestrator(resolver, classifier, interactive_classification=False)
+
+    events = []
+    expected_cash_targets = {}
+    for i in range(NUM_RIGHTS_ISSUES):
+        stock = _stock(resolver, i)
+        rights_isin, rights_symbol = f"DE{900000000 + i:010d}", f"S{i}.DIVIR"
+        rights = resolver.get_or_create_asset(rights_isin, f"{900000 + i}", rights_symbol, "EUR", "STK", f"S{i} - DIVIDEND RIGHTS",
+                                              description_source_type="corp_act_asset")
+        description = f"({rights_symbol}, S{i} - DIVIDEND RIGHTS, {rights_isin})"
+        events.append(CorpActionStockDividend(rights.internal_asset_id, "2024-05-24", quantity_new_shares_received=Decimal("100"),
+                                              ibkr_activity_description=f"S{i}({stock.ibkr_isin}) DIVIDEND RIGHTS ISSUE 1 FOR 1 {description}"))
+        events.append(CorpActionExpireDividendRights(rights.internal_asset_id, "2024-06-26",
+                                                     ibkr_activity_description=f"{rights_symbol}({rights_isin}) EXPIRE DIVIDEND RIGHT {description}"))
+        cash_event = CashFlowEvent(rights.internal_asset_id, "2024-06-26", event_type=FinancialEventType.DIVIDEND_CASH,
+                                   gross_amount_foreign_currency=Decimal("97.00"), local_currency="EUR",
+                                   ibkr_activity_description=f"{rights_symbol}({rights_isin}) EXPIRE DIVIDEND RIGHT (Exempt From Withholding)")
+        events.append(cash_event)
+        expected_cash_targets[cash_event.event_id] = stock.internal_asset_id
+    for i in range(NUM_OTHER_DIVIDENDS):
+        stock = resolver.get_asset_by_isin(f"DE{i % NUM_RIGHTS_ISSUES:010d}")
+        events.append(CashFlowEvent(stock.internal_asset_id, "2024-03-01", event_type=FinancialEventType.DIVIDEND_CASH,
+                                    gross_amount_foreign_currency=Decimal("1.00"), local_currency="EUR",
+                                    ibkr_activity_description=f"S{i}(DE{i:010d}) CASH DIVIDEND EUR 0.01 PER SHARE"))
+    orchestrator.domain_financial_events.extend(events)
+
+    started = time.perf_counter()
+    orchestrator._process_dividend_rights_matching()
+    elapsed = time.perf_counter() - started
+
+    assert all(e.quantity_new_shares_received == Decimal("0") for e in events if isinstance(e, CorpActionStockDividend))
+    assert all(e.asset_internal_id == expected_cash_targets[e.event_id] for e in events if e.event_id in expected_cash_targets)
+    print(f"\nDI/ED matching: {NUM_RIGHTS_ISSUES:,} ED events among {len(events):,} events in {elapsed:.3f}s")
@@ -0,0 +1,37 @@
+# tests/benchmarks/test_fast_row_decoder_benchmark.py
+import os
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.parsers.trades_parser import parse_trades_csv
+from tests.benchmarks import ASSERT_TIMINGS
+from tests.helpers.csv_creators import create_trades_csv_string
+
+NUM_TRADE_ROWS = 50_000
+
+
+def test_fast_row_decoding_speedup(temp_data_dir):
+    start = date(2020, 1, 2)
+    rows = []
+    for i in range(NUM_TRADE_ROWS):
+        symbol = f"SYM{i % 500:04d}"
+        rows.append(["U_BENCH", "USD", "STK", "COMMON", symbol, f"{symbol} INC", f"US{i % 500:010d}", None, None, None,
+                     (start + timedelta(days=i // 100)).isoformat(), Decimal(i % 7 + 1), Decimal("100.25"), Decimal("-1.00"),
+                     "USD", "BUY", f"T{i:09d}", None, None, f"C{i % 500:06d}", None, Decimal("1"), "O"])
+    trades_file = os.path.join(temp_data_dir, "trades_bench.csv")
+    with open(trades_file, "w", encoding="utf-8-sig") as f:
+        f.write(create_trades_csv_string(rows))
+
+    timings = {}
+    records = {}
+    for fast_decoding in (False, True):
+        started = time.perf_counter()
+        records[fast_decoding] = parse_trades_csv(trades_file, fast_decoding=fast_decoding)
+        timings[fast_decoding] = time.perf_counter() - started
+
+    assert [r.dict() for r in records[True]] == [r.dict() for r in records[False]]
+    if ASSERT_TIMINGS:
+        assert timings[True] < timings[False]
+    print(f"\nDecoding {NUM_TRADE_ROWS:,} trade rows: pydantic {timings[False]:.2f}s, "
+          f"fast row decoder {timings[True]:.2f}s ({timings[False] / timings[True]:.1f}x)")
@@ -0,0 +1,84 @@
+# tests/benchmarks/test_fifo_ledger_benchmark.py
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.domain.enums import AssetCategory, FinancialEventType
+from src.domain.events import TradeEvent
+from src.engine.fifo_manager import FifoLedger
+from src.utils.currency_converter import CurrencyConverter
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+NUM_BUYS = 50_000
+NUM_SELLS = 50_000
+
+
+def _make_ledger() -> FifoLedger:
+    rate_provider = MockECBExchangeRateProvider(foreign_to_eur_init_value=Decimal("1.0"))
+    return FifoLedger(
+        asset_internal_id=uuid.uuid4(),
+        asset_category=AssetCategory.STOCK,
+        asset_multiplier_from_asset=None,
+        currency_converter=CurrencyConverter(rate_provider),
+        exchange_rate_provider=rate_provider,
+        internal_working_precision=28,
+        decimal_rounding_mode="ROUND_HALF_UP",
+    )
+
+
+def _make_trade(asset_id: uuid.UUID, event_date: str, tx_id: str, event_type: FinancialEventType,
+                quantity: Decimal, price: Decimal) -> TradeEvent:
+    trade = TradeEvent(
+        asset_id, event_date,
+        quantity=quantity, price_foreign_currency=price, event_type=event_type,
+        local_currency="EUR", ibkr_transaction_id=tx_id,
+    )
+    trade.net_proceeds_or_cost_basis_eur = (quantity.copy_abs() * price)
+    return trade
+
+
+def test_fifo_ledger_50k_buys_50k_partial_sells():
+    """
+    DCA-style history on a single asset: every buy of 10 units is followed by a sale of 7 units,
+    so nearly every sale splits a lot. With the head-consuming lot store this stays linear.
+    """
+    ledger = _make_ledger()
+    asset_id = ledger.asset_internal_id
+    start = date(2015, 1, 1)
+
+    buys = []
+    sells = []
+    for i in range(max(NUM_BUYS, NUM_SELLS)):
+        event_date = (start + timedelta(days=i // 20)).isoformat()
+        if i < NUM_BUYS:
+            buys.append(_make_trade(asset_id, event_date, f"B{i:08d}", FinancialEventType.TRADE_BUY_LONG,
+                                    Decimal("10"), Decimal("100") + Decimal(i % 50)))
+        if i < NUM_SELLS:
+            sells.append(_make_trade(asset_id, event_date, f"S{i:08d}", FinancialEventType.TRADE_SELL_LONG,
+                                     Decimal("-7"), Decimal("120")))
+
+    started = time.perf_counter()
+    realized_count = 0
+    for buy, sell in zip(buys, sells):
+        ledger.add_long_lot(buy)
+        realized_count += len(ledger.consume_long_lots_for_sale(sell))
+    elapsed = time.perf_counter() - started
+
+    expected_open_qty = Decimal(NUM_BUYS * 10 - NUM_SELLS * 7)
+    assert ledger.get_current_position_quantity() == expected_open_qty
+    assert ledger.lots.open_quantity == sum(lot.quantity for lot in ledger.lots)
+    assert realized_count >= NUM_SELLS
+    print(f"\nFifoLedger: {NUM_BUYS} buys + {NUM_SELLS} partial sells in {elapsed:.2f}s "
+          f"({(NUM_BUYS + NUM_SELLS) / elapsed:,.0f} ops/s, {realized_count} RGL records, {len(ledger.lots)} open lots)")
+
+
+def test_fifo_ledger_out_of_order_lots_are_placed_by_date():
+    ledger = _make_ledger()
+    asset_id = ledger.asset_internal_id
+    for tx_id, event_date in [("T3", "2023-03-01"), ("T1", "2023-01-01"), ("T4", "2023-04-01"), ("T2", "2023-02-01")]:
+        ledger.add_long_lot(_make_trade(asset_id, event_date, tx_id, FinancialEventType.TRADE_BUY_LONG,
+                                        Decimal("1"), Decimal("10")))
+
+    assert [lot.source_transaction_id for lot in ledger.lots] == ["T1", "T2", "T3", "T4"]
+    assert ledger.lots.open_quantity == Decimal("4")
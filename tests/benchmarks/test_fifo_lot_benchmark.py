@@ -0,0 +1,57 @@
+# tests/benchmarks/test_fifo_lot_benchmark.py
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from datetime import date
+from decimal import Decimal
+
+from src.engine.fifo_manager import FifoLot, lot_total_tolerance
+from tests.benchmarks import ASSERT_TIMINGS
+
+NUM_LOTS = 1_000_000
+
+# The same fields as a regular (__dict__ based) dataclass, for comparison
+_DictFifoLot = make_dataclass("_DictFifoLot", [(f.name, f.type) for f in fields(FifoLot)])
+
+
+def _bytes_per_lot(lot_class, **lot_kwargs) -> float:
+    """Memory of NUM_LOTS lots sharing their field values, i.e. the per-lot overhead of the class."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        lots = [lot_class(**lot_kwargs) for _ in range(NUM_LOTS)]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(lots) == NUM_LOTS
+    return (after - before) / NUM_LOTS
+
+
+def _lots_per_second(validate: bool, tolerance: Decimal) -> float:
+    quantities = [Decimal(i % 97 + 1) for i in range(NUM_LOTS)]
+    unit_cost = Decimal("12.345678")
+    acquired = date(2022, 5, 17)
+    started = time.perf_counter()
+    lots = [FifoLot("2022-05-17", quantity, unit_cost, quantity * unit_cost, "T0001", acquired,
+                    validation_tolerance=tolerance, validate=validate) for quantity in quantities]
+    elapsed = time.perf_counter() - started
+    assert lots[-1].total_cost_basis_eur == quantities[-1] * unit_cost
+    return NUM_LOTS / elapsed
+
+
+def test_fifo_lot_memory_and_throughput():
+    lot_fields = dict(acquisition_date="2022-05-17", quantity=Decimal("10"), unit_cost_basis_eur=Decimal("12.5"),
+                      total_cost_basis_eur=Decimal("125"), source_transaction_id="T0001", acquisition_date_obj=date(2022, 5, 17))
+    assert not hasattr(FifoLot(**lot_fields), "__dict__")
+
+    slotted_bytes = _bytes_per_lot(FifoLot, validate=False, **lot_fields)
+    dict_bytes = _bytes_per_lot(_DictFifoLot, **lot_fields)
+    assert slotted_bytes < dict_bytes
+
+    tolerance = lot_total_tolerance()
+    strict_rate = _lots_per_second(validate=True, tolerance=tolerance)
+    fast_rate = _lots_per_second(validate=False, tolerance=tolerance)
+    if ASSERT_TIMINGS:
+        assert fast_rate > strict_rate
+    print(f"\nFifoLot x {NUM_LOTS:,}: {slotted_bytes:.0f} bytes/lot slotted vs {dict_bytes:.0f} with __dict__; "
+          f"strict validation {strict_rate:,.0f} lots/s, fast {fast_rate:,.0f} lots/s")
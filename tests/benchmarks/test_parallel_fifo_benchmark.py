@@ -0,0 +1,68 @@
+# tests/benchmarks/test_parallel_fifo_benchmark.py
+import copy
+import os
+import time
+from decimal import Decimal
+
+import src.config as config
+from src.classification.asset_classifier import AssetClassifier
+from src.engine.calculation_engine import run_main_calculations
+from src.pipeline_runner import _parse_and_enrich_events
+from src.utils.currency_converter import CurrencyConverter
+from tests.benchmarks import ASSERT_TIMINGS
+from tests.helpers.csv_creators import (
+    create_trades_csv_string, create_positions_csv_string,
+    create_cash_transactions_csv_string, create_corporate_actions_csv_string
+)
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+NUM_ASSETS = 5_000
+TAX_YEAR = 2023
+# A speedup is only asserted where there are enough cores to expect one
+MIN_CPUS_FOR_SPEEDUP = 4
+
+
+def _synthetic_portfolio_trades():
+    rows = []
+    for i in range(NUM_ASSETS):
+        symbol = f"S{i:05d}"
+        for month, quantity, price, buy_sell, open_close in [(2, "30", "10.00", "BUY", "O"), (4, "20", "11.00", "BUY", "O"),
+                                                             (6, "-25", "12.50", "SELL", "C"), (9, "-25", "9.75", "SELL", "C")]:
+            rows.append(["U_BENCH", "USD", "STK", "COMMON", symbol, f"{symbol} INC", f"US{i:010d}", None, None, None,
+                         f"2023-{month:02d}-{i % 28 + 1:02d}", Decimal(quantity), Decimal(price), Decimal("-1.00"), "USD",
+                         buy_sell, f"T{i:05d}{month:02d}", None, None, f"C{i:06d}", None, Decimal("1"), open_close])
+    return rows
+
+
+def test_parallel_fifo_speedup(temp_data_dir):
+    paths = {}
+    for name, rows, creator in [("trades", _synthetic_portfolio_trades(), create_trades_csv_string),
+                                ("positions_start", [], create_positions_csv_string),
+                                ("positions_end", [], create_positions_csv_string),
+                                ("cash_transactions", [], create_cash_transactions_csv_string),
+                                ("corporate_actions", [], create_corporate_actions_csv_string)]:
+        paths[name] = os.path.join(temp_data_dir, f"{name}.csv")
+        with open(paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+    rate_provider = MockECBExchangeRateProvider(Decimal("0.9"))
+    converter = CurrencyConverter(rate_provider=rate_provider)
+    classifier = AssetClassifier(cache_file_path=os.path.join(temp_data_dir, "classifications.json"))
+    parsed = _parse_and_enrich_events(paths, False, classifier, rate_provider, converter, TAX_YEAR,
+                                      streaming_ingestion=False, fast_row_decoding=True, parallel_parsing=False)
+
+    timings = {}
+    results = {}
+    for parallel_fifo in (False, True):
+        resolver, events = copy.deepcopy(parsed)
+        started = time.perf_counter()
+        results[parallel_fifo] = run_main_calculations(events, resolver, converter, rate_provider, TAX_YEAR,
+                                                       config.INTERNAL_CALCULATION_PRECISION, config.DECIMAL_ROUNDING_MODE,
+                                                       parallel_fifo=parallel_fifo)
+        timings[parallel_fifo] = time.perf_counter() - started
+
+    assert repr(results[True][0]) == repr(results[False][0])
+    assert len(results[True][0]) == 3 * NUM_ASSETS
+    if ASSERT_TIMINGS and (os.cpu_count() or 1) >= MIN_CPUS_FOR_SPEEDUP:
+        assert timings[True] < timings[False]
+    print(f"\nFIFO processing of {NUM_ASSETS:,} assets ({os.cpu_count()} CPUs): sequential {timings[False]:.2f}s, "
+          f"parallel {timings[True]:.2f}s ({timings[False] / timings[True]:.1f}x)")
@@ -0,0 +1,116 @@
+# tests/benchmarks/test_pipeline_scaling_benchmark.py
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from dataclasses import asdict
+
+import pytest
+
+from src.pipeline_profiler import STAGE_PATH_SEPARATOR
+from tests.benchmarks import ASSERT_TIMINGS
+from tests.helpers.flex_query_generator import FlexQuerySettings, generate_flex_query
+
+# Set PIPELINE_BENCHMARK_EVENTS=1000,10000,100000,1000000 for the full scaling run (the largest size takes several minutes).
+# Sizes without a stored baseline are skipped unless PIPELINE_BENCHMARK_UPDATE_BASELINE=1 records one.
+BENCHMARK_EVENT_COUNTS = [int(n) for n in os.environ.get("PIPELINE_BENCHMARK_EVENTS", "1000,10000").split(",")]
+# PIPELINE_BENCHMARK_UPDATE_BASELINE=1 stores the measured runs as the new baseline instead of comparing against it
+UPDATE_BASELINE = os.environ.get("PIPELINE_BENCHMARK_UPDATE_BASELINE") == "1"
+# Allowed slowdown / memory growth against the baseline, checked with BENCHMARK_ASSERT_TIMINGS=1 only;
+# wall times vary a lot between machines
+TIME_TOLERANCE = float(os.environ.get("PIPELINE_BENCHMARK_TIME_TOLERANCE", "3.0"))
+RSS_TOLERANCE = float(os.environ.get("PIPELINE_BENCHMARK_RSS_TOLERANCE", "1.5"))
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "pipeline_scaling_baseline.json")
+BENCHMARK_SETTINGS = FlexQuerySettings(seed=2023, split_probability=0.3)
+# Stages shown in the comparison against the baseline
+COMPARED_STAGE_DEPTH = 1
+
+# Runs the pipeline in a fresh interpreter so the peak RSS is that of one run alone. Memory tracing is
+# off: tracemalloc would distort the wall times, the RSS high-water mark is still recorded per stage.
+_PIPELINE_SCRIPT = textwrap.dedent("""
+    import json, sys
+    from decimal import Decimal
+    import src.config as config
+    from src.pipeline_profiler import PipelineProfiler, activate_profiler, peak_rss_bytes
+    from src.pipeline_runner import run_core_processing_pipeline
+    from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+    file_arguments, tax_year, profile_file, cache_file = json.loads(sys.argv[1]), int(sys.argv[2]), sys.argv[3], sys.argv[4]
+    config.CLASSIFICATION_CACHE_FILE_PATH = cache_file
+    profiler = PipelineProfiler(trace_memory=False)
+    activate_profiler(profiler)
+    profiler.start()
+    output = run_core_processing_pipeline(**file_arguments, interactive_classification_mode=False, tax_year_to_process=tax_year,
+                                          custom_rate_provider=MockECBExchangeRateProvider(Decimal("0.9")))
+    profiler.stop()
+    profiler.write_json(profile_file)
+    print(json.dumps({"events": len(output.all_financial_events_enriched), "eoy_mismatches": output.eoy_mismatch_error_count,
+                      "peak_rss_bytes": peak_rss_bytes()}))
+""")
+
+
+def _run_pipeline(temp_data_dir: str, num_events: int) -> dict:
+    flex_query = generate_flex_query(temp_data_dir, BENCHMARK_SETTINGS.with_event_count(num_events))
+    profile_file = os.path.join(temp_data_dir, "profile.json")
+    completed = subprocess.run([sys.executable, "-c", _PIPELINE_SCRIPT, json.dumps(flex_query.pipeline_file_arguments()),
+                                str(BENCHMARK_SETTINGS.tax_year), profile_file, os.path.join(temp_data_dir, "classifications.json")],
+                               capture_output=True, text=True, check=True, cwd=os.getcwd())
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert result["events"] == flex_query.num_events
+    assert result["eoy_mismatches"] == 0
+    with open(profile_file, encoding="utf-8") as f:
+        profile = json.load(f)
+    return {
+        "events": result["events"],
+        "total_seconds": profile["total_seconds"],
+        "peak_rss_bytes": result["peak_rss_bytes"],
+        "stages": {s["path"]: {"seconds": s["seconds"], "max_rss_bytes": s["max_rss_bytes"]} for s in profile["stages"]},
+    }
+
+
+def _load_baseline() -> dict:
+    if not os.path.exists(BASELINE_FILE):
+        return {"settings": {}, "runs": {}}
+    with open(BASELINE_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _comparison_table(num_events: int, run: dict, baseline_run: dict) -> str:
+    lines = [f"Pipeline with {run['events']:,} events: {run['total_seconds']:.2f}s (baseline {baseline_run['total_seconds']:.2f}s), "
+             f"peak RSS {run['peak_rss_bytes'] / 2**20:.0f} MB (baseline {baseline_run['peak_rss_bytes'] / 2**20:.0f} MB)"]
+    for path, stage in run["stages"].items():
+        if path.count(STAGE_PATH_SEPARATOR) > COMPARED_STAGE_DEPTH:
+            continue
+        baseline_seconds = baseline_run["stages"].get(path, {}).get("seconds")
+        ratio = f"{stage['seconds'] / baseline_seconds:5.2f}x" if baseline_seconds else "   new"
+        lines.append(f"  {path:<60} {stage['seconds']:9.3f}s  {ratio}")
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("num_events", BENCHMARK_EVENT_COUNTS)
+def test_pipeline_scaling_against_baseline(temp_data_dir, num_events):
+    run = _run_pipeline(temp_data_dir, num_events)
+    baseline = _load_baseline()
+    settings = {k: v for k, v in asdict(BENCHMARK_SETTINGS).items() if k != "num_stocks"}
+
+    if UPDATE_BASELINE:
+        if baseline["settings"] != settings:
+            baseline = {"settings": settings, "runs": {}}
+        baseline["runs"][str(num_events)] = run
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nStored the pipeline baseline for {num_events:,} events: {run['total_seconds']:.2f}s, "
+              f"peak RSS {run['peak_rss_bytes'] / 2**20:.0f} MB")
+        return
+
+    baseline_run = baseline["runs"].get(str(num_events))
+    if baseline_run is None or baseline["settings"] != settings:
+        pytest.skip(f"No pipeline baseline for {num_events:,} events with the current generator settings "
+                    f"(store one with PIPELINE_BENCHMARK_UPDATE_BASELINE=1).")
+    print("\n" + _comparison_table(num_events, run, baseline_run))
+    assert run["events"] == baseline_run["events"]
+    if ASSERT_TIMINGS:
+        assert run["total_seconds"] <= TIME_TOLERANCE * baseline_run["total_seconds"]
+        assert run["peak_rss_bytes"] <= RSS_TOLERANCE * baseline_run["peak_rss_bytes"]
@@ -0,0 +1,93 @@
+# tests/benchmarks/test_streaming_ingestion_benchmark.py
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from datetime import date, timedelta
+from decimal import Decimal
+
+from tests.benchmarks import ASSERT_TIMINGS
+from tests.helpers.csv_creators import TRADES_FILE_HEADERS, create_csv_string, create_positions_csv_string
+
+# Set STREAMING_BENCHMARK_TRADE_ROWS=2000000 for the full-size comparison (takes several minutes per mode).
+NUM_TRADE_ROWS = int(os.environ.get("STREAMING_BENCHMARK_TRADE_ROWS", "10000"))
+NUM_SYMBOLS = 200
+ROWS_PER_WRITE = 10_000
+
+# Runs the parsing pipeline in a fresh interpreter so the peak RSS is that of one mode alone.
+# VmHWM is used where available: on Linux ru_maxrss survives fork+exec and would report the test runner's peak.
+_PARSE_SCRIPT = textwrap.dedent("""
+    import json, resource, sys, time
+    from src.classification.asset_classifier import AssetClassifier
+    from src.identification.asset_resolver import AssetResolver
+    from src.parsers.parsing_orchestrator import ParsingOrchestrator
+
+    def peak_rss_kb():
+        try:
+            with open("/proc/self/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    trades_file, empty_positions_file, cache_file, streaming = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4] == "1"
+    rss_before_kb = peak_rss_kb()
+    classifier = AssetClassifier(cache_file_path=cache_file)
+    orchestrator = ParsingOrchestrator(AssetResolver(asset_classifier=classifier), classifier,
+                                       interactive_classification=False, streaming_ingestion=streaming)
+    started = time.perf_counter()
+    events = orchestrator.run_parsing_pipeline(trades_file=trades_file, positions_start_file=empty_positions_file,
+                                               positions_end_file=empty_positions_file)
+    print(json.dumps({"events": len(events), "seconds": time.perf_counter() - started,
+                      "rss_before_kb": rss_before_kb,
+                      "peak_rss_kb": peak_rss_kb()}))
+""")
+
+
+def _write_trades_file(path: str, num_rows: int):
+    start = date(2015, 1, 2)
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        f.write(create_csv_string(TRADES_FILE_HEADERS, []))
+        rows = []
+        for i in range(num_rows):
+            symbol = f"SYM{i % NUM_SYMBOLS:04d}"
+            is_buy = (i // NUM_SYMBOLS) % 2 == 0
+            rows.append(["U_BENCH", "USD", "STK", "COMMON", symbol, f"{symbol} INC", f"US{i % NUM_SYMBOLS:010d}",
+                         None, None, None, (start + timedelta(days=i // 1000)).isoformat(),
+                         Decimal("10") if is_buy else Decimal("-10"), Decimal("100.25"), Decimal("-1.00"), "USD",
+                         "BUY" if is_buy else "SELL", f"T{i:09d}", None, None, f"C{i % NUM_SYMBOLS:06d}", None,
+                         Decimal("1"), "O" if is_buy else "C"])
+            if len(rows) == ROWS_PER_WRITE:
+                f.write(create_csv_string(TRADES_FILE_HEADERS, rows).split("\r\n", 1)[1])
+                rows = []
+        if rows:
+            f.write(create_csv_string(TRADES_FILE_HEADERS, rows).split("\r\n", 1)[1])
+
+
+def _run_mode(temp_data_dir: str, trades_file: str, positions_file: str, streaming: bool) -> dict:
+    cache_file = os.path.join(temp_data_dir, f"classifications_{int(streaming)}.json")
+    completed = subprocess.run([sys.executable, "-c", _PARSE_SCRIPT, trades_file, positions_file, cache_file, "1" if streaming else "0"],
+                               capture_output=True, text=True, check=True, cwd=os.getcwd())
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_streaming_ingestion_peak_rss(temp_data_dir):
+    trades_file = os.path.join(temp_data_dir, "trades_large.csv")
+    positions_file = os.path.join(temp_data_dir, "positions_empty.csv")
+    _write_trades_file(trades_file, NUM_TRADE_ROWS)
+    with open(positions_file, "w", encoding="utf-8-sig") as f:
+        f.write(create_positions_csv_string([]))
+
+    loaded = _run_mode(temp_data_dir, trades_file, positions_file, streaming=False)
+    streamed = _run_mode(temp_data_dir, trades_file, positions_file, streaming=True)
+
+    assert streamed["events"] == loaded["events"] == NUM_TRADE_ROWS
+    if ASSERT_TIMINGS:
+        assert streamed["peak_rss_kb"] < loaded["peak_rss_kb"]
+    print(f"\nParsing {NUM_TRADE_ROWS:,} trade rows ({os.path.getsize(trades_file) / 1e6:.0f} MB): "
+          f"loaded peak RSS {loaded['peak_rss_kb'] / 1024:.0f} MB in {loaded['seconds']:.1f}s, "
+          f"streamed peak RSS {streamed['peak_rss_kb'] / 1024:.0f} MB in {streamed['seconds']:.1f}s "
+          f"(interpreter baseline {loaded['rss_before_kb'] / 1024:.0f} MB)")
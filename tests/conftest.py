@@ -83,6 +83,7 @@ def mock_config_paths(temp_data_dir, monkeypatch):
         "corp_actions": data_path("corporate_actions.csv"),
         "classification_cache": cache_path("user_classifications.json"),
         "ecb_cache": cache_path("ecb_exchange_rates.json"),
+        "pipeline_snapshot": cache_path("pipeline.snapshot"),
         "temp_dir_root": temp_data_dir
     }
 
@@ -103,6 +104,7 @@ def mock_config_paths(temp_data_dir, monkeypatch):
             monkeypatch.setattr(config_module_obj, "CORPORATE_ACTIONS_FILE_PATH", paths_dict["corp_actions"])
             monkeypatch.setattr(config_module_obj, "CLASSIFICATION_CACHE_FILE_PATH", paths_dict["classification_cache"]) # Updated name
             monkeypatch.setattr(config_module_obj, "ECB_RATES_CACHE_FILE_PATH", paths_dict["ecb_cache"]) # Updated name
+            monkeypatch.setattr(config_module_obj, "PIPELINE_SNAPSHOT_FILE_PATH", paths_dict["pipeline_snapshot"])
             monkeypatch.setattr(config_module_obj, "IS_INTERACTIVE_CLASSIFICATION", False) # Updated name, ensure non-interactive
         else:
             # This might occur if tests are structured such that src.config isn't loaded when conftest runs,
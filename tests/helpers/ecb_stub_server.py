@@ -0,0 +1,125 @@
+# tests/helpers/ecb_stub_server.py
+import json
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# Path layout mirrors the ECB data API so the provider's URL template only needs a different host.
+STUB_URL_PATH_TEMPLATE = "/service/data/EXR/D.{currency_code}.EUR.SP00.A?startPeriod={start_date_str}&endPeriod={end_date_str}&format=jsondata"
+
+
+def stub_rate_for(currency_code: str, day: date) -> Optional[Decimal]:
+    """
+    Deterministic canned rate (foreign units per 1 EUR) for business days; None on weekends.
+    The rate encodes the day of year so tests can tell which day a fallback resolved to.
+    """
+    if day.weekday() >= 5:
+        return None
+    base = {"USD": Decimal("1.1"), "GBP": Decimal("0.85"), "CHF": Decimal("0.95"), "JPY": Decimal("150")}.get(currency_code, Decimal("2"))
+    return base + Decimal(day.timetuple().tm_yday) / Decimal("10000")
+
+
+def build_sdmx_json(currency_code: str, start: date, end: date) -> Optional[dict]:
+    """Builds a minimal SDMX-JSON payload shaped like the ECB API response, or None if there are no observations."""
+    time_periods: List[str] = []
+    observations: Dict[str, List[float]] = {}
+    current = start
+    while current <= end:
+        rate = stub_rate_for(currency_code, current)
+        if rate is not None:
+            observations[str(len(time_periods))] = [float(rate)]
+            time_periods.append(current.isoformat())
+        current += timedelta(days=1)
+    if not time_periods:
+        return None
+    return {
+        "dataSets": [{"series": {"0:0:0:0:0": {"observations": observations}}}],
+        "structure": {"dimensions": {"observation": [
+            {"id": "TIME_PERIOD", "values": [{"id": tp} for tp in time_periods]}
+        ]}},
+    }
+
+
+class EcbStubServer:
+    """
+    Local HTTP server serving canned ECB SDMX-JSON responses.
+    Records every request as (currency_code, start_date, end_date) and can add artificial latency.
+    The first `fail_first_requests` requests are answered with 503 (to exercise retries).
+    Speaks HTTP/1.1 so clients can reuse connections; `max_concurrent_requests` records the peak
+    number of requests handled at the same time.
+    Use as a context manager; `url_template` is suitable for ECBExchangeRateProvider's api_url_template_override.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, fail_first_requests: int = 0):
+        self.latency_seconds = latency_seconds
+        self.fail_first_requests = fail_first_requests
+        self.requests: List[Tuple[str, date, date]] = []
+        self.failed_request_count = 0
+        self.max_concurrent_requests = 0
+        self._active_requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True # Headers and body are separate writes on a kept-alive connection
+
+            def _send_empty(self, status: int):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                currency_code = parsed.path.rsplit("/", 1)[-1].split(".")[1]
+                start = date.fromisoformat(query["startPeriod"][0])
+                end = date.fromisoformat(query["endPeriod"][0])
+                with stub._lock:
+                    if stub.failed_request_count < stub.fail_first_requests:
+                        stub.failed_request_count += 1
+                        self._send_empty(503)
+                        return
+                    stub.requests.append((currency_code, start, end))
+                    stub._active_requests += 1
+                    stub.max_concurrent_requests = max(stub.max_concurrent_requests, stub._active_requests)
+                try:
+                    if stub.latency_seconds:
+                        time.sleep(stub.latency_seconds)
+                finally:
+                    with stub._lock:
+                        stub._active_requests -= 1
+                payload = build_sdmx_json(currency_code, start, end)
+                if payload is None:
+                    self._send_empty(404)
+                    return
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def url_template(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{STUB_URL_PATH_TEMPLATE}"
+
+    def __enter__(self) -> "EcbStubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
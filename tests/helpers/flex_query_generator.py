@@ -0,0 +1,254 @@
+# tests/helpers/flex_query_generator.py
+import csv
+import math
+import os
+import random
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from tests.helpers.csv_creators import (
+    TRADES_FILE_HEADERS, POSITIONS_FILE_HEADERS, CASH_TRANSACTIONS_HEADERS, CORPORATE_ACTIONS_HEADERS
+)
+
+ACCOUNT_ID = "U_SYNTHETIC"
+OPTION_MULTIPLIER = 100
+# Regular trades use even day offsets into the year, everything else odd ones: no same-day ordering questions
+MAX_TRADES_PER_YEAR = 180
+DAYS_OPTION_HELD = 60
+FIRST_OPTION_EXPIRY_OFFSET = 91
+OPTION_CHAIN_KINDS = ("exercise", "assignment", "expiry")
+# Trade rows per option chain kind: opening trade, lifecycle trade and, for exercises/assignments, the stock delivery
+_OPTION_CHAIN_ROWS = {"exercise": 3, "assignment": 3, "expiry": 2}
+# (currency, ISIN country, name suffix, withholding tax rate)
+_MARKETS = (("USD", "US", "INC", Decimal("0.15")), ("EUR", "DE", "AG", Decimal("0.26375")))
+_CENT = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class FlexQuerySettings:
+    """Shape of a synthetic IBKR Flex Query export. The same settings (and seed) always produce the same files."""
+    seed: int = 0
+    tax_year: int = 2023
+    num_stocks: int = 20
+    trades_per_year: int = 12
+    history_years: int = 2 # Years of trades before the tax year (start-of-year positions follow from them)
+    option_chains_per_stock: int = 1 # Option positions opened and exercised, assigned or expired in the tax year
+    dividends_per_year: int = 4 # Each with a withholding tax line
+    split_probability: float = 0.05 # Share of stocks with a 2-for-1 split in the tax year
+    eur_stock_share: float = 0.3 # Share of EUR (DE) stocks, the rest are USD (US)
+
+    def __post_init__(self):
+        if not 1 <= self.trades_per_year <= MAX_TRADES_PER_YEAR:
+            raise ValueError(f"trades_per_year must be between 1 and {MAX_TRADES_PER_YEAR}, got {self.trades_per_year}.")
+        if self.num_stocks < 1 or self.history_years < 0 or self.option_chains_per_stock < 0 or self.dividends_per_year < 0:
+            raise ValueError(f"Invalid synthetic Flex Query settings: {self}.")
+        if FIRST_OPTION_EXPIRY_OFFSET + 2 * self.option_chains_per_stock > 2 * MAX_TRADES_PER_YEAR:
+            raise ValueError(f"Too many option chains per stock: {self.option_chains_per_stock}.")
+
+    def events_per_stock(self) -> float:
+        """Expected number of financial events (trade, cash transaction and corporate action rows) per stock."""
+        option_rows = sum(_OPTION_CHAIN_ROWS.values()) / len(_OPTION_CHAIN_ROWS)
+        return ((self.history_years + 1) * self.trades_per_year + self.option_chains_per_stock * option_rows
+                + 2 * self.dividends_per_year + self.split_probability)
+
+    def with_event_count(self, num_events: int) -> "FlexQuerySettings":
+        """These settings with the number of stocks scaled to produce about num_events events."""
+        return replace(self, num_stocks=max(1, round(num_events / self.events_per_stock())))
+
+
+@dataclass
+class SyntheticFlexQuery:
+    settings: FlexQuerySettings
+    file_paths: Dict[str, str] # Keys as for the pipeline's input files (trades, cash_transactions, ...)
+    row_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def num_events(self) -> int:
+        return self.row_counts["trades"] + self.row_counts["cash_transactions"] + self.row_counts["corporate_actions"]
+
+    def pipeline_file_arguments(self) -> Dict[str, str]:
+        """File path keyword arguments for run_core_processing_pipeline."""
+        return {
+            "trades_file_path": self.file_paths["trades"],
+            "cash_transactions_file_path": self.file_paths["cash_transactions"],
+            "positions_start_file_path": self.file_paths["positions_start"],
+            "positions_end_file_path": self.file_paths["positions_end"],
+            "corporate_actions_file_path": self.file_paths["corporate_actions"],
+        }
+
+
+class _StockSimulator:
+    """Generates the rows of one stock chronologically, tracking its position, price and average cost."""
+
+    def __init__(self, index: int, settings: FlexQuerySettings, rng: random.Random, ids: Dict[str, int]):
+        self.settings = settings
+        self.rng = rng
+        self.ids = ids
+        self.currency, country, suffix, self.wht_rate = _MARKETS[1] if rng.random() < settings.eur_stock_share else _MARKETS[0]
+        self.country = country
+        self.symbol = f"S{index:06d}"
+        self.name = f"{self.symbol} {suffix}"
+        self.isin = f"{country}{index:010d}"
+        self.conid = str(100000 + index)
+        self.price = Decimal(str(round(rng.uniform(10, 500), 2)))
+        self.position = 0
+        self.total_cost = Decimal(0)
+        self.trades: List[List[Any]] = []
+        self.cash_transactions: List[List[Any]] = []
+        self.corporate_actions: List[List[Any]] = []
+        self.soy_position: Optional[List[Any]] = None
+        self.eoy_position: Optional[List[Any]] = None
+
+    def _next_id(self, prefix: str) -> str:
+        self.ids[prefix] += 1
+        return f"{prefix}{self.ids[prefix]:09d}"
+
+    def _move_price(self):
+        self.price = max(Decimal("1.00"), (self.price * Decimal(str(math.exp(self.rng.gauss(0, 0.03))))).quantize(_CENT))
+
+    def _stock_trade(self, trade_date: date, quantity: int, price: Decimal, notes: Optional[str] = None):
+        is_buy = quantity > 0
+        if is_buy:
+            self.total_cost += quantity * price
+        else:
+            self.total_cost -= self.total_cost * Decimal(-quantity) / Decimal(self.position)
+        self.position += quantity
+        self.trades.append([ACCOUNT_ID, self.currency, "STK", "COMMON", self.symbol, self.name, self.isin, None, None, None,
+                            trade_date.isoformat(), Decimal(quantity), price, Decimal("-1.00"), self.currency,
+                            "BUY" if is_buy else "SELL", self._next_id("T"), notes, None, self.conid, None, Decimal("1"),
+                            "O" if is_buy else "C"])
+
+    def _regular_trade(self, trade_date: date):
+        self._move_price()
+        if self.position <= 20 or self.rng.random() < 0.6:
+            quantity = 10 * self.rng.randint(1, 10)
+        else:
+            quantity = -10 * self.rng.randint(1, (self.position - 10) // 10)
+        self._stock_trade(trade_date, quantity, self.price)
+
+    def _position_row(self) -> Optional[List[Any]]:
+        if self.position == 0:
+            return None
+        return [ACCOUNT_ID, self.currency, "STK", "COMMON", self.symbol, self.name, self.isin, Decimal(self.position),
+                (self.position * self.price).quantize(_CENT), self.price, self.total_cost.quantize(_CENT), None, self.conid,
+                None, Decimal("1")]
+
+    def _option_rows(self, kind: str, expiry: date) -> List[List[Any]]:
+        put_call = "C" if kind == "exercise" else "P"
+        strike = max(1, int(self.price))
+        symbol = f"{self.symbol} {expiry:%y%m%d}{put_call}{strike * 1000:08d}"
+        description = f"{self.symbol} {expiry:%d%b%y}".upper() + f" {strike} {put_call}"
+        conid = self._next_id("")
+        premium = Decimal(str(round(self.rng.uniform(0.5, 0.05 * strike + 1), 2)))
+
+        def row(trade_date: date, quantity: int, price: Decimal, notes: Optional[str], open_close: str) -> List[Any]:
+            return [ACCOUNT_ID, self.currency, "OPT", put_call, symbol, description, None, Decimal(strike), expiry.isoformat(),
+                    put_call, trade_date.isoformat(), Decimal(quantity), price, Decimal("-0.70"), self.currency,
+                    "BUY" if quantity > 0 else "SELL", self._next_id("T"), notes, self.symbol, conid, self.conid,
+                    Decimal(OPTION_MULTIPLIER), open_close]
+
+        opened = expiry - timedelta(days=DAYS_OPTION_HELD)
+        if kind == "exercise": # Long call, exercised: the shares are bought at the strike
+            return [row(opened, 1, premium, None, "O"), row(expiry, -1, Decimal("0"), "Ex", "C")]
+        if kind == "assignment": # Short put, assigned: the shares are bought at the strike
+            return [row(opened, -1, premium, None, "O"), row(expiry, 1, Decimal("0"), "A", "C")]
+        return [row(opened, 1, premium, None, "O"), row(expiry, -1, Decimal("0"), "Ep", "C")] # Long put, expired worthless
+
+    def _dividend(self, pay_date: date):
+        if self.position == 0:
+            return
+        per_share = Decimal(self.rng.randint(10, 100)) / 100
+        amount = (self.position * per_share).quantize(_CENT)
+        description = f"{self.symbol}({self.isin}) CASH DIVIDEND {self.currency} {per_share} PER SHARE"
+        self.cash_transactions.append([ACCOUNT_ID, self.currency, "STK", "COMMON", self.symbol, description, pay_date.isoformat(),
+                                       amount, "Dividends", self.conid, None, self.isin, self.country, self._next_id("D")])
+        self.cash_transactions.append([ACCOUNT_ID, self.currency, "STK", "COMMON", self.symbol, f"{description} - {self.country} TAX",
+                                       pay_date.isoformat(), -(amount * self.wht_rate).quantize(_CENT), "Withholding Tax",
+                                       self.conid, None, self.isin, self.country, self._next_id("D")])
+
+    def _split(self, split_date: date):
+        if self.position == 0:
+            return
+        self.corporate_actions.append([ACCOUNT_ID, self.symbol, f"{self.symbol}({self.isin}) SPLIT 2 FOR 1 ({self.symbol}, {self.name}, {self.isin})",
+                                       self.isin, split_date.strftime("%Y%m%d"), "", "FS", self._next_id("A"), self.conid, "", "",
+                                       self.currency, "0", "0", "0", str(self.position)])
+        self.position *= 2
+        self.price = max(Decimal("1.00"), (self.price / 2).quantize(_CENT))
+
+    def simulate(self):
+        settings = self.settings
+        first_year = settings.tax_year - settings.history_years
+        for year in range(first_year, settings.tax_year):
+            for offset in _spread_offsets(settings.trades_per_year, even=True):
+                self._regular_trade(date(year, 1, 2) + timedelta(days=offset))
+        self.soy_position = self._position_row()
+
+        year_start = date(settings.tax_year, 1, 2)
+        timeline = [(offset, 0, "trade") for offset in _spread_offsets(settings.trades_per_year, even=True)]
+        timeline += [(offset, 1, "dividend") for offset in _spread_offsets(settings.dividends_per_year, even=False)]
+        split_offset = MAX_TRADES_PER_YEAR + 1
+        if self.rng.random() < settings.split_probability:
+            timeline.append((split_offset, 2, "split"))
+        expiry_offsets = _spread_offsets(settings.option_chains_per_stock, even=False, start=FIRST_OPTION_EXPIRY_OFFSET)
+        timeline += [(offset + 2 if offset == split_offset else offset, 3, "option") for offset in expiry_offsets]
+        for offset, _, kind in sorted(timeline):
+            event_date = year_start + timedelta(days=offset)
+            if kind == "trade":
+                self._regular_trade(event_date)
+            elif kind == "dividend":
+                self._dividend(event_date)
+            elif kind == "split":
+                self._split(event_date)
+            else:
+                chain_kind = self.rng.choice(OPTION_CHAIN_KINDS)
+                option_rows = self._option_rows(chain_kind, event_date)
+                self.trades.extend(option_rows)
+                if chain_kind != "expiry":
+                    self._stock_trade(event_date, OPTION_MULTIPLIER, option_rows[0][7], notes=option_rows[1][17])
+        self.eoy_position = self._position_row()
+
+
+def _spread_offsets(count: int, even: bool, start: int = 0) -> List[int]:
+    """count distinct day offsets into the year (0..360), evenly spread from start, all even or all odd."""
+    slots = (2 * MAX_TRADES_PER_YEAR - start) // 2
+    return [start + 2 * (k * slots // count) + (0 if even == (start % 2 == 0) else 1) for k in range(count)]
+
+
+def _write_rows(writer, rows: List[List[Any]]):
+    writer.writerows(["" if item is None else str(item) for item in row] for row in rows)
+
+
+def generate_flex_query(directory: str, settings: FlexQuerySettings) -> SyntheticFlexQuery:
+    """
+    Writes trades, cash transactions, start/end-of-year positions and corporate actions CSV files
+    for settings into directory. Rows are grouped by stock, like in IBKR exports.
+    """
+    headers = {
+        "trades": TRADES_FILE_HEADERS, "cash_transactions": CASH_TRANSACTIONS_HEADERS,
+        "positions_start": POSITIONS_FILE_HEADERS, "positions_end": POSITIONS_FILE_HEADERS,
+        "corporate_actions": CORPORATE_ACTIONS_HEADERS,
+    }
+    result = SyntheticFlexQuery(settings, {name: os.path.join(directory, f"{name}.csv") for name in headers},
+                                {name: 0 for name in headers})
+    rng = random.Random(settings.seed)
+    ids = {"T": 0, "D": 0, "A": 0, "": 5_000_000}
+    files = {name: open(path, "w", encoding="utf-8-sig", newline="") for name, path in result.file_paths.items()}
+    try:
+        writers = {name: csv.writer(f) for name, f in files.items()}
+        for name, writer in writers.items():
+            writer.writerow(headers[name])
+        for index in range(settings.num_stocks):
+            stock = _StockSimulator(index, settings, rng, ids)
+            stock.simulate()
+            for name, rows in (("trades", stock.trades), ("cash_transactions", stock.cash_transactions),
+                               ("corporate_actions", stock.corporate_actions),
+                               ("positions_start", [stock.soy_position] if stock.soy_position else []),
+                               ("positions_end", [stock.eoy_position] if stock.eoy_position else [])):
+                _write_rows(writers[name], rows)
+                result.row_counts[name] += len(rows)
+    finally:
+        for f in files.values():
+            f.close()
+    return result
@@ -0,0 +1,21 @@
+# tests/helpers/record_decoding.py
+from typing import Any, Dict, List
+
+from src.parsers.cash_transactions_parser import parse_cash_transactions_csv
+from src.parsers.trades_parser import parse_trades_csv
+
+
+def record_fields(record: Any) -> Dict[str, str]:
+    """Field values by name, compared via repr so Decimal('1.0') != Decimal('1') and NaN equals NaN."""
+    return {name: repr(value) for name, value in record.dict().items()}
+
+
+def decoded_with_both_decoders(parse_func, file_path: str) -> List[List[Dict[str, str]]]:
+    return [[record_fields(r) for r in parse_func(file_path, fast_decoding=fast)] for fast in (False, True)]
+
+
+def assert_fast_row_decoding_matches_reference(trades_file: str, cash_transactions_file: str):
+    """The pydantic raw models are the reference: the fast row decoder must produce identical records."""
+    for parse_func, file_path in ((parse_trades_csv, trades_file), (parse_cash_transactions_csv, cash_transactions_file)):
+        reference, fast = decoded_with_both_decoders(parse_func, file_path)
+        assert fast == reference, f"Fast row decoding of {file_path} differs from the pydantic raw models"
@@ -0,0 +1,66 @@
+# tests/test_asset_resolver_indexes.py
+from src.classification.asset_classifier import AssetClassifier
+from src.domain.enums import AssetCategory, InvestmentFundType
+from src.identification.asset_resolver import AssetResolver
+
+
+def _resolver(mock_config_paths) -> AssetResolver:
+    return AssetResolver(AssetClassifier(cache_file_path=mock_config_paths["classification_cache"]))
+
+
+def _assert_indexes_match_assets(resolver: AssetResolver):
+    assets = list(resolver.assets_by_internal_id.values())
+    for category in AssetCategory:
+        assert resolver.get_assets_by_category(category) == [a for a in assets if a.asset_category == category]
+    for asset in assets:
+        assert resolver.get_assets_by_symbol(asset.ibkr_symbol) == [a for a in assets if a.ibkr_symbol == asset.ibkr_symbol]
+        assert resolver.get_asset_by_isin(asset.ibkr_isin) is asset
+    indexed = [a for by_symbol in resolver.assets_by_symbol.values() for a in by_symbol.values()]
+    assert all(resolver.get_asset_by_id(a.internal_asset_id) is a for a in indexed)
+
+
+def test_indexes_follow_merges_and_type_replacements(mock_config_paths):
+    resolver = _resolver(mock_config_paths)
+    by_isin = resolver.get_or_create_asset("US0000000AAA", None, None, "USD", "STK", "AAA INC")
+    by_conid = resolver.get_or_create_asset(None, "1001", "AAA", "USD", "STK", "AAA INC")
+    resolver.get_or_create_asset("IE00000FUND1", "2002", "FND", "EUR", "STK", "SOME FUND")
+    assert len(resolver.get_assets_by_category(AssetCategory.STOCK)) == 3
+
+    merged = resolver.get_or_create_asset("US0000000AAA", "1001", "AAA", "USD", "STK", "AAA INC")
+    assert {by_isin.internal_asset_id, by_conid.internal_asset_id} >= {merged.internal_asset_id}
+    assert len(resolver.assets_by_internal_id) == 2
+    assert resolver.get_assets_by_symbol("aaa") == [merged]
+    _assert_indexes_match_assets(resolver)
+
+    fund = resolver.get_asset_by_isin("IE00000FUND1")
+    replaced = resolver.replace_asset_type(fund.internal_asset_id, AssetCategory.INVESTMENT_FUND, InvestmentFundType.AKTIENFONDS, "")
+    assert resolver.get_assets_by_category(AssetCategory.INVESTMENT_FUND) == [replaced]
+    assert resolver.get_asset_by_isin("IE00000FUND1") is replaced
+    assert resolver.get_assets_by_symbol("FND")[0] is replaced
+    _assert_indexes_match_assets(resolver)
+
+    merged.asset_category = AssetCategory.PRIVATE_SALE_ASSET
+    resolver.reindex_asset(merged)
+    assert resolver.get_assets_by_category(AssetCategory.STOCK) == []
+    _assert_indexes_match_assets(resolver)
+
+
+def test_isin_lookup_falls_back_to_the_next_asset_with_that_isin(mock_config_paths):
+    resolver = _resolver(mock_config_paths)
+    first = resolver.get_or_create_asset("US0000000AAA", None, None, "USD", "STK", "AAA INC")
+    second = resolver.get_or_create_asset(None, "1001", "AAA", "USD", "STK", "AAA INC")
+    second.ibkr_isin = "US0000000AAA"
+    resolver.reindex_asset(second)
+    assert resolver.get_asset_by_isin("US0000000AAA") is first
+
+    merged = resolver.get_or_create_asset("US0000000AAA", "1001", "AAA", "USD", "STK", "AAA INC")
+    assert merged is second # The first asset lost the merge
+    assert resolver.get_asset_by_isin("US0000000AAA") is second
+
+    third = resolver.get_or_create_asset(None, "1002", "AAB", "USD", "STK", "AAB INC")
+    third.ibkr_isin = "US0000000AAA"
+    resolver.reindex_asset(third)
+    second.ibkr_isin = "US0000000AAB"
+    resolver.reindex_asset(second)
+    assert resolver.get_asset_by_isin("US0000000AAA") is third
+    assert resolver.get_asset_by_isin("US0000000AAB") is second
@@ -0,0 +1,109 @@
+# tests/test_currency_converter.py
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+
+import pytest
+
+from src.utils.currency_converter import CurrencyConverter, LruResolvedRateMemo, ResolvedRateMemo
+from src.utils.exchange_rate_provider import ExchangeRateProvider
+
+
+class CountingRateProvider(ExchangeRateProvider):
+    """Returns fixed rates and records every get_rate call."""
+    def __init__(self, rates: Dict[str, Optional[Decimal]]):
+        self.rates = rates
+        self.calls: List[Tuple[date, str]] = []
+
+    def get_rate(self, date_of_conversion: date, currency_code: str) -> Optional[Decimal]:
+        self.calls.append((date_of_conversion, currency_code))
+        return self.rates.get(currency_code)
+
+    def prefetch_rates(self, start_date: date, end_date: date, currencies: Set[str]):
+        pass
+
+    def get_currency_code_mapping(self) -> Dict[str, str]:
+        return {"CNH": "CNY"}
+
+    def get_max_fallback_days(self) -> int:
+        return 7
+
+
+def test_same_date_and_currency_is_resolved_once():
+    provider = CountingRateProvider({"USD": Decimal("2")})
+    converter = CurrencyConverter(provider)
+
+    assert converter.convert_to_eur(Decimal("10"), "USD", date(2023, 5, 2)) == Decimal("5")
+    assert converter.convert_to_eur(Decimal("3"), "usd", date(2023, 5, 2)) == Decimal("1.5")
+    assert converter.convert_to_eur(Decimal("4"), "USD", date(2023, 5, 3)) == Decimal("2")
+
+    assert provider.calls == [(date(2023, 5, 2), "USD"), (date(2023, 5, 3), "USD")]
+    assert (converter.rate_memo.hits, converter.rate_memo.misses) == (1, 2)
+
+
+def test_memo_is_keyed_by_effective_currency():
+    provider = CountingRateProvider({"CNH": Decimal("8"), "CNY": Decimal("8")})
+    converter = CurrencyConverter(provider)
+
+    converter.convert_to_eur(Decimal("8"), "CNH", date(2023, 5, 2))
+    converter.convert_to_eur(Decimal("16"), "CNY", date(2023, 5, 2))
+
+    assert len(provider.calls) == 1
+    assert converter.rate_memo.hits == 1
+
+
+def test_failed_lookups_are_memoized():
+    provider = CountingRateProvider({})
+    converter = CurrencyConverter(provider)
+
+    assert converter.convert_to_eur(Decimal("1"), "XYZ", date(2023, 5, 2)) is None
+    assert converter.convert_to_eur(Decimal("2"), "XYZ", date(2023, 5, 2)) is None
+    assert len(provider.calls) == 1
+
+
+def test_eur_and_zero_amounts_bypass_the_memo():
+    provider = CountingRateProvider({"USD": Decimal("2")})
+    converter = CurrencyConverter(provider)
+
+    assert converter.convert_to_eur(Decimal("7"), "EUR", date(2023, 5, 2)) == Decimal("7")
+    assert converter.convert_to_eur(Decimal("0"), "USD", date(2023, 5, 2)) == Decimal("0.00")
+    assert provider.calls == []
+    assert (converter.rate_memo.hits, converter.rate_memo.misses) == (0, 0)
+
+
+def test_lru_memo_evicts_least_recently_used_entry():
+    provider = CountingRateProvider({"USD": Decimal("2")})
+    memo = LruResolvedRateMemo(max_entries=2)
+    converter = CurrencyConverter(provider, rate_memo=memo)
+
+    day1, day2, day3 = date(2023, 5, 1), date(2023, 5, 2), date(2023, 5, 3)
+    for day in (day1, day2, day1, day3, day1, day2):
+        converter.convert_to_eur(Decimal("1"), "USD", day)
+
+    # day2 was evicted by day3 (day1 had been used more recently) and had to be fetched again.
+    assert provider.calls == [(day1, "USD"), (day2, "USD"), (day3, "USD"), (day2, "USD")]
+    assert len(memo) == 2
+    assert memo.evictions == 2
+    assert (memo.hits, memo.misses) == (2, 4)
+
+
+def test_lru_memo_requires_positive_size():
+    with pytest.raises(ValueError):
+        LruResolvedRateMemo(max_entries=0)
+
+
+def test_default_memo_is_unbounded():
+    converter = CurrencyConverter(CountingRateProvider({"USD": Decimal("2")}))
+    assert type(converter.rate_memo) is ResolvedRateMemo
+
+
+def test_preloaded_columns_are_served_from_the_memo():
+    provider = CountingRateProvider({"USD": Decimal("2"), "CNH": Decimal("8")})
+    converter = CurrencyConverter(provider)
+    converter.preload_rates({"USD": {date(2023, 5, 3), date(2023, 5, 2)}, "CNH": {date(2023, 5, 2)}, "EUR": {date(2023, 5, 2)}})
+    assert sorted(provider.calls) == [(date(2023, 5, 2), "CNH"), (date(2023, 5, 2), "USD"), (date(2023, 5, 3), "USD")]
+
+    assert converter.convert_to_eur(Decimal("10"), "USD", date(2023, 5, 3)) == Decimal("5")
+    assert converter.convert_to_eur(Decimal("16"), "CNY", date(2023, 5, 2)) == Decimal("2")
+    assert len(provider.calls) == 3
+    assert (converter.rate_memo.hits, converter.rate_memo.misses) == (2, 0)
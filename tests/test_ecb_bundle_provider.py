@@ -0,0 +1,93 @@
+# tests/test_ecb_bundle_provider.py
+import os
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.utils.ecb_bundle_provider import ECBHistoricalBundleProvider
+
+# Same layout as the ECB's eurofxref-hist.csv: newest day first, N/A gaps, trailing empty column.
+BUNDLE_CSV = """Date,USD,JPY,CNY,CYP,
+2023-01-09,1.0739,141.19,7.2903,N/A,
+2023-01-06,1.0500,140.09,7.2640,N/A,
+2023-01-05,1.0589,140.52,N/A,N/A,
+2023-01-04,1.0622,140.85,7.2973,N/A,
+2007-12-31,1.4721,163.67,10.7524,0.585274,
+"""
+
+
+@pytest.fixture
+def bundle_csv_path(temp_data_dir):
+    path = os.path.join(temp_data_dir, "eurofxref-hist.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(BUNDLE_CSV)
+    return path
+
+
+@pytest.fixture
+def bundle_zip_path(temp_data_dir):
+    path = os.path.join(temp_data_dir, "eurofxref-hist.zip")
+    with zipfile.ZipFile(path, "w") as bundle_zip:
+        bundle_zip.writestr("eurofxref-hist.csv", BUNDLE_CSV)
+    return path
+
+
+def test_rates_and_weekend_fallback(bundle_csv_path):
+    provider = ECBHistoricalBundleProvider(bundle_csv_path, max_fallback_days_override=7)
+
+    assert provider.get_rate(date(2023, 1, 9), "USD") == Decimal("1.0739")
+    assert provider.get_rate(date(2023, 1, 8), "USD") == Decimal("1.0500") # Sunday -> Friday
+    assert provider.get_rate(date(2023, 1, 5), "cny") == Decimal("7.2973") # N/A -> previous day
+    assert provider.get_rate(date(2023, 1, 9), "EUR") == Decimal("1.0")
+
+
+def test_gap_beyond_fallback_days_and_dates_outside_bundle(bundle_csv_path):
+    provider = ECBHistoricalBundleProvider(bundle_csv_path, max_fallback_days_override=7)
+
+    assert provider.get_rate(date(2008, 1, 7), "USD") == Decimal("1.4721")
+    assert provider.get_rate(date(2008, 1, 8), "USD") is None
+    assert provider.get_rate(date(2023, 1, 10), "USD") is None
+    assert provider.get_rate(date(2023, 1, 9), "CYP") is None
+    assert provider.get_rate(date(2023, 1, 9), "XXX") is None
+
+
+def test_currency_mapping_and_fallback_days_are_honoured(bundle_csv_path):
+    provider = ECBHistoricalBundleProvider(bundle_csv_path, max_fallback_days_override=1,
+                                           currency_code_mapping_override={"CNH": "CNY"})
+
+    assert provider.get_rate(date(2023, 1, 9), "CNH") == Decimal("7.2903")
+    assert provider.get_rate(date(2023, 1, 8), "USD") is None # Two days back from Friday
+    assert provider.get_currency_code_mapping() == {"CNH": "CNY"}
+    assert provider.get_max_fallback_days() == 1
+
+
+def test_zip_bundle_matches_csv_bundle(bundle_csv_path, bundle_zip_path):
+    from_csv = ECBHistoricalBundleProvider(bundle_csv_path)
+    from_zip = ECBHistoricalBundleProvider(bundle_zip_path)
+
+    assert list(from_zip.columns.day_ordinals) == list(from_csv.columns.day_ordinals)
+    assert from_zip.columns.rates_by_currency == from_csv.columns.rates_by_currency
+
+
+def test_snapshot_is_reused_until_bundle_changes(bundle_csv_path, temp_data_dir):
+    snapshot_path = os.path.join(temp_data_dir, "cache", "ecb_hist.snapshot")
+    first = ECBHistoricalBundleProvider(bundle_csv_path, snapshot_file_path=snapshot_path)
+    assert not first.loaded_from_snapshot
+    assert os.path.exists(snapshot_path)
+
+    second = ECBHistoricalBundleProvider(bundle_csv_path, snapshot_file_path=snapshot_path)
+    assert second.loaded_from_snapshot
+    assert second.get_rate(date(2023, 1, 8), "JPY") == first.get_rate(date(2023, 1, 8), "JPY")
+
+    with open(bundle_csv_path, "a", encoding="utf-8") as f:
+        f.write("2007-12-28,1.4700,165.00,10.7000,0.585274,\n")
+    third = ECBHistoricalBundleProvider(bundle_csv_path, snapshot_file_path=snapshot_path)
+    assert not third.loaded_from_snapshot
+    assert third.get_rate(date(2007, 12, 28), "USD") == Decimal("1.4700")
+
+
+def test_missing_bundle_raises(temp_data_dir):
+    with pytest.raises(FileNotFoundError):
+        ECBHistoricalBundleProvider(os.path.join(temp_data_dir, "missing.zip"))
@@ -0,0 +1,76 @@
+# tests/test_event_sort_keys.py
+import os
+import uuid
+from decimal import Decimal
+
+import pytest
+
+import src.utils.sorting_utils as sorting_utils
+from src.classification.asset_classifier import AssetClassifier
+from src.domain.assets import Stock
+from src.domain.enums import FinancialEventType
+from src.domain.events import CashFlowEvent, TradeEvent
+from src.identification.asset_resolver import AssetResolver
+from src.parsers.parsing_orchestrator import ParsingOrchestrator
+
+
+@pytest.fixture
+def orchestrator(temp_data_dir):
+    classifier = AssetClassifier(cache_file_path=os.path.join(temp_data_dir, "classification_cache.json"))
+    resolver = AssetResolver(asset_classifier=classifier)
+    stock = Stock(ibkr_symbol="ABC", currency="USD")
+    resolver.assets_by_internal_id[stock.internal_asset_id] = stock
+    orchestrator = ParsingOrchestrator(resolver, classifier, interactive_classification=False)
+    orchestrator.stock_id = stock.internal_asset_id
+    return orchestrator
+
+
+def _trade(asset_id: uuid.UUID, event_date: str, tx_id: str, event_id: uuid.UUID = None) -> TradeEvent:
+    return TradeEvent(asset_id, event_date, quantity=Decimal("1"), price_foreign_currency=Decimal("10"),
+                      event_type=FinancialEventType.TRADE_BUY_LONG, local_currency="USD",
+                      ibkr_transaction_id=tx_id, event_id=event_id or uuid.uuid4())
+
+
+def test_sort_keys_are_computed_once_per_event_and_reused(orchestrator, monkeypatch):
+    asset_id = orchestrator.stock_id
+    dividend = CashFlowEvent(asset_id, "2023-03-01", event_type=FinancialEventType.DIVIDEND_CASH,
+                             gross_amount_foreign_currency=Decimal("1"), local_currency="USD", ibkr_transaction_id="D1")
+    orchestrator.domain_financial_events = [_trade(asset_id, "2023-05-02", "T3"), dividend,
+                                            _trade(asset_id, "2023-03-01", "T2"), _trade(asset_id, "2022-11-30", "T1")]
+
+    calls = []
+    original = sorting_utils.get_event_sort_key
+    monkeypatch.setattr(sorting_utils, "get_event_sort_key", lambda ev, resolver: calls.append(ev) or original(ev, resolver))
+
+    events = orchestrator.get_all_financial_events()
+    assert [ev.ibkr_transaction_id for ev in events] == ["T1", "T2", "D1", "T3"] # Trades before cash on the same day
+    assert len(calls) == len(events)
+
+    for event in events:
+        assert sorting_utils.get_cached_event_sort_key(event, orchestrator.asset_resolver) == original(event, orchestrator.asset_resolver)
+    assert len(calls) == len(events)
+
+    events[0].event_date = "2022-12-01" # A changed date invalidates the cached key
+    assert events[0].cached_sort_key is None
+    assert sorting_utils.get_cached_event_sort_key(events[0], orchestrator.asset_resolver)[0].isoformat() == "2022-12-01"
+
+
+def test_duplicate_sort_keys_are_reported(orchestrator, caplog):
+    asset_id = orchestrator.stock_id
+    shared_id = uuid.uuid4()
+    orchestrator.domain_financial_events = [_trade(asset_id, "2023-05-02", "T1", shared_id),
+                                            _trade(asset_id, "2023-05-02", "T2"),
+                                            _trade(asset_id, "2023-05-02", "T1", shared_id),
+                                            _trade(asset_id, "2023-05-02", "T1", shared_id)]
+
+    with pytest.raises(ValueError, match="^2 critical sorting key issues found"):
+        orchestrator.get_all_financial_events()
+    duplicate_reports = [r.getMessage() for r in caplog.records if "Duplicate sort key detected" in r.getMessage()]
+    assert len(duplicate_reports) == 1
+    assert duplicate_reports[0].count("TxID: T1") == 3
+
+
+def test_unknown_asset_aborts_sorting(orchestrator):
+    orchestrator.domain_financial_events = [_trade(uuid.uuid4(), "2023-05-02", "T1")]
+    with pytest.raises(ValueError, match="references unknown asset"):
+        orchestrator.get_all_financial_events()
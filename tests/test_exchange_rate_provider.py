@@ -0,0 +1,335 @@
+# tests/test_exchange_rate_provider.py
+import gc
+import json
+import os
+import random
+import time
+import weakref
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.utils import exchange_rate_provider
+from src.utils.exchange_rate_provider import NO_OBSERVATION_MARKER, DenseRateTable, ECBExchangeRateProvider
+from tests.benchmarks import ASSERT_TIMINGS
+from tests.helpers.ecb_stub_server import EcbStubServer, stub_rate_for
+
+
+def _expected_rate(currency_code: str, day: date) -> Decimal:
+    # The stub serialises rates as JSON floats, which the provider reads back via str().
+    return Decimal(str(float(stub_rate_for(currency_code, day))))
+
+
+@pytest.fixture
+def ecb_stub():
+    with EcbStubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def provider_factory(temp_data_dir, ecb_stub):
+    def _make(**kwargs) -> ECBExchangeRateProvider:
+        return ECBExchangeRateProvider(
+            cache_file_path=os.path.join(temp_data_dir, "cache", "ecb_exchange_rates.json"),
+            api_url_template_override=ecb_stub.url_template,
+            max_fallback_days_override=7,
+            **kwargs,
+        )
+    return _make
+
+
+class TestPrefetchRates:
+    def test_prefetch_issues_one_series_request_per_currency(self, provider_factory, ecb_stub):
+        provider = provider_factory()
+        provider.prefetch_rates(date(2023, 1, 1), date(2023, 12, 31), {"USD", "GBP", "CHF", "JPY", "EUR"})
+
+        assert sorted(req[0] for req in ecb_stub.requests) == ["CHF", "GBP", "JPY", "USD"]
+        for _, start, end in ecb_stub.requests:
+            assert start == date(2023, 1, 1) - timedelta(days=7)
+            assert end == date(2023, 12, 31)
+
+    def test_lookups_after_prefetch_need_no_further_requests(self, provider_factory, ecb_stub):
+        provider = provider_factory()
+        provider.prefetch_rates(date(2023, 1, 1), date(2023, 12, 31), {"USD"})
+        requests_after_prefetch = len(ecb_stub.requests)
+
+        # Monday, Saturday (falls back to Friday) and New Year's Day (Sunday, falls back into the margin).
+        assert provider.get_rate(date(2023, 3, 6), "USD") == _expected_rate("USD", date(2023, 3, 6))
+        assert provider.get_rate(date(2023, 3, 11), "USD") == _expected_rate("USD", date(2023, 3, 10))
+        assert provider.get_rate(date(2023, 1, 1), "USD") == _expected_rate("USD", date(2022, 12, 30))
+        assert len(ecb_stub.requests) == requests_after_prefetch
+
+    def test_prefetched_rates_match_per_day_fetching(self, provider_factory, ecb_stub, temp_data_dir):
+        prefetched = provider_factory()
+        prefetched.prefetch_rates(date(2023, 5, 1), date(2023, 5, 31), {"GBP"})
+
+        per_day = ECBExchangeRateProvider(
+            cache_file_path=os.path.join(temp_data_dir, "cache", "per_day_rates.json"),
+            api_url_template_override=ecb_stub.url_template,
+            max_fallback_days_override=7,
+        )
+        for offset in range(31):
+            day = date(2023, 5, 1) + timedelta(days=offset)
+            assert prefetched.get_rate(day, "GBP") == per_day.get_rate(day, "GBP")
+
+    def test_currency_mapping_is_applied(self, provider_factory, ecb_stub):
+        provider = provider_factory(currency_code_mapping_override={"CNH": "CNY"})
+        provider.prefetch_rates(date(2023, 6, 1), date(2023, 6, 30), {"CNH"})
+
+        assert [req[0] for req in ecb_stub.requests] == ["CNY"]
+        assert provider.get_rate(date(2023, 6, 5), "CNH") == _expected_rate("CNY", date(2023, 6, 5))
+
+    def test_fully_cached_range_is_not_requested_again(self, provider_factory, ecb_stub):
+        first_run = provider_factory()
+        first_run.prefetch_rates(date(2023, 1, 1), date(2023, 3, 31), {"USD"})
+        first_run.flush_cache()
+        assert len(ecb_stub.requests) == 1
+
+        provider_factory().prefetch_rates(date(2023, 1, 1), date(2023, 3, 31), {"USD"})
+        assert len(ecb_stub.requests) == 1
+
+    def test_warm_cache_serves_weekends_without_requests(self, provider_factory, ecb_stub):
+        first_run = provider_factory()
+        first_run.prefetch_rates(date(2023, 1, 1), date(2023, 3, 31), {"USD"})
+        first_run.flush_cache()
+        ecb_stub.requests.clear()
+
+        second_run = provider_factory()
+        second_run.prefetch_rates(date(2023, 1, 1), date(2023, 3, 31), {"USD"})
+        # Saturday, cached as unavailable by the first run: falls back to Friday
+        assert second_run.get_rate(date(2023, 3, 11), "USD") == _expected_rate("USD", date(2023, 3, 10))
+        assert second_run.get_rates_for_dates([date(2023, 1, 1), date(2023, 2, 5)], "USD") == [
+            _expected_rate("USD", date(2022, 12, 30)), _expected_rate("USD", date(2023, 2, 3))]
+        assert ecb_stub.requests == []
+
+    def test_failed_per_day_fetch_is_requested_again_by_a_later_prefetch(self, temp_data_dir):
+        with EcbStubServer(fail_first_requests=1) as flaky_stub:
+            def _make_provider() -> ECBExchangeRateProvider:
+                return ECBExchangeRateProvider(
+                    cache_file_path=os.path.join(temp_data_dir, "cache", "ecb_exchange_rates.json"),
+                    api_url_template_override=flaky_stub.url_template,
+                    max_fallback_days_override=7,
+                    fetch_max_retries_override=0,
+                )
+
+            first_run = _make_provider()
+            # The Wednesday fetch fails (cached as None) and the lookup falls back to Tuesday
+            assert first_run.get_rate(date(2023, 3, 15), "USD") == _expected_rate("USD", date(2023, 3, 14))
+            first_run.flush_cache()
+            flaky_stub.requests.clear()
+
+            second_run = _make_provider()
+            second_run.prefetch_rates_for_dates({"USD": {date(2023, 3, 15)}})
+            assert any(start <= date(2023, 3, 15) <= end for _, start, end in flaky_stub.requests)
+            assert second_run.get_rate(date(2023, 3, 15), "USD") == _expected_rate("USD", date(2023, 3, 15))
+
+
+class TestCacheWriteBatching:
+    def test_misses_are_not_written_until_a_checkpoint(self, provider_factory):
+        provider = provider_factory()
+        for offset in range(20):
+            provider.get_rate(date(2023, 2, 1) + timedelta(days=offset), "USD")
+
+        assert provider.cache_flush_count == 0
+        assert not os.path.exists(provider.cache_file_path)
+
+        provider.flush_cache()
+        assert provider.cache_flush_count == 1
+        assert provider.cache_bytes_written == os.path.getsize(provider.cache_file_path)
+
+        reloaded = provider_factory()
+        assert reloaded.rates_cache == provider.rates_cache
+
+    def test_flush_after_every_n_new_entries(self, provider_factory):
+        provider = provider_factory(cache_flush_interval_override=5)
+        for offset in range(12):
+            provider.get_rate(date(2023, 3, 6) + timedelta(days=offset * 7), "USD") # Mondays: one new entry each
+
+        assert provider.cache_flush_count == 2
+        provider.flush_cache()
+        assert provider.cache_flush_count == 3
+        provider.flush_cache() # Nothing pending: no rewrite
+        assert provider.cache_flush_count == 3
+
+    def test_pending_rates_are_written_at_exit_by_one_shared_hook(self, provider_factory, monkeypatch):
+        registered_hooks = []
+        monkeypatch.setattr(exchange_rate_provider.atexit, "register", registered_hooks.append)
+        providers = [provider_factory() for _ in range(3)]
+        assert registered_hooks == [] # No per-instance hooks
+        assert all(p in exchange_rate_provider._LIVE_PROVIDERS for p in providers)
+
+        providers[0].get_rate(date(2023, 3, 6), "USD")
+        exchange_rate_provider._flush_provider_caches_at_exit()
+        assert [p.cache_flush_count for p in providers] == [1, 0, 0]
+
+        provider_refs = [weakref.ref(p) for p in providers]
+        del providers
+        gc.collect()
+        assert all(ref() is None for ref in provider_refs) # The registry does not keep providers alive
+
+    def test_write_is_atomic_and_leaves_no_temp_files(self, provider_factory, temp_data_dir):
+        provider = provider_factory()
+        provider.prefetch_rates(date(2023, 1, 1), date(2023, 1, 31), {"USD"})
+        provider.flush_cache()
+
+        cache_dir = os.path.join(temp_data_dir, "cache")
+        assert os.listdir(cache_dir) == ["ecb_exchange_rates.json"]
+
+    def test_failed_write_keeps_previous_cache_file(self, provider_factory, monkeypatch):
+        provider = provider_factory()
+        provider.get_rate(date(2023, 3, 6), "USD")
+        provider.flush_cache()
+        with open(provider.cache_file_path, "rb") as f:
+            previous_contents = f.read()
+
+        provider.get_rate(date(2023, 3, 7), "USD")
+        monkeypatch.setattr(os, "replace", lambda *args: (_ for _ in ()).throw(OSError("simulated crash")))
+        provider.flush_cache()
+
+        with open(provider.cache_file_path, "rb") as f:
+            assert f.read() == previous_contents
+        assert os.listdir(os.path.dirname(provider.cache_file_path)) == ["ecb_exchange_rates.json"]
+
+
+class TestDenseRateTables:
+    @staticmethod
+    def _write_random_cache(path: str, seed: int):
+        rng = random.Random(seed)
+        cache = {}
+        day = date(2023, 1, 1)
+        while day <= date(2023, 6, 30):
+            roll = rng.random()
+            if roll < 0.6:
+                cache[day.isoformat()] = {"USD": f"1.{day.timetuple().tm_yday:04d}"}
+            elif roll < 0.75:
+                cache[day.isoformat()] = {"USD": None} # Failed fetch
+            elif roll < 0.85:
+                cache[day.isoformat()] = {"USD": NO_OBSERVATION_MARKER}
+            day += timedelta(days=1) # Remaining days are never cached
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(cache, f)
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_table_lookups_match_fallback_walk(self, provider_factory, temp_data_dir, ecb_stub, seed, monkeypatch):
+        indexed = provider_factory()
+        self._write_random_cache(indexed.cache_file_path, seed)
+        indexed = provider_factory()
+
+        reference_path = os.path.join(temp_data_dir, "cache", "reference_rates.json")
+        self._write_random_cache(reference_path, seed)
+        reference = ECBExchangeRateProvider(
+            cache_file_path=reference_path,
+            api_url_template_override=ecb_stub.url_template,
+            max_fallback_days_override=7,
+        )
+        monkeypatch.setattr(reference, "_get_rate_table", lambda code: None)
+
+        for offset in range(190):
+            day = date(2022, 12, 25) + timedelta(days=offset)
+            assert indexed.get_rate(day, "USD") == reference.get_rate(day, "USD"), day
+
+    @pytest.mark.parametrize("seed", [4, 5])
+    def test_per_day_misses_patch_the_table_in_place(self, provider_factory, seed, monkeypatch):
+        provider = provider_factory()
+        self._write_random_cache(provider.cache_file_path, seed)
+        provider = provider_factory()
+        provider.get_rate(date(2023, 3, 1), "USD") # Builds the table
+        rebuild_count = 0
+        original_from_rates_cache = DenseRateTable.from_rates_cache
+
+        def _counting_from_rates_cache(*args, **kwargs):
+            nonlocal rebuild_count
+            rebuild_count += 1
+            return original_from_rates_cache(*args, **kwargs)
+        monkeypatch.setattr(DenseRateTable, "from_rates_cache", _counting_from_rates_cache)
+
+        rng = random.Random(seed)
+        for _ in range(60): # Misses inside, before and after the cached span
+            provider.get_rate(date(2022, 11, 1) + timedelta(days=rng.randrange(300)), "USD")
+            table = provider._rate_tables["USD"]
+            rebuilt = original_from_rates_cache(provider.rates_cache, "USD", provider.max_fallback_days)
+            assert (table.base_date, table.slots) == (rebuilt.base_date, rebuilt.slots)
+        assert rebuild_count == 0
+
+    def test_prefetched_range_is_served_without_per_day_fetches(self, provider_factory, monkeypatch):
+        provider = provider_factory()
+        provider.prefetch_rates(date(2023, 1, 1), date(2023, 12, 31), {"USD"})
+        monkeypatch.setattr(provider, "_fetch_rate_from_ecb",
+                            lambda *args: pytest.fail("unexpected per-day fetch"))
+
+        for offset in range(365):
+            day = date(2023, 1, 1) + timedelta(days=offset)
+            assert provider.get_rate(day, "USD") is not None
+
+    def test_column_lookup_matches_single_lookups(self, provider_factory):
+        provider = provider_factory()
+        provider.prefetch_rates(date(2023, 2, 1), date(2023, 3, 31), {"USD"})
+        days = [date(2023, 3, 31) - timedelta(days=offset) for offset in range(75)] # Partly outside the prefetch
+
+        assert provider.get_rates_for_dates(days, "USD") == [provider.get_rate(day, "USD") for day in days]
+        assert provider.get_rates_for_dates(days[:3], "EUR") == [Decimal("1.0")] * 3
+
+
+class TestConcurrentFetching:
+    def test_missing_dates_are_coalesced_into_range_queries(self, provider_factory, ecb_stub):
+        provider = provider_factory(fetch_coalesce_gap_days_override=14)
+        provider.get_rate(date(2023, 9, 4), "USD") # Already cached: not requested again
+        ecb_stub.requests.clear()
+
+        provider.prefetch_rates_for_dates({
+            "USD": {date(2023, 3, 6), date(2023, 3, 20), date(2023, 9, 4)},
+            "GBP": {date(2023, 3, 6)},
+        })
+
+        assert sorted(ecb_stub.requests) == [
+            ("GBP", date(2023, 2, 27), date(2023, 3, 6)),
+            ("USD", date(2023, 2, 27), date(2023, 3, 20)), # 7-day fallback windows, gap bridged
+            ("USD", date(2023, 8, 28), date(2023, 9, 3)),
+        ]
+        assert provider.get_rate(date(2023, 3, 19), "USD") == _expected_rate("USD", date(2023, 3, 17))
+
+    def test_retryable_errors_are_retried_with_backoff(self, temp_data_dir):
+        with EcbStubServer(fail_first_requests=2) as failing_stub:
+            provider = ECBExchangeRateProvider(
+                cache_file_path=os.path.join(temp_data_dir, "cache", "ecb_exchange_rates.json"),
+                api_url_template_override=failing_stub.url_template,
+                fetch_retry_backoff_seconds_override=0.01,
+            )
+            provider.prefetch_rates(date(2023, 4, 3), date(2023, 4, 7), {"USD"})
+
+            assert failing_stub.failed_request_count == 2
+            assert len(failing_stub.requests) == 1
+            assert provider.get_rate(date(2023, 4, 5), "USD") == _expected_rate("USD", date(2023, 4, 5))
+
+    def test_concurrent_fetching_is_faster_than_serial(self, temp_data_dir):
+        # 4 currencies x 6 months far apart -> 24 range queries, each taking 100ms on the server.
+        dates_by_currency = {
+            currency: {date(2015 + year, 1, 15) for year in range(6)}
+            for currency in ("USD", "GBP", "CHF", "JPY")
+        }
+
+        def _timed_prefetch(stub: EcbStubServer, cache_name: str, **kwargs) -> float:
+            provider = ECBExchangeRateProvider(
+                cache_file_path=os.path.join(temp_data_dir, "cache", cache_name),
+                api_url_template_override=stub.url_template,
+                **kwargs,
+            )
+            started_at = time.perf_counter()
+            provider.prefetch_rates_for_dates(dates_by_currency)
+            elapsed = time.perf_counter() - started_at
+            assert provider.get_rate(date(2020, 1, 15), "JPY") == _expected_rate("JPY", date(2020, 1, 15))
+            return elapsed
+
+        with EcbStubServer(latency_seconds=0.1) as stub:
+            serial_seconds = _timed_prefetch(stub, "serial.json", fetch_max_workers_override=1, max_connections_per_host_override=1)
+            assert stub.max_concurrent_requests == 1
+            concurrent_seconds = _timed_prefetch(stub, "concurrent.json", fetch_max_workers_override=8, max_connections_per_host_override=4)
+            assert stub.max_concurrent_requests == 4 # Per-host cap holds with more workers than connections
+            assert len(stub.requests) == 48
+
+        print(f"\n24 range queries: serial {serial_seconds:.2f}s, concurrent {concurrent_seconds:.2f}s "
+              f"({serial_seconds / concurrent_seconds:.1f}x)")
+        if ASSERT_TIMINGS:
+            assert concurrent_seconds * 2.5 < serial_seconds
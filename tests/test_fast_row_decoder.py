@@ -0,0 +1,186 @@
+# tests/test_fast_row_decoder.py
+import importlib
+import os
+import pkgutil
+from decimal import Decimal
+
+import pytest
+
+from src.classification.asset_classifier import AssetClassifier
+from src.identification.asset_resolver import AssetResolver
+from src.parsers.cash_transactions_parser import parse_cash_transactions_csv
+from src.parsers.fast_row_decoder import FastRawTradeRecord, RowDecoder, fast_record_class
+from src.parsers.parsing_orchestrator import ParsingOrchestrator
+from src.parsers.raw_models import RawTradeRecord, RawBaseRecord
+from src.parsers.trades_parser import parse_trades_csv
+import tests.fifo_scenarios as fifo_scenarios
+from tests.fifo_scenarios.test_case_base import FifoTestCaseBase
+from tests.helpers.csv_creators import (
+    CASH_TRANSACTIONS_HEADERS, create_csv_string, create_cash_transactions_csv_string,
+    create_positions_csv_string, create_trades_csv_string
+)
+from tests.helpers.record_decoding import assert_fast_row_decoding_matches_reference, decoded_with_both_decoders
+
+ACCOUNT_ID = "U_TEST_FAST"
+
+# Every column the trade model knows, in IBKR order, plus columns it ignores
+FULL_TRADES_HEADERS = [field.alias for field in RawTradeRecord.__fields__.values()] + ["LevelOfDetail", "Unmapped"]
+
+
+def _full_trade_row(**overrides):
+    row = {alias: "" for alias in FULL_TRADES_HEADERS}
+    row.update({"ClientAccountID": ACCOUNT_ID, "CurrencyPrimary": "USD", "AssetClass": "OPT", "Symbol": "AAA  230616C00050000",
+                "Description": "AAA 16JUN23 50 C", "Conid": "12345", "Multiplier": "100", "Strike": "50", "Expiry": "20230616",
+                "Put/Call": "C", "TradeDate": "20230301", "TradeTime": "093000", "Quantity": "2", "TradePrice": "1.25",
+                "TradeMoney": "250", "Proceeds": "-250", "IBCommission": "-1.3", "IBCommissionCurrency": "USD",
+                "NetCash": "-251.3", "Open/CloseIndicator": "O", "Buy/Sell": "BUY", "TransactionID": "T100", "LevelOfDetail": "EXECUTION"})
+    row.update(overrides)
+    return [row[alias] for alias in FULL_TRADES_HEADERS]
+
+
+EDGE_CASE_TRADE_ROWS = [
+    _full_trade_row(),
+    _full_trade_row(Multiplier="", Strike="abc", TradeMoney="  ", ClosePrice="1,5", CostBasis="1,234.50", MtmPnl="NaN"),
+    _full_trade_row(Expiry="  20230616 ", ReportDate=" ", OrigTradeDate="20230101", Conid=" 12345 ", Quantity="-0.0000"),
+    _full_trade_row(TradeDate="   "), # Required date left blank: rejected
+    _full_trade_row(CurrencyPrimary="", Description=""), # Required strings may be empty
+    _full_trade_row(Quantity="", TradePrice="x"), # Required decimals fall back to 0.0
+]
+
+
+@pytest.fixture
+def trades_file(temp_data_dir):
+    path = os.path.join(temp_data_dir, "trades_full.csv")
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write(create_csv_string(FULL_TRADES_HEADERS, EDGE_CASE_TRADE_ROWS))
+        f.write("\n") # Blank line
+        f.write(",".join(_full_trade_row(TransactionID="T101")[:30]) + "\n") # Short row, padded with None
+        f.write(",".join(_full_trade_row(TransactionID="T102")[:5]) + "\n") # Too short: required Description missing
+        f.write(",".join(_full_trade_row(TransactionID="T103") + ["extra"]) + "\n") # More fields than the header
+    return path
+
+
+def test_fast_decoder_matches_pydantic_models_on_edge_cases(trades_file, capsys):
+    reference, fast = decoded_with_both_decoders(parse_trades_csv, trades_file)
+    assert fast == reference
+    assert [r["transaction_id"] for r in fast] == ["'T100'"] * 5 + ["None"] # The short row ends before TransactionID
+    assert fast[5]["trade_price"] == "Decimal('0.0')"
+    assert fast[1]["multiplier"] == "Decimal('0.0')" and fast[1]["close_price"] == "Decimal('1.5')"
+
+    output = capsys.readouterr().out.splitlines()
+    reference_output, fast_output = output[:len(output) // 2], output[len(output) // 2:]
+    assert len(fast_output) == 3
+    assert fast_output[:2] == reference_output[:2] # Validation errors are reported identically
+    assert fast_output[2].startswith("Unexpected error parsing trade row") and "T103" in fast_output[2]
+
+
+class _ScenarioInputsCaptured(Exception):
+    pass
+
+
+def _fifo_scenario_cases():
+    """Every FIFO scenario test as (scenario class, test method name); their input rows double as decoder fixtures."""
+    cases = []
+    for module_info in pkgutil.iter_modules(fifo_scenarios.__path__):
+        if not module_info.name.startswith("test_"):
+            continue
+        module = importlib.import_module(f"{fifo_scenarios.__name__}.{module_info.name}")
+        for scenario_class in vars(module).values():
+            if isinstance(scenario_class, type) and issubclass(scenario_class, FifoTestCaseBase) and scenario_class is not FifoTestCaseBase:
+                cases.extend(pytest.param(scenario_class, name, id=f"{scenario_class.__name__}.{name}")
+                             for name in sorted(vars(scenario_class)) if name.startswith("test_"))
+    return cases
+
+
+@pytest.mark.parametrize("scenario_class, test_name", _fifo_scenario_cases())
+def test_fast_decoder_matches_pydantic_models_on_scenario_csvs(scenario_class, test_name, mock_config_paths):
+    captured = {}
+
+    def _capture_inputs(trades_data=None, positions_start_data=None, positions_end_data=None,
+                        cash_transactions_data=None, *args, **kwargs):
+        captured.update(trades=trades_data or [], cash=cash_transactions_data or [])
+        raise _ScenarioInputsCaptured()
+
+    scenario = scenario_class()
+    scenario._run_pipeline = _capture_inputs # The scenario only builds its inputs; the pipeline is not run
+    with pytest.raises(_ScenarioInputsCaptured):
+        getattr(scenario, test_name)(mock_config_paths)
+
+    for path_key, rows, creator in (("trades", captured["trades"], create_trades_csv_string),
+                                    ("cash", captured["cash"], create_cash_transactions_csv_string)):
+        with open(mock_config_paths[path_key], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+    assert_fast_row_decoding_matches_reference(mock_config_paths["trades"], mock_config_paths["cash"])
+
+
+def test_fast_records_are_slotted_and_compare_by_value(trades_file):
+    records = parse_trades_csv(trades_file, fast_decoding=True)
+    assert isinstance(records[0], FastRawTradeRecord)
+    assert not hasattr(records[0], "__dict__")
+    assert records[0] == parse_trades_csv(trades_file, fast_decoding=True)[0]
+    assert records[0] != records[1]
+
+
+def test_missing_required_column_rejects_every_row(temp_data_dir, capsys):
+    path = os.path.join(temp_data_dir, "cash_no_amount.csv")
+    headers = [h for h in CASH_TRANSACTIONS_HEADERS if h != "Amount"]
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write(create_csv_string(headers, [[ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA CASH DIVIDEND", "2023-04-03",
+                                             "Dividends", "C_AAA", None, "US0000000AAA", "US", "D001"]]))
+    assert decoded_with_both_decoders(parse_cash_transactions_csv, path) == [[], []]
+    reference_output, fast_output = capsys.readouterr().out.splitlines()
+    assert fast_output == reference_output and "field required" in fast_output
+
+
+def test_decoder_plan_only_covers_mapped_columns():
+    decoder = RowDecoder(FastRawTradeRecord, ["Symbol", "Unmapped", "Quantity", "Symbol"])
+    assert [(column, name) for column, name, *_ in decoder.plan] == [(3, "symbol"), (2, "quantity")]
+    assert {e["loc"][0] for e in decoder.missing_required_errors} == {"CurrencyPrimary", "AssetClass", "Description", "TradeDate", "TradePrice"}
+
+
+def test_models_with_unknown_validators_are_refused():
+    from pydantic import validator
+
+    class RawModelWithCustomValidator(RawBaseRecord):
+        symbol: str
+
+        @validator("symbol", pre=True)
+        def upper_symbol(cls, v):
+            return v.upper()
+
+    with pytest.raises(ValueError, match="cannot replay validators"):
+        fast_record_class(RawModelWithCustomValidator)
+
+
+def test_pipeline_events_are_identical_with_fast_row_decoding(temp_data_dir):
+    trades = [
+        [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-02-01",
+         Decimal("10"), Decimal("50.00"), Decimal("-1.00"), "USD", "BUY", "T001", None, None, "C_AAA", None, Decimal("1"), "O"],
+        [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-06-01",
+         Decimal("-4"), Decimal("60.00"), Decimal("-1.00"), "USD", "SELL", "T002", None, None, "C_AAA", None, Decimal("1"), "C"],
+    ]
+    cash = [
+        [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA(US0000000AAA) CASH DIVIDEND USD 0.50 PER SHARE", "2023-04-03",
+         Decimal("5.00"), "Dividends", "C_AAA", None, "US0000000AAA", "US", "D001"],
+        [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA(US0000000AAA) CASH DIVIDEND USD 0.50 PER SHARE - US TAX", "2023-04-03",
+         Decimal("-0.75"), "Withholding Tax", "C_AAA", None, "US0000000AAA", "US", "D002"],
+    ]
+    paths = {}
+    for name, content in [("trades", create_trades_csv_string(trades)), ("cash", create_cash_transactions_csv_string(cash)),
+                          ("positions", create_positions_csv_string([]))]:
+        paths[name] = os.path.join(temp_data_dir, f"{name}.csv")
+        with open(paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(content)
+    assert_fast_row_decoding_matches_reference(paths["trades"], paths["cash"])
+
+    summaries = []
+    for fast_row_decoding in (False, True):
+        classifier = AssetClassifier(cache_file_path=os.path.join(temp_data_dir, f"classifications_{fast_row_decoding}.json"))
+        orchestrator = ParsingOrchestrator(AssetResolver(asset_classifier=classifier), classifier,
+                                           interactive_classification=False, fast_row_decoding=fast_row_decoding)
+        events = orchestrator.run_parsing_pipeline(trades_file=paths["trades"], cash_transactions_file=paths["cash"],
+                                                   positions_start_file=paths["positions"], positions_end_file=paths["positions"])
+        summaries.append([(type(ev).__name__, ev.event_type, ev.event_date, ev.ibkr_transaction_id,
+                           ev.gross_amount_foreign_currency, getattr(ev, "quantity", None)) for ev in events])
+    assert summaries[1] == summaries[0]
+    assert len(summaries[0]) == 4
@@ -0,0 +1,44 @@
+# tests/test_fifo_lot_validation.py
+import logging
+import pickle
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from src.domain.enums import AssetCategory
+from src.engine.fifo_manager import FifoLedger, FifoLot, LOT_VALIDATION_FAST, LOT_VALIDATION_STRICT
+from src.utils.currency_converter import CurrencyConverter
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+
+def _ledger(lot_validation_mode: str) -> FifoLedger:
+    rate_provider = MockECBExchangeRateProvider(Decimal("1.0"))
+    return FifoLedger(asset_internal_id=uuid.uuid4(), asset_category=AssetCategory.STOCK, asset_multiplier_from_asset=None,
+                      currency_converter=CurrencyConverter(rate_provider), exchange_rate_provider=rate_provider,
+                      internal_working_precision=28, decimal_rounding_mode="ROUND_HALF_UP",
+                      lot_validation_mode=lot_validation_mode)
+
+
+def test_unknown_lot_validation_mode_raises():
+    with pytest.raises(ValueError, match="Unknown FIFO lot validation mode"):
+        _ledger("paranoid")
+
+
+@pytest.mark.parametrize("mode, expect_checks", [(LOT_VALIDATION_STRICT, True), (LOT_VALIDATION_FAST, False)])
+def test_ledger_lots_are_validated_per_mode(mode, expect_checks, caplog):
+    ledger = _ledger(mode)
+    with caplog.at_level(logging.WARNING, logger="src.engine.fifo_manager"):
+        lot = ledger._new_lot(acquisition_date="2023-01-02", quantity=Decimal("10"), unit_cost_basis_eur=Decimal("5"),
+                              total_cost_basis_eur=Decimal("60"), source_transaction_id="T1")
+    assert ("differs significantly" in caplog.text) == expect_checks
+    if expect_checks:
+        with pytest.raises(ValueError, match="positive finite Decimal"):
+            ledger._new_lot(acquisition_date="2023-01-02", quantity=Decimal("0"), unit_cost_basis_eur=Decimal("5"),
+                            total_cost_basis_eur=Decimal("0"), source_transaction_id="T2")
+    assert pickle.loads(pickle.dumps(lot)) == lot
+
+
+def test_standalone_lots_are_always_validated():
+    with pytest.raises(ValueError, match="non-empty source_transaction_id"):
+        FifoLot("2023-01-02", Decimal("1"), Decimal("1"), Decimal("1"), "")
@@ -0,0 +1,22 @@
+# tests/test_file_utils.py
+import os
+
+import pytest
+
+from src.utils.file_utils import write_file_atomically
+
+
+def test_failed_write_keeps_previous_file(temp_data_dir):
+    file_path = os.path.join(temp_data_dir, "nested", "state.json")
+    write_file_atomically(file_path, lambda f: f.write("first"))
+
+    def _failing_writer(f):
+        f.write("partial")
+        raise RuntimeError("simulated crash")
+
+    with pytest.raises(RuntimeError):
+        write_file_atomically(file_path, _failing_writer)
+
+    with open(file_path, encoding="utf-8") as f:
+        assert f.read() == "first"
+    assert os.listdir(os.path.dirname(file_path)) == ["state.json"]
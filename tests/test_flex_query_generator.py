@@ -0,0 +1,52 @@
+# tests/test_flex_query_generator.py
+import os
+from collections import Counter
+from decimal import Decimal
+
+import pytest
+
+from src.domain.enums import FinancialEventType
+from src.pipeline_runner import run_core_processing_pipeline
+from tests.helpers.flex_query_generator import FlexQuerySettings, generate_flex_query
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+
+def _file_contents(directory: str, settings: FlexQuerySettings) -> dict:
+    flex_query = generate_flex_query(directory, settings)
+    contents = {}
+    for name, path in flex_query.file_paths.items():
+        with open(path, encoding="utf-8-sig") as f:
+            contents[name] = f.read()
+    return contents
+
+
+def test_generator_is_deterministic_per_seed(temp_data_dir):
+    settings = FlexQuerySettings(seed=7, num_stocks=5)
+    first = _file_contents(os.path.join(temp_data_dir, "cache"), settings)
+    assert _file_contents(temp_data_dir, settings) == first
+    assert _file_contents(temp_data_dir, FlexQuerySettings(seed=8, num_stocks=5))["trades"] != first["trades"]
+    with pytest.raises(ValueError, match="trades_per_year"):
+        FlexQuerySettings(trades_per_year=0)
+
+
+def test_generated_portfolio_runs_through_the_pipeline(mock_config_paths):
+    settings = FlexQuerySettings(seed=3, option_chains_per_stock=3, split_probability=0.5).with_event_count(1000)
+    flex_query = generate_flex_query(mock_config_paths["temp_dir_root"], settings)
+    assert abs(flex_query.num_events - 1000) < 100
+
+    output = run_core_processing_pipeline(**flex_query.pipeline_file_arguments(), interactive_classification_mode=False,
+                                          tax_year_to_process=settings.tax_year,
+                                          custom_rate_provider=MockECBExchangeRateProvider(Decimal("0.9")))
+    events = output.all_financial_events_enriched
+    assert len(events) == flex_query.num_events
+    assert output.eoy_mismatch_error_count == 0
+
+    event_counts = Counter(e.event_type for e in events)
+    for event_type in (FinancialEventType.OPTION_EXERCISE, FinancialEventType.OPTION_ASSIGNMENT,
+                       FinancialEventType.OPTION_EXPIRATION_WORTHLESS, FinancialEventType.CORP_SPLIT_FORWARD):
+        assert event_counts[event_type] > 0, event_type
+    assert event_counts[FinancialEventType.WITHHOLDING_TAX] == event_counts[FinancialEventType.DIVIDEND_CASH]
+    option_deliveries = event_counts[FinancialEventType.OPTION_EXERCISE] + event_counts[FinancialEventType.OPTION_ASSIGNMENT]
+    assert sum(1 for e in events if getattr(e, "related_option_event_id", None)) == option_deliveries
+    assert all(e.gross_amount_eur is not None for e in events if e.gross_amount_foreign_currency is not None)
+    assert any(e.event_date < f"{settings.tax_year}-01-01" for e in events)
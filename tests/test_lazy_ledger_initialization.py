@@ -0,0 +1,56 @@
+# tests/test_lazy_ledger_initialization.py
+import logging
+from decimal import Decimal
+
+from src.pipeline_runner import run_core_processing_pipeline
+from tests.helpers.csv_creators import (
+    create_trades_csv_string, create_positions_csv_string,
+    create_cash_transactions_csv_string, create_corporate_actions_csv_string
+)
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+ACCOUNT_ID = "U_TEST_LAZY_LEDGERS"
+
+TRADES = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-02-01",
+     Decimal("10"), Decimal("50.00"), Decimal("-1.00"), "USD", "BUY", "T001", None, None, "C_AAA", None, Decimal("1"), "O"],
+]
+POSITIONS_START = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "CCC", "CCC INC", "US0000000CCC", Decimal("5"), Decimal("50"), Decimal("10"),
+     Decimal("40"), None, "C_CCC", None, Decimal("1")],
+]
+POSITIONS_END = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", Decimal("10"), Decimal("500"), Decimal("50"),
+     Decimal("501"), None, "C_AAA", None, Decimal("1")],
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "CCC", "CCC INC", "US0000000CCC", Decimal("5"), Decimal("50"), Decimal("10"),
+     Decimal("40"), None, "C_CCC", None, Decimal("1")],
+]
+# EEE only appears through a dividend of a position closed in an earlier year
+CASH_TRANSACTIONS = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "EEE", "EEE(US0000000EEE) CASH DIVIDEND USD 0.10 PER SHARE", "2023-03-01",
+     Decimal("1.00"), "Dividends", "C_EEE", None, "US0000000EEE", "US", "D001"],
+]
+
+
+def test_only_needed_ledgers_are_materialized(mock_config_paths, caplog):
+    for name, rows, creator in [("trades", TRADES, create_trades_csv_string),
+                                ("pos_start", POSITIONS_START, create_positions_csv_string),
+                                ("pos_end", POSITIONS_END, create_positions_csv_string),
+                                ("cash", CASH_TRANSACTIONS, create_cash_transactions_csv_string),
+                                ("corp_actions", [], create_corporate_actions_csv_string)]:
+        with open(mock_config_paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+
+    caplog.set_level(logging.INFO, logger="src.engine")
+    output = run_core_processing_pipeline(
+        trades_file_path=mock_config_paths["trades"], cash_transactions_file_path=mock_config_paths["cash"],
+        positions_start_file_path=mock_config_paths["pos_start"], positions_end_file_path=mock_config_paths["pos_end"],
+        corporate_actions_file_path=mock_config_paths["corp_actions"], interactive_classification_mode=False,
+        tax_year_to_process=2023, custom_rate_provider=MockECBExchangeRateProvider(Decimal("2.0"))
+    )
+
+    assert output.eoy_mismatch_error_count == 0
+    assert "Materialized 2 FIFO ledgers. Skipped 1 assets without SOY position, history or current year activity." in caplog.text
+    initialized = [r.getMessage() for r in caplog.records if "Initializing SOY" in r.getMessage()]
+    assert len(initialized) == 2
+    assert not any("US0000000EEE" in message for message in initialized)
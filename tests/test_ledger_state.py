@@ -0,0 +1,108 @@
+# tests/test_ledger_state.py
+import json
+import logging
+import os
+from decimal import Decimal
+
+import pytest
+
+from src.pipeline_runner import run_core_processing_pipeline
+from tests.helpers.csv_creators import (
+    create_trades_csv_string, create_positions_csv_string,
+    create_cash_transactions_csv_string, create_corporate_actions_csv_string
+)
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+ACCOUNT_ID = "U_TEST_LEDGER_STATE"
+
+
+def _trade(trade_date, quantity, price, buy_sell, transaction_id, open_close):
+    return [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, trade_date,
+            Decimal(quantity), Decimal(price), Decimal("-1.00"), "USD", buy_sell, transaction_id, None, None, "C_AAA", None,
+            Decimal("1"), open_close]
+
+
+def _position(quantity, cost_basis):
+    return [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", Decimal(quantity), Decimal("0"), Decimal("0"),
+            Decimal(cost_basis), None, "C_AAA", None, Decimal("1")]
+
+
+TRADES_2022 = [
+    _trade("2022-02-01", "10", "50.00", "BUY", "T001", "O"),
+    _trade("2022-03-01", "5", "70.00", "BUY", "T002", "O"),
+    _trade("2022-06-01", "-4", "60.00", "SELL", "T003", "C"),
+]
+TRADES_2023 = [_trade("2023-04-03", "-8", "80.00", "SELL", "T004", "C")]
+# Deliberately not the FIFO cost basis, so a fallback lot would be visible in the results
+POSITIONS_SOY_2023 = [_position("11", "1000")]
+POSITIONS_EOY_2023 = [_position("3", "210")]
+
+
+def _run(paths, tax_year, trades, positions_start, positions_end, **ledger_state_options):
+    for name, rows, creator in [("trades", trades, create_trades_csv_string),
+                                ("pos_start", positions_start, create_positions_csv_string),
+                                ("pos_end", positions_end, create_positions_csv_string),
+                                ("cash", [], create_cash_transactions_csv_string),
+                                ("corp_actions", [], create_corporate_actions_csv_string)]:
+        with open(paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+    return run_core_processing_pipeline(
+        trades_file_path=paths["trades"], cash_transactions_file_path=paths["cash"],
+        positions_start_file_path=paths["pos_start"], positions_end_file_path=paths["pos_end"],
+        corporate_actions_file_path=paths["corp_actions"], interactive_classification_mode=False,
+        tax_year_to_process=tax_year, custom_rate_provider=MockECBExchangeRateProvider(Decimal("2.0")),
+        **ledger_state_options
+    )
+
+
+def _rgl_summary(output):
+    return [(rgl.acquisition_date, rgl.realization_date, rgl.quantity_realized, rgl.total_cost_basis_eur, rgl.gross_gain_loss_eur)
+            for rgl in output.realized_gains_losses]
+
+
+@pytest.fixture
+def eoy_2022_state(mock_config_paths):
+    state_path = os.path.join(mock_config_paths["temp_dir_root"], "cache", "ledger_state_2022.json")
+    output = _run(mock_config_paths, 2022, TRADES_2022, [], [_position("11", "770")], eoy_ledger_state_file_path=state_path)
+    assert output.eoy_mismatch_error_count == 0
+    return state_path
+
+
+def test_eoy_state_export_contains_open_lots(eoy_2022_state):
+    with open(eoy_2022_state, encoding="utf-8") as f:
+        state = json.load(f)
+    assert state["tax_year"] == 2022
+    lots = state["ledgers"]["ISIN:US0000000AAA"]["lots"]
+    assert [(lot["source_transaction_id"], Decimal(lot["quantity"])) for lot in lots] == [("T001", Decimal("6")), ("T002", Decimal("5"))]
+    assert state["ledgers"]["ISIN:US0000000AAA"]["short_lots"] == []
+
+
+def test_seeding_from_eoy_state_matches_history_replay(mock_config_paths, eoy_2022_state, caplog):
+    replayed = _run(mock_config_paths, 2023, TRADES_2022 + TRADES_2023, POSITIONS_SOY_2023, POSITIONS_EOY_2023)
+
+    caplog.set_level(logging.INFO, logger="src.engine.calculation_engine")
+    seeded = _run(mock_config_paths, 2023, TRADES_2023, POSITIONS_SOY_2023, POSITIONS_EOY_2023,
+                  soy_ledger_state_file_path=eoy_2022_state)
+
+    assert "Seeded 1 FIFO ledgers from the carried EOY ledger state" in caplog.text
+    assert _rgl_summary(seeded) == _rgl_summary(replayed)
+    assert [rgl[0] for rgl in _rgl_summary(seeded)] == ["2022-02-01", "2022-03-01"]
+    assert seeded.eoy_mismatch_error_count == 0
+
+
+def test_divergent_eoy_state_falls_back_to_soy_positions(mock_config_paths, eoy_2022_state, caplog):
+    caplog.set_level(logging.INFO, logger="src.engine.calculation_engine")
+    output = _run(mock_config_paths, 2023, TRADES_2023, [_position("12", "1200")], [_position("4", "400")],
+                  soy_ledger_state_file_path=eoy_2022_state)
+
+    assert "diverges from the reported SOY Qty (12.00000000)" in caplog.text
+    assert "Carried EOY ledger state diverges from the SOY positions for 1 assets" in caplog.text
+    assert [(rgl.quantity_realized, rgl.total_cost_basis_eur) for rgl in output.realized_gains_losses] == \
+           [(Decimal("8"), Decimal("1600"))]
+
+
+def test_eoy_state_of_another_year_is_ignored(mock_config_paths, eoy_2022_state, caplog):
+    output = _run(mock_config_paths, 2024, [], [_position("11", "1000")], [_position("11", "1000")],
+                  soy_ledger_state_file_path=eoy_2022_state)
+    assert "is for the end of 2022, but tax year 2024 needs the end of 2023" in caplog.text
+    assert output.eoy_mismatch_error_count == 0
@@ -0,0 +1,117 @@
+# tests/test_parallel_fifo.py
+import copy
+import logging
+import os
+from decimal import Decimal
+
+import pytest
+
+import src.config as config
+from src.classification.asset_classifier import AssetClassifier
+from src.domain.enums import FinancialEventType
+from src.engine.calculation_engine import run_main_calculations
+from src.engine.parallel_fifo import partition_events_by_asset_component
+from src.pipeline_runner import _parse_and_enrich_events
+from src.utils.currency_converter import CurrencyConverter
+from tests.helpers.csv_creators import (
+    create_trades_csv_string, create_positions_csv_string,
+    create_cash_transactions_csv_string, create_corporate_actions_csv_string
+)
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+ACCOUNT_ID = "U_TEST_PARALLEL_FIFO"
+TAX_YEAR = 2023
+
+
+def _stock_trade(symbol, trade_date, quantity, price, buy_sell, transaction_id, open_close, notes=None):
+    return [ACCOUNT_ID, "USD", "STK", "COMMON", symbol, f"{symbol} INC", f"US0000000{symbol}", None, None, None, trade_date,
+            Decimal(quantity), Decimal(price), Decimal("-1.00"), "USD", buy_sell, transaction_id, notes, None, f"C_{symbol}", None,
+            Decimal("1"), open_close]
+
+
+def _option_trade(trade_date, quantity, price, buy_sell, transaction_id, open_close, notes=None):
+    return [ACCOUNT_ID, "USD", "OPT", "C", "AAA 230616C00050000", "AAA 16JUN23 50 C", None, Decimal("50"), "2023-06-16", "C",
+            trade_date, Decimal(quantity), Decimal(price), Decimal("-0.70"), "USD", buy_sell, transaction_id, notes, "AAA",
+            "C_AAA_OPT", "C_AAA", Decimal("100"), open_close]
+
+
+def _position(symbol, quantity, cost_basis):
+    return [ACCOUNT_ID, "USD", "STK", "COMMON", symbol, f"{symbol} INC", f"US0000000{symbol}", Decimal(quantity), Decimal("0"),
+            Decimal("0"), Decimal(cost_basis), None, f"C_{symbol}", None, Decimal("1")]
+
+
+TRADES = [
+    _stock_trade("AAA", "2023-01-10", "100", "50.00", "BUY", "T001", "O"),
+    _option_trade("2023-02-01", "1", "2.50", "BUY", "T002", "O"),
+    _option_trade("2023-03-17", "-1", "0", "SELL", "T003", "C", notes="Ex"),
+    _stock_trade("AAA", "2023-03-17", "100", "50.00", "BUY", "T004", "O", notes="Ex"),
+    _stock_trade("AAA", "2023-06-01", "-150", "60.00", "SELL", "T005", "C"),
+    _stock_trade("BBB", "2023-02-01", "10", "1.00", "BUY", "T006", "O"),
+    _stock_trade("BBB", "2023-09-01", "-5", "3.00", "SELL", "T007", "C"),
+    _stock_trade("CCC", "2023-04-01", "-20", "30.00", "SELL", "T008", "C"),
+    _stock_trade("DDD", "2023-05-01", "-7", "12.00", "SELL", "T009", "O"),
+    _stock_trade("DDD", "2023-07-01", "7", "10.00", "BUY", "T010", "C"),
+]
+POSITIONS_START = [_position("CCC", "30", "600")]
+POSITIONS_END = [_position("AAA", "50", "2500"), _position("BBB", "5", "0"), _position("CCC", "10", "200")]
+CASH_TRANSACTIONS = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "BBB", "BBB(US0000000BBB) CASH DIVIDEND USD 5.00 PER SHARE (EXEMPT FROM WITHHOLDING)",
+     "2023-06-15", Decimal("50.00"), "Dividends", "C_BBB", None, "US0000000BBB", "US", "D001"],
+]
+
+
+@pytest.fixture
+def enriched_events(mock_config_paths):
+    for name, rows, creator in [("trades", TRADES, create_trades_csv_string),
+                                ("pos_start", POSITIONS_START, create_positions_csv_string),
+                                ("pos_end", POSITIONS_END, create_positions_csv_string),
+                                ("cash", CASH_TRANSACTIONS, create_cash_transactions_csv_string),
+                                ("corp_actions", [], create_corporate_actions_csv_string)]:
+        with open(mock_config_paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+    input_files = {"trades": mock_config_paths["trades"], "cash_transactions": mock_config_paths["cash"],
+                   "positions_start": mock_config_paths["pos_start"], "positions_end": mock_config_paths["pos_end"],
+                   "corporate_actions": mock_config_paths["corp_actions"]}
+    rate_provider = MockECBExchangeRateProvider(Decimal("2.0"))
+    converter = CurrencyConverter(rate_provider=rate_provider)
+    classifier = AssetClassifier(cache_file_path=mock_config_paths["classification_cache"])
+    resolver, events = _parse_and_enrich_events(input_files, False, classifier, rate_provider, converter, TAX_YEAR,
+                                                streaming_ingestion=False, fast_row_decoding=False, parallel_parsing=False)
+    return resolver, events, converter, rate_provider, mock_config_paths["temp_dir_root"]
+
+
+def _calculate(enriched_events, parallel_fifo):
+    resolver, events, converter, rate_provider, temp_dir = copy.deepcopy(enriched_events[:2]) + enriched_events[2:]
+    state_path = os.path.join(temp_dir, f"eoy_state_parallel_{parallel_fifo}.json")
+    results = run_main_calculations(events, resolver, converter, rate_provider, TAX_YEAR, config.INTERNAL_CALCULATION_PRECISION,
+                                    config.DECIMAL_ROUNDING_MODE, eoy_ledger_state_file_path=state_path,
+                                    parallel_fifo=parallel_fifo)
+    with open(state_path, "rb") as f:
+        return results, events, f.read()
+
+
+def test_assets_linked_by_options_share_a_component(enriched_events):
+    resolver, events = enriched_events[:2]
+    current_year_events = [e for e in events if e.event_date.startswith(str(TAX_YEAR))]
+    components = partition_events_by_asset_component(current_year_events, resolver)
+    symbols = sorted(sorted(resolver.get_asset_by_id(a).ibkr_symbol for a in c.asset_ids) for c in components)
+    assert symbols == [["AAA", "AAA 230616C00050000"], ["BBB"], ["CCC"], ["DDD"]]
+
+
+def test_parallel_fifo_matches_sequential_processing(enriched_events, caplog):
+    (seq_rgls, _, seq_income, seq_mismatches), seq_events, seq_state = _calculate(enriched_events, parallel_fifo=False)
+    with caplog.at_level(logging.INFO, logger="src.engine.parallel_fifo"):
+        (par_rgls, _, par_income, par_mismatches), par_events, par_state = _calculate(enriched_events, parallel_fifo=True)
+    assert "in 4 asset components" in caplog.text
+    assert "Processing the events sequentially" not in caplog.text
+
+    assert repr(par_rgls) == repr(seq_rgls)
+    assert len(seq_rgls) == 5
+    assert par_state == seq_state
+    assert par_mismatches == seq_mismatches == 0
+    assert repr(par_events) == repr(seq_events)
+
+    def excess_free(events):
+        return [repr(e) if e.ibkr_transaction_id != "D001_EXCESS" else (e.event_type, e.gross_amount_eur) for e in events]
+    assert excess_free(par_income) == excess_free(seq_income)
+    assert [e.gross_amount_eur for e in par_income if e.event_type == FinancialEventType.DIVIDEND_CASH] == [Decimal("78.0")]
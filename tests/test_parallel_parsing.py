@@ -0,0 +1,110 @@
+# tests/test_parallel_parsing.py
+import logging
+import os
+from decimal import Decimal
+
+import pytest
+
+from src.classification.asset_classifier import AssetClassifier
+from src.identification.asset_resolver import AssetResolver
+from src.parsers.fast_row_decoder import FastRawTradeRecord
+from src.parsers.parsing_orchestrator import ParsingOrchestrator
+from src.parsers.raw_models import RawTradeRecord
+from tests.helpers.csv_creators import (
+    create_trades_csv_string, create_positions_csv_string,
+    create_cash_transactions_csv_string, create_corporate_actions_csv_string
+)
+
+ACCOUNT_ID = "U_TEST_PARALLEL"
+
+TRADES = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-02-01",
+     Decimal("10"), Decimal("50.00"), Decimal("-1.00"), "USD", "BUY", "T001", None, None, "C_AAA", None, Decimal("1"), "O"],
+    [ACCOUNT_ID, "USD", "OPT", "C", "AAA 230616C00050000", "AAA 16JUN23 50 C", None, Decimal("50"), "2023-06-16", "C", "2023-03-01",
+     Decimal("1"), Decimal("2.50"), Decimal("-0.70"), "USD", "BUY", "T002", None, "AAA", "C_AAA_OPT", "C_AAA", Decimal("100"), "O"],
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-06-01",
+     Decimal("-4"), Decimal("60.00"), Decimal("-1.00"), "USD", "SELL", "T003", None, None, "C_AAA", None, Decimal("1"), "C"],
+]
+POSITIONS_START = [
+    [ACCOUNT_ID, "EUR", "STK", "COMMON", "CCC", "CCC SE", "DE000000CCC0", Decimal("3"), Decimal("30"), Decimal("10"),
+     Decimal("27"), None, "C_CCC", None, Decimal("1")],
+]
+POSITIONS_END = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", Decimal("6"), Decimal("360"), Decimal("60"),
+     Decimal("300"), None, "C_AAA", None, Decimal("1")],
+]
+CASH_TRANSACTIONS = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA(US0000000AAA) CASH DIVIDEND USD 0.50 PER SHARE", "2023-04-03",
+     Decimal("5.00"), "Dividends", "C_AAA", None, "US0000000AAA", "US", "D001"],
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA(US0000000AAA) CASH DIVIDEND USD 0.50 PER SHARE - US TAX", "2023-04-03",
+     Decimal("-0.75"), "Withholding Tax", "C_AAA", None, "US0000000AAA", "US", "D002"],
+]
+CORPORATE_ACTIONS = [
+    [ACCOUNT_ID, "CCC", "CCC(DE000000CCC0) SPLIT 2 FOR 1 (CCC, CCC SE, DE000000CCC0)", "DE000000CCC0", "20230801", "",
+     "FS", "A001", "C_CCC", "", "", "EUR", "0", "0", "0", "3"],
+]
+
+
+@pytest.fixture
+def flex_query_files(temp_data_dir):
+    paths = {}
+    for name, rows, creator in [("trades", TRADES, create_trades_csv_string),
+                                ("pos_start", POSITIONS_START, create_positions_csv_string),
+                                ("pos_end", POSITIONS_END, create_positions_csv_string),
+                                ("cash", CASH_TRANSACTIONS, create_cash_transactions_csv_string),
+                                ("corp_actions", CORPORATE_ACTIONS, create_corporate_actions_csv_string)]:
+        paths[name] = os.path.join(temp_data_dir, f"{name}.csv")
+        with open(paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+    return paths
+
+
+def _run_parsing(paths, temp_data_dir, **orchestrator_options):
+    cache_name = "_".join(f"{k}_{v}" for k, v in sorted(orchestrator_options.items())) or "default"
+    classifier = AssetClassifier(cache_file_path=os.path.join(temp_data_dir, f"classifications_{cache_name}.json"))
+    resolver = AssetResolver(asset_classifier=classifier)
+    orchestrator = ParsingOrchestrator(resolver, classifier, interactive_classification=False, **orchestrator_options)
+    events = orchestrator.run_parsing_pipeline(
+        trades_file=paths["trades"], cash_transactions_file=paths["cash"],
+        positions_start_file=paths["pos_start"], positions_end_file=paths["pos_end"],
+        corporate_actions_file=paths["corp_actions"]
+    )
+    event_summary = [
+        (type(ev).__name__, ev.event_type, ev.event_date, ev.ibkr_transaction_id, ev.gross_amount_foreign_currency,
+         resolver.get_asset_by_id(ev.asset_internal_id).get_classification_key(), getattr(ev, "quantity", None))
+        for ev in events
+    ]
+    asset_summary = sorted((asset.get_classification_key(), type(asset).__name__, asset.soy_quantity, asset.eoy_quantity)
+                           for asset in resolver.assets_by_internal_id.values())
+    return orchestrator, event_summary, asset_summary
+
+
+def _raw_records(orchestrator):
+    return [[record.dict() for record in getattr(orchestrator, attribute)]
+            for attribute in ("raw_trades", "raw_cash_transactions", "raw_positions_start", "raw_positions_end", "raw_corporate_actions")]
+
+
+def test_parallel_parsing_matches_sequential_parsing(flex_query_files, temp_data_dir, caplog):
+    sequential, sequential_events, sequential_assets = _run_parsing(flex_query_files, temp_data_dir)
+    with caplog.at_level(logging.INFO, logger="src.parsers.parsing_orchestrator"):
+        parallel, parallel_events, parallel_assets = _run_parsing(flex_query_files, temp_data_dir, parallel_parsing=True)
+
+    assert _raw_records(parallel) == _raw_records(sequential)
+    assert type(parallel.raw_trades[0]) is RawTradeRecord
+    assert parallel_events == sequential_events
+    assert parallel_assets == sequential_assets
+    assert {"TradeEvent", "CashFlowEvent", "WithholdingTaxEvent", "CorpActionSplitForward"} <= {e[0] for e in parallel_events}
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(m.startswith("Loaded 3 raw trade records from") and m.endswith("s.") for m in messages)
+    assert any(m.startswith("Loaded 1 raw end-of-year position records from") for m in messages)
+    assert any(m.startswith("Parsed 5 input files in parallel in") for m in messages)
+
+
+def test_parallel_parsing_returns_fast_records(flex_query_files, temp_data_dir):
+    sequential, sequential_events, _ = _run_parsing(flex_query_files, temp_data_dir, fast_row_decoding=True)
+    parallel, parallel_events, _ = _run_parsing(flex_query_files, temp_data_dir, fast_row_decoding=True, parallel_parsing=True)
+
+    assert all(type(record) is FastRawTradeRecord for record in parallel.raw_trades)
+    assert parallel.raw_trades == sequential.raw_trades
+    assert parallel_events == sequential_events
@@ -0,0 +1,102 @@
+# tests/test_pipeline_profiler.py
+import json
+import os
+import tracemalloc
+from decimal import Decimal
+
+import pytest
+
+from src.pipeline_profiler import PipelineProfiler, STAGE_PATH_SEPARATOR, activate_profiler, active_profiler, profile_stage
+from src.pipeline_runner import run_core_processing_pipeline
+from tests.helpers.csv_creators import (
+    create_trades_csv_string, create_positions_csv_string,
+    create_cash_transactions_csv_string, create_corporate_actions_csv_string
+)
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+ACCOUNT_ID = "U_TEST_PROFILE"
+TAX_YEAR = 2023
+
+TRADES = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-02-01",
+     Decimal("10"), Decimal("50.00"), Decimal("-1.00"), "USD", "BUY", "T001", None, None, "C_AAA", None, Decimal("1"), "O"],
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-06-01",
+     Decimal("-4"), Decimal("60.00"), Decimal("-1.00"), "USD", "SELL", "T002", None, None, "C_AAA", None, Decimal("1"), "C"],
+]
+POSITIONS_END = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", Decimal("6"), Decimal("360"), Decimal("60"),
+     Decimal("300"), None, "C_AAA", None, Decimal("1")],
+]
+CASH_TRANSACTIONS = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA(US0000000AAA) CASH DIVIDEND USD 0.50 PER SHARE", "2023-04-03",
+     Decimal("5.00"), "Dividends", "C_AAA", None, "US0000000AAA", "US", "D001"],
+]
+
+
+@pytest.fixture
+def flex_query_files(mock_config_paths):
+    for name, rows, creator in [("trades", TRADES, create_trades_csv_string),
+                                ("pos_start", [], create_positions_csv_string),
+                                ("pos_end", POSITIONS_END, create_positions_csv_string),
+                                ("cash", CASH_TRANSACTIONS, create_cash_transactions_csv_string),
+                                ("corp_actions", [], create_corporate_actions_csv_string)]:
+        with open(mock_config_paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+    return mock_config_paths
+
+
+def _run(paths):
+    return run_core_processing_pipeline(
+        trades_file_path=paths["trades"], cash_transactions_file_path=paths["cash"],
+        positions_start_file_path=paths["pos_start"], positions_end_file_path=paths["pos_end"],
+        corporate_actions_file_path=paths["corp_actions"], interactive_classification_mode=False,
+        tax_year_to_process=TAX_YEAR, custom_rate_provider=MockECBExchangeRateProvider(Decimal("0.9"))
+    )
+
+
+def _path(*names: str) -> str:
+    return STAGE_PATH_SEPARATOR.join(names)
+
+
+def test_pipeline_stages_are_timed_and_counted(flex_query_files):
+    profiler = PipelineProfiler()
+    activate_profiler(profiler)
+    profiler.start()
+    try:
+        _run(flex_query_files)
+    finally:
+        profiler.stop()
+        activate_profiler(None)
+
+    stages = profiler.stages
+    parsing = "Parsing pipeline"
+    for name in ["Load input files", "Asset discovery", "Derivative linking", "Asset classification", "Event factory",
+                 "Option trade linking", "Withholding tax linking", "Dividend rights matching", "Event sort and validation"]:
+        assert _path(parsing, name) in stages, name
+    assert stages[_path(parsing, "Load input files", "Parse trades")].items == 2
+    assert stages[_path(parsing, "Event factory")].items == 3
+    assert stages["Enrichment"].items == 3
+
+    processing = _path("Calculations", "Event processing")
+    assert stages[_path(processing, "TradeProcessor")].calls == 2
+    assert stages[_path(processing, "SOY ledger initialization")].items == 1
+    assert _path("Calculations", "EOY validation") in stages
+
+    top_level = [s for s in stages.values() if s.depth == 0]
+    assert sum(s.seconds for s in top_level) <= profiler.total_seconds
+    assert all(s.peak_traced_bytes > 0 for s in top_level)
+    assert stages["Calculations"].peak_traced_bytes >= stages[processing].peak_traced_bytes
+
+    profile_file = os.path.join(flex_query_files["temp_dir_root"], "profile.json")
+    profiler.write_json(profile_file)
+    with open(profile_file, encoding="utf-8") as f:
+        written = json.load(f)
+    assert [s["path"] for s in written["stages"]] == list(stages)
+    assert "TradeProcessor" in profiler.format_table()
+
+
+def test_disabled_profiling_records_nothing(flex_query_files):
+    assert active_profiler() is None
+    assert profile_stage("Parsing pipeline") is profile_stage("Calculations")
+    _run(flex_query_files)
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,107 @@
+# tests/test_pipeline_snapshot.py
+import logging
+from decimal import Decimal
+
+import pytest
+
+import src.config as config
+import src.pipeline_runner as pipeline_runner
+from src.pipeline_runner import run_core_processing_pipeline
+from tests.helpers.csv_creators import (
+    create_trades_csv_string, create_positions_csv_string,
+    create_cash_transactions_csv_string, create_corporate_actions_csv_string
+)
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+ACCOUNT_ID = "U_TEST_SNAPSHOT"
+TAX_YEAR = 2023
+
+TRADES = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-02-01",
+     Decimal("10"), Decimal("50.00"), Decimal("-1.00"), "USD", "BUY", "T001", None, None, "C_AAA", None, Decimal("1"), "O"],
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-06-01",
+     Decimal("-4"), Decimal("60.00"), Decimal("-1.00"), "USD", "SELL", "T002", None, None, "C_AAA", None, Decimal("1"), "C"],
+]
+POSITIONS_END = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", Decimal("6"), Decimal("360"), Decimal("60"),
+     Decimal("300"), None, "C_AAA", None, Decimal("1")],
+]
+CASH_TRANSACTIONS = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA(US0000000AAA) CASH DIVIDEND USD 0.50 PER SHARE", "2023-04-03",
+     Decimal("5.00"), "Dividends", "C_AAA", None, "US0000000AAA", "US", "D001"],
+]
+
+
+@pytest.fixture
+def flex_query_files(mock_config_paths):
+    for name, rows, creator in [("trades", TRADES, create_trades_csv_string),
+                                ("pos_start", [], create_positions_csv_string),
+                                ("pos_end", POSITIONS_END, create_positions_csv_string),
+                                ("cash", CASH_TRANSACTIONS, create_cash_transactions_csv_string),
+                                ("corp_actions", [], create_corporate_actions_csv_string)]:
+        with open(mock_config_paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+    return mock_config_paths
+
+
+def _run(paths):
+    return run_core_processing_pipeline(
+        trades_file_path=paths["trades"], cash_transactions_file_path=paths["cash"],
+        positions_start_file_path=paths["pos_start"], positions_end_file_path=paths["pos_end"],
+        corporate_actions_file_path=paths["corp_actions"], interactive_classification_mode=False,
+        tax_year_to_process=TAX_YEAR, custom_rate_provider=MockECBExchangeRateProvider(Decimal("0.9")),
+        use_snapshot=True
+    )
+
+
+def _forbid_parsing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Parsing and enrichment should have been skipped")
+    monkeypatch.setattr(pipeline_runner, "_parse_and_enrich_events", fail)
+
+
+def test_unchanged_inputs_are_loaded_from_the_snapshot(flex_query_files, monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger="src.pipeline_snapshot")
+    first = _run(flex_query_files)
+    assert "Saved pipeline snapshot (3 events)" in caplog.text
+
+    _forbid_parsing(monkeypatch)
+    second = _run(flex_query_files)
+    assert "Loaded pipeline snapshot" in caplog.text
+
+    assert second.realized_gains_losses == first.realized_gains_losses
+    assert len(second.realized_gains_losses) == 1
+    assert [(e.event_id, e.gross_amount_eur) for e in second.all_financial_events_enriched] == \
+           [(e.event_id, e.gross_amount_eur) for e in first.all_financial_events_enriched]
+    assert sorted(second.asset_resolver.assets_by_internal_id) == sorted(first.asset_resolver.assets_by_internal_id)
+
+
+def test_input_change_invalidates_the_snapshot(flex_query_files, caplog):
+    caplog.set_level(logging.INFO, logger="src.pipeline_snapshot")
+    first = _run(flex_query_files)
+    with open(flex_query_files["cash"], "w", encoding="utf-8-sig") as f:
+        f.write(create_cash_transactions_csv_string([CASH_TRANSACTIONS[0][:7] + [Decimal("7.00")] + CASH_TRANSACTIONS[0][8:]]))
+
+    caplog.clear()
+    second = _run(flex_query_files)
+    assert "is outdated" in caplog.text
+    dividends = [e.gross_amount_foreign_currency for e in second.all_financial_events_enriched if e.ibkr_transaction_id == "D001"]
+    assert dividends == [Decimal("7.00")]
+    assert len(second.realized_gains_losses) == len(first.realized_gains_losses)
+
+
+def test_setting_change_invalidates_the_snapshot(flex_query_files, monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger="src.pipeline_snapshot")
+    _run(flex_query_files)
+    monkeypatch.setattr(config, "WHT_LINKING_ASSIGNMENT_MODE", "optimal")
+    caplog.clear()
+    _run(flex_query_files)
+    assert "is outdated" in caplog.text
+
+
+def test_unreadable_snapshot_falls_back_to_a_full_run(flex_query_files, caplog):
+    with open(flex_query_files["pipeline_snapshot"], "wb") as f:
+        f.write(b"not a snapshot")
+    output = _run(flex_query_files)
+    assert "Could not load pipeline snapshot" in caplog.text
+    assert len(output.realized_gains_losses) == 1
@@ -0,0 +1,93 @@
+# tests/test_reporting_subtotals.py
+import os
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from src.domain.enums import AssetCategory, FinancialEventType, TaxReportingCategory
+from src.domain.events import WithholdingTaxEvent
+from src.domain.results import (
+    ReportingSubtotals, SUBTOTAL_STOCK_CASH_DIVIDENDS, SUBTOTAL_WHT_TAXED_INCOME, SUBTOTAL_WHT_UNLINKED,
+    SUBTOTAL_WHT_LINKED_HIGH_CONFIDENCE, SUBTOTAL_WHT_LINKED_MEDIUM_CONFIDENCE, SUBTOTAL_WHT_LINKED_LOW_CONFIDENCE,
+)
+from src.engine.loss_offsetting import LossOffsettingEngine
+from src.pipeline_runner import run_core_processing_pipeline
+from src.reporting.console_reporter import generate_console_tax_report
+from src.reporting.pdf_generator import PdfReportGenerator
+from tests.helpers.flex_query_generator import FlexQuerySettings, generate_flex_query
+from tests.helpers.mock_providers import MockECBExchangeRateProvider
+
+
+def test_rollups_follow_later_additions():
+    subtotals = ReportingSubtotals()
+    asset_a, asset_b = uuid.uuid4(), uuid.uuid4()
+    subtotals.add(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID, Decimal("1.50"), asset_a, 3, "US")
+    subtotals.add(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID, Decimal("2.25"), asset_b, 3, "US")
+    subtotals.add(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID, Decimal("4.00"), asset_a, 7, "DE")
+    assert subtotals.by_country(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID) == {"US": Decimal("3.75"), "DE": Decimal("4.00")}
+    assert subtotals.by_month(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID) == {3: Decimal("3.75"), 7: Decimal("4.00")}
+
+    subtotals.add(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID, Decimal("0.25"), asset_b, 7, "DE")
+    assert subtotals.by_country(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID)["DE"] == Decimal("4.25")
+    assert subtotals.by_asset(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID) == {asset_a: Decimal("5.50"), asset_b: Decimal("2.50")}
+    assert subtotals.total(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID) == Decimal("8.00")
+    assert subtotals.count(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID) == 4
+    assert subtotals.total(SUBTOTAL_WHT_UNLINKED) == Decimal(0) and subtotals.by_asset(SUBTOTAL_WHT_UNLINKED) == {}
+
+
+def test_reports_read_the_aggregated_subtotals(mock_config_paths, capsys):
+    temp_dir = mock_config_paths["temp_dir_root"]
+    settings = FlexQuerySettings(seed=11, option_chains_per_stock=2).with_event_count(1000)
+    flex_query = generate_flex_query(temp_dir, settings)
+    output = run_core_processing_pipeline(**flex_query.pipeline_file_arguments(), interactive_classification_mode=False,
+                                          tax_year_to_process=settings.tax_year,
+                                          custom_rate_provider=MockECBExchangeRateProvider(Decimal("0.9")))
+    events = output.processed_income_events
+    result = LossOffsettingEngine(output.realized_gains_losses, output.vorabpauschale_items, events,
+                                  output.asset_resolver, settings.tax_year).calculate_reporting_figures()
+    subtotals = result.subtotals
+
+    for line in (TaxReportingCategory.ANLAGE_KAP_AKTIEN_GEWINN, TaxReportingCategory.ANLAGE_KAP_AKTIEN_VERLUST,
+                 TaxReportingCategory.ANLAGE_KAP_TERMIN_GEWINN, TaxReportingCategory.ANLAGE_KAP_SONSTIGE_KAPITALERTRAEGE,
+                 TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID):
+        assert result.form_line_values[line] == subtotals.total(line).quantize(Decimal("0.01"))
+    assert subtotals.total(TaxReportingCategory.ANLAGE_KAP_AKTIEN_GEWINN) > 0
+
+    # Stock gains/losses per asset, as the console report shows them
+    expected_stock_gl = defaultdict(Decimal)
+    for rgl in output.realized_gains_losses:
+        if rgl.asset_category_at_realization == AssetCategory.STOCK:
+            expected_stock_gl[rgl.asset_internal_id] += rgl.gross_gain_loss_eur
+    gains = subtotals.by_asset(TaxReportingCategory.ANLAGE_KAP_AKTIEN_GEWINN)
+    losses = subtotals.by_asset(TaxReportingCategory.ANLAGE_KAP_AKTIEN_VERLUST)
+    assert {a: gains.get(a, Decimal(0)) - losses.get(a, Decimal(0)) for a in gains.keys() | losses.keys()} == expected_stock_gl
+
+    # Withholding tax and the income it was withheld from, per country
+    wht_events = [e for e in events if isinstance(e, WithholdingTaxEvent)]
+    events_by_id = {e.event_id: e for e in events}
+    expected_wht = defaultdict(lambda: {"income": Decimal(0), "tax": Decimal(0)})
+    for wht in wht_events:
+        expected_wht[wht.source_country_code]["tax"] += wht.gross_amount_eur
+        if wht.taxed_income_event_id:
+            expected_wht[wht.source_country_code]["income"] += events_by_id[wht.taxed_income_event_id].gross_amount_eur
+    assert set(expected_wht) == {"US", "DE"}
+    assert subtotals.by_country(TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID) == {c: v["tax"] for c, v in expected_wht.items()}
+    assert subtotals.by_country(SUBTOTAL_WHT_TAXED_INCOME) == {c: v["income"] for c, v in expected_wht.items()}
+    assert sum(subtotals.count(line) for line in (SUBTOTAL_WHT_LINKED_HIGH_CONFIDENCE, SUBTOTAL_WHT_LINKED_MEDIUM_CONFIDENCE,
+                                                 SUBTOTAL_WHT_LINKED_LOW_CONFIDENCE, SUBTOTAL_WHT_UNLINKED)) == len(wht_events)
+    assert subtotals.total(SUBTOTAL_STOCK_CASH_DIVIDENDS) == sum(
+        e.gross_amount_eur for e in events if e.event_type == FinancialEventType.DIVIDEND_CASH)
+    assert len(subtotals.by_month(SUBTOTAL_STOCK_CASH_DIVIDENDS)) == settings.dividends_per_year
+
+    generate_console_tax_report(output.vorabpauschale_items, output.asset_resolver, settings.tax_year,
+                                output.eoy_mismatch_error_count, result)
+    report = capsys.readouterr().out
+    assert f"Quellensteuer-Ereignisse: {len(wht_events)} gesamt" in report
+    assert f"Zeile 41 (Anrechenbare ausländische Steuern): {result.form_line_values[TaxReportingCategory.ANLAGE_KAP_FOREIGN_TAX_PAID]}" in report
+
+    pdf_generator = PdfReportGenerator(result, events, output.realized_gains_losses, output.vorabpauschale_items,
+                                       output.asset_resolver.assets_by_internal_id, settings.tax_year, None)
+    pdf_file = os.path.join(temp_dir, "report.pdf")
+    pdf_generator.generate_report(pdf_file)
+    assert os.path.getsize(pdf_file) > 0
+    assert pdf_generator.prepared_wht_details_for_table == dict(expected_wht)
@@ -0,0 +1,97 @@
+# tests/test_streaming_ingestion.py
+import os
+from decimal import Decimal
+
+import pytest
+
+from src.classification.asset_classifier import AssetClassifier
+from src.identification.asset_resolver import AssetResolver
+from src.parsers.parsing_orchestrator import ParsingOrchestrator
+from src.parsers.trades_parser import iter_trades_csv, parse_trades_csv
+from tests.helpers.csv_creators import (
+    create_trades_csv_string, create_positions_csv_string,
+    create_cash_transactions_csv_string, create_corporate_actions_csv_string
+)
+
+ACCOUNT_ID = "U_TEST_STREAM"
+
+TRADES = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-02-01",
+     Decimal("10"), Decimal("50.00"), Decimal("-1.00"), "USD", "BUY", "T001", None, None, "C_AAA", None, Decimal("1"), "O"],
+    [ACCOUNT_ID, "EUR", "STK", "COMMON", "BBB", "BBB AG", "DE000000BBB0", None, None, None, "2023-03-01",
+     Decimal("5"), Decimal("20.00"), Decimal("-1.00"), "EUR", "BUY", "T002", None, None, "C_BBB", None, Decimal("1"), "O"],
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-06-01",
+     Decimal("-4"), Decimal("60.00"), Decimal("-1.00"), "USD", "SELL", "T003", None, None, "C_AAA", None, Decimal("1"), "C"],
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA INC", "US0000000AAA", None, None, None, "2023-06-01",
+     "not a number", Decimal("60.00"), Decimal("-1.00"), "USD", "SELL", "T004", None, None, "C_AAA", None, Decimal("1"), "C"],
+]
+POSITIONS_START = [
+    [ACCOUNT_ID, "EUR", "STK", "COMMON", "CCC", "CCC SE", "DE000000CCC0", Decimal("3"), Decimal("30"), Decimal("10"),
+     Decimal("27"), None, "C_CCC", None, Decimal("1")],
+]
+CASH_TRANSACTIONS = [
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA(US0000000AAA) CASH DIVIDEND USD 0.50 PER SHARE", "2023-04-03",
+     Decimal("5.00"), "Dividends", "C_AAA", None, "US0000000AAA", "US", "D001"],
+    [ACCOUNT_ID, "USD", "STK", "COMMON", "AAA", "AAA(US0000000AAA) CASH DIVIDEND USD 0.50 PER SHARE - US TAX", "2023-04-03",
+     Decimal("-0.75"), "Withholding Tax", "C_AAA", None, "US0000000AAA", "US", "D002"],
+    [ACCOUNT_ID, "EUR", "CASH", None, "EUR", "EUR CREDIT INT FOR MAR-2023", "2023-04-04",
+     Decimal("1.20"), "Broker Interest Received", None, None, None, None, "I001"],
+]
+CORPORATE_ACTIONS = [
+    [ACCOUNT_ID, "BBB", "BBB(DE000000BBB0) SPLIT 2 FOR 1 (BBB, BBB AG, DE000000BBB0)", "DE000000BBB0", "20230801", "",
+     "FS", "A001", "C_BBB", "", "", "EUR", "0", "0", "0", "5"],
+]
+
+
+@pytest.fixture
+def flex_query_files(temp_data_dir):
+    paths = {}
+    for name, rows, creator in [("trades", TRADES, create_trades_csv_string),
+                                ("pos_start", POSITIONS_START, create_positions_csv_string),
+                                ("pos_end", [], create_positions_csv_string),
+                                ("cash", CASH_TRANSACTIONS, create_cash_transactions_csv_string),
+                                ("corp_actions", CORPORATE_ACTIONS, create_corporate_actions_csv_string)]:
+        paths[name] = os.path.join(temp_data_dir, f"{name}.csv")
+        with open(paths[name], "w", encoding="utf-8-sig") as f:
+            f.write(creator(rows))
+    return paths
+
+
+def _run_parsing(paths, temp_data_dir, streaming_ingestion):
+    classifier = AssetClassifier(cache_file_path=os.path.join(temp_data_dir, f"classifications_{streaming_ingestion}.json"))
+    resolver = AssetResolver(asset_classifier=classifier)
+    orchestrator = ParsingOrchestrator(resolver, classifier, interactive_classification=False, streaming_ingestion=streaming_ingestion)
+    events = orchestrator.run_parsing_pipeline(
+        trades_file=paths["trades"], cash_transactions_file=paths["cash"],
+        positions_start_file=paths["pos_start"], positions_end_file=paths["pos_end"],
+        corporate_actions_file=paths["corp_actions"]
+    )
+    event_summary = [
+        (type(ev).__name__, ev.event_type, ev.event_date, ev.ibkr_transaction_id, ev.gross_amount_foreign_currency,
+         ev.local_currency, resolver.get_asset_by_id(ev.asset_internal_id).get_classification_key(), getattr(ev, "quantity", None))
+        for ev in events
+    ]
+    asset_summary = sorted((asset.get_classification_key(), type(asset).__name__, asset.soy_quantity)
+                           for asset in resolver.assets_by_internal_id.values())
+    return orchestrator, event_summary, asset_summary
+
+
+def test_streaming_ingestion_produces_the_same_events_and_assets(flex_query_files, temp_data_dir):
+    loaded, loaded_events, loaded_assets = _run_parsing(flex_query_files, temp_data_dir, streaming_ingestion=False)
+    streamed, streamed_events, streamed_assets = _run_parsing(flex_query_files, temp_data_dir, streaming_ingestion=True)
+
+    assert streamed_events == loaded_events
+    assert streamed_assets == loaded_assets
+    assert {"TradeEvent", "CashFlowEvent", "WithholdingTaxEvent", "CorpActionSplitForward"} <= {e[0] for e in loaded_events}
+    assert len(loaded.raw_trades) == 4
+    assert streamed.raw_trades == [] and streamed.raw_cash_transactions == [] and streamed.raw_corporate_actions == []
+
+
+def test_iter_trades_csv_is_lazy_and_matches_list_parser(flex_query_files, capsys):
+    records = iter_trades_csv(flex_query_files["trades"])
+    first = next(records)
+    assert first.transaction_id == "T001"
+    assert [first] + list(records) == parse_trades_csv(flex_query_files["trades"])
+
+    assert list(iter_trades_csv(os.path.join(os.path.dirname(flex_query_files["trades"]), "missing.csv"))) == []
+    assert "Trades file not found" in capsys.readouterr().out
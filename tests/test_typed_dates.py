@@ -0,0 +1,52 @@
+# tests/test_typed_dates.py
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from src.domain.enums import AssetCategory, FinancialEventType, RealizationType
+from src.domain.events import CashFlowEvent, TradeEvent
+from src.domain.results import RealizedGainLoss
+from src.engine.fifo_manager import FifoLot
+from src.parsers.domain_event_factory import DomainEventFactory
+
+
+def _dividend(event_date: str) -> CashFlowEvent:
+    return CashFlowEvent(uuid.uuid4(), event_date, event_type=FinancialEventType.DIVIDEND_CASH,
+                         gross_amount_foreign_currency=Decimal("1"), local_currency="USD")
+
+
+def test_event_date_obj_is_parsed_once_and_follows_reassignment():
+    event = _dividend("2023-03-15")
+    assert event.event_date_obj == date(2023, 3, 15)
+
+    event.event_date = "20230401"
+    assert event.event_date_obj == date(2023, 4, 1)
+
+    event.event_date = "not a date"
+    assert event.event_date_obj is None
+
+
+def test_factory_attached_date_is_used_as_is():
+    event = _dividend("2023-03-15")
+    DomainEventFactory._attach_event_dates([event])
+    assert event._event_date_obj_source is event.event_date
+    assert event.event_date_obj is event._event_date_obj
+
+
+def test_lots_and_results_carry_typed_dates():
+    trade = TradeEvent(uuid.uuid4(), "2023-05-02", quantity=Decimal("10"), price_foreign_currency=Decimal("5"),
+                       event_type=FinancialEventType.TRADE_BUY_LONG, local_currency="EUR", ibkr_transaction_id="T1")
+    lot = FifoLot(acquisition_date=trade.event_date, acquisition_date_obj=trade.event_date_obj, quantity=Decimal("10"),
+                  unit_cost_basis_eur=Decimal("5"), total_cost_basis_eur=Decimal("50"), source_transaction_id="T1")
+    assert lot.acquisition_date_obj is trade.event_date_obj
+    assert FifoLot("2022-12-31", Decimal("1"), Decimal("1"), Decimal("1"), "SOY").acquisition_date_obj == date(2022, 12, 31)
+
+    rgl = RealizedGainLoss(
+        originating_event_id=uuid.uuid4(), asset_internal_id=trade.asset_internal_id,
+        asset_category_at_realization=AssetCategory.STOCK, acquisition_date="2023-05-02", realization_date="2023-06-01",
+        realization_type=RealizationType.LONG_POSITION_SALE, quantity_realized=Decimal("1"),
+        unit_cost_basis_eur=Decimal("5"), unit_realization_value_eur=Decimal("6"),
+        total_cost_basis_eur=Decimal("5"), total_realization_value_eur=Decimal("6"), gross_gain_loss_eur=Decimal("1"),
+    )
+    assert (rgl.acquisition_date_obj, rgl.realization_date_obj) == (date(2023, 5, 2), date(2023, 6, 1))
+    assert rgl.realization_date == "2023-06-01"
@@ -1,10 +1,16 @@
 # tests/test_withholding_tax_linker.py
+import itertools
+import random
+
 import pytest
 import uuid
 from decimal import Decimal
 from datetime import date
 
-from src.processing.withholding_tax_linker import WithholdingTaxLinker, WithholdingTaxLink, LinkingCriteriaMatch
+from src.processing.withholding_tax_linker import (
+    WithholdingTaxLinker, WithholdingTaxLink, LinkingCriteriaMatch,
+    WHT_ASSIGNMENT_MODE_OPTIMAL, _max_weight_bipartite_matching
+)
 from src.domain.events import WithholdingTaxEvent, CashFlowEvent, FinancialEventType
 
 
@@ -295,6 +301,59 @@ class TestWithholdingTaxLinker:
         wht_event.gross_amount_foreign_currency = Decimal("10.00")
         assert self.linker._validate_interest_tax_rate(wht_event, interest_event) == False
 
+    def _competing_wht_events(self):
+        """Two WHT lines that both match dividend_1 exactly; only wht_1 also matches dividend_2 (strong)."""
+        dividend_1 = self.create_dividend_event(amount=Decimal("100.00"), transaction_id="1000")
+        dividend_2 = self.create_dividend_event(amount=Decimal("10.00"), transaction_id="2000")
+        wht_1 = self.create_withholding_tax_event(amount=Decimal("5.00"), transaction_id="1001")
+        wht_2 = self.create_withholding_tax_event(amount=Decimal("30.00"), transaction_id="1002")
+        return dividend_1, dividend_2, wht_1, wht_2
+
+    def test_optimal_assignment_is_one_to_one(self):
+        dividend_1, dividend_2, wht_1, wht_2 = self._competing_wht_events()
+        events = [dividend_1, dividend_2, wht_1, wht_2]
+
+        greedy_links, _ = WithholdingTaxLinker().link_withholding_tax_events(events)
+        assert {link.linked_income_event_id for link in greedy_links} == {dividend_1.event_id}
+
+        links, unlinked = WithholdingTaxLinker(assignment_mode=WHT_ASSIGNMENT_MODE_OPTIMAL).link_withholding_tax_events(events)
+        assert unlinked == []
+        linked = {link.withholding_tax_event_id: (link.linked_income_event_id, link.link_confidence_score) for link in links}
+        assert linked == {wht_1.event_id: (dividend_2.event_id, 80), wht_2.event_id: (dividend_1.event_id, 100)}
+        assert wht_1.taxed_income_event_id == dividend_2.event_id
+
+    def test_optimal_assignment_falls_back_to_greedy_for_large_components(self):
+        dividend_1, dividend_2, wht_1, wht_2 = self._competing_wht_events()
+        linker = WithholdingTaxLinker(assignment_mode=WHT_ASSIGNMENT_MODE_OPTIMAL, max_optimal_component_edges_override=1)
+
+        links, unlinked = linker.link_withholding_tax_events([dividend_1, dividend_2, wht_1, wht_2])
+        assert [(link.withholding_tax_event_id, link.linked_income_event_id) for link in links] == [(wht_1.event_id, dividend_1.event_id)]
+        assert unlinked == [wht_2]
+
+    def test_unknown_assignment_mode_raises(self):
+        with pytest.raises(ValueError, match="Unknown withholding tax assignment mode"):
+            WithholdingTaxLinker(assignment_mode="hungarian")
+
+
+def test_max_weight_bipartite_matching_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(200):
+        num_left, num_right = rng.randint(1, 5), rng.randint(1, 5)
+        edges = [(l, r, rng.choice([50, 60, 70, 80, 100])) for l in range(num_left) for r in range(num_right) if rng.random() < 0.5]
+        weights = {(l, r): w for l, r, w in edges}
+
+        matching = _max_weight_bipartite_matching(num_left, num_right, edges)
+        assert len(set(matching.values())) == len(matching)
+        assert all((l, r) in weights for l, r in matching.items())
+
+        best = 0
+        for size in range(1, min(num_left, num_right) + 1):
+            for lefts in itertools.combinations(range(num_left), size):
+                for rights in itertools.permutations(range(num_right), size):
+                    if all(pair in weights for pair in zip(lefts, rights)):
+                        best = max(best, sum(weights[pair] for pair in zip(lefts, rights)))
+        assert sum(weights[(l, r)] for l, r in matching.items()) == best
+
 
 if __name__ == "__main__":
     # Run basic smoke test